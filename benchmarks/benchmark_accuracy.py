@@ -1,24 +1,38 @@
 import argparse
+import sys
+import time
 from pathlib import Path
 
-from ultralytics import YOLO
-
-MODELS = [
-    "yolo11n.pt",
-    "yolo11s.pt",
-    "yolo11m.pt",
-    "yolo11l.pt",
-    "yolo12n.pt",
-    "yolo12s.pt",
-    "yolo26n.pt",
-    "yolo26s.pt",
-    "yolov8s-world.pt",
-    "yolov8m-world.pt",
-]
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_yolo import default_device, parse_imgsz
+from utils.backends import get_backend, imgsz_label
+from utils.config import load_models
+from utils.evaluation import (
+    CACHE_CONF,
+    DEFAULT_SWEEP,
+    load_dataset,
+    operating_point,
+    predict_dataset,
+    sweep_thresholds,
+)
+from utils.results_store import ResultsStore, make_record, new_run_id, render_table
+
+MODELS = list(dict.fromkeys(load_models().values()))
+
+
+def parse_confs(value):
+    """Parse "0.1,0.25,0.5" into a sorted list of confidence thresholds."""
+    confs = sorted({float(v) for v in value.split(",") if v.strip()})
+    if not confs or confs[0] < 0 or confs[-1] > 1:
+        raise argparse.ArgumentTypeError(f"invalid confidence thresholds: {value!r}")
+    return confs
 
 
 def benchmark_accuracy(model_path, data="coco128.yaml"):
     """Run validation on COCO dataset to measure mAP."""
+    from ultralytics import YOLO
+
     print(f"\nBenchmarking accuracy for {model_path} on {data}...")
 
     model = YOLO(model_path)
@@ -40,37 +54,206 @@ def benchmark_accuracy(model_path, data="coco128.yaml"):
     }
 
 
+def benchmark_accuracy_cached(
+    model_path,
+    data="coco128.yaml",
+    backend="pytorch",
+    imgsz=640,
+    device="cpu",
+    confs=None,
+    refresh=False,
+    backend_options=None,
+    half=False,
+):
+    """mAP from cached predictions, re-scored at every confidence in ``confs``.
+
+    Inference runs once per (model, backend, backend options, dataset, imgsz) and
+    is cached (see ``utils.evaluation``); later calls only load and re-score the
+    predictions.
+    mAP is computed at ``CACHE_CONF`` like ``model.val()``; precision and recall
+    are those of the best-F1 threshold of the sweep.
+    """
+    print(
+        f"\nBenchmarking accuracy for {model_path} on {data} "
+        f"(cached, {backend}, imgsz={imgsz_label(imgsz)})..."
+    )
+    images, labels, _ = load_dataset(data)
+    t0 = time.perf_counter()
+    predictions, key, cached = predict_dataset(
+        model_path,
+        images,
+        backend=backend,
+        imgsz=imgsz,
+        device=device,
+        half=half,
+        refresh=refresh,
+        **(backend_options or {}),
+    )
+    t1 = time.perf_counter()
+    action = "Loaded cached" if cached else "Predicted and cached"
+    print(f"  {action} predictions for {len(images)} images in {t1 - t0:.1f}s ({key})")
+
+    rows = sweep_thresholds(predictions, labels, sorted({CACHE_CONF, *(confs or DEFAULT_SWEEP)}))
+    seconds = time.perf_counter() - t1
+    print(f"  Scored {len(rows)} confidence threshold(s) in {seconds:.2f}s")
+    standard = next(r for r in rows if r["conf"] == CACHE_CONF)  # --confs may go lower
+    best = operating_point(rows)
+
+    print(
+        f"  Result: mAP@50={standard['map50']:.3f}, mAP@50-95={standard['map5095']:.3f} | "
+        f"best F1 {best['f1']:.3f} at conf={best['conf']:g}"
+    )
+    return {
+        "model": model_path,
+        "data": data,
+        "engine": "cached",
+        "backend": backend,
+        "imgsz": imgsz_label(imgsz),
+        "half": half,
+        "map50": standard["map50"],
+        "map5095": standard["map5095"],
+        "precision": best["precision"],
+        "recall": best["recall"],
+        "operating_conf": best["conf"],
+        "sweep": rows,
+        "cache_key": key,
+        "eval_seconds": seconds,
+    }
+
+
+ACCURACY_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Dataset", lambda r: r["cell"]["data"], ""),
+    ("Engine", lambda r: r["cell"].get("engine", "val"), ""),
+    ("mAP@50", lambda r: r["metrics"]["map50"], ".3f"),
+    ("mAP@50-95", lambda r: r["metrics"]["map5095"], ".3f"),
+    ("Precision", lambda r: r["metrics"]["precision"], ".3f"),
+    ("Recall", lambda r: r["metrics"]["recall"], ".3f"),
+]
+
+
+SWEEP_COLUMNS = [
+    ("Model", lambda r: r["model"], ""),
+    ("Conf", lambda r: r["conf"], "g"),
+    ("Precision", lambda r: r["precision"], ".3f"),
+    ("Recall", lambda r: r["recall"], ".3f"),
+    ("F1", lambda r: r["f1"], ".3f"),
+    ("mAP@50", lambda r: r["map50"], ".3f"),
+    ("mAP@50-95", lambda r: r["map5095"], ".3f"),
+    ("Detections/Image", lambda r: r["detections_per_image"], ".1f"),
+    ("Best F1", lambda r: "✓" if r["best"] else "", ""),
+]
+
+
+def accuracy_record(result, run_id=None, **config):
+    """Results-store record for one ``benchmark_accuracy``/``benchmark_accuracy_cached`` outcome."""
+    metrics = {k: float(result[k]) for k in ("map50", "map5095", "precision", "recall")}
+    cell = {"model": result["model"], "data": result["data"]}
+    if result.get("engine") == "cached":
+        cell.update(engine="cached", backend=result["backend"], imgsz=result["imgsz"])
+        if result.get("half"):
+            cell["half"] = True
+        metrics.update(operating_conf=result["operating_conf"], sweep=result["sweep"])
+        config.update(cache_key=result["cache_key"], eval_seconds=result["eval_seconds"])
+    return make_record("yolo_accuracy", cell=cell, metrics=metrics, config=config, run_id=run_id)
+
+
+def write_threshold_sweep(f, records):
+    """Per-threshold precision/recall/mAP of every record that carries a sweep."""
+    rows = []
+    for record in records:
+        sweep = record["metrics"].get("sweep")
+        if not sweep:
+            continue
+        best = record["metrics"]["operating_conf"]
+        model = record["cell"]["model"]
+        rows += [{**row, "model": model, "best": row["conf"] == best} for row in sweep]
+    if not rows:
+        return
+    f.write("\n## Confidence Threshold Sweep\n\n")
+    f.write(render_table(rows, SWEEP_COLUMNS) + "\n")
+    f.write(
+        "\nRe-scored from cached predictions. mAP at each threshold only counts the "
+        "detections kept at it; the best-F1 row is the suggested operating point, and "
+        "fewer detections per image also means less NMS and postprocessing time.\n"
+    )
+
+
+def write_accuracy_results(records, data, path="results/yolo_accuracy_results.md"):
+    """Render the accuracy table for ``records`` (one run)."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# YOLO Accuracy Benchmarks\n\n")
+        f.write(f"**Dataset:** {data}\n\n")
+        f.write(render_table(records, ACCURACY_COLUMNS) + "\n")
+        write_threshold_sweep(f, records)
+
+    print(f"\nResults saved to {path}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="YOLO Accuracy Benchmark Suite")
     parser.add_argument("--model", type=str, help="Specific model (e.g. yolo11n.pt). Omit for all.")
     parser.add_argument("--data", type=str, default="coco128.yaml", help="Dataset yaml")
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Score cached predictions with the vectorized matcher instead of model.val()",
+    )
+    parser.add_argument(
+        "--conf-sweep",
+        type=parse_confs,
+        default=None,
+        help=f"Confidence thresholds to re-score (implies --fast, default {DEFAULT_SWEEP})",
+    )
+    parser.add_argument("--backend", type=str, default="pytorch", help="Runtime for --fast")
+    parser.add_argument(
+        "--imgsz",
+        type=parse_imgsz,
+        default=[640],
+        help="Input sizes for --fast, square or WxH (e.g. 320,640,1280x720)",
+    )
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument(
+        "--refresh-cache", action="store_true", help="Re-run inference even if cached"
+    )
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
     args = parser.parse_args()
+    args.fast = args.fast or args.conf_sweep is not None
+    if args.fast:
+        get_backend(args.backend)
+        args.device = args.device or default_device()
 
     target_models = [args.model] if args.model else MODELS
-    results = []
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
 
     for model_path in target_models:
-        try:
-            r = benchmark_accuracy(model_path, args.data)
-            results.append(r)
-        except Exception as e:
-            print(f"  Failed for {model_path}: {e}")
-
-    # Save results
-    Path("results").mkdir(exist_ok=True)
-    with open("results/yolo_accuracy_results.md", "w") as f:
-        f.write("# YOLO Accuracy Benchmarks\n\n")
-        f.write(f"**Dataset:** {args.data}\n\n")
-        f.write("| Model | Dataset | mAP@50 | mAP@50-95 | Precision | Recall |\n")
-        f.write("|-------|---------|-------:|----------:|----------:|-------:|\n")
-        for r in results:
-            f.write(
-                f"| {r['model']} | {r['data']} "
-                f"| {r['map50']:.3f} | {r['map5095']:.3f} "
-                f"| {r['precision']:.3f} | {r['recall']:.3f} |\n"
-            )
-
-    print("\nResults saved to results/yolo_accuracy_results.md")
+        for imgsz in args.imgsz if args.fast else [None]:
+            try:
+                if args.fast:
+                    r = benchmark_accuracy_cached(
+                        model_path,
+                        args.data,
+                        backend=args.backend,
+                        imgsz=imgsz,
+                        device=args.device,
+                        confs=args.conf_sweep,
+                        refresh=args.refresh_cache,
+                    )
+                else:
+                    r = benchmark_accuracy(model_path, args.data)
+            except Exception as e:
+                print(f"  Failed for {model_path}: {e}")
+                continue
+            record = accuracy_record(r, run_id)
+            store.append(record)
+            records.append(record)
+
+    write_accuracy_results(records, args.data)
 
 
 if __name__ == "__main__":
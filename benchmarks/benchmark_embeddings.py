@@ -0,0 +1,480 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_yolo import default_device, device_name
+from utils.ann import (
+    INDEXES,
+    BruteForceIndex,
+    count_label,
+    get_index,
+    parse_counts,
+    recall_at_k,
+    synthetic_vectors,
+)
+from utils.embeddings import (
+    DEFAULT_ROOT,
+    EMBEDDERS,
+    FeatureStore,
+    ImageFolderLoader,
+    get_embedder,
+    load_features,
+)
+from utils.evaluation import list_images
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.stats import format_stages, stage_breakdown, summarize, warmup_iterations
+
+# Recall@k an approximate configuration needs to count as usable
+TARGET_RECALL = 0.95
+
+EXTRACT_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("Batch", lambda r: r["cell"]["batch"], "d"),
+    ("Images", lambda r: r["metrics"]["images"], "d"),
+    ("Images/s", lambda r: r["metrics"]["images_per_s"], ".1f"),
+    ("Batch p50 (ms)", lambda r: r["metrics"]["p50"], ".1f"),
+    ("Batch p99 (ms)", lambda r: r["metrics"]["p99"], ".1f"),
+    ("Load Wait (ms)", lambda r: r["metrics"]["stages"]["load_wait"]["mean"], ".1f"),
+    ("Dim", lambda r: r["metrics"]["dim"], "d"),
+    ("Storage", lambda r: r["cell"]["dtype"], ""),
+    ("Bytes/Vector", lambda r: r["metrics"]["bytes_per_vector"], ".0f"),
+]
+
+SEARCH_COLUMNS = [
+    ("Vectors", lambda r: r["cell"]["vectors"], ""),
+    ("Dim", lambda r: r["cell"]["dim"], "d"),
+    ("Storage", lambda r: r["cell"]["dtype"], ""),
+    ("Index", lambda r: r["cell"]["index"], ""),
+    ("Params", lambda r: r["cell"]["params"], ""),
+    ("Build (s)", lambda r: r["metrics"]["build_s"], ".2f"),
+    ("QPS", lambda r: r["metrics"]["qps"], ".0f"),
+    ("Batch p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("Batch p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Bytes/Vector", lambda r: r["metrics"]["bytes_per_vector"], ".0f"),
+    ("Recall@k", lambda r: r["metrics"]["recall"], ".3f"),
+]
+
+
+def parse_names(registry, kind):
+    """Parser for a comma-separated list of names registered in ``registry``."""
+
+    def parse(value):
+        names = [v.strip() for v in value.split(",") if v.strip()]
+        unknown = [n for n in names if n not in registry]
+        if not names or unknown:
+            raise argparse.ArgumentTypeError(
+                f"invalid {kind}: {value!r}, expected some of {sorted(registry)}"
+            )
+        return names
+
+    return parse
+
+
+def parse_dtypes(value):
+    """Parse "float32,float16" into storage dtypes."""
+    dtypes = [v.strip() for v in value.split(",") if v.strip()]
+    if not dtypes or set(dtypes) - {"float16", "float32"}:
+        raise argparse.ArgumentTypeError(f"invalid dtypes: {value!r}")
+    return dtypes
+
+
+def parse_ints(value):
+    """Parse "1,4,16" into positive ints."""
+    values = sorted({int(v) for v in value.split(",") if v.strip()})
+    if not values or values[0] < 1:
+        raise argparse.ArgumentTypeError(f"invalid values: {value!r}")
+    return values
+
+
+def parse_sizes(value):
+    try:
+        return parse_counts(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def benchmark_extraction(
+    model,
+    images,
+    batch_size=32,
+    device="cpu",
+    half=False,
+    pretrained=True,
+    workers=4,
+    prefetch=2,
+    dtype="float16",
+    features=None,
+    warmup=2,
+    run_id=None,
+):
+    """Embed every image in ``images`` and store the features memory-mapped.
+
+    Loading (decode + resize + normalize) runs on ``workers`` threads,
+    ``prefetch`` batches ahead of inference. Batch latency covers inference and
+    the write to the feature file; ``load_wait`` is the time inference sat idle
+    waiting for the loader. Returns the results record and the feature file path.
+    """
+    embedder = get_embedder(model)(model, device=device, half=half, pretrained=pretrained)
+    size = embedder.input_size
+    loader = ImageFolderLoader(
+        images, batch_size, embedder.preprocess, (3, size, size), workers, prefetch
+    )
+    features = Path(features or DEFAULT_ROOT / f"{model}_{dtype}.npy")
+    print(
+        f"\nEmbedding {len(images)} images with {model} ({embedder.format_name}, batch {batch_size})"
+    )
+
+    with embedder:
+        dummy = np.zeros((batch_size, 3, size, size), dtype=np.float32)
+        warmup_latencies = warmup_iterations(lambda: embedder.embed(dummy), warmup)
+        store = FeatureStore(features, len(images), embedder.dim, dtype)
+        latencies, inference, writes = [], [], []
+        started = time.perf_counter()
+        for paths, batch in loader:
+            t0 = time.perf_counter()
+            vectors = embedder.embed(batch)
+            t1 = time.perf_counter()
+            store.append(vectors, paths)
+            t2 = time.perf_counter()
+            latencies.append((t2 - t0) * 1000)
+            inference.append((t1 - t0) * 1000)
+            writes.append((t2 - t1) * 1000)
+        wall = time.perf_counter() - started
+        rows, nbytes = store.rows, store.nbytes
+        store.close()
+
+    if not rows:
+        raise OSError("No readable images")
+    stages = stage_breakdown({"load_wait": loader.wait_ms, "inference": inference, "store": writes})
+    metrics = {
+        **summarize(latencies),
+        "images": rows,
+        "failed": len(loader.failed),
+        "images_per_s": rows / wall,
+        "dim": embedder.dim,
+        "bytes_per_vector": nbytes / rows,
+        "stages": stages,
+    }
+    print(
+        f"  {metrics['images_per_s']:.1f} images/s | batch p50 {metrics['p50']:.1f} ms | "
+        f"{rows} vectors x {embedder.dim} ({dtype}) -> {features}"
+    )
+    print(f"  Stages: {format_stages(stages)}")
+    if loader.failed:
+        print(f"  Skipped {len(loader.failed)} unreadable images")
+    record = make_record(
+        "embedding_extract",
+        cell={
+            "model": model,
+            "format": embedder.format_name,
+            "batch": batch_size,
+            "device": device,
+            "dtype": dtype,
+        },
+        metrics=metrics,
+        config={
+            "images": str(Path(images[0]).parent) if images else None,
+            "workers": workers,
+            "prefetch": prefetch,
+            "pretrained": pretrained,
+            "warmup_iters": len(warmup_latencies),
+            "features": str(features),
+        },
+        latencies=latencies,
+        run_id=run_id,
+    )
+    return record, features
+
+
+def time_search(index, queries, k=10, batch=32, warmup=2):
+    """Per-batch latencies, found ids and queries/s of ``index`` over ``queries``."""
+    for i in range(min(warmup, -(-len(queries) // batch))):
+        index.search(queries[i * batch : (i + 1) * batch], k)
+    latencies, found = [], []
+    started = time.perf_counter()
+    for i in range(0, len(queries), batch):
+        t0 = time.perf_counter()
+        _, ids = index.search(queries[i : i + batch], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        found.append(ids)
+    qps = len(queries) / (time.perf_counter() - started)
+    return latencies, np.concatenate(found), qps
+
+
+def index_variants(args):
+    """``(name, constructor kwargs, search-parameter sweep)`` for every requested index."""
+    variants = []
+    for name in args.indexes:
+        if name == "ivf":
+            variants.append((name, {"nlist": args.nlist}, args.nprobe))
+        elif name == "hnsw":
+            variants.append(
+                (name, {"m": args.hnsw_m, "ef_construction": args.ef_construction}, args.ef)
+            )
+        else:
+            variants.append((name, {}, [None]))
+    return variants
+
+
+def benchmark_search(vectors, queries, truth, cell, variants, k=10, batch=32, run_id=None):
+    """Build each index over ``vectors`` once and time every search setting.
+
+    ``truth`` holds the exact ``k`` nearest neighbours of ``queries`` (float32
+    brute force), so the recall of float16 storage includes its rounding error.
+    """
+    records = []
+    for name, params, sweep in variants:
+        try:
+            index = get_index(name)(**params).timed_build(vectors)
+        except ImportError as e:
+            print(f"  {name} skipped: {e.name} is not installed")
+            continue
+        print(
+            f"  {index.label}: built in {index.build_s:.2f}s, {index.bytes_per_vector:.0f} B/vector"
+        )
+        if name == "ivf":
+            # Probing more lists than exist searches them all
+            sweep = sorted({min(v, index.params["nlist"]) for v in sweep})
+        for value in sweep:
+            if index.search_param:
+                index.params[index.search_param] = value
+            latencies, found, qps = time_search(index, queries, k, batch)
+            recall = recall_at_k(found, truth)
+            print(f"    {index.describe()}: {qps:.0f} QPS | recall@{k} {recall:.3f}")
+            records.append(
+                make_record(
+                    "embedding_search",
+                    cell={**cell, "index": index.label, "params": index.describe()},
+                    metrics={
+                        **summarize(latencies),
+                        "qps": qps,
+                        "build_s": index.build_s,
+                        "bytes_per_vector": index.bytes_per_vector,
+                        "recall": recall,
+                    },
+                    config={"k": k, "queries": len(queries), "query_batch": batch},
+                    latencies=latencies,
+                    run_id=run_id,
+                )
+            )
+    return records
+
+
+def fastest_at_recall(records, target=TARGET_RECALL):
+    """Highest-QPS search record reaching ``target`` recall, per vectors/dim/storage."""
+    best = {}
+    for r in records:
+        key = (r["cell"]["vectors"], r["cell"]["dim"], r["cell"]["dtype"])
+        if r["metrics"]["recall"] >= target and (
+            key not in best or r["metrics"]["qps"] > best[key]["metrics"]["qps"]
+        ):
+            best[key] = r
+    return best
+
+
+def write_embedding_results(extract, search, path="results/embedding_results.md"):
+    """Render the extraction and similarity-search tables for one run."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Embedding Benchmarks\n\n")
+        if extract or search:
+            f.write(render_environment((extract or search)[0]) + "\n")
+        if extract:
+            f.write("## Feature Extraction\n\n")
+            f.write(render_table(extract, EXTRACT_COLUMNS) + "\n")
+            f.write(
+                "\nImages are decoded, resized (shorter side to 8/7 of the input, centre "
+                "crop) and normalized on loader threads while the model runs. Batch latency "
+                "covers inference and the write to the memory-mapped feature file; Load Wait "
+                "is the mean time per batch inference waited for the loader.\n\n"
+            )
+        if search:
+            config = search[0]["config"]
+            f.write("## Similarity Search\n\n")
+            f.write(f"**k:** {config['k']} | **Query batch:** {config['query_batch']}\n\n")
+            f.write(render_table(search, SEARCH_COLUMNS) + "\n")
+            f.write(
+                "\nAll indexes search L2-normalized vectors by inner product (cosine). "
+                "Recall@k is against exact float32 brute force. Bytes/Vector is the memory "
+                "the index holds (the matrix itself for brute force, which searches the "
+                "memory-mapped file in place). NumPy has no float16 matrix multiply, so "
+                "float16 storage is converted block by block while searching: half the "
+                "memory, slower scans.\n"
+            )
+            best = fastest_at_recall(search)
+            if best:
+                f.write(f"\n## Fastest at Recall@k >= {TARGET_RECALL}\n\n")
+                for (vectors, dim, dtype), r in best.items():
+                    f.write(
+                        f"- **{vectors} x {dim} {dtype}**: {r['cell']['index']} "
+                        f"({r['cell']['params']}), {r['metrics']['qps']:.0f} QPS, "
+                        f"recall {r['metrics']['recall']:.3f}\n"
+                    )
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Embedding extraction throughput and similarity-search QPS/recall"
+    )
+    parser.add_argument(
+        "--models",
+        type=parse_names(EMBEDDERS, "models"),
+        default=["dinov2_vits14"],
+        help=f"Embedding models to extract with: {', '.join(EMBEDDERS)}",
+    )
+    parser.add_argument(
+        "--images", type=Path, default=None, help="Image folder to embed (enables extraction)"
+    )
+    parser.add_argument("--max-images", type=int, default=None, help="Embed at most this many")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per inference call")
+    parser.add_argument(
+        "--device",
+        type=str,
+        default=None,
+        help="Inference device (e.g. cpu, cuda). Defaults to cuda if available.",
+    )
+    parser.add_argument("--fp16", action="store_true", help="FP16 inference (GPU)")
+    parser.add_argument(
+        "--no-pretrained",
+        action="store_true",
+        help="Random weights: no download, speed only (the features are meaningless)",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Image loading threads")
+    parser.add_argument("--prefetch", type=int, default=2, help="Batches loaded ahead")
+    parser.add_argument(
+        "--storage",
+        choices=("float16", "float32"),
+        default="float16",
+        help="Feature file precision",
+    )
+    parser.add_argument(
+        "--features-dir",
+        type=Path,
+        default=DEFAULT_ROOT,
+        help="Where extracted feature files go (default: ~/.cache/vision-benchmarks/embeddings)",
+    )
+    parser.add_argument(
+        "--search-features",
+        action="store_true",
+        help="Also benchmark similarity search over the extracted features",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=[10_000, 100_000, 1_000_000],
+        help='Synthetic database sizes (e.g. 10k,100k,1M); "" skips synthetic search',
+    )
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic vector dimension")
+    parser.add_argument(
+        "--dtypes", type=parse_dtypes, default=["float32", "float16"], help="Synthetic storage"
+    )
+    parser.add_argument(
+        "--indexes",
+        type=parse_names(INDEXES, "indexes"),
+        default=["brute", "ivf", "hnsw"],
+        help="Indexes to compare: brute, ivf, hnsw (hnsw needs hnswlib)",
+    )
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default: sqrt(N))")
+    parser.add_argument(
+        "--nprobe", type=parse_ints, default=[1, 4, 16, 64], help="IVF lists scanned per query"
+    )
+    parser.add_argument("--hnsw-m", type=int, default=16, help="HNSW graph degree")
+    parser.add_argument("--ef-construction", type=int, default=200, help="HNSW build ef")
+    parser.add_argument(
+        "--ef", type=parse_ints, default=[16, 64, 256], help="HNSW search candidate list sizes"
+    )
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--queries", type=int, default=1000, help="Timed queries per setting")
+    parser.add_argument("--query-batch", type=int, default=32, help="Queries per search call")
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    args = parser.parse_args()
+
+    print("=== Vision Benchmarks: Embeddings ===")
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    extract, search, feature_files = [], [], []
+
+    if args.images:
+        device = args.device or default_device()
+        images = list_images(args.images)[: args.max_images]
+        if not images:
+            parser.error(f"no images found in {args.images}")
+        print(f"Device: {device_name(device)} | Images: {len(images)} from {args.images}")
+        for model in args.models:
+            try:
+                record, features = benchmark_extraction(
+                    model,
+                    images,
+                    batch_size=args.batch_size,
+                    device=device,
+                    half=args.fp16,
+                    pretrained=not args.no_pretrained,
+                    workers=args.workers,
+                    prefetch=args.prefetch,
+                    dtype=args.storage,
+                    features=args.features_dir / f"{model}_{args.images.name}_{args.storage}.npy",
+                    run_id=run_id,
+                )
+            except Exception as e:
+                print(f"  {model} extraction failed: {e}")
+                continue
+            store.append(record)
+            extract.append(record)
+            feature_files.append((model, features))
+
+    variants = index_variants(args)
+    rng = np.random.default_rng(0)
+    if args.search_features:
+        for model, features in feature_files:
+            vectors, _ = load_features(features)
+            # Every image against the collection, as in deduplication
+            picks = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+            queries = np.asarray(vectors[np.sort(picks)], dtype=np.float32)
+            print(f"\nSearch over {model} features: {vectors.shape} {vectors.dtype}")
+            _, truth = BruteForceIndex().timed_build(vectors).search(queries, args.k)
+            cell = {
+                "vectors": f"{count_label(len(vectors))} ({model})",
+                "dim": int(vectors.shape[1]),
+                "dtype": str(vectors.dtype),
+            }
+            records = benchmark_search(
+                vectors, queries, truth, cell, variants, args.k, args.query_batch, run_id
+            )
+            store.extend(records)
+            search += records
+
+    for n in args.sizes:
+        # Exact neighbours from the float32 matrix; float16 files hold the same vectors rounded
+        reference, queries = synthetic_vectors(n, args.dim, "float32", queries=args.queries)
+        _, truth = BruteForceIndex().timed_build(reference).search(queries, args.k)
+        for dtype in args.dtypes:
+            vectors = reference if dtype == "float32" else synthetic_vectors(n, args.dim, dtype)
+            print(f"\nSearch over {count_label(n)} synthetic vectors x {args.dim} ({dtype})")
+            cell = {"vectors": count_label(n), "dim": args.dim, "dtype": dtype}
+            records = benchmark_search(
+                vectors, queries, truth, cell, variants, args.k, args.query_batch, run_id
+            )
+            store.extend(records)
+            search += records
+
+    print(f"\nRun {run_id} saved to {args.store}")
+    write_embedding_results(extract, search)
+
+
+if __name__ == "__main__":
+    main()
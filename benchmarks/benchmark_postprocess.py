@@ -0,0 +1,320 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_yolo import parse_batch_sizes, resolve_model_path
+from utils.backends import STRIDE, get_backend, imgsz_hw
+from utils.postprocess import NMS_METHODS, decode, non_max_suppression
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.stats import summarize
+
+# ultralytics switches to torchvision's NMS kernel once torchvision is imported, so
+# it is measured first, in the state the ONNX Runtime backend used to run it in
+METHOD_ORDER = ("ultralytics", "numpy", "torchvision")
+
+POSTPROCESS_COLUMNS = [
+    ("Method", lambda r: r["cell"]["method"], ""),
+    ("Objects/Image", lambda r: r["cell"]["objects"], "d"),
+    ("Batch", lambda r: r["cell"]["batch"], "d"),
+    ("Candidates/Image", lambda r: r["metrics"]["candidates"], ".0f"),
+    ("Detections/Image", lambda r: r["metrics"]["detections"], ".1f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Per Image (ms)", lambda r: r["metrics"]["per_image_ms"], ".3f"),
+    ("Agreement with ultralytics", lambda r: r["metrics"]["agreement"], ".4f"),
+]
+
+COMPARISON_COLUMNS = [
+    ("Objects/Image", lambda c: c["objects"], "d"),
+    ("Batch", lambda c: c["batch"], "d"),
+    ("ultralytics p50 (ms)", lambda c: c["ultralytics"]["p50"], ".2f"),
+    ("NumPy p50 (ms)", lambda c: c["numpy"]["p50"], ".2f"),
+    ("Speedup", lambda c: c["ultralytics"]["p50"] / c["numpy"]["p50"], ".2f"),
+]
+
+
+def parse_counts(value):
+    """Parse "0,10,100" into a sorted list of non-negative counts."""
+    counts = sorted({int(v) for v in value.split(",") if v.strip()})
+    if not counts or counts[0] < 0:
+        raise argparse.ArgumentTypeError(f"invalid counts: {value!r}")
+    return counts
+
+
+def parse_methods(value):
+    """Parse "numpy,ultralytics" into NMS methods, in measurement order."""
+    names = {v.strip().lower() for v in value.split(",") if v.strip()}
+    for name in names:
+        if name not in NMS_METHODS:
+            raise argparse.ArgumentTypeError(f"unknown method {name!r}, expected {NMS_METHODS}")
+    return [m for m in METHOD_ORDER if m in names]
+
+
+def head_shape(imgsz=640, num_classes=80):
+    """Per-image ``(4 + nc, anchors)`` head output shape of a 3-scale detector at ``imgsz``."""
+    h, w = imgsz_hw(imgsz)
+    anchors = sum((h // s) * (w // s) for s in (STRIDE // 4, STRIDE // 2, STRIDE))
+    return 4 + num_classes, anchors
+
+
+def model_head_shape(name, imgsz=640):
+    """Per-image head output shape of a model's ONNX export (exported on first use)."""
+    import onnxruntime as ort
+
+    path = get_backend("onnxruntime")(resolve_model_path(name), imgsz=imgsz).artifact_path()
+    session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    return tuple(session.get_outputs()[0].shape[1:])
+
+
+def synthetic_head_output(batch, objects, shape, candidates=20, jitter=0.05, imgsz=640, seed=0):
+    """A raw head output with ``objects`` objects per image.
+
+    Each object lights up ``candidates`` random anchors with jittered copies of its
+    box and confidences between 0.2 and 0.95 for its class, like the overlapping
+    predictions NMS exists to merge; every other score stays below 1e-4. For an
+    end-to-end ``(max_det, 6)`` shape the first ``objects`` rows are detections.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = imgsz_hw(imgsz)
+    if shape[-1] == 6:
+        rows = shape[0]
+        out = np.zeros((batch, rows, 6), dtype=np.float32)
+        xy = rng.uniform(0, (w, h), (batch, rows, 2))
+        wh = rng.uniform(8, min(h, w) / 6, (batch, rows, 2))
+        out[..., :2], out[..., 2:4] = xy - wh / 2, xy + wh / 2
+        out[..., 4] = rng.uniform(0, 1e-4, (batch, rows))
+        out[:, : min(objects, rows), 4] = rng.uniform(0.2, 0.95, (batch, min(objects, rows)))
+        out[..., 5] = rng.integers(0, 80, (batch, rows))
+        return out
+
+    channels, anchors = shape
+    num_classes = channels - 4
+    if objects * candidates > anchors:
+        raise ValueError(f"{objects} objects x {candidates} candidates exceed {anchors} anchors")
+    out = np.empty((batch, channels, anchors), dtype=np.float32)
+    out[:, 0] = rng.uniform(0, w, (batch, anchors))
+    out[:, 1] = rng.uniform(0, h, (batch, anchors))
+    out[:, 2:4] = rng.uniform(4, min(h, w) / 4, (batch, 2, anchors))
+    out[:, 4:] = rng.uniform(0, 1e-4, (batch, num_classes, anchors))
+    if not objects:
+        return out
+
+    count = objects * candidates
+    picked = np.argsort(rng.random((batch, anchors)), axis=1)[:, :count].ravel()
+    image = np.repeat(np.arange(batch), count)
+    boxes = np.concatenate(
+        [
+            rng.uniform(0, (w, h), (batch, objects, 2)),
+            rng.uniform(8, min(h, w) / 6, (batch, objects, 2)),
+        ],
+        axis=2,
+    )
+    boxes = np.repeat(boxes, candidates, axis=1).reshape(-1, 4)
+    classes = np.repeat(rng.integers(0, num_classes, (batch, objects)), candidates).ravel()
+    view = out.transpose(0, 2, 1)  # (batch, anchors, channels) view
+    noise = rng.normal(0, jitter, boxes.shape) * np.tile(boxes[:, 2:], 2)
+    view[image, picked, :4] = boxes + noise  # center and size jitter relative to the size
+    view[image, picked, 4 + classes] = rng.uniform(0.2, 0.95, len(picked))
+    return out
+
+
+def detection_agreement(a, b, decimals=4):
+    """Share of detections two per-image lists have in common (1.0: identical sets).
+
+    Detections match on class, confidence and box rounded to ``decimals``; the
+    share is ``2 * common / (len(a) + len(b))`` over all images.
+    """
+    common = total = 0
+    for x, y in zip(a, b, strict=True):
+        rows = {tuple(row) for row in np.round(x, decimals).tolist()}
+        common += sum(tuple(row) in rows for row in np.round(y, decimals).tolist())
+        total += len(x) + len(y)
+    return 2 * common / total if total else 1.0
+
+
+def time_postprocess(output, method, runs=100, warmup=10, conf=0.25, iou=0.7):
+    """Latencies in ms of ``runs`` calls, after ``warmup`` untimed ones, and the detections."""
+    for _ in range(warmup):
+        non_max_suppression(output, conf, iou, method=method)
+    latencies = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        dets = non_max_suppression(output, conf, iou, method=method)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies, dets
+
+
+def candidates_per_image(output, conf):
+    """Mean number of anchors above ``conf`` per image (the NMS input size)."""
+    if output.shape[-1] == 6:
+        return float((output[..., 4] > conf).sum()) / len(output)
+    return len(decode(output, conf)[0]) / len(output)
+
+
+def postprocess_record(
+    method, objects, batch, shape, latencies, dets, candidates, config, reference=None, run_id=None
+):
+    """Results-store record for one method/density/batch cell."""
+    stats = summarize(latencies)
+    return make_record(
+        "postprocess",
+        cell={"method": method, "objects": objects, "batch": batch, "head": list(shape)},
+        metrics={
+            **stats,
+            "per_image_ms": stats["mean"] / batch,
+            "candidates": candidates,
+            "detections": sum(len(d) for d in dets) / batch,
+            "agreement": detection_agreement(dets, reference) if reference is not None else None,
+        },
+        config=config,
+        latencies=latencies,
+        run_id=run_id,
+    )
+
+
+def postprocess_comparisons(records):
+    """Pair the ultralytics and NumPy records of each density and batch size."""
+    pairs = {}
+    for r in records:
+        key = (r["cell"]["objects"], r["cell"]["batch"])
+        pairs.setdefault(key, {"objects": key[0], "batch": key[1]})[r["cell"]["method"]] = r[
+            "metrics"
+        ]
+    return [p for p in pairs.values() if "ultralytics" in p and "numpy" in p]
+
+
+def write_postprocess_results(records, path="results/postprocess_results.md"):
+    """Render the postprocessing table and the NumPy vs ultralytics comparison."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Postprocessing (Decode + NMS) Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            config = records[0]["config"]
+            f.write(
+                f"**Head:** {config['source']} {tuple(records[0]['cell']['head'])} | "
+                f"**conf:** {config['conf']} | **IoU:** {config['iou']} | "
+                f"**Candidates per object:** {config['candidates']}\n\n"
+            )
+        f.write(render_table(records, POSTPROCESS_COLUMNS) + "\n")
+        f.write(
+            "\nEvery method turns the same raw head output into per-image detections. "
+            "`numpy` is `utils/postprocess.py`, `torchvision` is the same decode with "
+            "`torchvision.ops.batched_nms`, `ultralytics` is `non_max_suppression` as the "
+            "ONNX Runtime backend ran it before. Agreement is the share of detections "
+            "identical to ultralytics'. ultralytics separates classes by adding a class "
+            "offset of up to 600k px to float32 boxes, which rounds coordinates; a pair "
+            "whose IoU is within rounding of the threshold can then be decided differently "
+            "(in float64, ultralytics matches the NumPy output exactly). ultralytics also "
+            "gives up after 2 s + 50 ms per image and returns the remaining images empty.\n"
+        )
+        comparisons = postprocess_comparisons(records)
+        if comparisons:
+            f.write("\n## NumPy vs ultralytics\n\n")
+            f.write(render_table(comparisons, COMPARISON_COLUMNS) + "\n")
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Postprocessing micro-benchmark: NumPy decode + NMS vs ultralytics"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="Take the head layout from this model's ONNX export (default: 80-class detector)",
+    )
+    parser.add_argument("--imgsz", type=int, default=640, help="Model input size")
+    parser.add_argument("--classes", type=int, default=80, help="Classes without --model")
+    parser.add_argument(
+        "--objects",
+        type=parse_counts,
+        default=[0, 10, 100, 300, 1000],
+        help="Objects per image (detection densities)",
+    )
+    parser.add_argument(
+        "--candidates", type=int, default=8, help="Overlapping candidate boxes per object"
+    )
+    parser.add_argument("--batch-sizes", type=parse_batch_sizes, default=[1, 8])
+    parser.add_argument("--methods", type=parse_methods, default=list(METHOD_ORDER))
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+    parser.add_argument("--iou", type=float, default=0.7, help="NMS IoU threshold")
+    parser.add_argument("--runs", type=int, default=100, help="Timed calls per cell")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed calls per cell")
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    args = parser.parse_args()
+
+    shape = model_head_shape(args.model, args.imgsz) if args.model else None
+    shape = shape or head_shape(args.imgsz, args.classes)
+    print("=== Vision Benchmarks: Postprocessing ===")
+    print(f"Head {shape} | conf {args.conf} | IoU {args.iou} | {args.candidates} boxes/object")
+
+    cells = [(objects, batch) for objects in args.objects for batch in args.batch_sizes]
+    outputs = {
+        (objects, batch): synthetic_head_output(
+            batch, objects, shape, args.candidates, imgsz=args.imgsz, seed=i
+        )
+        for i, (objects, batch) in enumerate(cells)
+    }
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records, reference = [], {}
+    for method in args.methods:
+        for objects, batch in cells:
+            output = outputs[objects, batch]
+            try:
+                latencies, dets = time_postprocess(
+                    output, method, args.runs, args.warmup, args.conf, args.iou
+                )
+            except Exception as e:
+                print(f"  {method} failed: {e}")
+                break
+            if method == "ultralytics":
+                reference[objects, batch] = dets
+            config = {
+                "source": args.model or "synthetic",
+                "conf": args.conf,
+                "iou": args.iou,
+                "candidates": args.candidates,
+                "runs": args.runs,
+            }
+            record = postprocess_record(
+                method,
+                objects,
+                batch,
+                shape,
+                latencies,
+                dets,
+                candidates_per_image(output, args.conf),
+                config,
+                reference.get((objects, batch)),
+                run_id,
+            )
+            store.append(record)
+            records.append(record)
+            m = record["metrics"]
+            line = f"  {method} objects={objects} batch={batch}: p50 {m['p50']:.2f} ms"
+            if m["agreement"] is not None and method != "ultralytics":
+                line += f" | agreement with ultralytics {m['agreement']:.4f}"
+            print(line)
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_postprocess_results(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_accuracy import accuracy_record, benchmark_accuracy_cached
+from benchmarks.benchmark_yolo import (
+    MODELS,
+    add_corpus_arguments,
+    benchmark_model,
+    corpus_from_args,
+    parse_imgsz,
+    resolve_model_path,
+    speed_record,
+)
+from utils.backends import ORT_OPT_LEVELS, imgsz_label
+from utils.memory import MB
+from utils.quantization import CALIBRATION_METHODS, DEFAULT_CALIBRATION_IMAGES
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+
+PRECISIONS = {"fp32": "onnxruntime", "int8": "onnxruntime_int8"}
+
+QUANTIZATION_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("imgsz", lambda r: r["cell"]["imgsz"], ""),
+    ("Calibration", lambda r: _calibration(r), ""),
+    ("FP32 FPS", lambda r: r["metrics"]["fp32"]["fps"], ".2f"),
+    ("INT8 FPS", lambda r: r["metrics"]["int8"]["fps"], ".2f"),
+    ("Speedup", lambda r: r["metrics"]["speedup"], ".2f"),
+    ("FP32 p99 (ms)", lambda r: r["metrics"]["fp32"]["p99"], ".2f"),
+    ("INT8 p99 (ms)", lambda r: r["metrics"]["int8"]["p99"], ".2f"),
+    ("FP32 mAP@50-95", lambda r: r["metrics"]["fp32"]["map5095"], ".3f"),
+    ("INT8 mAP@50-95", lambda r: r["metrics"]["int8"]["map5095"], ".3f"),
+    ("mAP@50-95 Drop", lambda r: r["metrics"]["map5095_drop"], ".3f"),
+    ("FP32 Size (MB)", lambda r: _size(r, "fp32"), ".1f"),
+    ("INT8 Size (MB)", lambda r: _size(r, "int8"), ".1f"),
+]
+
+
+def _calibration(r):
+    return f"{r['cell']['calibrate_method']} x{r['config']['calibration_images']}"
+
+
+def _size(r, precision):
+    size = r["metrics"][precision]["artifact_bytes"]
+    return size / MB if size is not None else None
+
+
+def precision_metrics(speed, accuracy=None):
+    """Speed (and, if measured, accuracy) of one precision for the comparison record."""
+    metrics = {
+        "fps": speed.fps,
+        "mean": speed.stats["mean"],
+        "p50": speed.stats["p50"],
+        "p99": speed.stats["p99"],
+        "artifact_bytes": speed.memory["artifact_bytes"] if speed.memory else None,
+        "map50": None,
+        "map5095": None,
+    }
+    if accuracy is not None:
+        metrics.update(map50=accuracy["map50"], map5095=accuracy["map5095"])
+    return metrics
+
+
+def quantization_record(name, fp32, int8, device, calibration, run_id=None):
+    """One record holding FP32 and INT8 speed and mAP, the speedup and the mAP drop.
+
+    ``fp32``/``int8`` are :func:`precision_metrics` dicts; ``calibration`` holds
+    the INT8 backend options (dataset, image count, method, per-channel).
+    """
+
+    def drop(key):
+        if fp32[key] is None or int8[key] is None:
+            return None
+        return fp32[key] - int8[key]
+
+    return make_record(
+        "yolo_int8",
+        cell={
+            "model": name,
+            "device": device,
+            "imgsz": calibration["imgsz"],
+            "calibrate_method": calibration["calibrate_method"],
+        },
+        metrics={
+            "fp32": fp32,
+            "int8": int8,
+            "speedup": int8["fps"] / fp32["fps"],
+            "p99_speedup": fp32["p99"] / int8["p99"],
+            "map50_drop": drop("map50"),
+            "map5095_drop": drop("map5095"),
+        },
+        config={
+            "calibration": calibration["calibration"],
+            "calibration_images": calibration["calibration_images"],
+            "per_channel": calibration["per_channel"],
+            "data": calibration.get("data"),
+        },
+        run_id=run_id,
+    )
+
+
+def write_quantization_results(records, path="results/int8_results.md"):
+    """Render the FP32 vs INT8 comparison table."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# INT8 Quantization Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            config = records[0]["config"]
+            f.write(
+                f"**Calibration set:** {config['calibration']} | "
+                f"**mAP dataset:** {config['data'] or 'N/A'} | "
+                f"**Per-channel weights:** {'yes' if config['per_channel'] else 'no'}\n\n"
+            )
+        f.write(render_table(records, QUANTIZATION_COLUMNS) + "\n")
+        f.write(
+            "\nBoth rows run the same ONNX Runtime session setup; INT8 is a static QDQ "
+            "quantization of the FP32 export (INT8 weights, UINT8 activations) with the "
+            "box-decoding tail of the head kept in FP32. Speedup is INT8 over FP32 "
+            "throughput; mAP drop is FP32 minus INT8.\n"
+        )
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="INT8 vs FP32 benchmark: static ONNX Runtime quantization, speed and mAP"
+    )
+    parser.add_argument(
+        "--model", type=str, help="Specific model to benchmark (e.g. yolo11n). Omit to run all."
+    )
+    parser.add_argument("--device", type=str, default="cpu", help="Inference device")
+    parser.add_argument("--runs", type=int, default=100, help="Number of inference runs")
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=None,
+        help="Fixed warmup iterations. Omit to warm up until latency stabilizes.",
+    )
+    parser.add_argument(
+        "--imgsz", type=parse_imgsz, default=[640], help="Model input size, square or WxH"
+    )
+    parser.add_argument(
+        "--data",
+        type=str,
+        default="coco128.yaml",
+        help="Dataset yaml scored for mAP (val split); 'none' skips accuracy",
+    )
+    parser.add_argument(
+        "--calibration",
+        type=str,
+        default=None,
+        help="Calibration images: dataset yaml (train split), directory or list (default: --data)",
+    )
+    parser.add_argument(
+        "--calibration-images",
+        type=int,
+        default=DEFAULT_CALIBRATION_IMAGES,
+        help="Images used to calibrate activation ranges",
+    )
+    parser.add_argument(
+        "--calibrate-method",
+        choices=CALIBRATION_METHODS,
+        default="minmax",
+        help="How activation ranges are derived from the calibration outputs",
+    )
+    parser.add_argument(
+        "--per-tensor", action="store_true", help="One weight scale per tensor, not per channel"
+    )
+    parser.add_argument(
+        "--ort-opt-level",
+        choices=ORT_OPT_LEVELS,
+        default="all",
+        help="ONNX Runtime graph optimization level",
+    )
+    parser.add_argument(
+        "--intra-op-threads", type=int, default=0, help="ONNX Runtime intra-op threads (0=auto)"
+    )
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    data = None if args.data.lower() == "none" else args.data
+    calibration = args.calibration or data
+    if calibration is None:
+        parser.error("--calibration is required with --data none")
+    imgsz = args.imgsz[0]
+
+    session = {"opt_level": args.ort_opt_level, "intra_op_threads": args.intra_op_threads}
+    int8_options = {
+        "calibration": calibration,
+        "calibration_images": args.calibration_images,
+        "calibrate_method": args.calibrate_method,
+        "per_channel": not args.per_tensor,
+    }
+    options = {"fp32": session, "int8": {**session, **int8_options}}
+
+    print("=== Vision Benchmarks: INT8 Quantization ===")
+    print(
+        f"Device: {args.device} | Calibration: {calibration} "
+        f"({args.calibration_images} images, {args.calibrate_method})"
+    )
+    target_models = [args.model] if args.model else list(MODELS.keys())
+    corpus = corpus_from_args(args)
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
+
+    for name in target_models:
+        path = resolve_model_path(name)
+        measured = {}
+        try:
+            for precision, backend in PRECISIONS.items():
+                speed = benchmark_model(
+                    path,
+                    device=args.device,
+                    warmup=args.warmup,
+                    runs=args.runs,
+                    backend=backend,
+                    backend_options=options[precision],
+                    corpus=corpus,
+                    imgsz=imgsz,
+                )
+                record = speed_record(name, speed, args.device, run_id, runs=args.runs)
+                store.append(record)
+                accuracy = None
+                if data is not None:
+                    accuracy = benchmark_accuracy_cached(
+                        path,
+                        data,
+                        backend=backend,
+                        imgsz=imgsz,
+                        device=args.device,
+                        backend_options=options[precision],
+                    )
+                    store.append(accuracy_record(accuracy, run_id))
+                measured[precision] = precision_metrics(speed, accuracy)
+        except Exception as e:
+            print(f"  INT8 comparison failed for {name}: {e}")
+            continue
+
+        record = quantization_record(
+            name,
+            measured["fp32"],
+            measured["int8"],
+            args.device,
+            {**int8_options, "imgsz": imgsz_label(imgsz), "data": data},
+            run_id,
+        )
+        store.append(record)
+        records.append(record)
+        m = record["metrics"]
+        line = f"  {name}: INT8 {m['speedup']:.2f}x FP32 throughput"
+        if m["map5095_drop"] is not None:
+            line += f" | mAP@50-95 {m['fp32']['map5095']:.3f} -> {m['int8']['map5095']:.3f}"
+        print(line)
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_quantization_results(records)
+
+
+if __name__ == "__main__":
+    main()
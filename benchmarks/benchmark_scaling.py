@@ -0,0 +1,436 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_yolo import (
+    MODELS,
+    add_corpus_arguments,
+    benchmark_model,
+    corpus_from_args,
+    resolve_model_path,
+)
+from utils.backends import get_backend, parse_backends
+from utils.export_cache import export_many
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.stats import summarize
+
+# Backends whose CPU parallelism is controlled by an intra-op thread count
+CPU_BACKENDS = ("pytorch", "torchscript", "onnxruntime")
+
+
+def parse_counts(value):
+    """Parse a comma-separated list such as "1,2,4" into sorted unique positive ints."""
+    counts = sorted({int(v) for v in value.split(",") if v.strip()})
+    if not counts or counts[0] < 1:
+        raise argparse.ArgumentTypeError(f"invalid counts: {value!r}")
+    return counts
+
+
+def available_cores():
+    """Cores this process may run on, in ascending order."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def powers_of_two(limit):
+    """1, 2, 4, ... up to ``limit`` (inclusive)."""
+    values, n = [], 1
+    while n <= limit:
+        values.append(n)
+        n *= 2
+    return values
+
+
+def scaling_grid(workers, threads, num_cores):
+    """All ``(workers, threads)`` pairs that fit on ``num_cores`` without oversubscription.
+
+    The 1x1 cell is always included because it is the baseline for scaling efficiency.
+    Pairs are ordered by cores used, then by worker count.
+    """
+    grid = {(1, 1)}
+    grid.update((w, t) for w in workers for t in threads if w * t <= num_cores)
+    return sorted(grid, key=lambda wt: (wt[0] * wt[1], wt[0]))
+
+
+def partition_cores(cores, workers, threads):
+    """Split ``cores`` into ``workers`` disjoint sets of ``threads`` cores each."""
+    needed = workers * threads
+    if needed > len(cores):
+        raise ValueError(
+            f"{workers} workers x {threads} threads needs {needed} cores, have {len(cores)}"
+        )
+    return [list(cores[i * threads : (i + 1) * threads]) for i in range(workers)]
+
+
+def aggregate_workers(outcomes, batch_size=1):
+    """Combine per-worker results of one grid cell.
+
+    Aggregate throughput is every image processed divided by the wall-clock window
+    from the first worker starting its timed loop to the last one finishing, so a
+    straggler lowers the result instead of being averaged away.
+    """
+    window = max(o["finished"] for o in outcomes) - min(o["started"] for o in outcomes)
+    images = sum(len(o["latencies"]) * batch_size for o in outcomes)
+    latencies = [x for o in outcomes for x in o["latencies"]]
+    return {
+        "throughput": images / window if window > 0 else 0.0,
+        "worker_fps": [o["fps"] for o in outcomes],
+        "worker_p99": [o["stats"]["p99"] for o in outcomes],
+        "latencies": latencies,
+        "stats": summarize(latencies),
+    }
+
+
+def scaling_efficiency(throughput, baseline, cores_used):
+    """Throughput relative to perfect linear scaling of the 1 worker x 1 thread baseline."""
+    if not baseline or not cores_used:
+        return None
+    return throughput / (baseline * cores_used)
+
+
+def _worker(
+    rank, cores, threads, model_path, backend, warmup, runs, batch_size, corpus, barrier, results
+):
+    """Pin to ``cores``, limit intra-op threads, run ``benchmark_model`` and report back."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        if backend == "onnxruntime":
+            options = {"intra_op_threads": threads, "inter_op_threads": 1}
+        else:
+            import torch  # ONNX Runtime workers never load torch
+
+            torch.set_num_threads(threads)
+            torch.set_num_interop_threads(1)
+            options = {}
+        r = benchmark_model(
+            model_path,
+            device="cpu",
+            warmup=warmup,
+            runs=runs,
+            batch_size=batch_size,
+            backend=backend,
+            backend_options=options,
+            barrier=barrier,
+            corpus=corpus,
+        )
+    except Exception as e:
+        barrier.abort()  # release the other workers instead of deadlocking them
+        results.put((rank, f"{type(e).__name__}: {e}"))
+        return
+    results.put(
+        (
+            rank,
+            {
+                "cores": cores,
+                "format": r.format,
+                "input": r.input,
+                "fps": r.fps,
+                "latencies": r.latencies,
+                "stats": r.stats,
+                "warmup_iters": r.warmup_iters,
+                "started": r.started,
+                "finished": r.finished,
+            },
+        )
+    )
+
+
+def run_config(
+    model_path,
+    workers,
+    threads,
+    cores,
+    backend="pytorch",
+    warmup=None,
+    runs=50,
+    batch_size=1,
+    corpus=None,
+):
+    """Run one grid cell: ``workers`` pinned processes with ``threads`` threads each.
+
+    A ``corpus`` is passed by path, so every worker maps the same frames file.
+    Returns the per-worker outcomes ordered by rank. Raises ``RuntimeError`` if any
+    worker fails.
+    """
+    # spawn: forked children would inherit the parent's initialized torch thread pools
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    assignment = partition_cores(cores, workers, threads)
+    procs = [
+        context.Process(
+            target=_worker,
+            args=(
+                rank,
+                assignment[rank],
+                threads,
+                model_path,
+                backend,
+                warmup,
+                runs,
+                batch_size,
+                corpus,
+                barrier,
+                results,
+            ),
+        )
+        for rank in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    outcomes = {}
+    try:
+        while len(outcomes) < workers:
+            try:
+                rank, outcome = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs) and results.empty():
+                    raise RuntimeError("worker process exited without reporting") from None
+                continue
+            outcomes[rank] = outcome
+    finally:
+        for p in procs:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+
+    errors = [o for o in outcomes.values() if isinstance(o, str)]
+    if errors:
+        raise RuntimeError(f"{len(errors)} worker(s) failed: {errors[0]}")
+    return [outcomes[rank] for rank in range(workers)]
+
+
+def run_scaling(
+    model_path, grid, cores, backend="pytorch", warmup=None, runs=50, batch_size=1, corpus=None
+):
+    """Benchmark every ``(workers, threads)`` cell of ``grid``; returns one row per cell."""
+    rows = []
+    for workers, threads in grid:
+        print(f"\n--- {workers} worker(s) x {threads} thread(s) ({backend}) ---")
+        try:
+            outcomes = run_config(
+                model_path, workers, threads, cores, backend, warmup, runs, batch_size, corpus
+            )
+        except Exception as e:
+            print(f"  Failed: {e}")
+            continue
+        row = {"workers": workers, "threads": threads, "cores_used": workers * threads}
+        row.update(aggregate_workers(outcomes, batch_size))
+        row["format"] = outcomes[0]["format"]
+        row["input"] = outcomes[0]["input"]
+        row["cores"] = [o["cores"] for o in outcomes]
+        row["warmup_iters"] = [o["warmup_iters"] for o in outcomes]
+        rows.append(row)
+        print(f"  Aggregate throughput: {row['throughput']:.2f} images/s")
+
+    baseline = next((r["throughput"] for r in rows if r["cores_used"] == 1), None)
+    for row in rows:
+        row["efficiency"] = scaling_efficiency(row["throughput"], baseline, row["cores_used"])
+    return rows
+
+
+def scaling_record(name, backend, row, run_id, batch_size=1, runs=50):
+    """Results-store record for one grid cell."""
+    return make_record(
+        "yolo_scaling",
+        cell={
+            "model": name,
+            "backend": backend,
+            "format": row["format"],
+            "workers": row["workers"],
+            "threads": row["threads"],
+            "batch": batch_size,
+            "device": "cpu",
+            **({"input": row["input"]} if row["input"] != "zeros" else {}),
+        },
+        metrics={
+            "fps": row["throughput"],
+            "efficiency": row["efficiency"],
+            "worker_fps": row["worker_fps"],
+            "worker_p99": row["worker_p99"],
+            **row["stats"],
+        },
+        config={"cores": row["cores"], "warmup_iters": row["warmup_iters"], "runs": runs},
+        latencies=row["latencies"],
+        run_id=run_id,
+    )
+
+
+def _per_worker_fps(r):
+    fps = r["metrics"]["worker_fps"]
+    return sum(fps) / len(fps)
+
+
+SCALING_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("Workers", lambda r: r["cell"]["workers"], "d"),
+    ("Threads", lambda r: r["cell"]["threads"], "d"),
+    ("Cores", lambda r: r["cell"]["workers"] * r["cell"]["threads"], "d"),
+    ("Images/s", lambda r: r["metrics"]["fps"], ".2f"),
+    ("Per-Worker FPS", _per_worker_fps, ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Efficiency", lambda r: r["metrics"]["efficiency"], ".0%"),
+]
+
+
+def best_by_cores(records):
+    """Group records by (model, format, cores used), best throughput first.
+
+    Each group answers "N workers x T threads or 1 worker x N*T threads?" for a
+    fixed core budget.
+    """
+    groups = {}
+    for r in records:
+        cell = r["cell"]
+        key = (cell["model"], cell["format"], cell["workers"] * cell["threads"])
+        groups.setdefault(key, []).append(r)
+    return {k: sorted(v, key=lambda r: -r["metrics"]["fps"]) for k, v in groups.items()}
+
+
+def write_scaling_results(records, path="results/yolo_scaling_results.md"):
+    """Render the scaling grid, the best layout per core budget and per model."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# YOLO CPU Thread Scaling Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            f.write("**Input:** 640x640 RGB, one pinned process per worker\n\n")
+        f.write(render_table(records, SCALING_COLUMNS) + "\n")
+        f.write("\nEfficiency is throughput relative to linear scaling of 1 worker x 1 thread.\n")
+
+        comparisons = [
+            (key, group) for key, group in best_by_cores(records).items() if len(group) > 1
+        ]
+        if comparisons:
+            f.write("\n## Workers vs Threads per Core Budget\n\n")
+        for (model, fmt, cores), group in comparisons:
+            options = ", ".join(
+                f"{r['cell']['workers']}x{r['cell']['threads']}: {r['metrics']['fps']:.2f}"
+                for r in group
+            )
+            best = group[0]["cell"]
+            f.write(
+                f"- **{model}** ({fmt}, {cores} cores): {best['workers']} worker(s) x "
+                f"{best['threads']} thread(s) wins ({options} images/s)\n"
+            )
+
+        f.write("\n## Best Configuration per Model\n\n")
+        best = {}
+        for r in records:
+            key = (r["cell"]["model"], r["cell"]["format"])
+            if key not in best or r["metrics"]["fps"] > best[key]["metrics"]["fps"]:
+                best[key] = r
+        for (model, fmt), r in best.items():
+            f.write(
+                f"- **{model}** ({fmt}): {r['cell']['workers']} worker(s) x "
+                f"{r['cell']['threads']} thread(s), {r['metrics']['fps']:.2f} images/s\n"
+            )
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="CPU thread and core-affinity scaling benchmark: N pinned worker "
+        "processes x T intra-op threads"
+    )
+    parser.add_argument(
+        "--model", type=str, help="Specific model to benchmark (e.g. yolo11n). Omit to run all."
+    )
+    parser.add_argument(
+        "--backends",
+        type=parse_backends,
+        default=["pytorch"],
+        help="Comma-separated CPU backends: pytorch,torchscript,onnxruntime",
+    )
+    parser.add_argument(
+        "--workers",
+        type=parse_counts,
+        default=None,
+        help="Comma-separated worker process counts (default: powers of two up to the core count)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=parse_counts,
+        default=None,
+        help="Comma-separated threads per worker (default: powers of two up to the core count)",
+    )
+    parser.add_argument("--runs", type=int, default=50, help="Timed inferences per worker")
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=None,
+        help="Fixed warmup iterations. Omit to warm up until latency stabilizes.",
+    )
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per inference call")
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    unsupported = [b for b in args.backends if b not in CPU_BACKENDS]
+    if unsupported:
+        parser.error(f"scaling runs on CPU only; unsupported backend(s): {', '.join(unsupported)}")
+
+    cores = available_cores()
+    workers = args.workers or powers_of_two(len(cores))
+    threads = args.threads or powers_of_two(len(cores))
+    grid = scaling_grid(workers, threads, len(cores))
+    skipped = [(w, t) for w in workers for t in threads if w * t > len(cores)]
+
+    print("=== Vision Benchmarks: CPU Thread Scaling ===")
+    print(f"Cores available: {len(cores)} | Backends: {', '.join(args.backends)}")
+    print(f"Grid (workers x threads): {', '.join(f'{w}x{t}' for w, t in grid)}")
+    if skipped:
+        print(f"Skipping oversubscribed cells: {', '.join(f'{w}x{t}' for w, t in skipped)}")
+
+    target_models = [args.model] if args.model else list(MODELS.keys())
+    paths = {name: resolve_model_path(name) for name in target_models}
+
+    # Export once up front so workers never race to export the same artifact
+    requests = []
+    for path in paths.values():
+        for backend in args.backends:
+            request = get_backend(backend)(path, batch_size=args.batch_size).export_request()
+            if request:
+                requests.append(request)
+    for request, outcome in export_many(requests):
+        if isinstance(outcome, Exception):
+            print(f"  Export failed for {request['model_path']} ({request['fmt']}): {outcome}")
+
+    corpus = corpus_from_args(args)
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
+    for name, path in paths.items():
+        for backend in args.backends:
+            rows = run_scaling(
+                path, grid, cores, backend, args.warmup, args.runs, args.batch_size, corpus
+            )
+            for row in rows:
+                record = scaling_record(name, backend, row, run_id, args.batch_size, args.runs)
+                store.append(record)
+                records.append(record)
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_scaling_results(records)
+
+
+if __name__ == "__main__":
+    main()
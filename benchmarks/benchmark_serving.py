@@ -0,0 +1,283 @@
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_scaling import parse_counts
+from benchmarks.benchmark_video import source_label
+from benchmarks.benchmark_yolo import ORT_BACKENDS, default_device, resolve_model_path
+from utils.backends import ORT_OPT_LEVELS, get_backend
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.serving import simulate
+from utils.stats import summarize
+from utils.video import open_stream
+
+SERVING_COLUMNS = [
+    ("Streams", lambda r: r["cell"]["streams"], "d"),
+    ("Offered FPS", lambda r: r["metrics"]["offered_fps"], ".1f"),
+    ("Served FPS", lambda r: r["metrics"]["fps"], ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Worst Stream p99 (ms)", lambda r: r["metrics"]["worst_stream_p99"], ".2f"),
+    ("Queue Wait p99 (ms)", lambda r: r["metrics"]["queue_wait"]["p99"], ".2f"),
+    ("Mean Batch", lambda r: r["metrics"]["mean_batch"], ".2f"),
+    ("Queue Depth (mean/max)", lambda r: _queue_depth(r), ""),
+    ("Dropped", lambda r: r["metrics"]["dropped"], "d"),
+    ("Drop Rate", lambda r: r["metrics"]["drop_rate"], ".1%"),
+    ("SLO", lambda r: "pass" if r["metrics"]["meets_slo"] else "FAIL", ""),
+]
+
+
+def _queue_depth(r):
+    depth = r["metrics"]["queue_depth"]
+    return f"{depth['mean']:.1f} / {depth['max']}"
+
+
+def load_frames(source, count):
+    """Read ``count`` frames from ``source`` into memory; streams cycle through them."""
+    cap = open_stream(source)
+    frames = []
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise OSError(f"No frames could be read from {source!r}")
+    return frames
+
+
+def meets_slo(metrics, slo_ms, max_drop_rate):
+    """Every stream's p99 within ``slo_ms`` and at most ``max_drop_rate`` of frames dropped."""
+    return metrics["worst_stream_p99"] <= slo_ms and metrics["drop_rate"] <= max_drop_rate
+
+
+def max_sustained_streams(records):
+    """Largest stream count before the first SLO breach, or 0 if the smallest already breaks it."""
+    sustained = 0
+    for r in sorted(records, key=lambda r: r["cell"]["streams"]):
+        if not r["metrics"]["meets_slo"]:
+            break
+        sustained = r["cell"]["streams"]
+    return sustained
+
+
+def serving_record(result, cell, config, slo_ms, max_drop_rate, run_id=None):
+    """Results-store record for one load level."""
+    latencies = [ms for values in result.latency_ms.values() for ms in values]
+    stream_p99 = result.stream_p99()
+    depths = result.queue_depths or [0]
+    metrics = {
+        **summarize(latencies),
+        "fps": result.throughput,
+        "offered_fps": result.streams * result.fps,
+        "stream_p99": [stream_p99[s] for s in range(result.streams)],
+        "worst_stream_p99": max(stream_p99.values()),
+        "queue_wait": summarize(result.queue_ms),
+        "queue_depth": {"mean": float(np.mean(depths)), "max": int(max(depths))},
+        "mean_batch": float(np.mean(result.batch_sizes)),
+        "batch_ms": summarize(result.batch_ms),
+        "offered": result.offered,
+        "dropped": sum(result.dropped.values()),
+        "drop_rate": result.drop_rate,
+    }
+    metrics["meets_slo"] = meets_slo(metrics, slo_ms, max_drop_rate)
+    return make_record(
+        "serving",
+        cell={**cell, "streams": result.streams},
+        metrics=metrics,
+        config={**config, "slo_ms": slo_ms, "max_drop_rate": max_drop_rate},
+        latencies=latencies,
+        run_id=run_id,
+    )
+
+
+def write_serving_results(records, path="results/serving_results.md"):
+    """Render the load table and the sustained stream count for ``records`` (one run)."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Multi-Stream Serving Benchmarks\n\n")
+        if records:
+            cell, config = records[0]["cell"], records[0]["config"]
+            f.write(render_environment(records[0]))
+            f.write(
+                f"**Model:** {cell['model']} ({cell['format']}) | **Source:** {cell['source']} | "
+                f"**Per-stream FPS:** {cell['stream_fps']:g} | "
+                f"**Micro-batching:** max batch {cell['max_batch']}, "
+                f"max delay {cell['max_delay_ms']:g} ms, queue {config['max_queue']}\n\n"
+            )
+        f.write(render_table(records, SERVING_COLUMNS) + "\n")
+        if records:
+            config = records[0]["config"]
+            f.write(
+                f"\n**Sustained streams:** {max_sustained_streams(records)} "
+                f"(SLO: every stream p99 <= {config['slo_ms']:g} ms, "
+                f"drop rate <= {config['max_drop_rate']:.1%})\n"
+            )
+        f.write(
+            "\nLatency runs from a frame's scheduled arrival to the end of its batch's "
+            "inference, so it includes queueing and batching delay. Frames that arrive while "
+            "the server queue is full are dropped. Queue depth is sampled each time a batch "
+            "is formed.\n"
+        )
+    print(f"\nResults saved to {path}")
+
+
+def serving_options(args):
+    """Backend options for variable-size micro-batches; rejects static-shape backends.
+
+    TorchScript and TensorRT run exports traced at one fixed batch size, so partial
+    batches would fail. ONNX Runtime backends use a dynamic-batch export instead.
+    """
+    if args.backend in ORT_BACKENDS:
+        return {
+            "dynamic": True,
+            "opt_level": args.ort_opt_level,
+            "intra_op_threads": args.intra_op_threads,
+        }
+    if args.backend != "pytorch":
+        raise ValueError(
+            f"--backend {args.backend} runs a static-batch export and cannot serve partial "
+            f"micro-batches; use pytorch or one of {', '.join(ORT_BACKENDS)}"
+        )
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Multi-stream serving benchmark: N simulated cameras sharing one "
+        "micro-batching inference server"
+    )
+    parser.add_argument("--model", type=str, default="yolo11n")
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="pytorch",
+        help=f"pytorch or one of {', '.join(ORT_BACKENDS)} (variable batch sizes)",
+    )
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="synthetic:720p",
+        help="Frames every stream replays: video file, clip directory or synthetic[:WxH]",
+    )
+    parser.add_argument("--source-frames", type=int, default=16, help="Frames kept in memory")
+    parser.add_argument(
+        "--streams", type=parse_counts, default=[1, 2, 4, 8], help="Stream counts, e.g. 1,2,4,8"
+    )
+    parser.add_argument("--stream-fps", type=float, default=15.0, help="Frames/s per stream")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per load level")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument(
+        "--max-queue-delay",
+        type=float,
+        default=10.0,
+        help="Dispatch a partial batch once its oldest frame has waited this many ms",
+    )
+    parser.add_argument(
+        "--max-queue", type=int, default=None, help="Waiting frames before dropping (2 batches)"
+    )
+    parser.add_argument("--slo-ms", type=float, default=100.0, help="Per-stream p99 latency SLO")
+    parser.add_argument("--max-drop-rate", type=float, default=0.01)
+    parser.add_argument(
+        "--keep-going", action="store_true", help="Run every stream count after an SLO breach"
+    )
+    parser.add_argument("--ort-opt-level", choices=ORT_OPT_LEVELS, default="all")
+    parser.add_argument("--intra-op-threads", type=int, default=0)
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    args = parser.parse_args()
+    device = args.device or default_device()
+
+    try:
+        options = serving_options(args)
+    except ValueError as e:
+        parser.error(str(e))
+    frames = load_frames(args.source, args.source_frames)
+    height, width = frames[0].shape[:2]
+
+    print("=== Vision Benchmarks: Multi-Stream Serving ===")
+    print(f"Source: {args.source} ({width}x{height}) | Streams: {args.streams}")
+    runtime = get_backend(args.backend)(
+        resolve_model_path(args.model),
+        device=device,
+        imgsz=args.imgsz,
+        batch_size=args.max_batch_size,
+        **options,
+    )
+    runtime.load()
+    print("Warming up...")
+    runtime.warmup(frames[: args.max_batch_size])
+    runtime.warmup(frames[:1])
+
+    cell = {
+        "model": args.model,
+        "backend": args.backend,
+        "format": runtime.format_name,
+        "device": device,
+        "source": source_label(args.source),
+        "stream_fps": args.stream_fps,
+        "max_batch": args.max_batch_size,
+        "max_delay_ms": args.max_queue_delay,
+    }
+    config = {
+        "imgsz": args.imgsz,
+        "resolution": f"{width}x{height}",
+        "duration": args.duration,
+        "max_queue": args.max_queue or 2 * args.max_batch_size,
+    }
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
+    try:
+        for streams in args.streams:
+            print(f"\n{streams} stream(s) x {args.stream_fps:g} FPS for {args.duration:g}s...")
+            result = simulate(
+                runtime.infer,
+                frames,
+                streams,
+                fps=args.stream_fps,
+                duration=args.duration,
+                max_batch_size=args.max_batch_size,
+                max_queue_delay_ms=args.max_queue_delay,
+                max_queue=args.max_queue,
+            )
+            if not result.completed:
+                print("Error: no frames were served.")
+                break
+            record = serving_record(result, cell, config, args.slo_ms, args.max_drop_rate, run_id)
+            store.append(record)
+            records.append(record)
+            m = record["metrics"]
+            print(
+                f"  Served {m['fps']:.2f}/{m['offered_fps']:.1f} FPS | p99 {m['p99']:.2f} ms | "
+                f"worst stream p99 {m['worst_stream_p99']:.2f} ms | batch {m['mean_batch']:.2f} | "
+                f"dropped {m['dropped']} ({m['drop_rate']:.1%})"
+            )
+            if not m["meets_slo"]:
+                print(f"  SLO breached at {streams} stream(s)")
+                if not args.keep_going:
+                    break
+    finally:
+        runtime.close()
+
+    print(f"\nSustained streams within SLO: {max_sustained_streams(records)}")
+    print(f"Run {run_id} saved to {args.store}")
+    write_serving_results(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from importlib import import_module
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Probe processes import this module, so it must not pull in torch or ultralytics
+from benchmarks.benchmark_yolo import MODELS, backend_options, resolve_model_path
+from utils.backends import ORT_OPT_LEVELS, get_backend, imgsz_hw, imgsz_label, parse_backends
+from utils.postprocess import NMS_METHODS
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Stdout line carrying the probe's measurements back to the parent
+RESULT_MARKER = "STARTUP_RESULT "
+
+# Warmup has settled once calls are within this fraction of the steady-state median
+SETTLE_TOLERANCE = 0.2
+SETTLE_WINDOW = 5
+
+PROBE = (
+    "import time; t_start = time.perf_counter(); import sys; sys.path.insert(0, {root!r}); "
+    "from benchmarks.benchmark_startup import probe; probe(t_start, {config!r})"
+)
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+STARTUP_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("Interpreter (ms)", lambda r: r["metrics"]["interpreter_ms"], ".0f"),
+    ("Imports (ms)", lambda r: r["metrics"]["import_ms"], ".0f"),
+    ("Weight Load (ms)", lambda r: r["metrics"]["load_ms"], ".0f"),
+    ("First Inference (ms)", lambda r: r["metrics"]["first_inference_ms"], ".1f"),
+    ("Steady Latency (ms)", lambda r: r["metrics"]["steady_ms"], ".1f"),
+    ("Settle (ms)", lambda r: r["metrics"]["settle_ms"], ".0f"),
+    ("First Result (ms)", lambda r: r["metrics"]["time_to_first_result_ms"], ".0f"),
+    ("Steady State (ms)", lambda r: r["metrics"]["time_to_steady_ms"], ".0f"),
+]
+
+IMPORT_COLUMNS = [
+    ("Format", lambda row: row["format"], ""),
+    ("Package", lambda row: row["package"], ""),
+    ("Import (ms)", lambda row: row["ms"], ".0f"),
+    ("Share", lambda row: row["share"], ".0%"),
+]
+
+
+def parse_importtime(text):
+    """Entries of ``python -X importtime`` output as ``(module, self_us, cumulative_us, depth)``."""
+    entries = []
+    for line in text.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            entries.append((module, int(own), int(cumulative), (len(indent) - 1) // 2))
+    return entries
+
+
+def import_breakdown(entries, top=8):
+    """Import time in ms per top-level package (own module time only), largest first.
+
+    Packages past ``top`` are folded into "other".
+    """
+    totals = {}
+    for module, own, _, _ in entries:
+        package = module.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + own / 1000
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+    breakdown = dict(ranked[:top])
+    if len(ranked) > top:
+        breakdown["other"] = sum(ms for _, ms in ranked[top:])
+    return breakdown
+
+
+def settle_point(latencies, steady, tolerance=SETTLE_TOLERANCE, window=SETTLE_WINDOW):
+    """Index of the first call that, like the median of the ``window`` calls from it,
+    is within ``tolerance`` of ``steady``; ``len(latencies)`` if none is.
+
+    The median keeps one fast call amid a slow warmup from ending it early, and
+    later noise from stretching it.
+    """
+    limit = steady * (1 + tolerance)
+    for i, ms in enumerate(latencies):
+        if ms <= limit and np.median(latencies[i : i + window]) <= limit:
+            return i
+    return len(latencies)
+
+
+def probe(t_start, config):
+    """Probe process body: time imports, load, first call and warmup of one backend.
+
+    ``t_start`` is the ``time.perf_counter()`` reading taken as the interpreter
+    runs its first statement. Prints one :data:`RESULT_MARKER` line of JSON.
+    """
+    config = json.loads(config)
+    runtime = get_backend(config["backend"])(
+        config["model"], device=config["device"], imgsz=config["imgsz"], **config["options"]
+    )
+    for name in runtime.frameworks:
+        import_module(name)
+    t_imports = time.perf_counter()
+    runtime.load()
+    t_loaded = time.perf_counter()
+
+    batch = [np.zeros((*imgsz_hw(config["imgsz"]), 3), dtype=np.uint8)]
+    runtime.infer(batch)
+    t_first = time.perf_counter()
+    warmup = runtime.warmup(batch)
+    t_warm = time.perf_counter()
+    steady = []
+    for _ in range(config["runs"]):
+        t0 = time.perf_counter()
+        runtime.infer(batch)
+        steady.append((time.perf_counter() - t0) * 1000)
+    runtime.close()
+
+    result = {
+        "t_start": t_start,
+        "t_imports": t_imports,
+        "t_loaded": t_loaded,
+        "t_first": t_first,
+        "t_warm": t_warm,
+        "warmup": warmup,
+        "steady": steady,
+        "format": runtime.format_name,
+    }
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def startup_metrics(t_spawn, result, imports):
+    """Phase timings in ms of one probe started at ``t_spawn`` (parent clock).
+
+    ``perf_counter`` is system-wide on Linux, macOS and Windows, so the parent's
+    spawn time and the child's readings share one clock.
+    """
+    steady = float(np.median(result["steady"]))
+    # The first call is timed on its own; warmup calls follow until the median settles
+    warmup = result["warmup"]
+    settled = settle_point(warmup, steady)
+    settle_ms = float(sum(warmup[:settled]))
+    first_ms = (result["t_first"] - result["t_loaded"]) * 1000
+    return {
+        "interpreter_ms": (result["t_start"] - t_spawn) * 1000,
+        "import_ms": (result["t_imports"] - result["t_start"]) * 1000,
+        "load_ms": (result["t_loaded"] - result["t_imports"]) * 1000,
+        "first_inference_ms": first_ms,
+        "first_call_overhead_ms": first_ms - steady,
+        "steady_ms": steady,
+        "settle_ms": settle_ms,
+        "settle_iters": settled,
+        "warmup_iters": len(warmup),
+        "time_to_first_result_ms": (result["t_first"] - t_spawn) * 1000,
+        "time_to_steady_ms": (result["t_first"] - t_spawn) * 1000 + settle_ms,
+        "imports": import_breakdown(imports),
+    }
+
+
+def run_probe(model, backend, imgsz=640, device="cpu", options=None, runs=20, timeout=900):
+    """Start a fresh interpreter that loads ``backend`` and runs it; return its metrics.
+
+    The exported artifact should already be in the export cache, so the probe
+    times loading it, not exporting it.
+    """
+    config = {
+        "model": model,
+        "backend": backend,
+        "imgsz": imgsz,
+        "device": device,
+        "options": options or {},
+        "runs": runs,
+    }
+    code = PROBE.format(root=str(ROOT), config=json.dumps(config))
+    t_spawn = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        cwd=Path.cwd(),
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if proc.returncode or not lines:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"probe exited with {proc.returncode}: {' | '.join(errors[-3:])}")
+    result = json.loads(lines[-1][len(RESULT_MARKER) :])
+    metrics = startup_metrics(t_spawn, result, parse_importtime(proc.stderr))
+    return result["format"], metrics
+
+
+def summarize_probes(probes):
+    """Median of every phase over repeated probes; the import breakdown of the median run."""
+    keys = [k for k in probes[0] if k != "imports"]
+    summary = {k: float(np.median([p[k] for p in probes])) for k in keys}
+    median_run = sorted(probes, key=lambda p: p["time_to_first_result_ms"])[len(probes) // 2]
+    summary["imports"] = median_run["imports"]
+    return summary
+
+
+def startup_record(name, backend, fmt, device, imgsz, probes, run_id=None):
+    """Results-store record for one model/backend: median phases over ``probes``."""
+    cell = {"model": name, "backend": backend, "format": fmt, "device": device}
+    if imgsz_label(imgsz) != 640:
+        cell["imgsz"] = imgsz_label(imgsz)
+    return make_record(
+        "startup",
+        cell=cell,
+        metrics=summarize_probes(probes),
+        config={"repeats": len(probes)},
+        latencies=[p["time_to_first_result_ms"] for p in probes],
+        run_id=run_id,
+    )
+
+
+def import_rows(records, top=5):
+    """Largest import costs of every record, for the import breakdown table."""
+    rows = []
+    for r in records:
+        imports = r["metrics"]["imports"]
+        total = sum(imports.values())
+        for package, ms in list(imports.items())[:top]:
+            rows.append(
+                {"format": r["cell"]["format"], "package": package, "ms": ms, "share": ms / total}
+            )
+    return rows
+
+
+def write_startup_results(records, path="results/startup_results.md"):
+    """Render the startup phase table and the import breakdown."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Startup Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            f.write(f"**Probes per cell:** {records[0]['config']['repeats']} (median)\n\n")
+        f.write(render_table(records, STARTUP_COLUMNS) + "\n")
+        f.write(
+            "\nEvery probe is a fresh interpreter. Interpreter runs from spawn to the first "
+            "statement. Imports covers the harness and the backend's frameworks, and Weight "
+            "Load covers `load()` of an already exported artifact. Settle is the time warmup "
+            "calls take until latency is within 20% of the steady median. First Result and "
+            "Steady State are measured from spawn.\n"
+        )
+        rows = import_rows(records)
+        if rows:
+            f.write("\n## Import Time by Package\n\n")
+            f.write(render_table(rows, IMPORT_COLUMNS) + "\n")
+            f.write(
+                "\nOwn module execution time from `python -X importtime` over the whole probe, "
+                "summed per top-level package. It includes modules imported lazily during "
+                "`load()` and the first call, and the tracing overhead of `-X importtime`.\n"
+            )
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cold-start benchmark: interpreter, imports, weight load, first inference"
+    )
+    parser.add_argument(
+        "--model", type=str, help="Specific model to benchmark (e.g. yolo11n). Omit to run all."
+    )
+    parser.add_argument(
+        "--backends",
+        type=parse_backends,
+        default=["pytorch", "onnxruntime"],
+        help="Comma-separated backends, e.g. pytorch,onnxruntime,onnxruntime_int8",
+    )
+    parser.add_argument("--device", type=str, default="cpu", help="Inference device")
+    parser.add_argument("--imgsz", type=int, default=640, help="Model input size")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh processes per cell")
+    parser.add_argument("--runs", type=int, default=20, help="Steady-state calls per probe")
+    parser.add_argument(
+        "--ort-opt-level",
+        choices=ORT_OPT_LEVELS,
+        default="all",
+        help="ONNX Runtime graph optimization level",
+    )
+    parser.add_argument(
+        "--intra-op-threads", type=int, default=0, help="ONNX Runtime intra-op threads (0=auto)"
+    )
+    parser.add_argument(
+        "--inter-op-threads", type=int, default=0, help="ONNX Runtime inter-op threads (0=auto)"
+    )
+    parser.add_argument(
+        "--ort-nms",
+        choices=NMS_METHODS,
+        default="numpy",
+        help="ONNX Runtime postprocessing: NumPy, torchvision or ultralytics NMS",
+    )
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    args = parser.parse_args()
+
+    print("=== Vision Benchmarks: Startup ===")
+    target_models = [args.model] if args.model else list(MODELS.keys())
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
+    for name in target_models:
+        path = resolve_model_path(name)
+        for backend in args.backends:
+            options = backend_options(args, backend)
+            try:
+                # Export (or quantize) up front: probes time loading the artifact
+                get_backend(backend)(
+                    path, device=args.device, imgsz=args.imgsz, **options
+                ).artifact_path()
+                probes = []
+                for i in range(args.repeats):
+                    fmt, metrics = run_probe(
+                        path, backend, args.imgsz, args.device, options, args.runs
+                    )
+                    probes.append(metrics)
+                    print(
+                        f"  {name} {backend} #{i + 1}: first result "
+                        f"{metrics['time_to_first_result_ms']:.0f} ms (imports "
+                        f"{metrics['import_ms']:.0f}, load {metrics['load_ms']:.0f}, first call "
+                        f"{metrics['first_inference_ms']:.1f}) | steady after "
+                        f"{metrics['time_to_steady_ms']:.0f} ms"
+                    )
+            except Exception as e:
+                print(f"  {backend} startup benchmark failed for {name}: {e}")
+                continue
+            record = startup_record(name, backend, fmt, args.device, args.imgsz, probes, run_id)
+            store.append(record)
+            records.append(record)
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_startup_results(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_accuracy import (
+    accuracy_record,
+    benchmark_accuracy,
+    benchmark_accuracy_cached,
+    write_accuracy_results,
+)
+from benchmarks.benchmark_yolo import (
+    MODELS,
+    ORT_BACKENDS,
+    benchmark_model,
+    default_device,
+    parse_batch_sizes,
+    precision_options,
+    resolve_model_path,
+    speed_record,
+    write_speed_results,
+)
+from utils.backends import get_backend, parse_backends
+from utils.export_cache import export_many
+from utils.results_store import ResultsStore, new_run_id
+from utils.scheduler import Cell, Checkpoint, Scheduler, parse_cores, python_command
+
+PRECISIONS = ("fp32", "fp16")
+
+
+def parse_precisions(value):
+    """Parse "fp32,fp16" into a list of precisions."""
+    names = [v.strip().lower() for v in value.split(",") if v.strip()]
+    for name in names:
+        if name not in PRECISIONS:
+            raise argparse.ArgumentTypeError(f"unknown precision {name!r}, expected {PRECISIONS}")
+    return names
+
+
+def build_cells(models, backends, precisions, batch_sizes, device, accuracy_data=None):
+    """Expand the sweep matrix into cells.
+
+    Accuracy cells come first so they can run in parallel; speed cells are
+    exclusive. FP16 and TensorRT cells are skipped on CPU.
+    """
+    cells = []
+    if accuracy_data:
+        for model in models:
+            params = {"kind": "accuracy", "model": model, "data": accuracy_data}
+            cells.append(Cell(f"accuracy/{model}/{accuracy_data}", params))
+    for model in models:
+        for backend in backends:
+            if backend == "tensorrt" and device == "cpu":
+                continue
+            for precision in precisions:
+                if precision == "fp16" and device == "cpu":
+                    continue
+                for bs in batch_sizes:
+                    params = {
+                        "kind": "speed",
+                        "model": model,
+                        "backend": backend,
+                        "precision": precision,
+                        "batch": bs,
+                    }
+                    cell_id = f"speed/{model}/{backend}/{precision}/b{bs}"
+                    cells.append(Cell(cell_id, params, exclusive=True))
+    return cells
+
+
+def cell_backend_options(params):
+    """Backend options of a cell: its own (INT8 calibration) plus ONNX Runtime thread limits."""
+    options = dict(params.get("options") or {})
+    if params.get("threads") and params["backend"] in ORT_BACKENDS:
+        options.update(intra_op_threads=params["threads"], inter_op_threads=1)
+    return options
+
+
+def run_cell(params, args):
+    """Body of one cell subprocess: benchmark and append the record to the store.
+
+    Cells from ``build_cells`` carry model, backend, precision and batch; config
+    cells (``utils.config``) add imgsz, threads, an accuracy engine and their
+    ``key``, which is stored in the record config so finished cells can be skipped.
+    """
+    store = ResultsStore(args.store)
+    config = {"cell_key": params["key"]} if params.get("key") else {}
+    imgsz = params.get("imgsz", 640)
+    imgsz = imgsz if isinstance(imgsz, int) else tuple(imgsz)
+    if params["kind"] == "accuracy":
+        if params.get("engine", "val") == "val":
+            r = benchmark_accuracy(MODELS.get(params["model"], params["model"]), params["data"])
+        else:
+            r = benchmark_accuracy_cached(
+                resolve_model_path(params["model"]),
+                params["data"],
+                backend=params["backend"],
+                imgsz=imgsz,
+                device=args.device,
+                backend_options=cell_backend_options(params),
+                half=params["precision"] == "fp16",
+            )
+        store.append(accuracy_record(r, args.run_id, **config))
+        return
+    if params.get("threads"):
+        if params["backend"] not in ORT_BACKENDS:
+            # ONNX Runtime sessions take their thread limits from cell_backend_options
+            import torch
+
+            torch.set_num_threads(params["threads"])
+        config["threads"] = params["threads"]
+    r = benchmark_model(
+        resolve_model_path(params["model"]),
+        device=args.device,
+        warmup=args.warmup,
+        runs=args.runs,
+        fp16=params["precision"] == "fp16",
+        batch_size=params["batch"],
+        backend=params["backend"],
+        backend_options=cell_backend_options(params),
+        imgsz=imgsz,
+    )
+    record = speed_record(params["model"], r, args.device, args.run_id, runs=args.runs, **config)
+    store.append(record)
+
+
+def prefetch_cell_exports(cells, device, max_workers=None):
+    """Export every artifact the pending cells need, concurrently, before the sweep.
+
+    INT8 cells are quantized here too (after their FP32 exports), so calibration
+    does not count against a cell's timeout.
+    """
+    requests, quantized = [], []
+    for cell in cells:
+        p = cell.params
+        if p["kind"] == "accuracy" and p.get("engine", "val") == "val":
+            continue
+        imgsz = p.get("imgsz", 640)
+        runtime = get_backend(p["backend"])(
+            resolve_model_path(p["model"]),
+            device=device,
+            batch_size=p.get("batch", 1),
+            **precision_options(p["precision"] == "fp16"),
+            imgsz=imgsz if isinstance(imgsz, int) else tuple(imgsz),
+            **cell_backend_options(p),
+        )
+        request = runtime.export_request()
+        if request and request not in requests:
+            requests.append(request)
+        if p["backend"] == "onnxruntime_int8":
+            quantized.append(runtime)
+    if requests:
+        print(f"Preparing {len(requests)} exported artifact(s)...")
+        for request, outcome in export_many(requests, max_workers=max_workers):
+            if isinstance(outcome, Exception):
+                print(f"  Export failed for {request['model_path']} ({request['fmt']}): {outcome}")
+    for runtime in quantized:
+        try:
+            runtime.artifact_path()
+        except Exception as e:
+            print(f"  Quantization failed for {runtime.model_path}: {e}")
+
+
+def cell_command(run_id, store, device, runs, warmup=None):
+    """Scheduler command running one cell in a fresh ``benchmark_sweep.py --cell`` process."""
+
+    def command(cell):
+        argv = ["--cell", json.dumps(cell.params), "--run-id", run_id, "--store", store]
+        argv += ["--device", device, "--runs", runs]
+        if warmup is not None:
+            argv += ["--warmup", warmup]
+        return python_command(Path(__file__).resolve(), *argv)
+
+    return command
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a benchmark sweep with every cell in a fresh subprocess"
+    )
+    parser.add_argument(
+        "--models", type=str, default=None, help="Comma-separated models (default: all)"
+    )
+    parser.add_argument("--backends", type=parse_backends, default=["pytorch"])
+    parser.add_argument("--precisions", type=parse_precisions, default=["fp32"])
+    parser.add_argument("--batch-sizes", type=parse_batch_sizes, default=[1])
+    parser.add_argument(
+        "--accuracy", type=str, default=None, help="Also evaluate mAP on this dataset yaml"
+    )
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=None)
+    parser.add_argument("--jobs", type=int, default=1, help="Concurrent shared (accuracy) cells")
+    parser.add_argument(
+        "--reserve-cores",
+        type=parse_cores,
+        default=None,
+        help="Pin speed cells to these cores (e.g. 0-7) and run shared cells on the rest",
+    )
+    parser.add_argument("--timeout", type=float, default=None, help="Per-cell timeout in seconds")
+    parser.add_argument(
+        "--resume", action="store_true", help="Skip cells the checkpoint records as finished"
+    )
+    parser.add_argument("--checkpoint", type=Path, default=Path("results/sweep_checkpoint.jsonl"))
+    parser.add_argument("--log-dir", type=Path, default=Path("results/sweep_logs"))
+    parser.add_argument("--export-workers", type=int, default=None)
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    # Internal: run a single cell (used by the scheduler's subprocesses)
+    parser.add_argument("--cell", type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--run-id", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.device = args.device or default_device()
+
+    if args.cell:
+        run_cell(json.loads(args.cell), args)
+        return
+
+    models = [m.strip() for m in args.models.split(",")] if args.models else list(MODELS)
+    cells = build_cells(
+        models, args.backends, args.precisions, args.batch_sizes, args.device, args.accuracy
+    )
+
+    checkpoint = Checkpoint(args.checkpoint)
+    skip = set()
+    run_id = checkpoint.run_id() if args.resume else None
+    if run_id:
+        skip = checkpoint.done()
+        print(f"Resuming sweep {run_id}: {len(skip)} of {len(cells)} cells already done")
+    else:
+        run_id = new_run_id()
+        checkpoint.start(run_id, {"cells": [c.id for c in cells]})
+
+    print("=== Vision Benchmarks: Sweep ===")
+    print(f"Run: {run_id} | Device: {args.device} | Cells: {len(cells)}")
+    pending = [c for c in cells if c.id not in skip]
+    prefetch_cell_exports(pending, args.device, args.export_workers)
+
+    scheduler = Scheduler(
+        cell_command(run_id, args.store, args.device, args.runs, args.warmup),
+        jobs=args.jobs,
+        reserved_cores=args.reserve_cores,
+        timeout=args.timeout,
+        checkpoint=checkpoint,
+        log_dir=args.log_dir,
+    )
+    outcomes = scheduler.run(cells, skip=skip)
+
+    store = ResultsStore(args.store)
+    speed = list(store.records("yolo_speed", run_id=run_id))
+    accuracy = list(store.records("yolo_accuracy", run_id=run_id))
+    if speed:
+        write_speed_results(speed)
+    if accuracy:
+        write_accuracy_results(accuracy, args.accuracy)
+
+    failed = [o for o in outcomes if o["status"] != "ok"]
+    print(f"\n{len(outcomes) - len(failed)} cell(s) ok, {len(failed)} failed or timed out")
+    for o in failed:
+        print(f"  {o['status']}: {o['cell']} (log: {args.log_dir})")
+    if failed:
+        print("Re-run with --resume to retry only the unfinished cells.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
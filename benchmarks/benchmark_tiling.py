@@ -0,0 +1,262 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_yolo import MODELS, parse_imgsz, resolve_model_path
+from utils.backends import get_backend, imgsz_label
+from utils.corpus import load_corpus
+from utils.evaluation import detection_f1, load_dataset
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.stats import summarize
+from utils.tiling import MERGE_IOU, TiledDetector
+
+# COCO "small" objects: ground-truth boxes under 32x32 px in the original image
+SMALL_AREA = 32**2
+
+TILING_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Mode", lambda r: r["cell"]["mode"], ""),
+    ("Tiles/Frame", lambda r: r["metrics"]["tiles"], ".1f"),
+    ("Frames/s", lambda r: r["metrics"]["fps"], ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Inference (ms)", lambda r: r["metrics"]["stages"]["inference"], ".2f"),
+    ("Merge (ms)", lambda r: r["metrics"]["stages"].get("merge"), ".2f"),
+    ("Detections/Frame", lambda r: r["metrics"]["detections"], ".1f"),
+    ("Recall", lambda r: r["metrics"]["recall"], ".3f"),
+    ("Small Recall", lambda r: r["metrics"]["small_recall"], ".3f"),
+    ("Single-Pass Kept", lambda r: r["metrics"]["single_pass_kept"], ".3f"),
+]
+
+
+def parse_overlaps(value):
+    """Parse "0.1,0.25" into overlap fractions in [0, 1)."""
+    overlaps = sorted({float(v) for v in value.split(",") if v.strip()})
+    if not overlaps or overlaps[0] < 0 or overlaps[-1] >= 1:
+        raise argparse.ArgumentTypeError(f"invalid overlaps: {value!r}")
+    return overlaps
+
+
+def load_frames(args):
+    """``(frames, ground_truth, label)``: frames from a labelled dataset or a corpus."""
+    if args.data:
+        images, labels, _ = load_dataset(args.data, split="val")
+        images = images[: args.frames] if args.frames else images
+        frames = []
+        for path in images:
+            frame = cv2.imread(str(path))
+            if frame is None:
+                raise OSError(f"Cannot read image {path}")
+            frames.append(frame)
+        truth = [np.column_stack(labels.image(i)).astype(np.float32) for i in range(len(frames))]
+        return frames, truth, args.data
+    corpus = load_corpus(args.source, args.resolutions, args.frames)
+    return [corpus[i] for i in range(len(corpus))], None, corpus.name
+
+
+def small_objects(truth):
+    """Ground-truth rows under :data:`SMALL_AREA` px, per image."""
+    return [t[(t[:, 2] - t[:, 0]) * (t[:, 3] - t[:, 1]) < SMALL_AREA] for t in truth]
+
+
+def time_detector(detector, frames, runs=1, warmup=2):
+    """Per-frame latencies over ``runs`` passes, first-pass detections, mean tiles and stage ms."""
+    for frame in frames[:warmup]:
+        detector.infer([frame])
+    latencies, outputs, tiles = [], [], []
+    stages = {}
+    for run in range(runs):
+        for frame in frames:
+            t0 = time.perf_counter()
+            dets = detector.infer([frame])[0]
+            latencies.append((time.perf_counter() - t0) * 1000)
+            for name, ms in (detector.stage_ms or {}).items():
+                stages.setdefault(name, []).append(ms)
+            tiles.append(getattr(detector, "tiles", 1))
+            if run == 0:
+                outputs.append(dets)
+    return (
+        latencies,
+        outputs,
+        float(np.mean(tiles)),
+        {k: float(np.mean(v)) for k, v in stages.items()},
+    )
+
+
+def tiling_record(model, mode, latencies, outputs, tiles, stages, truth, single, config, run_id):
+    """Results-store record for one single-pass or tiling configuration."""
+    stats = summarize(latencies)
+    metrics = {
+        **stats,
+        "fps": 1000 / stats["mean"],
+        "tiles": tiles,
+        "stages": stages,
+        "detections": sum(len(d) for d in outputs) / len(outputs),
+        "recall": None,
+        "small_recall": None,
+        "single_pass_kept": None,
+    }
+    if truth is not None:
+        metrics["recall"] = detection_f1(outputs, truth)["recall"]
+        small = small_objects(truth)
+        if sum(len(s) for s in small):
+            metrics["small_recall"] = detection_f1(outputs, small)["recall"]
+    if single is not None:
+        metrics["single_pass_kept"] = detection_f1(outputs, single)["recall"]
+    return make_record(
+        "tiling",
+        cell={"model": model, "mode": mode, "source": config["source"]},
+        metrics=metrics,
+        config=config,
+        latencies=latencies,
+        run_id=run_id,
+    )
+
+
+def write_tiling_results(records, path="results/tiling_results.md"):
+    """Render the single-pass vs tiling table for ``records`` (one run)."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Tiled Inference Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            config = records[0]["config"]
+            f.write(
+                f"**Source:** {config['source']} ({config['resolutions']}) | "
+                f"**Backend:** {config['backend']} | **conf:** {config['conf']} | "
+                f"**Merge IoU:** {config['merge_iou']}\n\n"
+            )
+        f.write(render_table(records, TILING_COLUMNS) + "\n")
+        f.write(
+            "\nTiled modes run every overlapping tile of a frame as one batch at native "
+            "resolution and merge the results with class-wise NMS across tiles; `+ full` "
+            "adds the whole frame, letterboxed, to the batch. Latency is per frame. Recall is "
+            "against the dataset labels at IoU 0.5 (small: labels under 32x32 px). "
+            "Single-Pass Kept is the share of single-pass detections the mode also finds.\n"
+        )
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tiled high-resolution inference vs single-pass: throughput and recall"
+    )
+    parser.add_argument("--model", type=str, default="yolo11n", help="Model to benchmark")
+    parser.add_argument(
+        "--backend", choices=("pytorch", "onnxruntime"), default="onnxruntime", help="Runtime"
+    )
+    parser.add_argument("--device", type=str, default="cpu", help="Inference device")
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="synthetic:8",
+        help="Frames without labels: synthetic[:N], dir:PATH or video:PATH",
+    )
+    parser.add_argument("--resolutions", type=str, default="1080p,4k", help="Synthetic frame sizes")
+    parser.add_argument(
+        "--data", type=str, default=None, help="Labelled dataset yaml (val split) for recall"
+    )
+    parser.add_argument("--frames", type=int, default=None, help="Maximum frames to use")
+    parser.add_argument(
+        "--imgsz", type=parse_imgsz, default=[640], help="Single-pass input size, square or WxH"
+    )
+    parser.add_argument(
+        "--tiles", type=parse_imgsz, default=[640], help="Tile sizes, square or WxH"
+    )
+    parser.add_argument(
+        "--overlaps", type=parse_overlaps, default=[0.1, 0.25], help="Tile overlap fractions"
+    )
+    parser.add_argument(
+        "--full-frame", action="store_true", help="Add the whole frame to every tile batch"
+    )
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold")
+    parser.add_argument("--merge-iou", type=float, default=MERGE_IOU, help="Cross-tile NMS IoU")
+    parser.add_argument("--runs", type=int, default=1, help="Timed passes over the frames")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed frames per mode")
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    args = parser.parse_args()
+
+    model_path = resolve_model_path(args.model)
+    model = args.model if args.model in MODELS else Path(model_path).stem
+    frames, truth, source = load_frames(args)
+    resolutions = sorted({f"{f.shape[1]}x{f.shape[0]}" for f in frames})
+    print("=== Vision Benchmarks: Tiled Inference ===")
+    print(f"Model: {model_path} | Backend: {args.backend} | Frames: {len(frames)} ({source})")
+
+    # Tiles of all sizes share one batch, so ONNX Runtime needs a dynamic-shape export
+    options = {"dynamic": True} if args.backend == "onnxruntime" else {}
+    modes = [(f"single {imgsz_label(s)}", s, None) for s in args.imgsz]
+    modes += [
+        (f"tiles {imgsz_label(t)} @ {o:.0%}" + (" + full" if args.full_frame else ""), t, o)
+        for t in args.tiles
+        for o in args.overlaps
+    ]
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records, single = [], None
+    for mode, imgsz, overlap in modes:
+        print(f"\n--- {mode} ---")
+        runtime = get_backend(args.backend)(
+            model_path, device=args.device, imgsz=imgsz, conf=args.conf, **options
+        )
+        with runtime:
+            detector = runtime
+            if overlap is not None:
+                detector = TiledDetector(runtime, imgsz, overlap, args.full_frame, args.merge_iou)
+            latencies, outputs, tiles, stages = time_detector(
+                detector, frames, args.runs, args.warmup
+            )
+        config = {
+            "source": source,
+            "resolutions": ", ".join(resolutions),
+            "backend": args.backend,
+            "imgsz": imgsz_label(imgsz),
+            "overlap": overlap,
+            "full_frame": args.full_frame and overlap is not None,
+            "conf": args.conf,
+            "merge_iou": args.merge_iou,
+            "runs": args.runs,
+            "device": args.device,
+        }
+        record = tiling_record(
+            model,
+            mode,
+            latencies,
+            outputs,
+            tiles,
+            stages,
+            truth,
+            single if overlap is not None else None,
+            config,
+            run_id,
+        )
+        if overlap is None and single is None:
+            single = outputs
+        m = record["metrics"]
+        print(
+            f"{m['fps']:.2f} frames/s | p50 {m['p50']:.1f} ms | {tiles:.1f} tiles/frame | "
+            f"{m['detections']:.1f} detections/frame"
+        )
+        store.append(record)
+        records.append(record)
+
+    print(f"\nRun {run_id} saved to {args.store}")
+    write_tiling_results(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import multiprocessing
+import queue
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Spawned workers import this module, so it must not pull in torch or ultralytics
+from benchmarks.benchmark_scaling import parse_counts
+from utils.corpus import parse_resolutions
+from utils.pipeline import letterbox_into
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.shm_ring import FrameRing
+from utils.stats import summarize
+from utils.video import SyntheticCapture
+
+TRANSPORTS = ("shm", "queue")
+WORKLOADS = ("none", "touch", "letterbox")
+
+TRANSPORT_COLUMNS = [
+    ("Transport", lambda r: r["cell"]["transport"], ""),
+    ("Resolution", lambda r: r["cell"]["resolution"], ""),
+    ("Workers", lambda r: r["cell"]["workers"], "d"),
+    ("Frames/s", lambda r: r["metrics"]["fps"], ".1f"),
+    ("MB/s", lambda r: r["metrics"]["mb_per_s"], ".0f"),
+    ("Handoff p50 (ms)", lambda r: r["metrics"]["p50"], ".3f"),
+    ("Handoff p99 (ms)", lambda r: r["metrics"]["p99"], ".3f"),
+    ("Producer CPU/frame (ms)", lambda r: r["metrics"]["producer_cpu_ms"], ".3f"),
+    ("Worker CPU/frame (ms)", lambda r: r["metrics"]["worker_cpu_ms"], ".3f"),
+    ("Total CPU/frame (ms)", lambda r: r["metrics"]["cpu_ms"], ".3f"),
+]
+
+COMPARISON_COLUMNS = [
+    ("Resolution", lambda c: c["resolution"], ""),
+    ("Workers", lambda c: c["workers"], "d"),
+    ("Queue Frames/s", lambda c: c["queue"]["fps"], ".1f"),
+    ("Shm Frames/s", lambda c: c["shm"]["fps"], ".1f"),
+    ("Throughput Gain", lambda c: c["shm"]["fps"] / c["queue"]["fps"], ".2f"),
+    ("CPU Saved/frame (ms)", lambda c: c["queue"]["cpu_ms"] - c["shm"]["cpu_ms"], ".3f"),
+]
+
+
+def parse_transports(value):
+    """Parse "shm,queue" into a list of transports."""
+    names = [v.strip().lower() for v in value.split(",") if v.strip()]
+    for name in names:
+        if name not in TRANSPORTS:
+            raise argparse.ArgumentTypeError(f"unknown transport {name!r}, expected {TRANSPORTS}")
+    return names
+
+
+def make_work(name, imgsz=640):
+    """Per-frame worker function standing in for inference preprocessing."""
+    if name == "none":
+        return lambda frame: None
+    if name == "touch":
+        # Read one byte per 4 KiB page, so every page of the frame is faulted in
+        return lambda frame: int(frame.reshape(-1)[::4096].sum())
+    canvas = np.empty((imgsz, imgsz, 3), dtype=np.uint8)
+    return lambda frame: letterbox_into(frame, canvas)
+
+
+def _worker_loop(next_frame, done, work, barrier, results):
+    """Consume frames until end of stream; report handoff latencies and CPU time."""
+    work = make_work(work)
+    barrier.wait()
+    cpu0 = time.process_time()
+    handoff = []
+    while (item := next_frame()) is not None:
+        _, frame, t_publish = item
+        handoff.append((time.perf_counter() - t_publish) * 1000)
+        work(frame)
+        done()
+    results.put({"handoff": handoff, "cpu": time.process_time() - cpu0})
+
+
+def _shm_worker(ring, work, barrier, results):
+    def next_frame():
+        return ring.get(timeout=60)
+
+    try:
+        _worker_loop(next_frame, ring.release, work, barrier, results)
+    finally:
+        ring.detach()
+
+
+def _queue_worker(frames, work, barrier, results):
+    _worker_loop(lambda: frames.get(timeout=60), lambda: None, work, barrier, results)
+
+
+def _produce_shm(cap, rings, frames):
+    """Decode straight into a free slot of the next worker's ring, round robin."""
+    for seq in range(frames):
+        for k in range(len(rings)):
+            ring = rings[(seq + k) % len(rings)]
+            slot = ring.acquire(block=False)
+            if slot is not None:
+                break
+        else:  # every ring is full: wait on this frame's round-robin worker
+            ring = rings[seq % len(rings)]
+            slot = ring.acquire()
+        cap.read(slot)
+        ring.publish(seq, time.perf_counter())
+    for ring in rings:
+        ring.close()
+
+
+def _produce_queue(cap, frames_queue, frames, workers):
+    """Decode into a fresh frame and pickle it through the shared queue."""
+    for seq in range(frames):
+        _, frame = cap.read()
+        frames_queue.put((seq, frame, time.perf_counter()))
+    for _ in range(workers):
+        frames_queue.put(None)
+
+
+def run_transport(transport, resolution, workers, frames=500, slots=4, work="touch"):
+    """Stream ``frames`` synthetic frames at ``resolution`` to ``workers`` processes.
+
+    Both transports buffer ``slots`` frames per worker. Worker startup is excluded:
+    timing starts once every worker is ready. Returns wall time, per-frame handoff
+    latencies (publish to the worker holding the frame) and CPU seconds of the
+    producer process (including the queue's pickling thread) and of each worker.
+    """
+    width, height = resolution
+    cap = SyntheticCapture(width, height, unique=4)
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    if transport == "shm":
+        channels = [FrameRing((height, width, 3), slots, context=context) for _ in range(workers)]
+        procs = [
+            context.Process(target=_shm_worker, args=(ring, work, barrier, results))
+            for ring in channels
+        ]
+    else:
+        channels = [context.Queue(maxsize=slots * workers)]
+        procs = [
+            context.Process(target=_queue_worker, args=(channels[0], work, barrier, results))
+            for _ in range(workers)
+        ]
+    for p in procs:
+        p.start()
+
+    outcomes = []
+    try:
+        barrier.wait(timeout=120)
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        if transport == "shm":
+            _produce_shm(cap, channels, frames)
+        else:
+            _produce_queue(cap, channels[0], frames, workers)
+        while len(outcomes) < workers:
+            try:
+                outcomes.append(results.get(timeout=1.0))
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs) and results.empty():
+                    raise RuntimeError("worker process exited without reporting") from None
+        wall = time.perf_counter() - t0
+        producer_cpu = time.process_time() - cpu0
+    finally:
+        for p in procs:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        if transport == "shm":
+            for ring in channels:
+                ring.unlink()
+
+    return {
+        "wall": wall,
+        "frames": frames,
+        "handoff": [ms for o in outcomes for ms in o["handoff"]],
+        "producer_cpu": producer_cpu,
+        "worker_cpu": [o["cpu"] for o in outcomes],
+    }
+
+
+def transport_record(transport, resolution, workers, outcome, work, slots, run_id=None):
+    """Results-store record for one transport/resolution/worker-count cell."""
+    width, height = resolution
+    frames = outcome["frames"]
+    worker_cpu = sum(outcome["worker_cpu"])
+    fps = frames / outcome["wall"]
+    return make_record(
+        "frame_transport",
+        cell={
+            "transport": transport,
+            "resolution": f"{width}x{height}",
+            "workers": workers,
+            "work": work,
+        },
+        metrics={
+            **summarize(outcome["handoff"]),
+            "fps": fps,
+            "mb_per_s": fps * width * height * 3 / 1e6,
+            "producer_cpu_ms": outcome["producer_cpu"] * 1000 / frames,
+            "worker_cpu_ms": worker_cpu * 1000 / frames,
+            "cpu_ms": (outcome["producer_cpu"] + worker_cpu) * 1000 / frames,
+        },
+        config={"frames": frames, "slots": slots},
+        latencies=outcome["handoff"],
+        run_id=run_id,
+    )
+
+
+def transport_comparisons(records):
+    """Pair shared-memory and queue records of the same resolution and worker count."""
+    pairs = {}
+    for r in records:
+        key = (r["cell"]["resolution"], r["cell"]["workers"])
+        pairs.setdefault(key, {"resolution": key[0], "workers": key[1]})[r["cell"]["transport"]] = (
+            r["metrics"]
+        )
+    return [p for p in pairs.values() if "shm" in p and "queue" in p]
+
+
+def write_transport_results(records, path="results/frame_transport_results.md"):
+    """Render the transport table and the shared memory vs queue comparison."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Frame Transport Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            config = records[0]["config"]
+            f.write(
+                f"**Workload:** {records[0]['cell']['work']} | **Frames:** {config['frames']} | "
+                f"**Buffered frames per worker:** {config['slots']}\n\n"
+            )
+        f.write(render_table(records, TRANSPORT_COLUMNS) + "\n")
+        f.write(
+            "\n`shm` decodes into shared-memory ring slots that workers read as NumPy views. "
+            "`queue` pickles every frame through a `multiprocessing.Queue`. Handoff runs from "
+            "publish to the worker holding the frame. CPU per frame adds up every process, "
+            "including the queue's pickling thread.\n"
+        )
+        comparisons = transport_comparisons(records)
+        if comparisons:
+            f.write("\n## Shared Memory vs Queue\n\n")
+            f.write(render_table(comparisons, COMPARISON_COLUMNS) + "\n")
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Frame transport benchmark: shared-memory ring vs multiprocessing.Queue"
+    )
+    parser.add_argument(
+        "--resolutions",
+        type=parse_resolutions,
+        default=parse_resolutions("720p,1080p,4k"),
+        help="Frame sizes, e.g. 720p,1080p,4k or 1280x720",
+    )
+    parser.add_argument(
+        "--workers", type=parse_counts, default=[1, 2, 4], help="Worker process counts"
+    )
+    parser.add_argument("--transports", type=parse_transports, default=list(TRANSPORTS))
+    parser.add_argument("--frames", type=int, default=500, help="Frames per cell")
+    parser.add_argument("--slots", type=int, default=4, help="Buffered frames per worker")
+    parser.add_argument(
+        "--work",
+        choices=WORKLOADS,
+        default="touch",
+        help="Per-frame worker load: none, touch (read every page) or letterbox (to 640)",
+    )
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    args = parser.parse_args()
+
+    print("=== Vision Benchmarks: Frame Transport ===")
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
+    for resolution in args.resolutions:
+        for workers in args.workers:
+            for transport in args.transports:
+                label = f"{transport} {resolution[0]}x{resolution[1]} x{workers}"
+                try:
+                    outcome = run_transport(
+                        transport, resolution, workers, args.frames, args.slots, args.work
+                    )
+                except Exception as e:
+                    print(f"  {label} failed: {e}")
+                    continue
+                record = transport_record(
+                    transport, resolution, workers, outcome, args.work, args.slots, run_id
+                )
+                store.append(record)
+                records.append(record)
+                m = record["metrics"]
+                print(
+                    f"  {label}: {m['fps']:.1f} frames/s | handoff p99 {m['p99']:.3f} ms | "
+                    f"CPU {m['cpu_ms']:.3f} ms/frame"
+                )
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_transport_results(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+import argparse
+import sys
+from pathlib import Path
+
+import cv2
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.evaluation import detection_f1
+from utils.motion_gate import MotionGate, gate_stages
+from utils.pipeline import Pipeline, make_yolo_stages
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.soak import (
+    DEFAULT_WINDOW_S,
+    DRIFT_COLUMNS,
+    RESERVOIR_SIZE,
+    SOAK_ROOT,
+    SoakMonitor,
+    format_drift,
+    parse_duration,
+)
+from utils.stats import format_histogram, format_summary, summarize, warmup_until_stable
+from utils.video import RingDecoder, open_stream
+
+VIDEO_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Source", lambda r: r["cell"]["source"], ""),
+    ("Resolution", lambda r: r["cell"]["resolution"], ""),
+    ("Target FPS", lambda r: r["cell"]["target_fps"], ""),
+    ("Inference", lambda r: r["cell"].get("inference", "full"), ""),
+    ("Sustained FPS", lambda r: r["metrics"]["fps"], ".2f"),
+    ("Skip Rate", lambda r: r["metrics"].get("gate", {}).get("skip_rate"), ".1%"),
+    ("F1 vs Full", lambda r: r["metrics"].get("drift", {}).get("f1"), ".3f"),
+    ("Dropped", lambda r: r["metrics"]["dropped"], "d"),
+    ("Drop Rate", lambda r: r["metrics"]["drop_rate"], ".1%"),
+    ("E2E p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("E2E p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Decode (ms)", lambda r: r["metrics"]["decode"]["mean"], ".2f"),
+]
+
+SOAK_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Target FPS", lambda r: r["cell"]["target_fps"], ""),
+    ("Inference", lambda r: r["cell"].get("inference", "full"), ""),
+    *DRIFT_COLUMNS,
+]
+
+
+def parse_target_fps(value):
+    """Parse a comma-separated list of target frame rates such as "15,30,60"."""
+    rates = sorted({float(v) for v in value.split(",") if v.strip()})
+    if not rates or rates[0] <= 0:
+        raise argparse.ArgumentTypeError(f"invalid target FPS: {value!r}")
+    return rates
+
+
+def source_label(source):
+    """Short name for the results table: the file or directory name, or the spec."""
+    source = str(source)
+    if source.startswith("synthetic") or source.isdigit():
+        return source
+    return Path(source).name or source
+
+
+def benchmark_stream(
+    source="synthetic:1080p",
+    model_path="yolo11n.pt",
+    frames=300,
+    target_fps=None,
+    imgsz=640,
+    device="cpu",
+    queue_size=2,
+    ring_slots=None,
+    warmup=None,
+    gate=None,
+    reference=None,
+    outputs=None,
+    run_id=None,
+    duration=None,
+    soak_log=None,
+    soak_window=DEFAULT_WINDOW_S,
+):
+    """Stream ``frames`` frames from ``source`` through the pipelined detector.
+
+    Frames are decoded on a background thread into a preallocated ring buffer.
+    With ``target_fps`` the source is replayed as a live stream and frames that
+    arrive while the ring is full are dropped; without it the run measures the
+    maximum sustained offline throughput. End-to-end latency is measured from each
+    frame's arrival to the end of postprocessing.
+
+    With a :class:`~utils.motion_gate.MotionGate`, frames the gate skips reuse the
+    previous detections. Unpaced runs process every source frame, so their
+    detections can be compared with a full-inference run: pass that run's
+    ``outputs`` list as ``reference`` to record the drift.
+
+    ``duration`` (seconds) turns the run into a soak: files and clip directories
+    loop, streaming stops at the deadline instead of after ``frames`` frames,
+    per-window throughput, end-to-end latency and system metrics go to
+    ``soak_log`` (see :class:`utils.soak.SoakMonitor`) and timings keep a
+    fixed-size sample, so memory stays flat. Soaks do not keep outputs.
+    """
+    label = f"{target_fps:g} FPS" if target_fps else "unpaced"
+    print(f"\nOpening {source} ({label})...")
+    cap = open_stream(source, fps=target_fps or 30.0, loop=bool(duration))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    from ultralytics import YOLO
+
+    print(f"Loading model {model_path}...")
+    model = YOLO(model_path)
+    in_flight = Pipeline.max_in_flight(queue_size, 3 if gate is None else 4)
+    stages = make_yolo_stages(model, imgsz=imgsz, device=device, num_buffers=in_flight)
+
+    print("Warming up...")
+    if warmup is None:
+        warmup_until_stable(
+            lambda: Pipeline(cap, stages, queue_size=queue_size, max_frames=1).run().frames > 0,
+            window=5,
+            max_iters=50,
+        )
+    else:
+        Pipeline(cap, stages, queue_size=queue_size, max_frames=warmup).run()
+
+    keep_outputs = not (target_fps or duration) and (outputs is not None or reference is not None)
+    if keep_outputs:
+        # Start from the first frame, so runs compared frame by frame see the same frames
+        cap.release()
+        cap = open_stream(source, fps=30.0)
+
+    decoder = RingDecoder(
+        cap,
+        num_slots=ring_slots or in_flight + 8,
+        reserve=in_flight,
+        target_fps=target_fps,
+        max_frames=None if duration else frames,
+        duration=duration,
+        sample_size=RESERVOIR_SIZE if duration else None,
+    )
+    if gate is not None:
+        gate.reset()
+        stages = gate_stages(stages, gate)
+    soak = on_frame = None
+    if duration:
+        # One log per target FPS: a run soaks every --target-fps in turn
+        fps_suffix = f"_{target_fps:g}fps" if target_fps else ""
+        soak_log = soak_log or SOAK_ROOT / f"{run_id or 'video'}{fps_suffix}.jsonl"
+        soak = SoakMonitor(
+            soak_log,
+            soak_window,
+            model=model_path,
+            source=source_label(source),
+            target_fps=target_fps,
+            inference="full" if gate is None else "gated",
+        )
+
+        def on_frame(packet):
+            soak.add((packet.t_done - packet.t_capture) * 1000)
+
+        print(f"Soaking for {duration:.0f}s at {width}x{height}, {soak_window:.0f}s windows...")
+    else:
+        print(f"Streaming {frames} frames at {width}x{height} (ring of {decoder.num_slots})...")
+    try:
+        result = Pipeline(
+            decoder.start(),
+            stages,
+            queue_size=queue_size,
+            keep_outputs=keep_outputs,
+            on_frame=on_frame,
+            sample_size=RESERVOIR_SIZE if duration else None,
+        ).run()
+    finally:
+        decoder.release()
+        drift = soak.close() if soak is not None else None
+    if outputs is not None and keep_outputs:
+        outputs.extend(result.outputs)
+
+    if not result.frames:
+        print("Error: no frames were processed.")
+        return None
+
+    source_frames = result.frames + decoder.dropped
+    e2e = summarize(result.end_to_end_ms)
+    decode = summarize(decoder.decode_ms)
+    print(f"\n📊 Stream results for {model_path} @ {width}x{height} ({label})")
+    print(f"End-to-end: {format_summary(e2e)}")
+    print(format_histogram(result.end_to_end_ms))
+    print(f"  {'stage':<12} {'mean':>8} {'p50':>8} {'p99':>8}")
+    print(f"  {'decode':<12} {decode['mean']:8.2f} {decode['p50']:8.2f} {decode['p99']:8.2f} ms")
+    for name, values in result.stage_ms.items():
+        if values and name != "capture":
+            st = summarize(values)
+            print(f"  {name:<12} {st['mean']:8.2f} {st['p50']:8.2f} {st['p99']:8.2f} ms")
+    print(
+        f"Sustained FPS: {result.fps:.2f} | Processed: {result.frames}/{source_frames} | "
+        f"Dropped: {decoder.dropped} ({decoder.dropped / source_frames:.1%})"
+    )
+
+    metrics = {
+        **e2e,
+        "fps": result.fps,
+        "dropped": decoder.dropped,
+        "source_frames": source_frames,
+        "drop_rate": decoder.dropped / source_frames,
+        "decode": decode,
+        "stages": {k: summarize(v) for k, v in result.stage_ms.items() if v},
+    }
+    if soak is not None:
+        metrics["soak"] = {
+            "duration_s": result.wall_time,
+            "window_s": soak_window,
+            "windows": len(soak.windows),
+            "log": str(soak_log),
+            "drift": drift,
+        }
+        print(f"Soak: {result.frames} frames in {len(soak.windows)} windows -> {soak_log}")
+        print(format_drift(drift))
+    config = {
+        "source": str(source),
+        "frames": frames,
+        "duration": duration,
+        "queue_size": queue_size,
+        "ring_slots": decoder.num_slots,
+        "imgsz": imgsz,
+        "device": device,
+    }
+    inference = "full"
+    if gate is not None:
+        metrics["gate"] = gate.summary()
+        config["gate"] = {"threshold": gate.threshold, "refresh": gate.refresh}
+        inference = f"gated ({gate.threshold:g}, refresh {gate.refresh})"
+        print(
+            f"Motion gate: ran {gate.inferred}/{gate.frames} frames, skip rate "
+            f"{gate.skip_rate:.1%} ({gate.forced} forced refreshes)"
+        )
+        if keep_outputs and reference is not None and len(reference) == len(result.outputs):
+            metrics["drift"] = detection_f1(result.outputs, reference)
+            print(
+                "Drift vs full inference: precision {precision:.3f} | recall {recall:.3f} | "
+                "F1 {f1:.3f}".format(**metrics["drift"])
+            )
+
+    return make_record(
+        "video_stream",
+        cell={
+            "model": model_path,
+            "source": source_label(source),
+            "resolution": f"{width}x{height}",
+            "target_fps": f"{target_fps:g}" if target_fps else "unpaced",
+            "inference": inference,
+        },
+        metrics=metrics,
+        config=config,
+        latencies=result.end_to_end_ms,
+        run_id=run_id,
+    )
+
+
+def write_video_results(records, path="results/video_stream_results.md"):
+    """Render the stream table for ``records`` (one run)."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Video Stream Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]) + "\n")
+        f.write(render_table(records, VIDEO_COLUMNS) + "\n")
+        f.write(
+            "\nEnd-to-end latency runs from a frame's arrival (its slot on the target-FPS "
+            "schedule, or decode completion when unpaced) to the end of postprocessing. "
+            "Frames are dropped when they arrive while the decode ring is full.\n"
+        )
+        if any("gate" in r["metrics"] for r in records):
+            f.write(
+                "\nGated runs skip inference on frames that differ little from the last "
+                "inferred frame and reuse its detections; sustained FPS is the effective "
+                "rate over all frames. F1 vs Full compares their detections with the "
+                "unpaced full-inference run, frame by frame (IoU 0.5, same class).\n"
+            )
+        soaked = [r for r in records if "soak" in r["metrics"]]
+        if soaked:
+            f.write("\n## Soak Drift\n\n")
+            f.write(render_table(soaked, SOAK_COLUMNS) + "\n")
+            f.write(
+                "\nChanges compare the median of the last quarter of the windows with the "
+                "first quarter; throughput is processed frames per second.\n"
+            )
+    print(f"\nResults saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Video stream throughput benchmark (files, clip directories, synthetic)"
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="synthetic:1080p",
+        help="Video file, directory of clips, synthetic[:720p|1080p|4k|WxH], URL or camera",
+    )
+    parser.add_argument("--model", type=str, default="yolo11n.pt")
+    parser.add_argument("--frames", type=int, default=300, help="Source frames per run")
+    parser.add_argument(
+        "--target-fps",
+        type=parse_target_fps,
+        default=None,
+        help="Replay as a live stream at these rates (e.g. 15,30); omit for unpaced throughput",
+    )
+    parser.add_argument("--imgsz", type=int, default=640, help="Letterboxed model input size")
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--queue-size", type=int, default=2, help="Inter-stage queue capacity")
+    parser.add_argument(
+        "--ring-slots", type=int, default=None, help="Decode ring size (default: in-flight + 8)"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=None,
+        help="Fixed warmup frames. Omit to warm up until latency stabilizes.",
+    )
+    parser.add_argument(
+        "--motion-gate",
+        type=float,
+        default=None,
+        metavar="THRESHOLD",
+        help="Skip inference while less than this share of pixels changed (e.g. 0.003)",
+    )
+    parser.add_argument(
+        "--gate-refresh", type=int, default=30, help="Force inference after this many skips"
+    )
+    parser.add_argument(
+        "--duration",
+        type=parse_duration,
+        default=None,
+        help="Soak mode: stream each run for this long (e.g. 30m, 2h), looping files",
+    )
+    parser.add_argument(
+        "--soak-log",
+        type=Path,
+        default=None,
+        help="JSONL file for per-window soak metrics "
+        "(default: results/soak/<run id>[_<target fps>fps].jsonl)",
+    )
+    parser.add_argument(
+        "--soak-window",
+        type=parse_duration,
+        default=DEFAULT_WINDOW_S,
+        help="Soak metrics window (default: 60s)",
+    )
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
+    common = {
+        "frames": args.frames,
+        "imgsz": args.imgsz,
+        "device": args.device,
+        "queue_size": args.queue_size,
+        "ring_slots": args.ring_slots,
+        "warmup": args.warmup,
+        "run_id": run_id,
+        "duration": args.duration,
+        "soak_log": args.soak_log,
+        "soak_window": args.soak_window,
+    }
+    reference = None
+    if args.motion_gate is not None and not args.duration:
+        # Full inference on every frame: the baseline for speed and drift
+        reference = []
+        record = benchmark_stream(args.source, args.model, outputs=reference, **common)
+        if record is not None:
+            store.append(record)
+            records.append(record)
+    for target_fps in args.target_fps or [None]:
+        gate = None
+        if args.motion_gate is not None:
+            gate = MotionGate(threshold=args.motion_gate, refresh=args.gate_refresh)
+        record = benchmark_stream(
+            args.source,
+            args.model,
+            target_fps=target_fps,
+            gate=gate,
+            reference=reference,
+            **common,
+        )
+        if record is None:
+            continue
+        store.append(record)
+        records.append(record)
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_video_results(records)
+
+
+if __name__ == "__main__":
+    main()
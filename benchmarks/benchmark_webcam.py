@@ -1,13 +1,146 @@
 import argparse
+import itertools
+import sys
 import time
+from pathlib import Path
 
 import cv2
-import numpy as np
-from ultralytics import YOLO
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-def benchmark_latency(source=0, model_path="yolo11n.pt", frames=200):
-    print(f"Opening camera source {source}...")
+from utils.motion_gate import MotionGate, gate_stages
+from utils.pipeline import POLICIES, Pipeline, make_yolo_stages, open_source
+from utils.results_store import ResultsStore, make_record, new_run_id, render_table
+from utils.soak import (
+    DEFAULT_WINDOW_S,
+    DRIFT_COLUMNS,
+    RESERVOIR_SIZE,
+    SOAK_ROOT,
+    Reservoir,
+    SoakMonitor,
+    format_drift,
+    parse_duration,
+)
+from utils.stats import (
+    format_histogram,
+    format_summary,
+    summarize,
+    warmup_iterations,
+    warmup_until_stable,
+)
+from utils.video import LoopingCapture, open_stream
+
+WEBCAM_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Resolution", lambda r: r["cell"]["resolution"], ""),
+    ("Mode", lambda r: r["cell"]["mode"], ""),
+    ("Avg (ms)", lambda r: r["metrics"]["mean"], ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Min (ms)", lambda r: r["metrics"]["min"], ".2f"),
+    ("Max (ms)", lambda r: r["metrics"]["max"], ".2f"),
+    ("FPS", lambda r: r["metrics"]["fps"], ".2f"),
+    ("Skip Rate", lambda r: r["metrics"].get("gate", {}).get("skip_rate"), ".1%"),
+    ("Date", lambda r: r["timestamp"][:10], ""),
+]
+
+SOAK_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Mode", lambda r: r["cell"]["mode"], ""),
+    *DRIFT_COLUMNS,
+]
+
+
+LEGACY_HEADER = "## Legacy Results"
+LEGACY_TABLE = (
+    "| Model | Resolution | Avg (ms) | Min (ms) | Max (ms) |\n"
+    "|-------|------------|---------:|---------:|---------:|\n"
+)
+
+
+def legacy_rows(path):
+    """Rows of the append-only table written before the results store existed.
+
+    A file without the current title is entirely legacy rows; a re-rendered file
+    keeps them under :data:`LEGACY_HEADER`.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    text = path.read_text()
+    if text.startswith("# Webcam Latency Benchmarks"):
+        _, found, text = text.partition(f"\n{LEGACY_HEADER}\n")
+        if not found:
+            return []
+    return [
+        line
+        for line in text.splitlines()
+        if line.startswith("| ") and not line.startswith("| Model")
+    ]
+
+
+def save_latency_record(record, store_path="results/runs.jsonl"):
+    """Append ``record`` to the results store and re-render the latency history table.
+
+    Legacy rows already in the results file are carried over into their own section.
+    """
+    store = ResultsStore(store_path)
+    store.append(record)
+    history = list(store.records("webcam_latency"))
+    path = Path("results/webcam_latency_results.md")
+    legacy = legacy_rows(path)
+    path.parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Webcam Latency Benchmarks\n\n")
+        f.write(render_table(history, WEBCAM_COLUMNS) + "\n")
+        soaked = [r for r in history if "soak" in r["metrics"]]
+        if soaked:
+            f.write("\n## Soak Drift\n\n")
+            f.write(render_table(soaked, SOAK_COLUMNS) + "\n")
+            f.write(
+                "\nChanges compare the median of the last quarter of the windows with the "
+                "first quarter; throughput is processed frames per second.\n"
+            )
+        if legacy:
+            f.write(f"\n{LEGACY_HEADER}\n\n")
+            f.write("Sequential runs recorded before the results store.\n\n")
+            f.write(LEGACY_TABLE + "\n".join(legacy) + "\n")
+
+
+def gate_fields(gate, mode):
+    """``(mode, metrics, config)`` additions of a gated run; prints the skip rate."""
+    print(
+        f"Motion gate: ran {gate.inferred}/{gate.frames} frames, skip rate "
+        f"{gate.skip_rate:.1%} ({gate.forced} forced refreshes)"
+    )
+    config = {"threshold": gate.threshold, "refresh": gate.refresh}
+    return f"{mode}+gate", gate.summary(), config
+
+
+def start_soak(duration, soak_log, soak_window, run_id, **labels):
+    """:class:`SoakMonitor` of a ``duration`` run (``None`` without one)."""
+    if not duration:
+        return None
+    soak_log = soak_log or SOAK_ROOT / f"{run_id or 'webcam'}.jsonl"
+    print(f"Soaking for {duration:.0f}s, {soak_window:.0f}s windows -> {soak_log}")
+    return SoakMonitor(soak_log, soak_window, **labels)
+
+
+def soak_fields(soak, drift, wall_time, frames):
+    """``metrics["soak"]`` of a finished soak; prints the drift summary."""
+    print(f"Soak: {frames} frames in {len(soak.windows)} windows -> {soak.path}")
+    print(format_drift(drift))
+    return {
+        "duration_s": wall_time,
+        "window_s": soak.window_s,
+        "windows": len(soak.windows),
+        "log": str(soak.path),
+        "drift": drift,
+    }
+
+
+def open_camera(source):
+    """cv2 capture of ``source`` configured for low latency."""
     cap = cv2.VideoCapture(source)
 
     # Optimize for latency: 720p, MJPG, minimal buffer
@@ -15,6 +148,38 @@ def benchmark_latency(source=0, model_path="yolo11n.pt", frames=200):
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
     # cap.set(cv2.CAP_PROP_FPS, 60) # Optional: Enable if supported
     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Critical for latency
+    return cap
+
+
+def benchmark_latency(
+    source=0,
+    model_path="yolo11n.pt",
+    frames=200,
+    gate=None,
+    warmup=None,
+    duration=None,
+    soak_log=None,
+    soak_window=DEFAULT_WINDOW_S,
+    run_id=None,
+):
+    """Glass-to-glass latency of sequential capture and inference.
+
+    With a ``gate`` (:class:`MotionGate`), frames that barely changed since the
+    last inferred one skip inference. ``warmup=None`` warms up until latency
+    stabilizes; an int reads a fixed number of frames. Warmup stops early when a
+    video file runs out of frames.
+    ``duration`` (seconds) turns the run into a soak: frames are timed until the
+    deadline instead of ``frames`` times (video files loop), per-window metrics
+    stream to ``soak_log`` (see :class:`utils.soak.SoakMonitor`) and latencies
+    keep a fixed-size sample.
+    """
+    print(f"Opening camera source {source}...")
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    if duration and isinstance(source, str) and Path(source).is_file():
+        cap = LoopingCapture(lambda: open_camera(source))
+    else:
+        cap = open_camera(source)
 
     if not cap.isOpened():
         print("Error: Could not open webcam.")
@@ -26,67 +191,301 @@ def benchmark_latency(source=0, model_path="yolo11n.pt", frames=200):
     actual_fps = cap.get(cv2.CAP_PROP_FPS)
     print(f"📷 Camera Config: {int(actual_w)}x{int(actual_h)} @ {actual_fps} FPS (Buffer=1)")
 
+    from ultralytics import YOLO
+
     print(f"Loading model {model_path}...")
     model = YOLO(model_path)
 
-    print("Warming up...")
-    for _ in range(30):
+    def warmup_step():
         ret, frame = cap.read()
         if ret:
             model(frame, verbose=False)
+        return ret
 
-    print(f"Starting Glass-to-Glass Latency Test ({frames} frames)...")
+    print("Warming up...")
+    warmup_latencies = warmup_iterations(warmup_step, warmup, window=10, max_iters=100)
+    print(f"Warmup done after {len(warmup_latencies)} frames")
 
-    latencies = []
+    mode = "sequential" if gate is None else "sequential+gate"
+    soak = start_soak(duration, soak_log, soak_window, run_id, model=model_path, mode=mode)
+    if soak is None:
+        print(f"Starting Glass-to-Glass Latency Test ({frames} frames)...")
 
-    for _ in range(frames):
-        # 1. Capture Start
-        t0 = time.perf_counter()
+    latencies = Reservoir(RESERVOIR_SIZE) if soak else []
+    started = time.monotonic()
+    try:
+        for _ in itertools.count() if soak else range(frames):
+            if soak and time.monotonic() - started >= duration:
+                break
+            # 1. Capture Start
+            t0 = time.perf_counter()
 
-        ret, frame = cap.read()
-        if not ret:
-            break
+            ret, frame = cap.read()
+            if not ret:
+                break
 
-        # 2. Inference
-        _ = model(frame, verbose=False)
+            # 2. Inference (skipped while the scene is static, when gated)
+            if gate is None or gate(frame):
+                _ = model(frame, verbose=False)
 
-        # 3. Simulate Render/Display (draw boxes)
-        # _ = results[0].plot() # Unused, removed for linting
+            # 3. Simulate Render/Display (draw boxes)
+            # _ = results[0].plot() # Unused, removed for linting
 
-        # 4. Total Time
-        t3 = time.perf_counter()
+            # 4. Total Time
+            t3 = time.perf_counter()
 
-        total_latency = (t3 - t0) * 1000
-        # inference_time = (t2 - t1) * 1000 # Unused
+            total_latency = (t3 - t0) * 1000
+            # inference_time = (t2 - t1) * 1000 # Unused
 
-        latencies.append(total_latency)
+            latencies.append(total_latency)
+            if soak is not None:
+                soak.add(total_latency)
 
-        # GUI Calls removed for headless support
-        # cv2.imshow('Benchmark', res_plotted)
-        # if cv2.waitKey(1) == ord('q'):
-        #    break
+            # GUI Calls removed for headless support
+            # cv2.imshow('Benchmark', res_plotted)
+            # if cv2.waitKey(1) == ord('q'):
+            #    break
+    finally:
+        cap.release()
+        # cv2.destroyAllWindows()
+        drift = soak.close() if soak is not None else None
+    wall_time = time.monotonic() - started
 
-    cap.release()
-    # cv2.destroyAllWindows()
+    if not latencies:
+        print(
+            "Error: no frames left to time, the source ended during warmup (try a smaller --warmup)."
+        )
+        return None
 
-    avg_lat = np.mean(latencies)
-    min_lat = np.min(latencies)
-    max_lat = np.max(latencies)
+    stats = summarize(latencies)
+    avg_lat = stats["mean"]
+    min_lat = stats["min"]
+    max_lat = stats["max"]
 
-    print(f"\n📊 Results for {model_path} @ 720p")
+    resolution = f"{int(actual_w)}x{int(actual_h)}"
+    print(f"\n📊 Results for {model_path} @ {resolution}")
     print(f"Average Latency: {avg_lat:.2f} ms")
     print(f"Min: {min_lat:.2f} ms | Max: {max_lat:.2f} ms")
+    print(f"Latency: {format_summary(stats)}")
+    print(format_histogram(latencies))
     print(f"Theoretical Max FPS: {1000 / avg_lat:.2f}")
 
     # Save
-    with open("results/webcam_latency_results.md", "a") as f:
-        f.write(f"| {model_path} | 720p | {avg_lat:.2f} | {min_lat:.2f} | {max_lat:.2f} |\n")
+    metrics = {"fps": 1000 / avg_lat, **stats}
+    config = {
+        "source": str(source),
+        "frames": frames,
+        "duration": duration,
+        "warmup_iters": len(warmup_latencies),
+    }
+    mode = "sequential"
+    if gate is not None:
+        mode, metrics["gate"], config["gate"] = gate_fields(gate, mode)
+    if soak is not None:
+        metrics["soak"] = soak_fields(soak, drift, wall_time, latencies.seen)
+    record = make_record(
+        "webcam_latency",
+        cell={"model": model_path, "resolution": resolution, "mode": mode},
+        metrics=metrics,
+        config=config,
+        latencies=latencies,
+        run_id=run_id,
+    )
+    save_latency_record(record)
+
+
+def benchmark_pipeline(
+    source=0,
+    model_path="yolo11n.pt",
+    frames=200,
+    policy="latest",
+    queue_size=2,
+    imgsz=640,
+    device="cpu",
+    warmup=None,
+    gate=None,
+    duration=None,
+    soak_log=None,
+    soak_window=DEFAULT_WINDOW_S,
+    run_id=None,
+):
+    """Pipelined latency test: capture, preprocess, inference and postprocess overlap.
+
+    Works with any cv2-readable source (camera index, video file, stream URL).
+    A ``gate`` (:class:`MotionGate`) adds a stage that skips inference on frames
+    that barely changed and reuses the previous detections.
+    ``duration`` turns the run into a soak, as in :func:`benchmark_latency`.
+    """
+    print(f"Opening source {source}...")
+    cap = open_stream(source, loop=True) if duration else open_source(source)
+    actual_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    actual_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    print(f"Source: {actual_w}x{actual_h} | Policy: {policy} | Queue size: {queue_size}")
+
+    from ultralytics import YOLO
+
+    print(f"Loading model {model_path}...")
+    model = YOLO(model_path)
+    num_buffers = Pipeline.max_in_flight(queue_size, 3 if gate is None else 4)
+    stages = make_yolo_stages(model, imgsz=imgsz, device=device, num_buffers=num_buffers)
+
+    print("Warming up...")
+    if warmup is None:
+        warmup_until_stable(
+            lambda: Pipeline(cap, stages, queue_size=queue_size, max_frames=1).run().frames > 0,
+            window=5,
+            max_iters=50,
+        )
+    else:
+        Pipeline(cap, stages, queue_size=queue_size, max_frames=warmup).run()
+
+    if gate is not None:
+        stages = gate_stages(stages, gate)
+    mode = f"pipeline-{policy}" if gate is None else f"pipeline-{policy}+gate"
+    soak = start_soak(duration, soak_log, soak_window, run_id, model=model_path, mode=mode)
+    on_frame = None
+    if soak is not None:
+
+        def on_frame(packet):
+            soak.add((packet.t_done - packet.t_capture) * 1000)
+
+    else:
+        print(f"Starting Pipelined Latency Test ({frames} frames)...")
+    try:
+        result = Pipeline(
+            cap,
+            stages,
+            queue_size=queue_size,
+            policy=policy,
+            max_frames=None if duration else frames,
+            duration=duration,
+            on_frame=on_frame,
+            sample_size=RESERVOIR_SIZE if duration else None,
+        ).run()
+    finally:
+        cap.release()
+        drift = soak.close() if soak is not None else None
+
+    if not result.frames:
+        print("Error: no frames were processed.")
+        return None
+
+    e2e = summarize(result.end_to_end_ms)
+    print(f"\n📊 Pipeline results for {model_path} @ {actual_w}x{actual_h}")
+    print(f"End-to-end: {format_summary(e2e)}")
+    print(format_histogram(result.end_to_end_ms))
+    print(f"  {'stage':<12} {'mean':>8} {'p50':>8} {'p99':>8}")
+    for name, values in result.stage_ms.items():
+        if values:
+            st = summarize(values)
+            print(f"  {name:<12} {st['mean']:8.2f} {st['p50']:8.2f} {st['p99']:8.2f} ms")
+    print(f"Sustained FPS: {result.fps:.2f} | Frames: {result.frames} | Dropped: {result.dropped}")
+
+    metrics = {
+        **e2e,
+        "fps": result.fps,
+        "dropped": result.dropped,
+        "stages": {k: summarize(v) for k, v in result.stage_ms.items() if v},
+    }
+    config = {
+        "source": str(source),
+        "frames": frames,
+        "duration": duration,
+        "queue_size": queue_size,
+        "imgsz": imgsz,
+    }
+    mode = f"pipeline-{policy}"
+    if gate is not None:
+        mode, metrics["gate"], config["gate"] = gate_fields(gate, mode)
+    if soak is not None:
+        metrics["soak"] = soak_fields(soak, drift, result.wall_time, result.frames)
+    record = make_record(
+        "webcam_latency",
+        cell={"model": model_path, "resolution": f"{actual_w}x{actual_h}", "mode": mode},
+        metrics=metrics,
+        config=config,
+        latencies=result.end_to_end_ms,
+        run_id=run_id,
+    )
+    save_latency_record(record)
+    return result
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--source", type=int, default=0, help="Camera index")
+    parser.add_argument(
+        "--source", type=str, default="0", help="Camera index, video file or stream URL"
+    )
     parser.add_argument("--model", type=str, default="yolo11n.pt")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=None,
+        help="Fixed warmup frames. Omit to warm up until latency stabilizes.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Overlap capture, preprocess, inference and postprocess on separate threads",
+    )
+    parser.add_argument("--policy", choices=POLICIES, default="latest", help="Frame drop policy")
+    parser.add_argument("--queue-size", type=int, default=2, help="Inter-stage queue capacity")
+    parser.add_argument("--imgsz", type=int, default=640, help="Letterboxed model input size")
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument(
+        "--motion-gate",
+        type=float,
+        default=None,
+        metavar="THRESHOLD",
+        help="Skip inference while less than this share of pixels changed (e.g. 0.003)",
+    )
+    parser.add_argument(
+        "--gate-refresh", type=int, default=30, help="Force inference after this many skips"
+    )
+    parser.add_argument(
+        "--duration",
+        type=parse_duration,
+        default=None,
+        help="Soak mode: time frames for this long (e.g. 30m, 2h) instead of --frames",
+    )
+    parser.add_argument(
+        "--soak-log",
+        type=Path,
+        default=None,
+        help="JSONL file for per-window soak metrics (default: results/soak/<run id>.jsonl)",
+    )
+    parser.add_argument(
+        "--soak-window",
+        type=parse_duration,
+        default=DEFAULT_WINDOW_S,
+        help="Soak metrics window (default: 60s)",
+    )
     args = parser.parse_args()
 
-    benchmark_latency(args.source, args.model)
+    gate = None
+    if args.motion_gate is not None:
+        gate = MotionGate(threshold=args.motion_gate, refresh=args.gate_refresh)
+    soak = {
+        "duration": args.duration,
+        "soak_log": args.soak_log,
+        "soak_window": args.soak_window,
+        "run_id": new_run_id(),
+    }
+    if args.pipeline:
+        benchmark_pipeline(
+            args.source,
+            args.model,
+            frames=args.frames,
+            policy=args.policy,
+            queue_size=args.queue_size,
+            imgsz=args.imgsz,
+            device=args.device,
+            warmup=args.warmup,
+            gate=gate,
+            **soak,
+        )
+    else:
+        benchmark_latency(
+            args.source, args.model, frames=args.frames, gate=gate, warmup=args.warmup, **soak
+        )
@@ -1,77 +1,974 @@
 import argparse
+import itertools
+import sys
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import numpy as np
-import torch
-from ultralytics import YOLO
-
-# Benchmark Configuration
-MODELS = {
-    "yolo11n": "yolo11n.pt",
-    "yolo11s": "yolo11s.pt",
-    "yolo11m": "yolo11m.pt",
-    "yolo11l": "yolo11l.pt",
-    "yolo12n": "yolo12n.pt",
-    "yolo12s": "yolo12s.pt",
-    "yolo26n": "yolo26n.pt",
-    "yolo26s": "yolo26s.pt",
-    "yolov8s-world": "yolov8s-world.pt",
-    "yolov8m-world": "yolov8m-world.pt",
-}
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.backends import (
+    ORT_OPT_LEVELS,
+    STRIDE,
+    get_backend,
+    imgsz_hw,
+    imgsz_label,
+    parse_backends,
+)
+from utils.config import load_models
+from utils.corpus import bucket_by_detections, load_corpus
+from utils.export_cache import export_many
+from utils.memory import MB, MemoryTracker, format_memory, trace_allocations
+from utils.postprocess import NMS_METHODS
+from utils.profiling import profile_onnxruntime, profile_step
+from utils.report import model_id
+from utils.results_store import (
+    ResultsStore,
+    make_record,
+    new_run_id,
+    render_environment,
+    render_table,
+)
+from utils.soak import (
+    DEFAULT_WINDOW_S,
+    DRIFT_COLUMNS,
+    SOAK_ROOT,
+    Reservoir,
+    SoakMonitor,
+    format_drift,
+    parse_duration,
+)
+from utils.stats import (
+    format_histogram,
+    format_stages,
+    format_summary,
+    stage_breakdown,
+    summarize,
+)
+
+# Benchmark Configuration: short name -> weights, from configs/models.yaml
+MODELS = load_models()
+
+PROFILE_ROOT = Path("results/profiles")
+# --profile adds torch.profiler for these, and ONNX Runtime's session profiler for ORT_BACKENDS
+TORCH_BACKENDS = ("pytorch", "torchscript", "tensorrt")
+ORT_BACKENDS = ("onnxruntime", "onnxruntime_int8")
 
 
 def download_if_missing(model_name):
     """Ensure model weights exist locally."""
     path = Path(f"{model_name}.pt")
     if not path.exists():
+        from ultralytics import YOLO
+
         print(f"Downloading {model_name}...")
         YOLO(f"{model_name}.pt")
     return str(path)
 
 
-def export_tensorrt(model_path, fp16=True):
-    """Export a .pt model to TensorRT engine and return the engine path."""
-    engine_path = Path(model_path).with_suffix(".engine")
-    if engine_path.exists():
-        print(f"  TensorRT engine already exists: {engine_path}")
-        return str(engine_path)
+def default_device():
+    """Return "cuda" when a GPU is visible, otherwise "cpu"."""
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def device_name(device):
+    """Human-readable name of the device used for the results header."""
+    if str(device).startswith("cuda"):
+        import torch
+
+        if torch.cuda.is_available():
+            return torch.cuda.get_device_name(0)
+    return "CPU"
+
+
+def parse_batch_sizes(value):
+    """Parse a comma-separated list such as "1,2,4,8" into sorted unique ints."""
+    sizes = sorted({int(v) for v in value.split(",") if v.strip()})
+    if not sizes or sizes[0] < 1:
+        raise argparse.ArgumentTypeError(f"invalid batch sizes: {value!r}")
+    return sizes
 
-    print(f"  Exporting {model_path} to TensorRT (FP16={fp16})...")
-    model = YOLO(model_path)
-    path = model.export(format="engine", half=fp16, device=0)
-    print(f"  Export complete: {path}")
-    return str(path)
 
+def parse_imgsz(value):
+    """Parse "320,640,1280x720" into model input sizes.
 
-def benchmark_model(model_path, device="cuda", warmup=10, runs=100, fp16=False):
-    """Run inference benchmark loop."""
-    print(f"\nBenchmarking {model_path} on {device} (FP16={fp16})...")
+    Square sizes stay ints; "WxH" gives an ``(h, w)`` tuple. Each side is rounded
+    up to a multiple of the model stride, the shape a letterboxed frame is padded
+    to (1280x720 becomes 1280x736).
+    """
+    sizes = []
+    for token in (v.strip().lower() for v in value.split(",")):
+        if not token:
+            continue
+        try:
+            w, _, h = token.partition("x")
+            w, h = int(w), int(h or w)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid imgsz: {token!r}") from None
+        if w < 1 or h < 1:
+            raise argparse.ArgumentTypeError(f"invalid imgsz: {token!r}")
+        h, w = (-(-h // STRIDE) * STRIDE, -(-w // STRIDE) * STRIDE)
+        size = h if h == w else (h, w)
+        if size not in sizes:
+            sizes.append(size)
+    if not sizes:
+        raise argparse.ArgumentTypeError(f"invalid imgsz: {value!r}")
+    return sizes
+
+
+@dataclass
+class BenchmarkResult:
+    """Outcome of one ``benchmark_model`` run.
+
+    Unpacks as ``(fps, latency)`` so existing callers keep working.
+    """
+
+    fps: float
+    latency: float
+    batch_size: int = 1
+    backend: str = "pytorch"
+    format: str = "PyTorch FP32"
+    latencies: list = field(default_factory=list)
+    warmup_iters: int = 0
+    stats: dict = field(default_factory=dict)
+    started: float = 0.0  # time.monotonic() bounds of the timed loop
+    finished: float = 0.0
+    input: str = "zeros"
+    imgsz: int | tuple = 640
+    detections: list = field(default_factory=list)  # detections per timed call
+    stages: dict = field(default_factory=dict)  # stage name -> per-call ms
+    memory: dict = field(default_factory=dict)  # see utils.memory
+    soak: dict = field(default_factory=dict)  # see utils.soak
+
+    def __iter__(self):
+        return iter((self.fps, self.latency))
 
-    model = YOLO(model_path)
 
-    # Dummy input (640x640 RGB)
-    img = np.zeros((640, 640, 3), dtype=np.uint8)
+def benchmark_model(
+    model_path,
+    device=None,
+    warmup=None,
+    runs=100,
+    fp16=False,
+    batch_size=1,
+    histogram=False,
+    backend="pytorch",
+    backend_options=None,
+    barrier=None,
+    corpus=None,
+    profile_dir=None,
+    profile_iters=20,
+    imgsz=640,
+    memory_iters=0,
+    duration=None,
+    soak_log=None,
+    soak_window=DEFAULT_WINDOW_S,
+):
+    """Run inference benchmark loop.
+
+    Each iteration pushes ``batch_size`` frames through the model in a single call.
+    ``warmup=None`` warms up until latency stabilizes; an int runs a fixed count.
+    ``backend`` selects the runtime (see ``utils.backends``); every backend sees
+    identical inputs. Returns a :class:`BenchmarkResult` where ``fps`` is
+    images/sec and ``latency`` is the average time per call (i.e. per batch) in ms.
+    ``barrier`` (a ``multiprocessing.Barrier``) is waited on after warmup so that
+    concurrent worker processes time the same window.
+    ``corpus`` (a :class:`utils.corpus.Corpus`) cycles through real or synthetic
+    frames instead of the all-zeros frame, so NMS and postprocessing are exercised.
+    Every call is split into preprocess/inference/postprocess (as reported by the
+    backend) plus ``overhead``, the rest of the call not attributed to any stage.
+    ``profile_dir`` additionally writes profiler traces after the timed loop.
+    ``imgsz`` is the model input size, an int or ``(h, w)``; the all-zeros frame
+    has that shape so no resize is timed.
+    Memory (load delta, steady and peak RSS, RSS growth, artifact size) is read
+    outside the timed calls; ``memory_iters`` adds a tracemalloc pass of that many
+    calls after the timed loop.
+    ``duration`` (seconds) turns the run into a soak: calls repeat until the
+    deadline instead of ``runs`` times, per-window metrics stream to ``soak_log``
+    (see :class:`utils.soak.SoakMonitor`), RSS is read once per window, and
+    latencies, detections and stages keep a fixed-size uniform sample of the calls
+    so memory stays flat however long the run.
+    """
+    device = device or default_device()
+    if fp16 and device == "cpu":
+        print("  FP16 is not supported on CPU, falling back to FP32")
+        fp16 = False
+
+    options = {**precision_options(fp16), **(backend_options or {})}
+
+    def make_runtime(**extra):
+        return get_backend(backend)(
+            model_path, device=device, imgsz=imgsz, batch_size=batch_size, **options, **extra
+        )
+
+    runtime = make_runtime()
+    print(
+        f"\nBenchmarking {model_path} with {runtime.format_name} on {device} "
+        f"(batch={batch_size}, imgsz={imgsz_label(imgsz)})..."
+    )
 
-    # Warmup
-    print("  Warming up...")
-    for _ in range(warmup):
-        model(img, verbose=False, half=fp16)
+    if corpus is not None:
+        corpus.preload()
+        batch = corpus.batch(0, batch_size)
+    else:
+        # Dummy input at the model input shape, stacked into one batch per call
+        img = np.zeros((*imgsz_hw(imgsz), 3), dtype=np.uint8)
+        batch = [img] * batch_size
 
-    # Benchmark loop
-    print(f"  Running {runs} inferences...")
-    latencies = []
-    for _ in range(runs):
-        t0 = time.perf_counter()
-        model(img, verbose=False, half=fp16)
-        t1 = time.perf_counter()
-        latencies.append((t1 - t0) * 1000)  # ms
+    memory = MemoryTracker()
+    with runtime:
+        memory.loaded()
+        # Warmup
+        print("  Warming up...")
+        warmup_latencies = runtime.warmup(batch, warmup)
+        print(f"  Warmup done after {len(warmup_latencies)} iterations")
+        if barrier is not None:
+            barrier.wait()
 
-    avg_latency = np.mean(latencies)
-    fps = 1000.0 / avg_latency
+        # Benchmark loop
+        soak = None
+        if duration:
+            soak_log = soak_log or SOAK_ROOT / f"{Path(model_path).stem}_{backend}.jsonl"
+            soak = SoakMonitor(
+                soak_log,
+                soak_window,
+                model=Path(model_path).stem,
+                backend=backend,
+                batch=batch_size,
+            )
+            print(f"  Soaking for {duration:.0f}s, {soak_window:.0f}s windows -> {soak_log}")
+        else:
+            print(f"  Running {runs} inferences...")
+        # Same seed and one append per call each, so reservoirs keep the same calls
+        collect = Reservoir if soak else list
+        latencies, detections, stages = collect(), collect(), {}
+        started = time.monotonic()
+        for i in itertools.count() if soak else range(runs):
+            if soak and time.monotonic() - started >= duration:
+                break
+            if corpus is not None:
+                batch = corpus.batch(i, batch_size)  # memmap views, no decode
+            t0 = time.perf_counter()
+            outputs = runtime.infer(batch)
+            t1 = time.perf_counter()
+            latency = (t1 - t0) * 1000  # ms
+            latencies.append(latency)
+            if soak is None or soak.add(latency, batch_size):
+                memory.sample()
+            detections.append(sum(len(o) for o in outputs))
+            if runtime.stage_ms:
+                for name, ms in runtime.stage_ms.items():
+                    stages.setdefault(name, collect()).append(ms)
+                overhead = latency - sum(runtime.stage_ms.values())
+                stages.setdefault("overhead", collect()).append(max(overhead, 0.0))
+        finished = time.monotonic()
+        soak_stats = {}
+        if soak is not None:
+            drift = soak.close()
+            memory.sample()
+            soak_stats = {
+                "duration_s": finished - started,
+                "window_s": soak_window,
+                "calls": latencies.seen,
+                "windows": len(soak.windows),
+                "log": str(soak_log),
+                "drift": drift,
+            }
+        memory_stats = memory.summary(runtime.artifact_path())
+
+        if memory_iters:
+            print(f"  Tracing Python allocations over {memory_iters} iterations...")
+            memory_stats["allocations"] = trace_allocations(
+                lambda: runtime.infer(batch), memory_iters
+            )
+        if profile_dir is not None:
+            print(f"  Profiling {profile_iters} iterations...")
+            written = profile_step(
+                lambda: runtime.infer(batch),
+                profile_dir,
+                profile_iters,
+                torch_trace=backend in TORCH_BACKENDS,
+            )
+            if backend in ORT_BACKENDS:
+                written += profile_onnxruntime(make_runtime, batch, profile_dir, profile_iters)
+            for path in written:
+                print(f"    wrote {path}")
+
+    stats = summarize(latencies)
+    avg_latency = stats["mean"]
+    fps = 1000.0 * batch_size / avg_latency
 
     print(f"  Result: {fps:.2f} FPS | Avg Latency: {avg_latency:.2f}ms")
-    return fps, avg_latency
+    print(f"  Latency: {format_summary(stats)}")
+    if stages:
+        print(f"  Stages: {format_stages(stage_breakdown(stages))}")
+    print(f"  Memory: {format_memory(memory_stats)}")
+    if soak_stats:
+        print(f"  Soak: {soak_stats['calls']} calls in {soak_stats['windows']} windows")
+        print("  " + format_drift(soak_stats["drift"]).replace("\n", "\n  "))
+    if histogram:
+        print(format_histogram(latencies))
+    if corpus is not None:
+        for row in bucket_by_detections(latencies, detections):
+            print(
+                f"  {row['bucket']:>7} detections: {row['calls']:4d} calls | "
+                f"p50 {row['p50']:.2f}ms | p99 {row['p99']:.2f}ms"
+            )
+    return BenchmarkResult(
+        fps=fps,
+        latency=avg_latency,
+        batch_size=batch_size,
+        backend=backend,
+        format=runtime.format_name,
+        latencies=latencies,
+        warmup_iters=len(warmup_latencies),
+        stats=stats,
+        started=started,
+        finished=finished,
+        input=corpus.name if corpus is not None else "zeros",
+        imgsz=imgsz,
+        detections=detections,
+        stages=stages,
+        memory=memory_stats,
+        soak=soak_stats,
+    )
+
+
+def benchmark_batch_sizes(
+    model_path,
+    batch_sizes,
+    device=None,
+    warmup=None,
+    runs=100,
+    fp16=False,
+    backend="pytorch",
+    backend_options=None,
+    corpus=None,
+    imgsz=640,
+):
+    """Sweep ``benchmark_model`` over several batch sizes.
+
+    Returns one dict per batch size with images/sec, per-batch and per-image latency.
+    """
+    rows = []
+    for bs in batch_sizes:
+        r = benchmark_model(
+            model_path,
+            device=device,
+            warmup=warmup,
+            runs=runs,
+            fp16=fp16,
+            batch_size=bs,
+            backend=backend,
+            backend_options=backend_options,
+            corpus=corpus,
+            imgsz=imgsz,
+        )
+        rows.append(
+            {
+                "batch": bs,
+                "fps": r.fps,
+                "latency": r.latency,
+                "latency_per_image": r.latency / bs,
+                "p50": r.stats["p50"],
+                "p99": r.stats["p99"],
+                "result": r,
+            }
+        )
+    return rows
+
+
+def find_throughput_plateau(rows, tolerance=0.05):
+    """Return the smallest batch size whose throughput is within ``tolerance`` of the peak.
+
+    Larger batches beyond this point add latency without a meaningful throughput gain.
+    """
+    if not rows:
+        return None
+    peak = max(r["fps"] for r in rows)
+    for r in sorted(rows, key=lambda r: r["batch"]):
+        if r["fps"] >= (1.0 - tolerance) * peak:
+            return r["batch"]
+
+
+def resolve_model_path(name):
+    """Map a ``MODELS`` key to a local weights path, downloading it if needed."""
+    model_file = MODELS.get(name, name)
+    try:
+        return download_if_missing(name) if name in MODELS else model_file
+    except Exception:
+        return model_file
+
+
+def precision_options(fp16):
+    """Backend ``half`` override for ``--fp16``.
+
+    Without the flag each backend keeps its own default precision, so TensorRT
+    still builds an FP16 engine while the other runtimes stay FP32.
+    """
+    return {"half": True} if fp16 else {}
+
+
+def backend_options(args, backend):
+    """Backend-specific options taken from the command line."""
+    if backend in ORT_BACKENDS:
+        return {
+            "opt_level": args.ort_opt_level,
+            "intra_op_threads": args.intra_op_threads,
+            "inter_op_threads": args.inter_op_threads,
+            "nms": args.ort_nms,
+        }
+    return {}
+
+
+def add_corpus_arguments(parser):
+    """Input corpus flags shared by the speed, batch and scaling benchmarks."""
+    parser.add_argument(
+        "--corpus",
+        type=str,
+        default=None,
+        help="Input frames: synthetic[:N], dir:PATH or video:PATH (default: all-zeros frame)",
+    )
+    parser.add_argument(
+        "--corpus-resolutions",
+        type=str,
+        default=None,
+        help="Synthetic frame sizes, e.g. 720p,1080p,4k,square,portrait or 1280x720",
+    )
+    parser.add_argument(
+        "--corpus-frames", type=int, default=None, help="Maximum frames to load into the corpus"
+    )
+
+
+def corpus_from_args(args):
+    """Load (building on first use) the corpus selected on the command line, or ``None``."""
+    if not args.corpus:
+        return None
+    corpus = load_corpus(args.corpus, args.corpus_resolutions, args.corpus_frames)
+    sizes = ", ".join(f"{k} x{v}" for k, v in corpus.resolutions().items())
+    print(f"Input corpus: {corpus.name} ({len(corpus)} frames: {sizes})")
+    return corpus
+
+
+def backend_variants(args, backend, compare_dynamic=False):
+    """Option sets to benchmark for ``backend``.
+
+    With ``compare_dynamic`` ONNX Runtime runs twice: per-shape static exports and
+    one dynamic-shape export.
+    """
+    options = backend_options(args, backend)
+    if backend == "onnxruntime" and compare_dynamic:
+        return [{**options, "dynamic": False}, {**options, "dynamic": True}]
+    return [options]
+
+
+def prefetch_exports(paths, args, device, batch_sizes=(1,), imgsizes=(640,), compare_dynamic=False):
+    """Export every artifact the sweep will need up front, concurrently.
+
+    Cold-start of a full ``MODELS`` sweep is dominated by serial exports; running
+    them in a process pool through the export cache overlaps them.
+    """
+    fp16 = args.fp16 and device != "cpu"
+    requests = []
+    for path in paths:
+        for backend in args.backends:
+            for options in backend_variants(args, backend, compare_dynamic):
+                for bs in batch_sizes:
+                    for imgsz in imgsizes:
+                        runtime = get_backend(backend)(
+                            path,
+                            device=device,
+                            imgsz=imgsz,
+                            batch_size=bs,
+                            **precision_options(fp16),
+                            **options,
+                        )
+                        request = runtime.export_request()
+                        if request and request not in requests:
+                            requests.append(request)
+    if not requests:
+        return
+    print(f"Preparing {len(requests)} exported artifact(s)...")
+    for request, outcome in export_many(requests, max_workers=args.export_workers):
+        if isinstance(outcome, Exception):
+            print(f"  Export failed for {request['model_path']} ({request['fmt']}): {outcome}")
+
+
+def speed_record(name, result, device, run_id, benchmark="yolo_speed", **config):
+    """Results-store record for one ``benchmark_model`` outcome."""
+    cell = {
+        "model": name,
+        "backend": result.backend,
+        "format": result.format,
+        "batch": result.batch_size,
+        "device": device,
+    }
+    metrics = {"fps": result.fps, **result.stats}
+    if result.stages:
+        metrics["stages"] = stage_breakdown(result.stages)
+    if result.memory:
+        metrics["memory"] = result.memory
+    if result.soak:
+        metrics["soak"] = result.soak
+    if imgsz_label(result.imgsz) != 640:
+        cell["imgsz"] = imgsz_label(result.imgsz)
+    if result.input != "zeros":
+        cell["input"] = result.input
+        metrics["mean_detections"] = float(np.mean(result.detections))
+        metrics["detection_buckets"] = bucket_by_detections(result.latencies, result.detections)
+    return make_record(
+        benchmark,
+        cell=cell,
+        metrics=metrics,
+        config={"warmup_iters": result.warmup_iters, **config},
+        latencies=result.latencies,
+        run_id=run_id,
+    )
+
+
+SPEED_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("Input", lambda r: r["cell"].get("input", "zeros"), ""),
+    ("FPS", lambda r: r["metrics"]["fps"], ".2f"),
+    ("Latency (ms)", lambda r: r["metrics"]["mean"], ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+]
+
+BATCH_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("Input", lambda r: r["cell"].get("input", "zeros"), ""),
+    ("Batch", lambda r: r["cell"]["batch"], "d"),
+    ("Images/s", lambda r: r["metrics"]["fps"], ".2f"),
+    ("Batch Latency (ms)", lambda r: r["metrics"]["mean"], ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+    ("Per-Image Latency (ms)", lambda r: r["metrics"]["mean"] / r["cell"]["batch"], ".2f"),
+]
+
+DETECTION_COLUMNS = [
+    ("Detections", lambda b: b["bucket"], ""),
+    ("Calls", lambda b: b["calls"], "d"),
+    ("Mean Detections", lambda b: b["mean_detections"], ".1f"),
+    ("Latency (ms)", lambda b: b["mean"], ".2f"),
+    ("p50 (ms)", lambda b: b["p50"], ".2f"),
+    ("p99 (ms)", lambda b: b["p99"], ".2f"),
+]
+
+
+def _stage(name, key="mean"):
+    return lambda r: r["metrics"]["stages"].get(name, {}).get(key)
+
+
+STAGE_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("Preprocess (ms)", _stage("preprocess"), ".2f"),
+    ("Inference (ms)", _stage("inference"), ".2f"),
+    ("Postprocess (ms)", _stage("postprocess"), ".2f"),
+    ("Overhead (ms)", _stage("overhead"), ".2f"),
+    ("Non-Inference Share", lambda r: 1.0 - _stage("inference", "share")(r), ".0%"),
+]
+
+
+def write_stage_breakdown(f, records):
+    """Append the per-stage mean latency table for records that carry stage timings."""
+    staged = [r for r in records if r["metrics"].get("stages", {}).get("inference")]
+    if not staged:
+        return
+    f.write("\n## Stage Breakdown\n\n")
+    f.write(
+        "Mean per-call time by stage. Overhead is time inside the call not attributed to a "
+        "stage; a high non-inference share means the model is overhead-dominated.\n\n"
+    )
+    f.write(render_table(staged, STAGE_COLUMNS) + "\n")
+
+
+# Per-stream rate used to turn throughput into streams per process
+STREAM_FPS = 15
+
+
+def _memory(key, scale=MB):
+    def get(r):
+        value = r["metrics"].get("memory", {}).get(key)
+        return value / scale if value is not None else None
+
+    return get
+
+
+def rss_per_stream(record, stream_fps=STREAM_FPS):
+    """Peak RSS divided by the ``stream_fps`` streams one process sustains, in MB."""
+    streams = int(record["metrics"]["fps"] // stream_fps)
+    if not streams or "memory" not in record["metrics"]:
+        return None
+    return record["metrics"]["memory"]["peak_rss"] / MB / streams
+
+
+MEMORY_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("Artifact (MB)", _memory("artifact_bytes"), ".1f"),
+    ("Load Delta (MB)", _memory("load_delta"), ".0f"),
+    ("Steady RSS (MB)", _memory("steady_rss"), ".0f"),
+    ("Peak RSS (MB)", _memory("peak_rss"), ".0f"),
+    ("RSS Growth (MB)", _memory("rss_growth"), "+.1f"),
+    (f"Streams @{STREAM_FPS} FPS", lambda r: int(r["metrics"]["fps"] // STREAM_FPS), "d"),
+    ("RSS per Stream (MB)", rss_per_stream, ".0f"),
+]
+
+ALLOCATION_COLUMNS = [
+    ("Site", lambda s: s["site"], ""),
+    ("KiB", lambda s: s["bytes"] / 1024, ".1f"),
+    ("Blocks", lambda s: s["count"], "d"),
+]
+
+
+def write_memory(f, records):
+    """Append the memory table, leak warnings and tracemalloc allocation sites."""
+    measured = [r for r in records if r["metrics"].get("memory")]
+    if not measured:
+        return
+    f.write("\n## Memory\n\n")
+    scope = {r["metrics"]["memory"]["peak_scope"] for r in measured}
+    f.write(
+        "Load delta is the RSS added by loading the model. Steady RSS is the median after "
+        "each timed call and RSS growth compares the first and last quarter of the loop. "
+        f"RSS per stream divides peak RSS by the {STREAM_FPS} FPS streams one process "
+        "sustains at the measured throughput. Peak RSS is per cell"
+        + (" (process lifetime peak on this platform)" if "process" in scope else "")
+        + ".\n\n"
+    )
+    f.write(render_table(measured, MEMORY_COLUMNS) + "\n")
+    for r in measured:
+        memory, cell = r["metrics"]["memory"], r["cell"]
+        if memory["leak_suspect"]:
+            f.write(
+                f"\n**Possible leak:** {cell['model']} ({cell['format']}) grew "
+                f"{memory['rss_growth'] / MB:.1f} MB over the timed loop "
+                f"({memory['rss_growth_per_iter'] / 1024:.1f} KiB/iteration)\n"
+            )
+    for r in measured:
+        allocations = r["metrics"]["memory"].get("allocations")
+        if not allocations:
+            continue
+        cell = r["cell"]
+        f.write(f"\n### Python Allocations: {cell['model']} ({cell['format']})\n\n")
+        f.write(
+            f"tracemalloc over {allocations['iterations']} calls: peak "
+            f"{allocations['python_peak_per_call'] / 1024:.1f} KiB per call, "
+            f"{allocations['python_retained_per_call'] / 1024:.2f} KiB retained per call.\n\n"
+        )
+        if allocations["sites"]:
+            f.write("Allocations still held after the pass, by source line:\n\n")
+            f.write(render_table(allocations["sites"], ALLOCATION_COLUMNS) + "\n")
+
+
+SOAK_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    *DRIFT_COLUMNS,
+]
+
+
+def write_soak(f, records):
+    """Append the soak drift table (first vs last quarter of the windows)."""
+    soaked = [r for r in records if r["metrics"].get("soak")]
+    if not soaked:
+        return
+    f.write("\n## Soak Drift\n\n")
+    f.write(render_table(soaked, SOAK_COLUMNS) + "\n")
+    f.write(
+        "\nChanges compare the median of the last quarter of the windows with the first "
+        "quarter. Per-window metrics are in each record's soak log.\n"
+    )
+    for r in soaked:
+        drift = r["metrics"]["soak"]["drift"]
+        if drift and drift["degraded"]:
+            f.write(
+                f"\n**Warning:** {r['cell']['model']} ({r['cell']['format']}) degraded "
+                f"during the soak: {', '.join(drift['flags'])}\n"
+            )
+
+
+def write_detection_buckets(f, records):
+    """Append per-record latency-by-detection-count tables for corpus runs."""
+    bucketed = [r for r in records if r["metrics"].get("detection_buckets")]
+    if not bucketed:
+        return
+    f.write("\n## Latency by Detection Count\n\n")
+    f.write("Per-call latency grouped by detections in that call (NMS/postprocess load).\n")
+    for r in bucketed:
+        cell = r["cell"]
+        f.write(
+            f"\n### {cell['model']} ({cell['format']}, batch {cell['batch']}, {cell['input']})\n\n"
+        )
+        f.write(render_table(r["metrics"]["detection_buckets"], DETECTION_COLUMNS) + "\n")
+
+
+def write_speed_results(records, path="results/yolo_speed_results.md"):
+    """Render the speed table for ``records`` (one run) from the results store."""
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# YOLO Speed Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]) + "\n")
+        f.write(render_table(records, SPEED_COLUMNS) + "\n")
+        fastest = fastest_by_model(records)
+        if len({r["cell"]["format"] for r in records}) > 1:
+            f.write("\n## Fastest Backend per Model\n\n")
+            for model, r in fastest.items():
+                f.write(f"- **{model}**: {r['cell']['format']} ({r['metrics']['fps']:.2f} FPS)\n")
+        write_stage_breakdown(f, records)
+        write_memory(f, records)
+        write_soak(f, records)
+        write_detection_buckets(f, records)
+    print(f"\nResults saved to {path}")
+
+
+def fastest_by_model(records):
+    """Map each model to its highest-throughput record."""
+    best = {}
+    for r in records:
+        model = r["cell"]["model"]
+        if model not in best or r["metrics"]["fps"] > best[model]["metrics"]["fps"]:
+            best[model] = r
+    return best
+
+
+def write_batch_results(records, path="results/yolo_batch_results.md"):
+    """Render the batch sweep table and per-model throughput plateau."""
+    Path(path).parent.mkdir(exist_ok=True)
+    by_model = {}
+    for r in records:
+        key = f"{r['cell']['model']} ({r['cell']['format']})"
+        by_model.setdefault(key, []).append(
+            {"batch": r["cell"]["batch"], "fps": r["metrics"]["fps"]}
+        )
+    with open(path, "w") as f:
+        f.write("# YOLO Batch Throughput Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            f.write(f"**Input:** {records[0]['cell'].get('input', '640x640 zeros')}\n\n")
+        f.write(render_table(records, BATCH_COLUMNS) + "\n")
+        f.write("\n## Throughput Plateau\n\n")
+        f.write("Smallest batch size within 5% of peak images/s.\n\n")
+        for model, rows in by_model.items():
+            f.write(f"- **{model}**: batch {find_throughput_plateau(rows)}\n")
+        write_detection_buckets(f, records)
+    print(f"\nResults saved to {path}")
+
+
+IMGSZ_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("imgsz", lambda r: r["cell"].get("imgsz", 640), ""),
+    ("Images/s", lambda r: r["metrics"]["fps"], ".2f"),
+    ("Latency (ms)", lambda r: r["metrics"]["mean"], ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+]
+
+DYNAMIC_COLUMNS = [
+    ("Model", lambda p: p["model"], ""),
+    ("imgsz", lambda p: p["imgsz"], ""),
+    ("Static p50 (ms)", lambda p: p["static"]["p50"], ".2f"),
+    ("Dynamic p50 (ms)", lambda p: p["dynamic"]["p50"], ".2f"),
+    ("Static p99 (ms)", lambda p: p["static"]["p99"], ".2f"),
+    ("Dynamic p99 (ms)", lambda p: p["dynamic"]["p99"], ".2f"),
+    ("Dynamic Cost (p50)", lambda p: p["dynamic"]["p50"] / p["static"]["p50"] - 1.0, "+.1%"),
+]
+
+
+def is_dynamic(record):
+    return "dynamic" in record["cell"]["format"]
+
+
+def dynamic_pairs(records):
+    """Static and dynamic-shape ONNX records of the same model, imgsz and batch, paired."""
+    pairs = {}
+    for r in records:
+        if r["cell"]["backend"] != "onnxruntime":
+            continue
+        cell = r["cell"]
+        key = (cell["model"], cell.get("imgsz", 640), cell["batch"])
+        kind = "dynamic" if is_dynamic(r) else "static"
+        pairs.setdefault(key, {"model": key[0], "imgsz": key[1]})[kind] = r["metrics"]
+    return [p for p in pairs.values() if "static" in p and "dynamic" in p]
+
+
+def write_imgsz_results(records, accuracy=(), path="results/yolo_imgsz_results.md"):
+    """Render the input-size sweep, with mAP per shape and the static/dynamic comparison."""
+    Path(path).parent.mkdir(exist_ok=True)
+    maps = {
+        (model_id(a["cell"]["model"]), a["cell"]["backend"], a["cell"]["imgsz"]): a["metrics"]
+        for a in accuracy
+    }
+
+    def accuracy_of(r):
+        return maps.get(
+            (model_id(r["cell"]["model"]), r["cell"]["backend"], r["cell"].get("imgsz", 640))
+        )
+
+    columns = list(IMGSZ_COLUMNS)
+    if maps:
+        columns += [
+            ("mAP@50", lambda r: (accuracy_of(r) or {}).get("map50"), ".3f"),
+            ("mAP@50-95", lambda r: (accuracy_of(r) or {}).get("map5095"), ".3f"),
+        ]
+    with open(path, "w") as f:
+        f.write("# YOLO Input Size Benchmarks\n\n")
+        if records:
+            f.write(render_environment(records[0]))
+            f.write(
+                f"**Input:** {records[0]['cell'].get('input', 'zeros at the model input shape')}\n\n"
+            )
+        f.write(render_table(records, columns) + "\n")
+        f.write(
+            "\nRectangular sizes are width x height, rounded up to the model stride "
+            f"({STRIDE}). A 1280x720 camera frame letterboxes into 1280x736 without "
+            "the padding a square 1280 input needs.\n"
+        )
+        pairs = dynamic_pairs(records)
+        if pairs:
+            f.write("\n## Static vs Dynamic ONNX Export\n\n")
+            f.write(
+                "Static rows use one export per shape; dynamic rows run a single export with "
+                "dynamic batch and spatial axes at every shape.\n\n"
+            )
+            f.write(render_table(pairs, DYNAMIC_COLUMNS) + "\n")
+    print(f"\nResults saved to {path}")
+
+
+def run_imgsz_sweep(args, device):
+    """Benchmark every target model at each ``args.imgsz`` shape and save a table.
+
+    ONNX Runtime runs a static export per shape plus one dynamic-shape export
+    (unless ``--static-only``). With ``--accuracy-data`` every (model, backend,
+    shape) is also scored by the cached accuracy engine.
+    """
+    target_models = [args.model] if args.model else list(MODELS.keys())
+    fp16 = args.fp16 and device != "cpu"
+    compare_dynamic = not args.static_only
+    print("=== Vision Benchmarks: Input Size Sweep ===")
+    print(f"Device: {device_name(device)}")
+    print(f"Sizes: {', '.join(str(imgsz_label(s)) for s in args.imgsz)}")
+    print(f"Backends: {', '.join(args.backends)}")
+
+    paths = {name: resolve_model_path(name) for name in target_models}
+    prefetch_exports(
+        paths.values(), args, device, imgsizes=args.imgsz, compare_dynamic=compare_dynamic
+    )
+    corpus = corpus_from_args(args)
+
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records, accuracy = [], []
+    for name, path in paths.items():
+        for backend in args.backends:
+            for options in backend_variants(args, backend, compare_dynamic):
+                for imgsz in args.imgsz:
+                    try:
+                        r = benchmark_model(
+                            path,
+                            device=device,
+                            warmup=args.warmup,
+                            runs=args.runs,
+                            fp16=fp16,
+                            backend=backend,
+                            backend_options=options,
+                            corpus=corpus,
+                            imgsz=imgsz,
+                        )
+                    except Exception as e:
+                        print(f"  {backend} failed for {name} at {imgsz_label(imgsz)}: {e}")
+                        continue
+                    record = speed_record(
+                        name, r, device, run_id, benchmark="yolo_imgsz", runs=args.runs
+                    )
+                    record["cell"].setdefault("imgsz", imgsz_label(imgsz))
+                    store.append(record)
+                    records.append(record)
+            if args.accuracy_data:
+                accuracy += score_shapes(path, backend, args, device, run_id, store)
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_imgsz_results(records, accuracy)
+
+
+def score_shapes(path, backend, args, device, run_id, store):
+    """Cached-engine mAP of ``path`` on ``backend`` at every swept shape."""
+    # Imported here: benchmark_accuracy imports this module
+    from benchmarks.benchmark_accuracy import accuracy_record, benchmark_accuracy_cached
+
+    records = []
+    for imgsz in args.imgsz:
+        try:
+            result = benchmark_accuracy_cached(
+                path, args.accuracy_data, backend=backend, imgsz=imgsz, device=device
+            )
+        except Exception as e:
+            print(f"  Accuracy failed for {path} ({backend}) at {imgsz_label(imgsz)}: {e}")
+            continue
+        record = accuracy_record(result, run_id)
+        store.append(record)
+        records.append(record)
+    return records
+
+
+def run_batch_sweep(args, device):
+    """Benchmark every target model across ``args.batch_sizes`` and save a table."""
+    target_models = [args.model] if args.model else list(MODELS.keys())
+    fp16 = args.fp16 and device != "cpu"
+    precision = "FP16" if fp16 else "FP32"
+    print("=== Vision Benchmarks: Batch Throughput Sweep ===")
+    print(f"Device: {device_name(device)}")
+    print(f"Precision: {precision} | Batch sizes: {args.batch_sizes}")
+    print(f"Backends: {', '.join(args.backends)}")
+
+    paths = {name: resolve_model_path(name) for name in target_models}
+    prefetch_exports(
+        paths.values(), args, device, batch_sizes=args.batch_sizes, imgsizes=args.imgsz
+    )
+    corpus = corpus_from_args(args)
+
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
+    for name, path in paths.items():
+        for backend in args.backends:
+            try:
+                rows = benchmark_batch_sizes(
+                    path,
+                    args.batch_sizes,
+                    device=device,
+                    warmup=args.warmup,
+                    runs=args.runs,
+                    fp16=fp16,
+                    backend=backend,
+                    backend_options=backend_options(args, backend),
+                    corpus=corpus,
+                    imgsz=args.imgsz[0],
+                )
+            except Exception as e:
+                print(f"  Batch sweep failed for {name} ({backend}): {e}")
+                continue
+            plateau = find_throughput_plateau(rows)
+            print(f"  Throughput plateau for {name} ({backend}): batch {plateau}")
+            for row in rows:
+                record = speed_record(
+                    name, row["result"], device, run_id, benchmark="yolo_batch", runs=args.runs
+                )
+                store.append(record)
+                records.append(record)
+
+    print(f"Run {run_id} saved to {args.store}")
+    write_batch_results(records)
 
 
 def main():
@@ -82,63 +979,185 @@ def main():
         help="Specific model to benchmark (e.g. yolo11n). Omit to run all.",
     )
     parser.add_argument("--runs", type=int, default=100, help="Number of inference runs")
-    parser.add_argument("--fp16", action="store_true", help="Use FP16 precision (PyTorch)")
+    parser.add_argument(
+        "--fp16", action="store_true", help="Use FP16 precision (PyTorch; TensorRT is always FP16)"
+    )
     parser.add_argument(
         "--export", action="store_true", help="Export to TensorRT FP16 and benchmark"
     )
+    parser.add_argument(
+        "--backends",
+        type=parse_backends,
+        default=["pytorch"],
+        help="Comma-separated backends to sweep: pytorch,torchscript,onnxruntime,onnxruntime_int8,tensorrt",
+    )
+    parser.add_argument(
+        "--ort-opt-level",
+        choices=ORT_OPT_LEVELS,
+        default="all",
+        help="ONNX Runtime graph optimization level",
+    )
+    parser.add_argument(
+        "--intra-op-threads", type=int, default=0, help="ONNX Runtime intra-op threads (0=auto)"
+    )
+    parser.add_argument(
+        "--inter-op-threads", type=int, default=0, help="ONNX Runtime inter-op threads (0=auto)"
+    )
+    parser.add_argument(
+        "--ort-nms",
+        choices=NMS_METHODS,
+        default="numpy",
+        help="ONNX Runtime postprocessing: NumPy, torchvision or ultralytics NMS",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default=None,
+        help="Inference device (e.g. cpu, cuda, 0). Defaults to cuda if available.",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=parse_batch_sizes,
+        default=None,
+        help="Comma-separated batch sizes to sweep (e.g. 1,2,4,8,16,32)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=None,
+        help="Fixed warmup iterations. Omit to warm up until latency stabilizes.",
+    )
+    parser.add_argument(
+        "--histogram", action="store_true", help="Print an HDR-style latency histogram"
+    )
+    parser.add_argument(
+        "--export-workers",
+        type=int,
+        default=None,
+        help="Parallel export processes when several models need exporting (default: CPUs)",
+    )
+    parser.add_argument(
+        "--store", type=Path, default=Path("results/runs.jsonl"), help="JSONL results store"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write cProfile, collapsed-stack and torch.profiler traces to results/profiles/",
+    )
+    parser.add_argument(
+        "--profile-iters", type=int, default=20, help="Iterations per profiler pass"
+    )
+    parser.add_argument(
+        "--memory-iters",
+        type=int,
+        default=0,
+        help="After the timed loop, trace Python allocations over this many calls (tracemalloc)",
+    )
+    parser.add_argument(
+        "--imgsz",
+        type=parse_imgsz,
+        default=[640],
+        help="Model input sizes, square or WxH (e.g. 320,640,1280x720); several sizes run a sweep",
+    )
+    parser.add_argument(
+        "--static-only",
+        action="store_true",
+        help="In an --imgsz sweep, skip the dynamic-shape ONNX export comparison",
+    )
+    parser.add_argument(
+        "--accuracy-data",
+        type=str,
+        default=None,
+        help="In an --imgsz sweep, also score mAP per shape on this dataset yaml (cached)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=parse_duration,
+        default=None,
+        help="Soak mode: run each cell for this long (e.g. 30m, 2h) instead of --runs calls",
+    )
+    parser.add_argument(
+        "--soak-log",
+        type=Path,
+        default=None,
+        help="JSONL file for per-window soak metrics "
+        "(default: results/soak/<run id>_<model>_<backend>.jsonl, one per cell)",
+    )
+    parser.add_argument(
+        "--soak-window",
+        type=parse_duration,
+        default=DEFAULT_WINDOW_S,
+        help="Soak metrics window (default: 60s)",
+    )
+    add_corpus_arguments(parser)
 
     args = parser.parse_args()
+    device = args.device or default_device()
+    if args.export and "tensorrt" not in args.backends:
+        args.backends.append("tensorrt")
+    if len(args.imgsz) > 1 and args.batch_sizes:
+        parser.error("--batch-sizes cannot be combined with several --imgsz sizes")
+    if args.duration and (len(args.imgsz) > 1 or args.batch_sizes):
+        parser.error("--duration soaks single cells; it cannot be combined with sweeps")
+
+    if len(args.imgsz) > 1:
+        run_imgsz_sweep(args, device)
+        return
+    if args.batch_sizes:
+        run_batch_sweep(args, device)
+        return
 
-    results = []
     target_models = [args.model] if args.model else list(MODELS.keys())
 
     precision = "FP16" if args.fp16 else "FP32"
     print("=== Vision Benchmarks: Speed Benchmark ===")
-    print(f"Device: {torch.cuda.get_device_name(0) if torch.cuda.is_available() else 'CPU'}")
-    print(f"Precision: {precision} | TensorRT export: {args.export}")
+    print(f"Device: {device_name(device)}")
+    print(f"Precision: {precision} | Backends: {', '.join(args.backends)}")
 
-    for name in target_models:
-        model_file = MODELS.get(name, name)
+    store = ResultsStore(args.store)
+    run_id = new_run_id()
+    records = []
 
-        # Download if needed
-        try:
-            path = download_if_missing(name) if name in MODELS else model_file
-        except Exception:
-            path = model_file
-
-        # PyTorch benchmark
-        fps, latency = benchmark_model(path, runs=args.runs, fp16=args.fp16)
-        results.append(
-            {"model": name, "format": f"PyTorch {precision}", "fps": fps, "latency": latency}
-        )
+    paths = {name: resolve_model_path(name) for name in target_models}
+    prefetch_exports(paths.values(), args, device, imgsizes=args.imgsz)
+    corpus = corpus_from_args(args)
 
-        # TensorRT benchmark
-        if args.export:
+    for name, path in paths.items():
+        # Every backend sees the same inputs, so rows are directly comparable
+        for backend in args.backends:
+            cell_id = f"{Path(path).stem}_{backend}"  # one soak log per cell
             try:
-                engine_path = export_tensorrt(path, fp16=True)
-                trt_fps, trt_latency = benchmark_model(engine_path, runs=args.runs)
-                results.append(
-                    {
-                        "model": name,
-                        "format": "TensorRT FP16",
-                        "fps": trt_fps,
-                        "latency": trt_latency,
-                    }
+                r = benchmark_model(
+                    path,
+                    device=device,
+                    warmup=args.warmup,
+                    runs=args.runs,
+                    fp16=args.fp16,
+                    histogram=args.histogram,
+                    backend=backend,
+                    backend_options=backend_options(args, backend),
+                    corpus=corpus,
+                    profile_dir=PROFILE_ROOT / f"{name}_{backend}" if args.profile else None,
+                    profile_iters=args.profile_iters,
+                    imgsz=args.imgsz[0],
+                    memory_iters=args.memory_iters,
+                    duration=args.duration,
+                    soak_log=args.soak_log or SOAK_ROOT / f"{run_id}_{cell_id}.jsonl",
+                    soak_window=args.soak_window,
                 )
             except Exception as e:
-                print(f"  TensorRT export failed for {name}: {e}")
+                print(f"  {backend} benchmark failed for {name}: {e}")
+                continue
+            config = {"duration": args.duration} if args.duration else {"runs": args.runs}
+            record = speed_record(name, r, device, run_id, **config)
+            store.append(record)
+            records.append(record)
 
-    # Save results
-    Path("results").mkdir(exist_ok=True)
-    with open("results/yolo_speed_results.md", "w") as f:
-        f.write("# YOLO Speed Benchmarks\n\n")
-        f.write(f"**GPU:** {torch.cuda.get_device_name(0)}\n\n")
-        f.write("| Model | Format | FPS | Latency (ms) |\n")
-        f.write("|-------|--------|----:|--------------:|\n")
-        for r in results:
-            f.write(f"| {r['model']} | {r['format']} | {r['fps']:.2f} | {r['latency']:.2f} |\n")
+    for model, r in fastest_by_model(records).items():
+        print(f"Fastest for {model}: {r['cell']['format']} ({r['metrics']['fps']:.2f} FPS)")
 
-    print("\nResults saved to results/yolo_speed_results.md")
+    print(f"Run {run_id} saved to {args.store}")
+    write_speed_results(records)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.benchmark_sweep import cell_command, prefetch_cell_exports
+from benchmarks.benchmark_yolo import default_device
+from utils.config import ConfigError, completed_keys, expand_config, load_config
+from utils.results_store import ResultsStore, new_run_id, render_environment, render_table
+from utils.scheduler import Cell, Scheduler, parse_cores
+
+SPEED_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Format", lambda r: r["cell"]["format"], ""),
+    ("imgsz", lambda r: r["cell"].get("imgsz", 640), ""),
+    ("Batch", lambda r: r["cell"]["batch"], "d"),
+    ("Threads", lambda r: r["config"].get("threads") or "auto", ""),
+    ("Images/s", lambda r: r["metrics"]["fps"], ".2f"),
+    ("Latency (ms)", lambda r: r["metrics"]["mean"], ".2f"),
+    ("p50 (ms)", lambda r: r["metrics"]["p50"], ".2f"),
+    ("p99 (ms)", lambda r: r["metrics"]["p99"], ".2f"),
+]
+
+ACCURACY_COLUMNS = [
+    ("Model", lambda r: r["cell"]["model"], ""),
+    ("Backend", lambda r: r["cell"].get("backend", "pytorch"), ""),
+    ("FP16", lambda r: "yes" if r["cell"].get("half") else "", ""),
+    ("imgsz", lambda r: r["cell"].get("imgsz", 640), ""),
+    ("Dataset", lambda r: r["cell"]["data"], ""),
+    ("Engine", lambda r: r["cell"].get("engine", "val"), ""),
+    ("mAP@50", lambda r: r["metrics"]["map50"], ".3f"),
+    ("mAP@50-95", lambda r: r["metrics"]["map5095"], ".3f"),
+    ("Precision", lambda r: r["metrics"]["precision"], ".3f"),
+    ("Recall", lambda r: r["metrics"]["recall"], ".3f"),
+]
+
+
+def config_cells(config, device):
+    """Scheduler cells of a config; speed cells are exclusive."""
+    return [
+        Cell(cell_id, params, exclusive=params["kind"] == "speed")
+        for cell_id, params in expand_config(config, device).items()
+    ]
+
+
+def plan(config, device, store, force=False):
+    """``(cells, done)``: every cell of the config and the ids of those already stored."""
+    cells = config_cells(config, device)
+    if force:
+        return cells, set()
+    finished = completed_keys(ResultsStore(store).records())
+    return cells, {c.id for c in cells if c.params["key"] in finished}
+
+
+def config_records(store, cells):
+    """Latest stored record of each cell, in cell order."""
+    latest = {}
+    for record in ResultsStore(store).records():
+        key = record["config"].get("cell_key")
+        if key:
+            latest[key] = record
+    return [latest[c.params["key"]] for c in cells if c.params["key"] in latest]
+
+
+def write_config_results(name, records, path=None):
+    """Render the speed and accuracy tables of a config's cells."""
+    path = Path(path or f"results/{name}_results.md")
+    path.parent.mkdir(exist_ok=True)
+    speed = [r for r in records if r["benchmark"] == "yolo_speed"]
+    accuracy = [r for r in records if r["benchmark"] == "yolo_accuracy"]
+    with open(path, "w") as f:
+        f.write(f"# Benchmark Config: {name}\n\n")
+        if records:
+            f.write(render_environment(records[-1]) + "\n")
+        if speed:
+            f.write("## Speed\n\n" + render_table(speed, SPEED_COLUMNS) + "\n\n")
+        if accuracy:
+            f.write("## Accuracy\n\n" + render_table(accuracy, ACCURACY_COLUMNS) + "\n")
+    print(f"\nResults saved to {path}")
+
+
+def load(args):
+    config = load_config(args.config)
+    settings = config["settings"]
+    device = args.device or settings["device"] or default_device()
+    store = args.store or Path(settings["store"])
+    return config, settings, device, store
+
+
+def cmd_plan(args):
+    config, _, device, store = load(args)
+    cells, done = plan(config, device, store, args.force)
+    for cell in cells:
+        print(f"{'done' if cell.id in done else 'todo'}  {cell.id}")
+    print(f"\n{config['name']}: {len(cells)} cell(s) on {device}, {len(done)} already in {store}")
+
+
+def cmd_run(args):
+    config, settings, device, store = load(args)
+    cells, done = plan(config, device, store, args.force)
+    pending = [c for c in cells if c.id not in done]
+    run_id = new_run_id()
+    print(f"=== Vision Benchmarks: {config['name']} ===")
+    print(
+        f"Run: {run_id} | Device: {device} | Cells: {len(cells)} "
+        f"({len(done)} already in {store}, {len(pending)} to run)"
+    )
+    if not pending:
+        return
+    prefetch_cell_exports(pending, device, args.export_workers)
+
+    options = config["scheduler"]
+    reserve = options.get("reserve_cores")
+    scheduler = Scheduler(
+        cell_command(run_id, store, device, settings["runs"], settings["warmup"]),
+        jobs=options.get("jobs", 1),
+        reserved_cores=parse_cores(str(reserve)) if reserve is not None else None,
+        timeout=options.get("timeout"),
+        log_dir=args.log_dir,
+    )
+    outcomes = scheduler.run(pending)
+
+    write_config_results(config["name"], config_records(store, cells))
+
+    failed = [o for o in outcomes if o["status"] != "ok"]
+    print(f"\n{len(outcomes) - len(failed)} cell(s) ok, {len(failed)} failed or timed out")
+    for o in failed:
+        print(f"  {o['status']}: {o['cell']} (log: {args.log_dir})")
+    if failed:
+        print("Re-run the same config to retry only the unfinished cells.")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="vision-bench", description="Run the benchmark matrix described by a YAML config"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, func, help_text in (
+        ("run", cmd_run, "Run every cell not already in the results store"),
+        ("plan", cmd_plan, "List the config's cells and which are already done"),
+    ):
+        sub = commands.add_parser(name, help=help_text)
+        sub.set_defaults(func=func)
+        sub.add_argument("config", type=Path, help="Benchmark config (e.g. configs/nightly.yaml)")
+        sub.add_argument("--device", type=str, default=None, help="Override the config's device")
+        sub.add_argument("--store", type=Path, default=None, help="Override the results store")
+        sub.add_argument(
+            "--force", action="store_true", help="Ignore stored results and run every cell"
+        )
+    run = commands.choices["run"]
+    run.add_argument("--log-dir", type=Path, default=Path("results/sweep_logs"))
+    run.add_argument("--export-workers", type=int, default=None)
+    args = parser.parse_args()
+    try:
+        args.func(args)
+    except (OSError, ConfigError) as e:
+        sys.exit(f"error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 import sys
+import time
+from importlib import import_module
 
-import onnxruntime as ort
-import torch
-import ultralytics
-from ultralytics import YOLO
+
+def timed_import(name):
+    """Import ``name``; return the module and the import time in seconds."""
+    t0 = time.perf_counter()
+    module = import_module(name)
+    return module, time.perf_counter() - t0
 
 
 def verify():
@@ -11,36 +15,36 @@ def verify():
     print("-" * 20)
 
     # PyTorch
+    torch, seconds = timed_import("torch")
     torch_available = torch.cuda.is_available()
-    print(f"PyTorch Version: {torch.__version__}")
+    print(f"PyTorch Version: {torch.__version__} (import {seconds:.2f}s)")
     print(f"PyTorch CUDA Available: {torch_available}")
     if torch_available:
         print(f"PyTorch Device Name: {torch.cuda.get_device_name(0)}")
 
     # ONNX Runtime
     print("-" * 20)
+    ort, seconds = timed_import("onnxruntime")
     available_providers = ort.get_available_providers()
     onnx_gpu = "CUDAExecutionProvider" in available_providers
-    print(f"ONNX Runtime Version: {ort.__version__}")
+    print(f"ONNX Runtime Version: {ort.__version__} (import {seconds:.2f}s)")
     print(f"ONNX Runtime Providers: {available_providers}")
     print(f"ONNX Runtime GPU Available: {onnx_gpu}")
 
     # TensorRT
     print("-" * 20)
     try:
-        import tensorrt as trt
-
-        print(f"TensorRT Version: {trt.__version__}")
+        trt, seconds = timed_import("tensorrt")
+        print(f"TensorRT Version: {trt.__version__} (import {seconds:.2f}s)")
     except ImportError as e:
         print(f"TensorRT Import Failed: {e}")
 
     # PaddlePaddle
     print("-" * 20)
     try:
-        import paddle
-
+        paddle, seconds = timed_import("paddle")
         paddle_gpu = paddle.is_compiled_with_cuda()
-        print(f"Paddle Version: {paddle.__version__}")
+        print(f"Paddle Version: {paddle.__version__} (import {seconds:.2f}s)")
         print(f"Paddle GPU Available: {paddle_gpu}")
         if paddle_gpu:
             print(f"Paddle CUDA Version: {paddle.version.cuda()}")
@@ -49,11 +53,13 @@ def verify():
 
     # Ultralytics
     print("-" * 20)
-    print(f"Ultralytics Version: {ultralytics.__version__}")
+    ultralytics, seconds = timed_import("ultralytics")
+    print(f"Ultralytics Version: {ultralytics.__version__} (import {seconds:.2f}s)")
     try:
         # Simple test load
-        _ = YOLO("yolov8n.pt")
-        print("Ultralytics YOLO model load: SUCCESS")
+        t0 = time.perf_counter()
+        _ = ultralytics.YOLO("yolov8n.pt")
+        print(f"Ultralytics YOLO model load: SUCCESS ({time.perf_counter() - t0:.2f}s)")
     except Exception as e:
         print(f"Ultralytics YOLO model load: FAILED: {e}")
 
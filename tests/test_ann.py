@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.ann import (
+    BruteForceIndex,
+    IVFIndex,
+    count_label,
+    get_index,
+    normalize,
+    parse_counts,
+    recall_at_k,
+    synthetic_vectors,
+)
+
+
+def _exact(vectors, queries, k):
+    """Reference top-k by full sort of the float64 score matrix."""
+    scores = np.asarray(queries, np.float64) @ np.asarray(vectors, np.float64).T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def test_parse_counts_and_labels():
+    assert parse_counts("10k,100k,1M") == [10_000, 100_000, 1_000_000]
+    assert parse_counts("") == []
+    assert [count_label(n) for n in (500, 10_000, 1_000_000)] == ["500", "10k", "1M"]
+    with pytest.raises(ValueError):
+        parse_counts("ten")
+    with pytest.raises(ValueError):
+        get_index("annoy")
+
+
+def test_synthetic_vectors_are_cached_unit_vectors(temp_dir):
+    database, queries = synthetic_vectors(1000, 32, queries=20, root=temp_dir)
+    assert isinstance(database, np.memmap) and database.shape == (1000, 32)
+    np.testing.assert_allclose(np.linalg.norm(database, axis=1), 1, rtol=1e-5)
+    assert queries.shape == (20, 32)
+    # float16 files hold the same vectors rounded, so float32 ground truth applies
+    half = synthetic_vectors(1000, 32, "float16", root=temp_dir)
+    assert half.dtype == np.float16
+    np.testing.assert_allclose(half, database, atol=1e-3)
+    assert len(list(temp_dir.glob("*.npy"))) == 2
+
+
+def test_brute_force_is_exact_across_blocks(monkeypatch):
+    """Top-k merged over database blocks equals a full sort, also from float16 storage."""
+    monkeypatch.setattr("utils.ann.CHUNK_ROWS", 128)
+    rng = np.random.default_rng(0)
+    vectors = normalize(rng.standard_normal((1000, 16)))
+    queries = normalize(rng.standard_normal((7, 16)))
+    scores, ids = BruteForceIndex().timed_build(vectors).search(queries, 5)
+    np.testing.assert_array_equal(ids, _exact(vectors, queries, 5))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+    _, ids16 = BruteForceIndex().timed_build(vectors.astype(np.float16)).search(queries, 5)
+    assert recall_at_k(ids16, ids) >= 0.9
+
+
+def test_ivf_recall_grows_with_nprobe_and_is_exact_probing_all_lists(temp_dir):
+    database, queries = synthetic_vectors(4000, 32, queries=50, clusters=8, root=temp_dir)
+    truth = _exact(database, queries, 10)
+    index = IVFIndex(nlist=32).timed_build(database)
+    assert index.offsets[-1] == len(database) and sorted(index.ids) == list(range(4000))
+    assert index.bytes_per_vector > database.itemsize * 32
+
+    recalls = []
+    for nprobe in (1, 4, 32):
+        index.params["nprobe"] = nprobe
+        _, ids = index.search(queries, 10)
+        recalls.append(recall_at_k(ids, truth))
+    assert recalls[0] < recalls[1] <= recalls[2] == 1.0
+    assert index.describe() == "nlist=32, nprobe=32"
@@ -0,0 +1,110 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.backends import BACKENDS, Backend, get_backend, imgsz_label, parse_backends
+
+
+class CountingBackend(Backend):
+    """Backend stub that records its lifecycle."""
+
+    name = "counting"
+    label = "Counting"
+
+    def load(self):
+        self.calls = []
+        self.loaded = True
+
+    def infer(self, batch):
+        self.calls.append(len(batch))
+        return [np.zeros((0, 6), dtype=np.float32) for _ in batch]
+
+    def close(self):
+        self.loaded = False
+
+
+def test_builtin_backends_registered():
+    """PyTorch, TorchScript, ONNX Runtime and TensorRT are available."""
+    assert {"pytorch", "torchscript", "onnxruntime", "tensorrt"} <= set(BACKENDS)
+
+
+def test_parse_backends():
+    """Backend lists are parsed and validated."""
+    assert parse_backends("pytorch, onnxruntime") == ["pytorch", "onnxruntime"]
+    with pytest.raises(ValueError):
+        parse_backends("pytorch,caffe")
+
+
+def test_get_backend_unknown():
+    """Unknown backends raise a helpful ValueError."""
+    with pytest.raises(ValueError, match="Unknown backend"):
+        get_backend("caffe")
+
+
+def test_format_names():
+    """Format labels carry runtime, precision and ORT options."""
+    assert get_backend("pytorch")("m.pt").format_name == "PyTorch FP32"
+    assert get_backend("tensorrt")("m.pt").format_name == "TensorRT FP16"
+    ort = get_backend("onnxruntime")("m.pt", opt_level="basic")
+    assert ort.format_name == "ONNX Runtime FP32 (opt=basic)"
+    ort = get_backend("onnxruntime")("m.pt", dynamic=True)
+    assert ort.format_name == "ONNX Runtime FP32 (opt=all, dynamic)"
+    ort = get_backend("onnxruntime")("m.pt", nms="torchvision")
+    assert ort.format_name == "ONNX Runtime FP32 (opt=all, nms=torchvision)"
+    assert "torch" in ort.frameworks
+    assert get_backend("onnxruntime")("m.pt").frameworks == ("onnxruntime",)
+    int8 = get_backend("onnxruntime_int8")("m.pt", half=True)
+    assert int8.format_name == "ONNX Runtime INT8 (opt=all)"
+    assert not int8.export_request()["half"]
+
+
+def test_dynamic_export_shared_across_shapes():
+    """Static exports are per shape and batch; every dynamic run shares one export."""
+    ort = get_backend("onnxruntime")
+    static = [
+        ort("m.pt", imgsz=s, batch_size=b).export_request()
+        for s in (320, (736, 1280))
+        for b in (1, 4)
+    ]
+    dynamic = [
+        ort("m.pt", imgsz=s, batch_size=b, dynamic=True).export_request()
+        for s in (320, (736, 1280))
+        for b in (1, 4)
+    ]
+    assert len({str(r) for r in static}) == 4
+    assert len({str(r) for r in dynamic}) == 1
+
+
+def test_imgsz_label():
+    assert imgsz_label(640) == 640
+    assert imgsz_label((640, 640)) == 640
+    assert imgsz_label((736, 1280)) == "1280x736"
+
+
+def test_backend_lifecycle():
+    """Context manager loads and closes; warmup runs infer the requested times."""
+    backend = CountingBackend("m.pt", batch_size=2)
+    batch = [np.zeros((8, 8, 3), dtype=np.uint8)] * 2
+    with backend:
+        assert backend.loaded
+        latencies = backend.warmup(batch, 3)
+        out = backend.infer(batch)
+    assert not backend.loaded
+    assert len(latencies) == 3
+    assert backend.calls == [2, 2, 2, 2]
+    assert len(out) == 2 and out[0].shape == (0, 6)
+
+
+@pytest.mark.skipif(not Path("yolo11n.pt").exists(), reason="Requires yolo11n.pt model")
+def test_onnxruntime_matches_pytorch(sample_image_with_objects):
+    """ONNX Runtime and PyTorch find the same number of objects on the same frame."""
+    frame = np.array(sample_image_with_objects())[..., ::-1].copy()
+    counts = []
+    for name in ("pytorch", "onnxruntime"):
+        with get_backend(name)("yolo11n.pt") as backend:
+            counts.append(len(backend.infer([frame])[0]))
+    assert counts[0] == counts[1]
@@ -1,14 +1,41 @@
+import argparse
 import sys
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from benchmarks.benchmark_accuracy import benchmark_accuracy
-from benchmarks.benchmark_webcam import benchmark_latency
-from benchmarks.benchmark_yolo import benchmark_model
+from benchmarks.benchmark_accuracy import benchmark_accuracy, benchmark_accuracy_cached
+from benchmarks.benchmark_webcam import benchmark_latency, save_latency_record
+from benchmarks.benchmark_yolo import (
+    benchmark_model,
+    find_throughput_plateau,
+    parse_batch_sizes,
+    parse_imgsz,
+    prefetch_exports,
+    speed_record,
+)
+from utils.backends import BACKENDS, Backend
+from utils.evaluation import CACHE_CONF
+from utils.results_store import make_record
+
+
+class StagedBackend(Backend):
+    """Backend stub reporting fixed per-stage times and one detection per frame."""
+
+    name = "staged"
+    label = "Staged"
+
+    def load(self):
+        pass
+
+    def infer(self, batch):
+        self.stage_ms = {"preprocess": 0.0, "inference": 0.0, "postprocess": 0.0}
+        return [np.zeros((1, 6), dtype=np.float32) for _ in batch]
+
 
 # benchmark_webcam requires hardware, so we might skip it or mock it
 
@@ -36,6 +63,78 @@ def test_benchmark_yolo_dry_run():
     assert latency > 0
 
 
+@pytest.mark.skipif(not Path("yolo11n.pt").exists(), reason="Requires yolo11n.pt model")
+def test_benchmark_yolo_batched_cpu():
+    """Smoke test: a batch of 2 on CPU reports images/sec, not calls/sec."""
+    fps, latency = benchmark_model("yolo11n.pt", device="cpu", warmup=1, runs=1, batch_size=2)
+    assert fps == pytest.approx(2000.0 / latency)
+
+
+def test_benchmark_model_records_stages(monkeypatch):
+    """Per-call stage timings and detections are captured for every iteration."""
+    monkeypatch.setitem(BACKENDS, "staged", StagedBackend)
+    r = benchmark_model("m.pt", device="cpu", warmup=1, runs=5, batch_size=2, backend="staged")
+    assert set(r.stages) == {"preprocess", "inference", "postprocess", "overhead"}
+    assert all(len(v) == 5 for v in r.stages.values())
+    assert r.detections == [2] * 5
+    assert r.finished >= r.started
+
+
+def test_parse_batch_sizes():
+    """Batch sizes are de-duplicated and sorted."""
+    assert parse_batch_sizes("8,1,2,2,4") == [1, 2, 4, 8]
+
+
+def test_parse_batch_sizes_rejects_zero():
+    """Zero or negative batch sizes are rejected."""
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_batch_sizes("0,1")
+
+
+def test_parse_imgsz():
+    """Square sizes stay ints; WxH becomes (h, w) rounded up to the stride."""
+    assert parse_imgsz("320, 640,320") == [320, 640]
+    assert parse_imgsz("1280x720") == [(736, 1280)]
+    assert parse_imgsz("500") == [512]
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_imgsz("720p")
+
+
+def test_benchmark_model_imgsz(monkeypatch):
+    """The dummy frame takes the model input shape and the record cell carries it."""
+    monkeypatch.setitem(BACKENDS, "staged", StagedBackend)
+    r = benchmark_model("m.pt", device="cpu", warmup=1, runs=2, backend="staged", imgsz=(736, 1280))
+    assert r.imgsz == (736, 1280)
+    record = speed_record("m", r, "cpu", run_id="t")
+    assert record["cell"]["imgsz"] == "1280x736"
+    default = benchmark_model("m.pt", device="cpu", warmup=1, runs=2, backend="staged")
+    assert "imgsz" not in speed_record("m", default, "cpu", run_id="t")["cell"]
+
+
+def test_benchmark_model_records_memory(monkeypatch):
+    """Every cell carries RSS figures; ``memory_iters`` adds the tracemalloc pass."""
+    monkeypatch.setitem(BACKENDS, "staged", StagedBackend)
+    r = benchmark_model("m.pt", device="cpu", warmup=1, runs=8, backend="staged", memory_iters=3)
+    memory = speed_record("m", r, "cpu", run_id="t")["metrics"]["memory"]
+    assert memory["peak_rss"] >= memory["steady_rss"] * 0.9 > 0
+    assert memory["artifact_bytes"] is None  # "m.pt" does not exist
+    assert memory["allocations"]["iterations"] == 3
+
+
+def test_find_throughput_plateau():
+    """Plateau is the smallest batch within tolerance of peak throughput."""
+    rows = [
+        {"batch": 1, "fps": 50.0},
+        {"batch": 2, "fps": 90.0},
+        {"batch": 4, "fps": 118.0},
+        {"batch": 8, "fps": 120.0},
+        {"batch": 16, "fps": 121.0},
+    ]
+    assert find_throughput_plateau(rows) == 4
+    assert find_throughput_plateau(rows, tolerance=0.0) == 16
+    assert find_throughput_plateau([]) is None
+
+
 @pytest.mark.skip(reason="Requires COCO dataset")
 def test_benchmark_accuracy_dry_run():
     """Smoke test: Accuracy check on small data."""
@@ -43,7 +142,62 @@ def test_benchmark_accuracy_dry_run():
     pass
 
 
+def test_cached_accuracy_reports_map_at_cache_conf(monkeypatch):
+    """mAP comes from the CACHE_CONF row even when --confs sweeps lower thresholds."""
+
+    def sweep_thresholds(predictions, labels, confs):
+        row = {"map5095": 0.0, "precision": 0.5, "recall": 0.5, "f1": 0.5}
+        return [{**row, "conf": c, "map50": c} for c in confs]
+
+    monkeypatch.setattr("benchmarks.benchmark_accuracy.load_dataset", lambda data: ([], [], None))
+    monkeypatch.setattr(
+        "benchmarks.benchmark_accuracy.predict_dataset", lambda *a, **k: (None, "key", True)
+    )
+    monkeypatch.setattr("benchmarks.benchmark_accuracy.sweep_thresholds", sweep_thresholds)
+    r = benchmark_accuracy_cached("m.pt", "data.yaml", confs=[0.0001, 0.25])
+    assert r["map50"] == CACHE_CONF
+    assert r["sweep"][0]["conf"] == 0.0001
+
+
 def test_requirements_file():
     """Verify requirements.txt exists."""
     req = Path(__file__).parent.parent / "requirements.txt"
     assert req.exists()
+
+
+def test_tensorrt_exports_fp16_by_default(monkeypatch):
+    """Without --fp16 a tensorrt cell still requests an FP16 engine; PyTorch stays FP32."""
+    requested = []
+
+    def export_many(requests, max_workers=None):
+        requested.extend(requests)
+        return []
+
+    monkeypatch.setattr("benchmarks.benchmark_yolo.export_many", export_many)
+    args = argparse.Namespace(fp16=False, backends=["tensorrt", "torchscript"], export_workers=1)
+    prefetch_exports(["m.pt"], args, "cuda")
+    precision = {r["fmt"]: r["half"] for r in requested}
+    assert precision == {"engine": True, "torchscript": False}
+
+
+def test_webcam_results_keep_legacy_rows(temp_dir, monkeypatch):
+    """Rows of the old append-only results file survive every re-render, once."""
+    monkeypatch.chdir(temp_dir)
+    results = temp_dir / "results" / "webcam_latency_results.md"
+    results.parent.mkdir()
+    old = [
+        "| yolo11n.pt | 1080p | 201.51 | 173.57 | 231.33 |",
+        "| yolo11n.pt | 720p | 201.58 | 185.01 | 221.71 |",
+    ]
+    results.write_text("\n".join(old) + "\n")
+
+    cell = {"model": "yolo11n.pt", "resolution": "1280x720", "mode": "sequential"}
+    metrics = {"mean": 80.0, "p50": 79.0, "p99": 95.0, "min": 70.0, "max": 99.0, "fps": 12.5}
+    for _ in range(2):
+        save_latency_record(make_record("webcam_latency", cell, metrics), "results/runs.jsonl")
+
+    text = results.read_text()
+    assert text.startswith("# Webcam Latency Benchmarks")
+    assert text.count("| sequential |") == 2
+    assert text.count("## Legacy Results") == 1
+    assert all(text.count(row) == 1 for row in old)
@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config import (
+    ConfigError,
+    completed_keys,
+    expand_config,
+    expand_matrix,
+    load_config,
+    load_models,
+    runnable,
+)
+
+CONFIG = """
+name: test
+runs: 50
+models: [yolo11n, yolo11s]
+int8: {calibration: data.yaml, calibration_images: 10}
+speed:
+  matrix:
+    backend: [pytorch, onnxruntime]
+    precision: [fp32, fp16, int8]
+    imgsz: [640]
+  exclude:
+    - {model: yolo11s, backend: pytorch}
+  include:
+    - {model: yolo11n, backend: onnxruntime, precision: fp32, imgsz: 1280x736}
+accuracy:
+  matrix:
+    model: [yolo11n]
+    data: [data.yaml]
+"""
+
+
+def _config(temp_dir, text=CONFIG):
+    path = temp_dir / "config.yaml"
+    path.write_text(text)
+    return load_config(path)
+
+
+def test_expand_matrix_include_exclude():
+    matrix = {"os": ["linux", "mac"], "py": [3.11, 3.12]}
+    combos = expand_matrix(
+        matrix,
+        include=[{"os": "linux", "extra": True}, {"os": "windows", "py": 3.12}],
+        exclude=[{"os": "mac", "py": 3.11}],
+    )
+    assert combos == [
+        {"os": "linux", "py": 3.11, "extra": True},
+        {"os": "linux", "py": 3.12, "extra": True},
+        {"os": "mac", "py": 3.12},
+        {"os": "windows", "py": 3.12},
+    ]
+
+
+def test_expand_config_drops_unrunnable_cells(temp_dir):
+    config = _config(temp_dir)
+    cpu = expand_config(config, "cpu")
+    assert sorted(cpu) == [
+        "accuracy/yolo11n/pytorch/fp32/data.yaml/640/cached",
+        "speed/yolo11n/onnxruntime/fp32/b1/1280x736/t0",
+        "speed/yolo11n/onnxruntime/fp32/b1/640/t0",
+        "speed/yolo11n/onnxruntime_int8/int8/b1/640/t0",
+        "speed/yolo11n/pytorch/fp32/b1/640/t0",
+        "speed/yolo11s/onnxruntime/fp32/b1/640/t0",
+        "speed/yolo11s/onnxruntime_int8/int8/b1/640/t0",
+    ]
+    assert next(iter(cpu)).startswith("accuracy/")
+    int8 = cpu["speed/yolo11n/onnxruntime_int8/int8/b1/640/t0"]
+    assert int8["options"] == {"calibration": "data.yaml", "calibration_images": 10}
+    assert cpu["speed/yolo11n/onnxruntime/fp32/b1/1280x736/t0"]["imgsz"] == (736, 1280)
+    # FP16 cells only exist on GPU
+    assert len(expand_config(config, "cuda")) == len(cpu) + 3
+
+
+def test_tensorrt_cells_are_fp16_only():
+    """TensorRT builds FP16 engines, so an fp32 cell would mislabel an FP16 run."""
+    assert runnable({"backend": "tensorrt", "precision": "fp16"}, "cuda")
+    assert not runnable({"backend": "tensorrt", "precision": "fp32"}, "cuda")
+    assert not runnable({"backend": "tensorrt", "precision": "int8"}, "cuda")
+    cells = expand_config(
+        load_config(Path(__file__).parent.parent / "configs/nightly.yaml"), "cuda"
+    )
+    assert {p["precision"] for p in cells.values() if p["backend"] == "tensorrt"} == {"fp16"}
+
+
+def test_cell_keys_depend_on_settings(temp_dir):
+    config = _config(temp_dir)
+    keys = {cid: p["key"] for cid, p in expand_config(config, "cpu").items()}
+    assert len(set(keys.values())) == len(keys)
+    assert keys == {cid: p["key"] for cid, p in expand_config(config, "cpu").items()}
+
+    config["settings"]["runs"] = 100
+    rekeyed = {cid: p["key"] for cid, p in expand_config(config, "cpu").items()}
+    accuracy = "accuracy/yolo11n/pytorch/fp32/data.yaml/640/cached"
+    assert rekeyed[accuracy] == keys[accuracy]  # run count does not change mAP
+    assert all(rekeyed[c] != keys[c] for c in keys if c.startswith("speed/"))
+
+
+def test_completed_keys_match_host():
+    def record(key, host):
+        return {"config": {"cell_key": key}, "environment": {"hostname": host}}
+
+    records = [record("a", "here"), record("b", "elsewhere"), record(None, "here")]
+    assert completed_keys(records, hostname="here") == {"a"}
+
+
+def test_invalid_configs(temp_dir):
+    with pytest.raises(ConfigError, match="unknown keys"):
+        _config(temp_dir, "speed: {matrix: {backend: [pytorch]}}\nrunz: 5\n")
+    with pytest.raises(ConfigError, match="needs a 'speed'"):
+        _config(temp_dir, "name: empty\n")
+    config = _config(temp_dir, "speed: {matrix: {model: [a], batchsize: [1]}}\n")
+    with pytest.raises(ConfigError, match="unknown matrix keys"):
+        expand_config(config, "cpu")
+
+
+def test_shipped_configs_expand():
+    models = load_models()
+    assert models["yolo11n"] == "yolo11n.pt"
+    for path in sorted(Path(__file__).parent.parent.glob("configs/*.yaml")):
+        if path.name != "models.yaml":
+            assert expand_config(load_config(path), "cpu"), path
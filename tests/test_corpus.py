@@ -0,0 +1,87 @@
+import pickle
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.corpus import (
+    Corpus,
+    bucket_by_detections,
+    load_corpus,
+    parse_resolutions,
+    parse_spec,
+    synthetic_frames,
+)
+
+
+def test_parse_resolutions():
+    """Named and WxH resolutions are accepted; junk is rejected."""
+    assert parse_resolutions("720p, 4k") == [(1280, 720), (3840, 2160)]
+    assert parse_resolutions("640x480") == [(640, 480)]
+    with pytest.raises(ValueError):
+        parse_resolutions("8k")
+
+
+def test_parse_spec():
+    assert parse_spec("synthetic") == ("synthetic", 24)
+    assert parse_spec("synthetic:6") == ("synthetic", 6)
+    assert parse_spec("dir:images") == ("dir", "images")
+    with pytest.raises(ValueError):
+        parse_spec("video:")
+    with pytest.raises(ValueError):
+        parse_spec("webcam:0")
+
+
+def test_synthetic_frames_cycle_resolutions():
+    """Frames cycle through the requested resolutions and object densities."""
+    frames = list(synthetic_frames(4, [(64, 48), (32, 32)], densities=(0, 10)))
+    assert [f.shape for f, _ in frames] == [(48, 64, 3), (32, 32, 3)] * 2
+    assert [s.rsplit(":", 1)[1] for _, s in frames] == ["0", "0", "10", "10"]
+
+
+def test_corpus_roundtrip_mixed_shapes(temp_dir):
+    """Frames of different shapes come back byte-identical from the memory map."""
+    rng = np.random.default_rng(0)
+    originals = [rng.integers(0, 256, shape, dtype=np.uint8) for shape in [(8, 12, 3), (20, 5, 3)]]
+    corpus = Corpus.build(temp_dir / "c", ((f, f"f{i}") for i, f in enumerate(originals)), "test")
+
+    assert len(corpus) == 2
+    assert np.array_equal(corpus[0], originals[0])
+    assert np.array_equal(corpus[1], originals[1])
+    assert not corpus[0].flags.writeable
+    assert [f.shape for f in corpus.batch(1, batch_size=3)] == [(20, 5, 3), (8, 12, 3), (20, 5, 3)]
+
+    clone = pickle.loads(pickle.dumps(corpus))
+    assert clone.path == corpus.path
+    assert np.array_equal(clone[1], originals[1])
+
+
+def test_load_corpus_from_folder_is_cached(temp_dir, sample_image_with_objects):
+    """A folder corpus is decoded once and reused until its files change."""
+    images = temp_dir / "images"
+    images.mkdir()
+    for i in range(3):
+        frame = np.array(sample_image_with_objects(width=160, height=120))[..., ::-1]
+        cv2.imwrite(str(images / f"{i}.png"), frame)
+
+    first = load_corpus(f"dir:{images}", root=temp_dir / "cache")
+    second = load_corpus(f"dir:{images}", root=temp_dir / "cache")
+    assert len(first) == 3
+    assert first.path == second.path
+    assert first.resolutions() == {"160x120": 3}
+
+
+def test_bucket_by_detections():
+    """Latencies are grouped by detection count with per-bucket percentiles."""
+    latencies = [1.0, 1.0, 2.0, 3.0, 4.0, 10.0]
+    detections = [0, 0, 5, 12, 60, 400]
+    rows = bucket_by_detections(latencies, detections)
+    assert [r["bucket"] for r in rows] == ["0", "1-9", "10-49", "50-99", "300+"]
+    assert rows[0]["calls"] == 2
+    assert rows[-1]["mean"] == 10.0
+    with pytest.raises(ValueError):
+        bucket_by_detections([1.0], [1, 2])
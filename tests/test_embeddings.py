@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.embeddings import (
+    IMAGENET_MEAN,
+    Embedder,
+    FeatureStore,
+    ImageFolderLoader,
+    get_embedder,
+    load_features,
+    resize_center_crop,
+)
+from utils.evaluation import list_images
+
+
+def _write_images(directory, count, shape=(60, 80, 3)):
+    (directory / "nested").mkdir()
+    for i in range(count):
+        folder = directory / "nested" if i % 2 else directory
+        cv2.imwrite(str(folder / f"{i:02d}.png"), np.full(shape, i * 10, dtype=np.uint8))
+
+
+def test_resize_center_crop_and_preprocess():
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    image[:, 75:125] = (0, 0, 255)  # red centre band (BGR)
+    crop = resize_center_crop(image, 32)
+    assert crop.shape == (32, 32, 3)
+
+    embedder = get_embedder("resnet50")("resnet50")
+    assert embedder.dim == 2048 and embedder.format_name == "torchvision FP32"
+    out = np.empty((3, 224, 224), dtype=np.float32)
+    embedder.preprocess(np.zeros((300, 400, 3), dtype=np.uint8), out)
+    # Black pixels map to -mean/std in RGB order
+    np.testing.assert_allclose(out[:, 0, 0], -np.array(IMAGENET_MEAN) / embedder.std, rtol=1e-5)
+    with pytest.raises(ValueError):
+        get_embedder("word2vec")
+
+
+def test_loader_batches_in_order_and_skips_unreadable(temp_dir):
+    _write_images(temp_dir, 7)
+    (temp_dir / "broken.jpg").write_bytes(b"not an image")
+    paths = list_images(temp_dir)
+    assert len(paths) == 8
+
+    def transform(image, out):
+        out[...] = image[0, 0, 0]
+
+    loader = ImageFolderLoader(paths, 3, transform, (2,), workers=2, prefetch=1)
+    batches = list(loader)
+    seen = [p for ps, _ in batches for p in ps]
+    assert [p.name for p in seen] == [p.name for p in paths if p.name != "broken.jpg"]
+    values = np.concatenate([b[:, 0] for _, b in batches])
+    assert list(values) == [int(p.stem) * 10 for p in seen]
+    assert [p.name for p in loader.failed] == ["broken.jpg"]
+    assert len(loader.wait_ms) == len(loader) == 3
+
+
+def test_feature_store_round_trip_and_trim(temp_dir):
+    store = FeatureStore(temp_dir / "f.npy", count=5, dim=4, dtype="float16")
+    store.append(np.eye(4, dtype=np.float32)[:3], ["a", "b", "c"])
+    assert store.nbytes == 3 * 4 * 2
+    path = store.close()
+    features, paths = load_features(path)
+    assert isinstance(features, np.memmap) and features.dtype == np.float16
+    assert features.shape == (3, 4) and paths == ["a", "b", "c"]
+    np.testing.assert_array_equal(features, np.eye(4)[:3])
+    assert list(temp_dir.glob("*.tmp.npy")) == []
+
+
+def test_embed_normalizes_forward_output():
+    class Fixed(Embedder):
+        models = {"fixed": 2}
+
+        def load(self):
+            pass
+
+        def forward(self, batch):
+            return np.array([[3.0, 4.0]] * len(batch), dtype=np.float32)
+
+    with Fixed("fixed") as embedder:
+        features = embedder.embed(np.zeros((2, 3, 224, 224), dtype=np.float32))
+    np.testing.assert_allclose(features, [[0.6, 0.8]] * 2)
+    assert embedder.stage_ms["inference"] >= 0
@@ -0,0 +1,139 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.backends import BACKENDS, Backend
+from utils.evaluation import (
+    Detections,
+    evaluate,
+    match_detections,
+    predict_dataset,
+    read_labels,
+    sweep_thresholds,
+)
+
+BOX = [10.0, 10.0, 110.0, 110.0]
+
+
+def dets(*images):
+    """Detections from per-image lists of ``(x1, y1, x2, y2, score, cls)`` rows."""
+    return Detections.from_arrays([np.array(rows, dtype=np.float32) for rows in images])
+
+
+def shifted(dx, score, cls=0):
+    return [BOX[0] + dx, BOX[1], BOX[2] + dx, BOX[3], score, cls]
+
+
+class CountingBackend(Backend):
+    """Backend stub returning one box per frame and counting inference calls."""
+
+    name = "counting"
+    label = "Counting"
+    calls = 0
+
+    def load(self):
+        pass
+
+    def infer(self, batch):
+        CountingBackend.calls += len(batch)
+        return [np.array([[*BOX, 0.9, 0]], dtype=np.float32) for _ in batch]
+
+
+def test_perfect_predictions():
+    """Predictions identical to the labels score 1.0 everywhere."""
+    gt = dets([[*BOX, 1, 0], [200, 200, 260, 300, 1, 3]], [[0, 0, 50, 50, 1, 3]])
+    pred = dets([[*BOX, 0.9, 0], [200, 200, 260, 300, 0.8, 3]], [[0, 0, 50, 50, 0.7, 3]])
+    r = evaluate(pred, gt)
+    assert r["map50"] == pytest.approx(1.0)
+    assert r["map5095"] == pytest.approx(1.0)
+    assert r["precision"] == pytest.approx(1.0)
+    assert r["recall"] == pytest.approx(1.0)
+
+
+def test_known_average_precision():
+    """TP, FP, TP in score order gives the hand-computed COCO 101-point AP."""
+    gt = dets([[*BOX, 1, 0]], [[*BOX, 1, 0]])
+    pred = dets([[*BOX, 0.9, 0], [300, 300, 350, 350, 0.8, 0]], [[*BOX, 0.7, 0]])
+    # Recall 0.5 at precision 1 (51 recall points), then recall 1 at precision 2/3 (50)
+    expected = (51 * 1.0 + 50 * 2 / 3) / 101
+    assert evaluate(pred, gt)["map5095"] == pytest.approx(expected)
+
+
+def test_match_in_score_order():
+    """Higher scores claim labels first, whatever their IoU (the COCO rule)."""
+    gt = dets([[*BOX, 1, 0]])
+    # Score 0.9 overlaps with IoU 0.6, score 0.8 with IoU ~0.9
+    pred = dets([shifted(25, 0.9), shifted(5, 0.8)])
+    tp = match_detections(pred, gt, iou_thresholds=[0.5, 0.7])
+    assert tp.tolist() == [[True, False], [False, True]]
+
+
+def test_match_respects_image_and_class():
+    """Boxes only match labels of the same image and class."""
+    gt = dets([[*BOX, 1, 0]], [[*BOX, 1, 1]])
+    pred = dets([[*BOX, 0.9, 1]], [[*BOX, 0.9, 1]])
+    assert match_detections(pred, gt)[:, 0].tolist() == [False, True]
+
+
+def test_filter_conf_and_max_det():
+    """max_det keeps the highest scores of each image, in their original order."""
+    pred = dets([shifted(0, 0.2), shifted(1, 0.9), shifted(2, 0.5)], [shifted(0, 0.05)])
+    top = pred.filter(max_det=2)
+    assert top.offsets.tolist() == [0, 2, 3]
+    assert top.scores.tolist() == pytest.approx([0.9, 0.5, 0.05])
+    assert pred.filter(conf=0.3).offsets.tolist() == [0, 2, 2]
+
+
+def test_sweep_matches_full_evaluation():
+    """Re-scoring from one match equals evaluating each threshold from scratch."""
+    rng = np.random.default_rng(0)
+    gts, preds = [], []
+    for _ in range(20):
+        n = int(rng.integers(1, 6))
+        xy = rng.uniform(0, 400, (n, 2))
+        boxes = np.c_[xy, xy + rng.uniform(20, 80, (n, 2))]
+        gts.append(np.c_[boxes, np.ones(n), rng.integers(0, 3, n)])
+        noisy = boxes[rng.integers(0, n, 8)] + rng.normal(0, 6, (8, 4))
+        preds.append(np.c_[noisy, rng.random(8), rng.integers(0, 3, 8)])
+    gt, pred = Detections.from_arrays(gts), Detections.from_arrays(preds)
+
+    rows = sweep_thresholds(pred, gt, confs=[0.001, 0.3, 0.6])
+    for row in rows:
+        full = evaluate(pred, gt, conf=row["conf"])
+        for key in ("map50", "map5095", "precision", "recall"):
+            assert row[key] == pytest.approx(full[key])
+    assert rows[0]["detections_per_image"] > rows[-1]["detections_per_image"]
+
+
+def test_read_labels(temp_dir):
+    """Normalized xywh rows and polygons become pixel xyxy boxes."""
+    path = temp_dir / "a.txt"
+    path.write_text("2 0.5 0.5 0.5 0.25\n1 0.1 0.1 0.3 0.1 0.3 0.4 0.1 0.4\n")
+    rows = read_labels(path, width=200, height=100)
+    np.testing.assert_allclose(rows[:, :4], [[50, 37.5, 150, 62.5], [20, 10, 60, 40]])
+    assert rows[:, 5].tolist() == [2, 1]
+    assert read_labels(temp_dir / "missing.txt", 10, 10).shape == (0, 6)
+
+
+def test_predictions_cached_once(temp_dir, monkeypatch):
+    """Inference runs on the first call only; later calls load the memory map."""
+    monkeypatch.setitem(BACKENDS, "counting", CountingBackend)
+    CountingBackend.calls = 0
+    images = []
+    for i in range(3):
+        images.append(temp_dir / f"{i}.png")
+        cv2.imwrite(str(images[-1]), np.zeros((120, 160, 3), dtype=np.uint8))
+
+    first, key, cached = predict_dataset("m.pt", images, backend="counting", root=temp_dir)
+    again, key2, cached2 = predict_dataset("m.pt", images, backend="counting", root=temp_dir)
+    assert (cached, cached2) == (False, True)
+    assert key == key2
+    assert CountingBackend.calls == 3
+    assert isinstance(again.boxes, np.memmap)
+    assert again.offsets.tolist() == [0, 1, 2, 3]
+    assert again.classes.dtype == np.int16
@@ -0,0 +1,147 @@
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.export_cache import ExportCache, _locked, cache_key
+
+
+@pytest.fixture
+def fake_export(monkeypatch):
+    """Replace the ultralytics export with one that writes a small file."""
+    calls = []
+
+    def _export(workdir, model_path, fmt, imgsz, batch, dynamic, half, device):
+        calls.append((model_path, fmt, imgsz, batch))
+        out = Path(workdir) / f"out.{fmt}"
+        out.write_bytes(b"x" * 100)
+        return str(out)
+
+    monkeypatch.setattr(ExportCache, "_export", staticmethod(_export))
+    return calls
+
+
+@pytest.fixture
+def weights(temp_dir):
+    path = temp_dir / "model.pt"
+    path.write_bytes(b"weights-v1")
+    return path
+
+
+def test_cache_key_changes_with_settings(weights):
+    """Format, precision, imgsz and batch all change the key."""
+    base, _ = cache_key(weights, "onnx")
+    assert cache_key(weights, "onnx")[0] == base
+    assert cache_key(weights, "torchscript")[0] != base
+    assert cache_key(weights, "onnx", half=True)[0] != base
+    assert cache_key(weights, "onnx", imgsz=320)[0] != base
+    assert cache_key(weights, "onnx", batch=4)[0] != base
+
+
+def test_engine_key_includes_gpu(weights, monkeypatch):
+    """Engines built on another GPU architecture get another key; ONNX keys ignore the GPU."""
+    monkeypatch.setattr("utils.export_cache.gpu_identity", lambda device=0: "GPU A (sm_86)")
+    ampere, fields = cache_key(weights, "engine", half=True)
+    onnx, _ = cache_key(weights, "onnx")
+    assert fields["gpu"] == "GPU A (sm_86)"
+    monkeypatch.setattr("utils.export_cache.gpu_identity", lambda device=0: "GPU B (sm_89)")
+    assert cache_key(weights, "engine", half=True)[0] != ampere
+    assert cache_key(weights, "onnx")[0] == onnx
+
+
+def test_cache_key_changes_with_weights(weights):
+    """Retrained weights at the same path invalidate the entry."""
+    before, _ = cache_key(weights, "onnx")
+    time.sleep(0.01)
+    weights.write_bytes(b"weights-v2")
+    after, fields = cache_key(weights, "onnx")
+    assert before != after
+    assert len(fields["weights_sha256"]) == 64
+
+
+def test_cache_key_rejects_unknown_format(weights):
+    with pytest.raises(ValueError):
+        cache_key(weights, "tflite")
+
+
+def test_get_or_export_reuses_artifact(temp_dir, weights, fake_export):
+    """The second request for the same settings is a cache hit."""
+    cache = ExportCache(temp_dir / "cache")
+    first = cache.get_or_export(weights, "onnx", imgsz=320)
+    second = cache.get_or_export(weights, "onnx", imgsz=320)
+
+    assert first == second
+    assert first.endswith("model.onnx")
+    assert len(fake_export) == 1
+    assert cache.lookup(weights, "onnx", imgsz=320) == first
+    assert cache.lookup(weights, "onnx", imgsz=640) is None
+
+
+def test_evict_lru(temp_dir, weights, fake_export):
+    """Eviction removes the least recently used entries first."""
+    cache = ExportCache(temp_dir / "cache", max_bytes=10_000)
+    old = cache.get_or_export(weights, "onnx", imgsz=320)
+    new = cache.get_or_export(weights, "onnx", imgsz=640)
+    time.sleep(0.01)
+    cache.lookup(weights, "onnx", imgsz=640)  # touch
+
+    assert cache.size() == 200
+    evicted = cache.evict(max_bytes=150)
+    assert len(evicted) == 1
+    assert not Path(old).exists()
+    assert Path(new).exists()
+
+
+def test_export_larger_than_budget_is_kept(temp_dir, weights, fake_export):
+    """The eviction after an export never removes the entry it just created."""
+    cache = ExportCache(temp_dir / "cache", max_bytes=50)
+    old = cache.get_or_export(weights, "onnx", imgsz=320)
+    new = cache.get_or_export(weights, "onnx", imgsz=640)
+
+    assert Path(new).exists()
+    assert not Path(old).exists()
+
+
+def test_cache_hit_waits_for_eviction_of_its_key(temp_dir, weights, fake_export):
+    """A hit is checked under the key lock, so it never returns a path being evicted."""
+    cache = ExportCache(temp_dir / "cache")
+    path = cache.get_or_export(weights, "onnx")
+    result = []
+    with _locked(temp_dir / "cache" / f"{Path(path).parent.name}.lock"):
+        thread = threading.Thread(
+            target=lambda: result.append(cache.get_or_export(weights, "onnx"))
+        )
+        thread.start()
+        time.sleep(0.1)
+        assert not result  # blocked behind the evicting holder
+        shutil.rmtree(Path(path).parent)
+    thread.join(2)
+    assert Path(result[0]).exists()
+    assert len(fake_export) == 2
+
+
+def test_lock_waiter_retries_after_lock_file_is_replaced(temp_dir):
+    """A waiter on an unlinked lock file must not hold the key alongside the new file's owner."""
+    path = temp_dir / "key.lock"
+    entered = threading.Event()
+
+    def waiter():
+        with _locked(path):
+            entered.set()
+
+    with _locked(path):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.1)  # waiter is blocked on the old file
+        path.unlink()  # as evict() does while holding the lock
+        new_owner = _locked(path)
+        new_owner.__enter__()
+    assert not entered.wait(0.2)
+    new_owner.__exit__(None, None, None)
+    thread.join(2)
+    assert entered.is_set()
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.memory import (
+    MB,
+    MemoryTracker,
+    artifact_bytes,
+    peak_rss_bytes,
+    rss_bytes,
+    rss_growth,
+    trace_allocations,
+)
+
+
+def test_rss_readings_are_plausible():
+    rss = rss_bytes()
+    assert 10 * MB < rss < 64 * 1024 * MB
+    assert peak_rss_bytes() >= rss * 0.9
+
+
+def test_tracker_sees_load_delta_and_peak():
+    """Memory touched during ``load`` shows up in the load delta and the cell peak."""
+    tracker = MemoryTracker()
+    model = np.ones(64 * MB // 8)  # "load" 64 MB of weights
+    tracker.loaded()
+    for _ in range(8):
+        tracker.sample()
+    stats = tracker.summary()
+    assert stats["load_delta"] > 48 * MB
+    assert stats["peak_rss"] >= stats["steady_rss"] * 0.9
+    assert not stats["leak_suspect"]
+    del model
+
+
+def test_rss_growth_flags_steady_leak():
+    flat = np.full(100, 500 * MB) + np.random.default_rng(0).integers(0, 64 * 1024, 100)
+    growth, slope = rss_growth(flat)
+    assert abs(growth) < MB
+    leaking = 500 * MB + np.arange(100) * 100 * 1024  # 100 KiB per iteration
+    growth, slope = rss_growth(leaking)
+    assert growth > 5 * MB
+    assert abs(slope - 100 * 1024) < 1
+
+
+def test_artifact_bytes(temp_dir):
+    (temp_dir / "model.onnx").write_bytes(b"x" * 1000)
+    (temp_dir / "openvino").mkdir()
+    (temp_dir / "openvino" / "model.bin").write_bytes(b"x" * 300)
+    (temp_dir / "openvino" / "model.xml").write_bytes(b"x" * 20)
+    assert artifact_bytes(temp_dir / "model.onnx") == 1000
+    assert artifact_bytes(temp_dir / "openvino") == 320
+    assert artifact_bytes(temp_dir / "missing.pt") is None
+
+
+def test_trace_allocations_finds_leaking_line():
+    """Objects kept alive across calls are reported with the line that allocated them."""
+    leaked = []
+
+    def step():
+        scratch = [bytearray(10_000) for _ in range(5)]  # freed: counts toward the peak only
+        leaked.append(bytearray(50_000))
+        return scratch
+
+    allocations = trace_allocations(step, iterations=10)
+    assert allocations["python_peak_per_call"] > 90_000
+    assert allocations["python_retained_per_call"] >= 50_000
+    top = allocations["sites"][0]
+    assert top["site"].startswith("tests/test_memory.py:")
+    assert top["bytes"] >= 500_000
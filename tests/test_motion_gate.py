@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.evaluation import detection_f1
+from utils.motion_gate import MotionGate, gate_stages
+from utils.pipeline import Pipeline
+
+
+class FrameList:
+    """cv2-style source over a list of frames."""
+
+    def __init__(self, frames):
+        self.frames = iter(frames)
+
+    def read(self):
+        frame = next(self.frames, None)
+        return frame is not None, frame
+
+
+def _scene(moving=None, noise=0, seed=0):
+    """Static 360x640 scene; ``moving`` draws a block at that x offset."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((360, 640, 3), 90, dtype=np.uint8)
+    frame[100:260, 300:400] = 170
+    if noise:
+        frame = np.clip(frame + rng.normal(0, noise, frame.shape), 0, 255).astype(np.uint8)
+    if moving is not None:
+        frame[150:230, moving : moving + 40] = (0, 0, 255)
+    return frame
+
+
+def test_gate_skips_static_frames_and_refreshes():
+    gate = MotionGate(threshold=0.003, refresh=4)
+    runs = [gate(_scene(noise=2, seed=i)) for i in range(10)]
+    # First frame runs, then every 5th frame is a forced refresh despite no motion
+    assert runs == [True, False, False, False, False, True, False, False, False, False]
+    assert gate.forced == 1 and gate.skip_rate == pytest.approx(0.8)
+
+    gate = MotionGate(threshold=0.003, refresh=100)
+    runs = [gate(_scene(moving=100 + 20 * i)) for i in range(5)]
+    assert all(runs)
+
+
+def test_gate_accumulates_slow_change():
+    """Changes too small per frame still trigger once they add up against the last inferred frame."""
+    gate = MotionGate(threshold=0.003, refresh=100)
+    gate(_scene())
+    # Lighting drifts 2 levels per frame; each frame is within pixel_delta of the last
+    runs = [gate(_scene() + 2 * step) for step in range(1, 15)]
+    assert [i + 1 for i, run in enumerate(runs) if run] == [7, 14]
+
+
+def test_gate_stages_reuse_last_output():
+    frames = [_scene(), _scene(), _scene(moving=200), _scene(moving=200)]
+    calls = []
+
+    def detect(frame):
+        calls.append(1)
+        return np.array([[len(calls), 0, 10, 10, 0.9, 0]], dtype=np.float32)
+
+    gate = MotionGate(threshold=0.003, refresh=100)
+    stages = gate_stages([("prepare", lambda f: f), ("detect", detect)], gate)
+    result = Pipeline(FrameList(frames), stages, keep_outputs=True).run()
+    assert [int(o[0, 0]) for o in result.outputs] == [1, 1, 2, 2]
+    assert len(calls) == 2 and "gate" in result.stage_ms
+
+
+def test_detection_f1_against_reference():
+    box = np.array([[0, 0, 10, 10, 0.9, 1]], dtype=np.float32)
+    moved = np.array([[20, 20, 30, 30, 0.9, 1]], dtype=np.float32)
+    empty = np.zeros((0, 6), dtype=np.float32)
+    assert detection_f1([box, empty], [box, empty])["f1"] == 1.0
+    drift = detection_f1([box, box], [box, moved])
+    assert drift == {"precision": 0.5, "recall": 0.5, "f1": 0.5}
+    assert detection_f1([empty], [empty])["f1"] == 1.0
+    with pytest.raises(ValueError):
+        detection_f1([box], [])
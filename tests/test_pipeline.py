@@ -0,0 +1,142 @@
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.pipeline import (
+    FrameQueue,
+    Pipeline,
+    Preprocessor,
+    letterbox_into,
+    open_source,
+    scale_boxes_back,
+)
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in yielding ``n`` numbered frames."""
+
+    def __init__(self, n, shape=(48, 64, 3)):
+        self.n = n
+        self.shape = shape
+        self.i = 0
+
+    def read(self):
+        if self.i >= self.n:
+            return False, None
+        frame = np.full(self.shape, self.i % 256, dtype=np.uint8)
+        self.i += 1
+        return True, frame
+
+
+def test_frame_queue_drop_oldest():
+    """drop_oldest discards the oldest item when full."""
+    q = FrameQueue(maxsize=2, policy="drop_oldest")
+    for i in range(5):
+        q.put(i)
+    assert q.dropped == 3
+    assert [q.get(), q.get()] == [3, 4]
+
+
+def test_frame_queue_latest_keeps_one():
+    """latest keeps only the newest item regardless of maxsize."""
+    q = FrameQueue(maxsize=8, policy="latest")
+    for i in range(3):
+        q.put(i)
+    assert len(q) == 1
+    assert q.get() == 2
+
+
+def test_frame_queue_rejects_unknown_policy():
+    """Unknown policies raise ValueError."""
+    with pytest.raises(ValueError):
+        FrameQueue(policy="nope")
+
+
+def test_letterbox_into_preserves_aspect():
+    """A 1280x720 frame is scaled to 640x360 and padded vertically."""
+    frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+    out = np.empty((640, 640, 3), dtype=np.uint8)
+    ratio, (pad_x, pad_y) = letterbox_into(frame, out)
+
+    assert ratio == pytest.approx(0.5)
+    assert (pad_x, pad_y) == (0, 140)
+    assert np.all(out[:140] == 114)
+    assert np.all(out[140:500] == 255)
+
+
+def test_preprocessor_reuses_buffers():
+    """Preprocessor cycles through its preallocated tensors."""
+    pre = Preprocessor(imgsz=64, num_buffers=2)
+    frame = np.zeros((32, 32, 3), dtype=np.uint8)
+    a, b, c = pre(frame), pre(frame), pre(frame)
+
+    assert a["tensor"].shape == (1, 3, 64, 64)
+    assert a["tensor"].dtype == np.float32
+    assert a["tensor"] is c["tensor"]
+    assert a["tensor"] is not b["tensor"]
+
+
+def test_scale_boxes_back_roundtrip():
+    """Boxes in letterboxed space map back to the original frame."""
+    boxes = np.array([[100.0, 190.0, 300.0, 290.0]])
+    out = scale_boxes_back(boxes, 0.5, (0, 140), (720, 1280))
+    np.testing.assert_allclose(out, [[200.0, 100.0, 600.0, 300.0]])
+
+
+def test_pipeline_runs_all_stages_in_order():
+    """Every frame passes through every stage in order with per-stage timings."""
+    stages = [("double", lambda f: int(f[0, 0, 0]) * 2), ("inc", lambda v: v + 1)]
+    result = Pipeline(FakeCapture(20), stages, keep_outputs=True).run()
+
+    assert result.frames == 20
+    assert result.dropped == 0
+    assert result.outputs == [i * 2 + 1 for i in range(20)]
+    assert set(result.stage_ms) == {"capture", "double", "inc"}
+    assert all(len(v) == 20 for v in result.stage_ms.values())
+    assert result.fps > 0
+
+
+def test_pipeline_max_frames():
+    """max_frames stops reading early."""
+    result = Pipeline(FakeCapture(100), [("noop", lambda f: f)], max_frames=5).run()
+    assert result.frames == 5
+
+
+def test_pipeline_duration_stops_an_endless_source():
+    """duration ends a run on a source that never runs out."""
+    slow = ("sleep", lambda f: time.sleep(0.01) or f)
+    result = Pipeline(FakeCapture(10**9), [slow], duration=0.2, sample_size=8).run()
+    assert 5 <= result.frames < 100
+    assert len(result.end_to_end_ms) == 8
+
+
+def test_pipeline_propagates_stage_errors():
+    """Exceptions raised in a stage surface from run()."""
+
+    def boom(_):
+        raise RuntimeError("stage failed")
+
+    with pytest.raises(RuntimeError, match="stage failed"):
+        Pipeline(FakeCapture(3), [("boom", boom)]).run()
+
+
+def test_pipeline_reads_video_file(temp_dir):
+    """A local video file can drive the pipeline without a camera."""
+    path = str(temp_dir / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(10):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+    cap = open_source(path)
+    result = Pipeline(cap, [("shape", lambda f: f.shape)], keep_outputs=True).run()
+    cap.release()
+
+    assert result.frames == 10
+    assert result.outputs[0] == (48, 64, 3)
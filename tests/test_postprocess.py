@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.benchmark_postprocess import (
+    detection_agreement,
+    head_shape,
+    synthetic_head_output,
+)
+from utils.postprocess import batched_nms, greedy_nms, non_max_suppression
+
+SHAPE = head_shape(320, num_classes=8)
+
+
+def _ultralytics_float64(output, **kwargs):
+    """ultralytics' NMS on float64 input, so its class offsets do not round boxes."""
+    torch = pytest.importorskip("torch")
+    nms = pytest.importorskip("ultralytics.utils.nms").non_max_suppression
+    dets = nms(torch.from_numpy(output.astype(np.float64)), **kwargs)
+    return [d.numpy().astype(np.float32) for d in dets]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"agnostic": True}, {"classes": [1, 3]}, {"max_det": 5}])
+def test_matches_ultralytics(kwargs):
+    output = synthetic_head_output(3, 40, SHAPE, candidates=10, imgsz=320)
+    ours = non_max_suppression(output, iou_thres=0.6, **kwargs)
+    reference = _ultralytics_float64(output, iou_thres=0.6, **kwargs)
+    assert [len(d) for d in ours] == [len(d) for d in reference]
+    assert detection_agreement(ours, reference) == 1.0
+
+
+def test_chunked_and_greedy_fallback_agree():
+    """Small pair budgets split groups into chunks or fall back to greedy NMS."""
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0, 100, (300, 2))
+    boxes = np.concatenate([xy, xy + rng.uniform(5, 40, (300, 2))], axis=1).astype(np.float32)
+    scores = rng.random(300).astype(np.float32)
+    groups = rng.integers(0, 4, 300)
+    full = batched_nms(boxes, scores, groups, 0.5)
+    for max_pairs in (1, 500, 5000):
+        assert np.array_equal(batched_nms(boxes, scores, groups, 0.5, max_pairs=max_pairs), full)
+    one_group = batched_nms(boxes, scores, np.zeros(300, dtype=int), 0.5)
+    assert np.array_equal(one_group, greedy_nms(boxes, scores, 0.5))
+
+
+def test_end_to_end_and_empty_outputs():
+    e2e = synthetic_head_output(2, 7, (300, 6))
+    dets = non_max_suppression(e2e, conf_thres=0.1, max_det=5)
+    assert [len(d) for d in dets] == [5, 5]
+    assert all(np.isin(d[:, 5], [2, 5]).all() for d in non_max_suppression(e2e, classes=[2, 5]))
+
+    empty = synthetic_head_output(2, 0, SHAPE, imgsz=320)
+    dets = non_max_suppression(empty)
+    assert len(dets) == 2 and all(d.shape == (0, 6) for d in dets)
+    with pytest.raises(ValueError, match="method must be one of"):
+        non_max_suppression(empty, method="opencv")
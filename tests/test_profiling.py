@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.profiling import StackCollector, profile_onnxruntime, profile_step
+
+
+def _leaf():
+    return sum(range(20000))
+
+
+def _root():
+    return _leaf() + _leaf()
+
+
+def test_stack_collector_collapsed_format():
+    """Collapsed stacks nest callers before callees and end with a time in us."""
+    with StackCollector() as collector:
+        _root()
+    lines = collector.collapsed()
+    leaf = [line for line in lines if "_leaf" in line]
+    assert leaf
+    stack, micros = leaf[0].rsplit(" ", 1)
+    frames = stack.split(";")
+    assert frames.index(next(f for f in frames if f.startswith("_root"))) < frames.index(
+        next(f for f in frames if f.startswith("_leaf"))
+    )
+    assert int(micros) > 0
+
+
+def test_profile_step_writes_traces(temp_dir):
+    """Every profiler pass writes its output file."""
+    written = profile_step(_root, temp_dir / "prof", iterations=2, torch_trace=False)
+    names = {p.name for p in written}
+    assert names == {"cprofile.prof", "cprofile.txt", "stacks.collapsed"}
+    assert all(p.stat().st_size > 0 for p in written)
+
+
+def test_profile_onnxruntime_uses_a_separate_profiled_session(temp_dir):
+    """The trace comes from a fresh runtime built with ``profile`` set, closed afterwards."""
+
+    class Runtime:
+        def __init__(self, profile):
+            self.prefix, self.calls, self.closed = Path(profile), 0, False
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.closed = True
+
+        def infer(self, batch):
+            self.calls += 1
+
+        def end_profiling(self):
+            path = self.prefix.with_name(f"{self.prefix.name}_1.json")
+            path.write_text("[]")
+            return str(path)
+
+    built = []
+    written = profile_onnxruntime(
+        lambda **kw: built.append(Runtime(**kw)) or built[-1], [None], temp_dir / "prof", 3
+    )
+    assert [p.name for p in written] == ["ort_trace_1.json"]
+    assert built[0].calls == 3 and built[0].closed
@@ -0,0 +1,129 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.benchmark_quantization import quantization_record
+from utils.quantization import calibration_images, head_postprocess_nodes, quantize_model
+
+onnx = pytest.importorskip("onnx")
+
+
+def tiny_detector(path, batch=1):
+    """Two-module graph named like an ultralytics export: a backbone conv, then a head
+    with a prediction conv and a decode sigmoid."""
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    weights = [
+        numpy_helper.from_array(rng.normal(size=shape).astype(np.float32), name)
+        for name, shape in (("w0", (8, 3, 3, 3)), ("w1", (4, 8, 1, 1)))
+    ]
+    nodes = [
+        helper.make_node("Conv", ["images", "w0"], ["x0"], name="/model.0/conv/Conv", pads=[1] * 4),
+        helper.make_node("Relu", ["x0"], ["x1"], name="/model.0/act/Relu"),
+        helper.make_node("Conv", ["x1", "w1"], ["x2"], name="/model.1/cv2.0/Conv"),
+        helper.make_node("Sigmoid", ["x2"], ["output0"], name="/model.1/Sigmoid"),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "tiny",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [batch, 3, 32, 32])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [batch, 4, 32, 32])],
+        initializer=weights,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=9)
+    onnx.save(model, str(path))
+    return model
+
+
+def write_images(directory, count):
+    directory.mkdir(exist_ok=True)
+    rng = np.random.default_rng(1)
+    for i in range(count):
+        cv2.imwrite(str(directory / f"{i:03d}.jpg"), rng.integers(0, 255, (48, 64, 3), np.uint8))
+    return directory
+
+
+def test_head_postprocess_nodes_keeps_prediction_convs(temp_dir):
+    """Only the decode ops of the last module are excluded from quantization."""
+    model = tiny_detector(temp_dir / "tiny.onnx")
+    assert head_postprocess_nodes(model) == ["/model.1/Sigmoid"]
+
+
+def test_calibration_images_spread_over_source(temp_dir):
+    images = write_images(temp_dir / "images", 10)
+    picked = calibration_images(images, count=4)
+    assert [Path(p).name for p in picked] == ["000.jpg", "003.jpg", "006.jpg", "009.jpg"]
+    assert len(calibration_images(images, count=50)) == 10
+    with pytest.raises(ValueError, match="No calibration images"):
+        calibration_images(write_images(temp_dir / "empty", 0))
+
+
+def test_quantize_model_caches_model_and_ranges(temp_dir, capsys):
+    """The INT8 model is reused as is, and its calibrated ranges across quantization settings."""
+    pytest.importorskip("onnxruntime")
+    import onnxruntime as ort
+
+    source = temp_dir / "tiny.onnx"
+    tiny_detector(source)
+    images = write_images(temp_dir / "images", 4)
+    kwargs = {"calibration": images, "imgsz": (32, 32), "root": temp_dir / "cache"}
+
+    path = quantize_model(source, **kwargs)
+    assert "calibrating on 4 images" in capsys.readouterr().out
+    assert quantize_model(source, **kwargs) == path
+    assert capsys.readouterr().out == ""
+    assert len(list((temp_dir / "cache" / "calibration").glob("*.json"))) == 1
+
+    per_tensor = quantize_model(source, per_channel=False, **kwargs)
+    assert per_tensor != path
+    assert "cached ranges" in capsys.readouterr().out
+
+    quantized = onnx.load(path)
+    ops = [n.op_type for n in quantized.graph.node]
+    assert "QuantizeLinear" in ops and "DequantizeLinear" in ops
+    sigmoid = next(n for n in quantized.graph.node if n.name == "/model.1/Sigmoid")
+    assert sigmoid.output[0] == "output0"  # the decoded output is not re-quantized
+
+    session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    x = np.random.default_rng(2).random((1, 3, 32, 32), dtype=np.float32)
+    assert session.run(None, {"images": x})[0].shape == (1, 4, 32, 32)
+
+
+def test_quantize_static_batch_export(temp_dir):
+    """A static batch-8 export calibrates on full batches, padding the last from the start."""
+    pytest.importorskip("onnxruntime")
+    import onnxruntime as ort
+
+    source = temp_dir / "tiny_b8.onnx"
+    tiny_detector(source, batch=8)
+    images = write_images(temp_dir / "images", 5)
+    path = quantize_model(source, calibration=images, imgsz=(32, 32), root=temp_dir / "cache")
+
+    session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    x = np.random.default_rng(2).random((8, 3, 32, 32), dtype=np.float32)
+    assert session.run(None, {"images": x})[0].shape == (8, 4, 32, 32)
+
+
+def test_quantization_record_speedup_and_drop():
+    fp32 = {"fps": 10.0, "p99": 120.0, "map50": 0.5, "map5095": 0.4, "artifact_bytes": 100}
+    int8 = {"fps": 25.0, "p99": 48.0, "map50": 0.48, "map5095": 0.37, "artifact_bytes": 30}
+    calibration = {
+        "calibration": "coco128.yaml",
+        "calibration_images": 100,
+        "calibrate_method": "minmax",
+        "per_channel": True,
+        "imgsz": 640,
+    }
+    metrics = quantization_record("yolo11n", fp32, int8, "cpu", calibration)["metrics"]
+    assert metrics["speedup"] == pytest.approx(2.5)
+    assert metrics["p99_speedup"] == pytest.approx(2.5)
+    assert metrics["map5095_drop"] == pytest.approx(0.03)
+    no_accuracy = {**int8, "map50": None, "map5095": None}
+    metrics = quantization_record("yolo11n", fp32, no_accuracy, "cpu", calibration)["metrics"]
+    assert metrics["map5095_drop"] is None
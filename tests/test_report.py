@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.report import (
+    accuracy_index,
+    best_under,
+    build_report,
+    join,
+    model_id,
+    pareto_front,
+    speed_configs,
+    write_report,
+)
+from utils.results_store import ResultsStore, make_record
+
+
+def speed(model, fmt, p99, fps, backend="pytorch", batch=1):
+    cell = {"model": model, "backend": backend, "format": fmt, "batch": batch, "device": "cpu"}
+    return make_record("yolo_speed", cell, {"fps": fps, "p99": p99}, run_id="s")
+
+
+def accuracy(model, map5095, **cell):
+    return make_record(
+        "yolo_accuracy", {"model": model, "data": "coco128.yaml", **cell}, {"map5095": map5095}
+    )
+
+
+def row(model, p99, fps, map5095):
+    return {"model": model, "p99": p99, "fps": fps, "map5095": map5095}
+
+
+def test_model_id_normalizes_names():
+    assert model_id("yolo11n.pt") == model_id("yolo11n") == model_id("weights/YOLO11n.onnx")
+    assert model_id("yolov8s-world.pt") == "yolov8s-world"
+
+
+def test_join_prefers_most_specific_accuracy():
+    """Speed keys ("yolo11n") join accuracy keys ("yolo11n.pt"), backend-specific first."""
+    index = accuracy_index(
+        [
+            accuracy("yolo11n.pt", 0.39),
+            accuracy("yolo11n.pt", 0.37, engine="cached", backend="onnxruntime", imgsz=640),
+        ]
+    )
+    rows = speed_configs(
+        [
+            speed("yolo11n", "PyTorch FP32", 10.0, 100.0),
+            speed("yolo11n", "ONNX Runtime FP32 (opt=all)", 8.0, 120.0, backend="onnxruntime"),
+            speed("yolo11s", "PyTorch FP32", 20.0, 50.0),
+        ]
+    )
+    joined = {r["backend"]: r for r in join(rows, index)}
+    assert len(joined) == 2  # yolo11s has no accuracy result
+    assert joined["onnxruntime"]["map5095"] == pytest.approx(0.37)
+    assert joined["onnxruntime"]["map_source"] == "exact"  # cached records default to FP32
+    assert joined["onnxruntime"]["precision"] == "fp32"
+    assert joined["pytorch"]["map5095"] == pytest.approx(0.39)
+    assert joined["pytorch"]["map_source"] == "backend"  # model.val() runs PyTorch
+
+
+def test_join_keeps_fp16_and_fp32_accuracy_apart():
+    """An FP16 cached-engine result never lands on the FP32 speed row of the same backend."""
+    fp32 = accuracy("yolo11n.pt", 0.39, engine="cached", backend="pytorch", imgsz=640)
+    fp16 = accuracy("yolo11n.pt", 0.38, engine="cached", backend="pytorch", imgsz=640, half=True)
+    fp16["timestamp"] = "9999"  # the FP16 result is the latest
+    rows = speed_configs(
+        [
+            speed("yolo11n", "PyTorch FP32", 10.0, 100.0),
+            speed("yolo11n", "PyTorch FP16", 6.0, 160.0),
+        ]
+    )
+    joined = {r["precision"]: r for r in join(rows, accuracy_index([fp32, fp16]))}
+    assert joined["fp32"]["map5095"] == pytest.approx(0.39)
+    assert joined["fp16"]["map5095"] == pytest.approx(0.38)
+    assert {r["map_source"] for r in joined.values()} == {"exact"}
+
+
+def test_pareto_front_and_budget_query():
+    rows = [
+        row("n", p99=5, fps=200, map5095=0.39),
+        row("s", p99=12, fps=90, map5095=0.47),
+        row("s-slow", p99=15, fps=60, map5095=0.46),  # dominated by "s"
+        row("m", p99=30, fps=40, map5095=0.51),
+    ]
+    front = pareto_front(rows, cost=lambda r: r["p99"])
+    assert [r["model"] for r in front] == ["n", "s", "m"]
+    assert best_under(rows, max_p99=10)["model"] == "n"
+    assert best_under(rows, max_p99=20)["model"] == "s"
+    assert best_under(rows, min_fps=50)["model"] == "s"
+    assert best_under(rows, max_p99=1) is None
+
+
+def test_report_from_store(temp_dir):
+    """The report joins the store's latest speed and accuracy records into one file."""
+    store = ResultsStore(temp_dir / "runs.jsonl")
+    store.extend(
+        [
+            speed("yolo11n", "PyTorch FP32", 10.0, 100.0),
+            speed("yolo11s", "PyTorch FP32", 25.0, 40.0),
+            accuracy("yolo11n.pt", 0.39),
+            accuracy("yolo11s.pt", 0.47),
+        ]
+    )
+    rows, records, data = build_report(store)
+    assert data == "coco128.yaml"
+    assert {r["model"] for r in rows} == {"yolo11n", "yolo11s"}
+
+    out = temp_dir / "pareto.md"
+    write_report(rows, records, data, out, max_p99=12)
+    text = out.read_text()
+    assert "## Best mAP with p99 <= 12 ms" in text
+    assert "## Latency Frontier" in text
+    assert text.count("| yolo11s |") == 3  # both frontiers and the full table
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.results_store import (
+    ResultsStore,
+    compare_records,
+    environment_fingerprint,
+    make_record,
+    mann_whitney_u,
+    render_table,
+)
+
+
+def _speed_record(run_id, latencies, model="yolo11n"):
+    return make_record(
+        "yolo_speed",
+        cell={"model": model, "format": "PyTorch FP32", "batch": 1},
+        metrics={"fps": 1000 / float(np.mean(latencies))},
+        latencies=latencies,
+        run_id=run_id,
+    )
+
+
+def test_environment_fingerprint_fields():
+    """Fingerprint carries CPU, core count and package versions."""
+    env = environment_fingerprint()
+    assert env["cpu_count"] >= 1
+    assert env["cpu_model"]
+    assert "numpy" in env["packages"]
+
+
+def test_store_roundtrip_and_runs(temp_dir):
+    """Records are appended as JSONL and grouped into runs."""
+    store = ResultsStore(temp_dir / "runs.jsonl")
+    store.append(_speed_record("run-a", [10.0, 11.0]))
+    store.append(_speed_record("run-a", [12.0, 13.0], model="yolo11s"))
+    store.append(_speed_record("run-b", [10.0, 11.0]))
+
+    assert len(list(store.records())) == 3
+    assert len(list(store.records(run_id="run-a"))) == 2
+    assert [r[0] for r in store.runs()] == ["run-a", "run-b"]
+    assert store.resolve_run("latest") == "run-b"
+    assert store.resolve_run("previous") == "run-a"
+    with pytest.raises(LookupError):
+        store.resolve_run("nope")
+
+
+def test_mann_whitney_u():
+    """Identical samples are not significant; clearly shifted samples are."""
+    rng = np.random.default_rng(0)
+    a = rng.normal(10, 1, 200)
+    _, p_same = mann_whitney_u(a, a.copy())
+    _, p_shift = mann_whitney_u(a, a + 2)
+    assert p_same > 0.5
+    assert p_shift < 1e-6
+
+
+def test_compare_flags_latency_regression():
+    """A significant >5% latency increase is a regression; noise is not."""
+    rng = np.random.default_rng(0)
+    base = [_speed_record("a", rng.normal(10, 0.2, 100).tolist())]
+    slower = [_speed_record("b", rng.normal(12, 0.2, 100).tolist())]
+    same = [_speed_record("c", rng.normal(10, 0.2, 100).tolist())]
+
+    (row,) = compare_records(base, slower)
+    assert row["status"] == "regression"
+    assert row["change"] == pytest.approx(0.2, abs=0.02)
+
+    (row,) = compare_records(base, same)
+    assert row["status"] == "ok"
+
+
+def test_compare_scalar_metrics():
+    """Records without latencies compare mAP instead."""
+    cell = {"model": "yolo11n.pt", "data": "coco128.yaml"}
+    base = [make_record("yolo_accuracy", cell, {"map5095": 0.50}, run_id="a")]
+    cand = [make_record("yolo_accuracy", cell, {"map5095": 0.40}, run_id="b")]
+    (row,) = compare_records(base, cand)
+    assert row["metric"] == "map5095"
+    assert row["status"] == "regression"
+
+
+def test_render_table():
+    """Tables render headers, alignment and N/A for missing values."""
+    records = [{"name": "yolo11n", "fps": 85.7}, {"name": "yolo11s", "fps": None}]
+    text = render_table(
+        records, [("Model", lambda r: r["name"], ""), ("FPS", lambda r: r["fps"], ".2f")]
+    )
+    lines = text.splitlines()
+    assert lines[0] == "| Model | FPS |"
+    assert lines[1] == "|-------|----:|"
+    assert lines[2] == "| yolo11n | 85.70 |"
+    assert lines[3] == "| yolo11s | N/A |"
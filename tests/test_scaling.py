@@ -0,0 +1,107 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.benchmark_scaling import (
+    aggregate_workers,
+    best_by_cores,
+    partition_cores,
+    scaling_efficiency,
+    scaling_grid,
+)
+
+
+def test_scaling_grid_skips_oversubscribed():
+    """Cells needing more cores than available are dropped; 1x1 is always run."""
+    grid = scaling_grid([2, 4], [4, 16], num_cores=16)
+    assert grid == [(1, 1), (2, 4), (4, 4)]
+
+
+def test_partition_cores_disjoint():
+    """Each worker gets its own contiguous, non-overlapping core set."""
+    sets = partition_cores(list(range(16)), workers=4, threads=4)
+    assert sets == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11], [12, 13, 14, 15]]
+    with pytest.raises(ValueError):
+        partition_cores(list(range(8)), workers=4, threads=4)
+
+
+def test_aggregate_workers_uses_wall_window():
+    """Aggregate throughput is total images over the overlapping timed window."""
+    outcomes = [
+        {
+            "fps": 10.0,
+            "latencies": [100.0] * 10,
+            "stats": {"p99": 100.0},
+            "started": 0.0,
+            "finished": 1.0,
+        },
+        {
+            "fps": 5.0,
+            "latencies": [200.0] * 10,
+            "stats": {"p99": 200.0},
+            "started": 0.0,
+            "finished": 2.0,
+        },
+    ]
+    agg = aggregate_workers(outcomes)
+    assert agg["throughput"] == pytest.approx(10.0)  # 20 images in 2 s, not 10 + 5
+    assert agg["worker_p99"] == [100.0, 200.0]
+    assert agg["stats"]["count"] == 20
+
+
+def test_scaling_efficiency():
+    assert scaling_efficiency(40.0, 10.0, 4) == pytest.approx(1.0)
+    assert scaling_efficiency(20.0, 10.0, 4) == pytest.approx(0.5)
+    assert scaling_efficiency(20.0, None, 4) is None
+
+
+def test_best_by_cores_ranks_layouts():
+    """Layouts with the same core budget are ranked by throughput."""
+
+    def rec(workers, threads, fps):
+        cell = {
+            "model": "yolo11n",
+            "format": "PyTorch FP32",
+            "workers": workers,
+            "threads": threads,
+        }
+        return {"cell": cell, "metrics": {"fps": fps}}
+
+    groups = best_by_cores([rec(1, 16, 30.0), rec(4, 4, 45.0), rec(1, 1, 4.0)])
+    ranked = groups[("yolo11n", "PyTorch FP32", 16)]
+    assert [(r["cell"]["workers"], r["cell"]["threads"]) for r in ranked] == [(4, 4), (1, 16)]
+
+
+ORT_WORKER = """
+import queue, sys, threading
+sys.path.insert(0, ".")
+import numpy as np
+from benchmarks.benchmark_scaling import _worker
+from utils.backends import BACKENDS, Backend
+
+class Stub(Backend):
+    name, label, frameworks = "onnxruntime", "Stub", ()
+    def load(self):
+        pass
+    def infer(self, batch):
+        return [np.zeros((0, 6), np.float32) for _ in batch]
+
+BACKENDS["onnxruntime"] = Stub
+results = queue.Queue()
+_worker(0, [0], 1, "m.pt", "onnxruntime", 1, 2, 1, None, threading.Barrier(1), results)
+print(type(results.get()[1]).__name__, "torch" in sys.modules)
+"""
+
+
+def test_onnxruntime_worker_does_not_load_torch():
+    """Thread limits for ONNX Runtime go through session options, not torch."""
+    root = Path(__file__).parent.parent
+    out = subprocess.run(
+        [sys.executable, "-c", ORT_WORKER], capture_output=True, text=True, cwd=root
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split()[-2:] == ["dict", "False"]
@@ -0,0 +1,149 @@
+import os
+import sys
+import types
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.benchmark_sweep import build_cells, prefetch_cell_exports, run_cell
+from utils.scheduler import Cell, Checkpoint, Scheduler, parse_cores
+
+SLEEP_AND_LOG = (
+    "import sys, time; t0 = time.time(); time.sleep(float(sys.argv[2])); "
+    "open(sys.argv[1], 'w').write(f'{t0} {time.time()}')"
+)
+
+
+def _command(temp_dir):
+    """Each cell sleeps for ``params['sleep']`` and logs its start/end time."""
+
+    def command(cell):
+        if cell.params.get("fail"):
+            return [sys.executable, "-c", "raise SystemExit(3)"]
+        log = temp_dir / f"{cell.id}.txt"
+        return [sys.executable, "-c", SLEEP_AND_LOG, str(log), str(cell.params["sleep"])]
+
+    return command
+
+
+def _interval(temp_dir, cell_id):
+    start, end = map(float, (temp_dir / f"{cell_id}.txt").read_text().split())
+    return start, end
+
+
+def test_parse_cores():
+    assert parse_cores("0-3,8,10-11") == [0, 1, 2, 3, 8, 10, 11]
+    with pytest.raises(ValueError):
+        parse_cores(",")
+
+
+def test_checkpoint_tracks_done_cells(temp_dir):
+    """Only successful cells count as done; a torn last line is ignored."""
+    checkpoint = Checkpoint(temp_dir / "ckpt.jsonl")
+    checkpoint.start("run-1")
+    checkpoint.record(Cell("a"), "ok", 1.0, 0)
+    checkpoint.record(Cell("b"), "timeout", 2.0)
+    with open(checkpoint.path, "a") as f:
+        f.write('{"cell": "c", "sta')
+    assert checkpoint.run_id() == "run-1"
+    assert checkpoint.done() == {"a"}
+    assert checkpoint.results()["b"]["status"] == "timeout"
+
+
+def test_scheduler_statuses_and_checkpoint(temp_dir):
+    """Cells end as ok, failed or timeout, and each outcome is checkpointed."""
+    checkpoint = Checkpoint(temp_dir / "ckpt.jsonl")
+    checkpoint.start("run-1")
+    cells = [
+        Cell("fast", {"sleep": 0.0}),
+        Cell("broken", {"fail": True}),
+        Cell("slow", {"sleep": 30}),
+        Cell("skipped", {"sleep": 0.0}),
+    ]
+    scheduler = Scheduler(
+        _command(temp_dir), jobs=4, timeout=1.0, checkpoint=checkpoint, poll_interval=0.05
+    )
+    outcomes = {o["cell"]: o["status"] for o in scheduler.run(cells, skip={"skipped"})}
+    assert outcomes == {"fast": "ok", "broken": "failed", "slow": "timeout"}
+    assert checkpoint.done() == {"fast"}
+
+
+@pytest.mark.parametrize("reserve_all", [False, True])
+def test_exclusive_cells_run_alone(temp_dir, reserve_all):
+    """Shared cells overlap each other but never an exclusive cell.
+
+    Reserving every core leaves nowhere to pin shared cells, so they are serialized too.
+    """
+    if reserve_all and not hasattr(os, "sched_getaffinity"):
+        pytest.skip("core pinning needs sched_getaffinity")
+    reserved = sorted(os.sched_getaffinity(0)) if reserve_all else None
+    cells = [
+        Cell("shared1", {"sleep": 0.4}),
+        Cell("shared2", {"sleep": 0.4}),
+        Cell("speed", {"sleep": 0.2}, exclusive=True),
+        Cell("shared3", {"sleep": 0.2}),
+    ]
+    Scheduler(_command(temp_dir), jobs=2, reserved_cores=reserved, poll_interval=0.02).run(cells)
+
+    s1, s2, speed, s3 = (_interval(temp_dir, c.id) for c in cells)
+    assert s2[0] < s1[1]  # shared cells ran in parallel
+    for start, end in (s1, s2, s3):
+        assert end <= speed[0] or start >= speed[1]
+    assert s3[0] >= speed[1]  # did not overtake the waiting exclusive cell
+
+
+def test_build_cells_skips_gpu_only_on_cpu():
+    """FP16 and TensorRT cells are dropped on CPU; accuracy cells come first."""
+    cells = build_cells(
+        ["yolo11n"], ["pytorch", "tensorrt"], ["fp32", "fp16"], [1, 4], "cpu", "coco128.yaml"
+    )
+    assert [c.id for c in cells] == [
+        "accuracy/yolo11n/coco128.yaml",
+        "speed/yolo11n/pytorch/fp32/b1",
+        "speed/yolo11n/pytorch/fp32/b4",
+    ]
+    assert [c.exclusive for c in cells] == [False, True, True]
+
+
+def test_tensorrt_cells_export_fp16_engines(monkeypatch):
+    """A tensorrt cell requests an FP16 engine unless it asks for fp16 itself."""
+    requested = []
+
+    def export_many(requests, max_workers=None):
+        requested.extend(requests)
+        return []
+
+    monkeypatch.setattr("benchmarks.benchmark_sweep.export_many", export_many)
+    cells = build_cells(["m.pt"], ["tensorrt", "torchscript"], ["fp32"], [1], "cuda")
+    prefetch_cell_exports(cells, "cuda")
+    assert {r["fmt"]: r["half"] for r in requested} == {"engine": True, "torchscript": False}
+
+
+@pytest.mark.parametrize(
+    "backend,torch_threads,ort_threads",
+    [("pytorch", [2], None), ("onnxruntime", [], 2), ("onnxruntime_int8", [], 2)],
+)
+def test_run_cell_threads_go_to_the_backend_runtime(
+    monkeypatch, temp_dir, backend, torch_threads, ort_threads
+):
+    """Cell threads limit torch for torch backends and the ORT session otherwise, never both."""
+    set_threads, options = [], {}
+
+    def benchmark_model(path, **kwargs):
+        options.update(kwargs["backend_options"])
+        raise RuntimeError("stop")
+
+    monkeypatch.setitem(
+        sys.modules, "torch", types.SimpleNamespace(set_num_threads=set_threads.append)
+    )
+    monkeypatch.setattr("benchmarks.benchmark_sweep.benchmark_model", benchmark_model)
+    params = {"kind": "speed", "model": "m.pt", "backend": backend, "precision": "fp32"}
+    params.update(batch=1, threads=2)
+    args = Namespace(store=str(Path(temp_dir) / "runs.jsonl"), device="cpu", warmup=1, runs=1)
+    with pytest.raises(RuntimeError, match="stop"):
+        run_cell(params, args)
+    assert set_threads == torch_threads
+    assert options.get("intra_op_threads") == ort_threads
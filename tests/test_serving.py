@@ -0,0 +1,105 @@
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.benchmark_serving import (
+    max_sustained_streams,
+    serving_options,
+    serving_record,
+)
+from utils.serving import InferenceServer, simulate
+
+
+class SleepModel:
+    """Inference stand-in: fixed cost per call plus a cost per frame."""
+
+    def __init__(self, per_call=0.002, per_frame=0.001):
+        self.per_call = per_call
+        self.per_frame = per_frame
+        self.batches = []
+
+    def __call__(self, frames):
+        self.batches.append(len(frames))
+        time.sleep(self.per_call + self.per_frame * len(frames))
+        return [None] * len(frames)
+
+
+def test_full_batch_dispatches_without_waiting():
+    """A batch leaves as soon as it is full, long before the queue delay expires."""
+    model = SleepModel()
+    with InferenceServer(model, max_batch_size=4, max_queue_delay_ms=10_000) as server:
+        t0 = time.perf_counter()
+        for i in range(4):
+            server.submit(0, i)
+        while not server.completed:
+            time.sleep(0.001)
+        assert time.perf_counter() - t0 < 1.0
+    assert model.batches == [4]
+
+
+def test_partial_batch_leaves_after_queue_delay():
+    """A lone frame waits for company up to the delay bound, then runs alone."""
+    model = SleepModel()
+    with InferenceServer(model, max_batch_size=8, max_queue_delay_ms=30) as server:
+        server.submit(0, "frame")
+        time.sleep(0.2)
+    assert model.batches == [1]
+    assert server.completed[0].queue_ms == pytest.approx(30, abs=25)
+
+
+def test_full_queue_drops_new_frames():
+    """Frames beyond ``max_queue`` are dropped and counted against their stream."""
+    release = threading.Event()
+    server = InferenceServer(lambda f: release.wait(), max_batch_size=1, max_queue=2).start()
+    server.submit(0, "running")
+    time.sleep(0.05)  # the worker has taken the first frame and is blocked in infer
+    accepted = [server.submit(s, "frame") for s in (1, 2, 3, 3)]
+    release.set()
+    server.close()
+    assert accepted == [True, True, False, False]
+    assert server.dropped == {3: 2}
+    assert len(server.completed) == 3
+
+
+def test_simulated_streams_are_batched_under_load():
+    """With more offered load than single-frame calls can serve, batches grow."""
+    model = SleepModel(per_call=0.01, per_frame=0.001)
+    result = simulate(model, ["frame"], streams=8, fps=50, duration=0.5, max_batch_size=8)
+    assert result.offered == pytest.approx(200, abs=8)
+    assert result.completed + sum(result.dropped.values()) == result.offered
+    assert max(result.batch_sizes) > 1
+    assert set(result.stream_p99()) == set(range(8))
+
+    record = serving_record(result, {"model": "m"}, {}, slo_ms=1000, max_drop_rate=1.0, run_id="r")
+    assert record["cell"]["streams"] == 8
+    assert len(record["metrics"]["stream_p99"]) == 8
+    assert record["metrics"]["meets_slo"]
+
+
+def test_max_sustained_streams_stops_at_first_breach():
+    def record(streams, ok):
+        return {"cell": {"streams": streams}, "metrics": {"meets_slo": ok}}
+
+    records = [record(8, True), record(1, True), record(2, True), record(4, False)]
+    assert max_sustained_streams(records) == 2
+    assert max_sustained_streams([record(1, False)]) == 0
+
+
+def test_serving_options_rejects_static_batch_backends():
+    """Every ONNX Runtime backend serves from a dynamic export; static-shape exports are refused."""
+
+    def args(backend):
+        return argparse.Namespace(backend=backend, ort_opt_level="all", intra_op_threads=0)
+
+    assert serving_options(args("pytorch")) == {}
+    for backend in ("onnxruntime", "onnxruntime_int8"):
+        assert serving_options(args(backend))["dynamic"] is True
+    for backend in ("torchscript", "tensorrt"):
+        with pytest.raises(ValueError, match="static-batch"):
+            serving_options(args(backend))
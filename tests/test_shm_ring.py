@@ -0,0 +1,89 @@
+import multiprocessing
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.benchmark_transport import run_transport, transport_comparisons, transport_record
+from utils.shm_ring import FrameRing
+
+
+def _fill_and_echo(ring, out):
+    """Child process: write 7 into the next frame, report its sum, release it."""
+    seq, frame, _ = ring.get(timeout=30)
+    out.put((seq, int(frame.sum())))
+    frame[...] = 7
+    ring.release()
+    ring.detach()
+
+
+def test_ring_hands_out_slots_in_order():
+    ring = FrameRing((4, 6, 3), num_slots=2)
+    try:
+        for seq in (10, 11):
+            slot = ring.acquire()
+            slot[...] = seq
+            ring.publish(seq, timestamp=float(seq))
+        assert ring.acquire(block=False) is None  # both slots in flight
+        for expected in (10, 11):
+            seq, frame, stamp = ring.get(timeout=1)
+            assert (seq, int(frame[0, 0, 0]), stamp) == (expected, expected, expected)
+            ring.release()
+        ring.close()
+        assert ring.get(timeout=1) is None
+    finally:
+        ring.unlink()
+
+
+def test_ring_get_times_out():
+    ring = FrameRing((2, 2, 3), num_slots=1)
+    try:
+        with pytest.raises(TimeoutError):
+            ring.get(timeout=0.01)
+    finally:
+        ring.unlink()
+
+
+def test_ring_is_shared_across_processes():
+    """A spawned worker reads the producer's frame and its writes are visible in place."""
+    context = multiprocessing.get_context("spawn")
+    ring = FrameRing((8, 8, 3), num_slots=1, context=context)
+    out = context.Queue()
+    try:
+        slot = ring.acquire()
+        slot[...] = 1
+        ring.publish(3)
+        proc = context.Process(target=_fill_and_echo, args=(ring, out))
+        proc.start()
+        assert out.get(timeout=30) == (3, 8 * 8 * 3)
+        proc.join(timeout=30)
+        assert proc.exitcode == 0
+        assert (ring.acquire(timeout=5) == 7).all()  # same memory, no copy back
+    finally:
+        ring.unlink()
+
+
+@pytest.mark.parametrize("transport", ["shm", "queue"])
+def test_run_transport_delivers_every_frame(transport):
+    outcome = run_transport(transport, (64, 48), workers=2, frames=30, slots=2)
+    assert len(outcome["handoff"]) == 30
+    assert len(outcome["worker_cpu"]) == 2
+    record = transport_record(transport, (64, 48), 2, outcome, "touch", 2)
+    assert record["cell"]["resolution"] == "64x48"
+    assert record["metrics"]["fps"] > 0
+
+
+def test_transport_comparisons_pair_cells():
+    def record(transport, workers, fps):
+        return {
+            "cell": {"transport": transport, "resolution": "1280x720", "workers": workers},
+            "metrics": {"fps": fps, "cpu_ms": 1.0},
+        }
+
+    pairs = transport_comparisons(
+        [record("shm", 1, 900.0), record("queue", 1, 90.0), record("shm", 2, 1.0)]
+    )
+    assert len(pairs) == 1
+    assert pairs[0]["shm"]["fps"] / pairs[0]["queue"]["fps"] == pytest.approx(10.0)
@@ -0,0 +1,115 @@
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.soak import GCMonitor, Reservoir, SoakMonitor, analyze_drift, parse_duration
+
+
+def _windows(throughput, p99, rss_mb=500.0, cpu_mhz=2000.0):
+    """Synthetic full windows, one minute each."""
+    return [
+        {
+            "t_start_s": i * 60.0,
+            "duration_s": 60.0,
+            "throughput": t,
+            "p99": p,
+            "rss_mb": rss_mb if np.isscalar(rss_mb) else rss_mb[i],
+            "cpu_mhz": cpu_mhz if np.isscalar(cpu_mhz) else cpu_mhz[i],
+            "gc_pause_ms": 1.0,
+            "throttle_events": None,
+        }
+        for i, (t, p) in enumerate(zip(throughput, p99))
+    ]
+
+
+def test_parse_duration():
+    assert parse_duration("90") == 90
+    assert parse_duration("45s") == 45
+    assert parse_duration("2h") == 7200
+    assert parse_duration("1h30m") == 5400
+    for bad in ("", "2x", "h", "0s", "1h banana"):
+        with pytest.raises(ValueError):
+            parse_duration(bad)
+
+
+def test_reservoir_is_bounded_and_uniform():
+    """Memory stays fixed and late items are as likely to be kept as early ones."""
+    sample = Reservoir(size=1000)
+    for i in range(100_000):
+        sample.append(i)
+    assert len(sample) == 1000 and sample.seen == 100_000
+    assert 40_000 < np.mean(sample) < 60_000
+    # Reservoirs fed in lockstep keep the same positions, so paired samples stay paired
+    a, b = Reservoir(size=10), Reservoir(size=10)
+    for i in range(500):
+        a.append(i)
+        b.append(-i)
+    assert [-x for x in a] == list(b)
+
+
+def test_gc_monitor_counts_collections():
+    monitor = GCMonitor().start()
+    try:
+        gc.collect()
+        counters = monitor.take()
+    finally:
+        monitor.stop()
+    assert counters["gc_collections"][2] >= 1
+    assert counters["gc_pause_ms"] >= counters["gc_max_pause_ms"] > 0
+    assert monitor.take()["gc_collections"] == [0, 0, 0]
+
+
+def test_soak_monitor_streams_windows(temp_dir):
+    """Each window is one flushed JSONL line; close() writes the partial tail."""
+    path = temp_dir / "soak" / "run.jsonl"
+    monitor = SoakMonitor(path, window_s=0.05, model="m")
+    closed = 0
+    deadline = time.monotonic() + 0.18
+    while time.monotonic() < deadline:
+        closed += monitor.add(2.0, items=4)
+        time.sleep(0.002)
+    lines = path.read_text().splitlines()
+    assert len(lines) == closed >= 2  # written as the run goes, not at the end
+    monitor.add(3.0)
+    monitor.close()
+
+    windows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(windows) == closed + 1 and windows[-1]["partial"]
+    first = windows[0]
+    assert first["model"] == "m" and first["window"] == 0
+    assert first["items"] == 4 * first["calls"]
+    assert first["throughput"] == pytest.approx(first["items"] / first["duration_s"])
+    assert first["p99"] == 2.0 and first["rss_mb"] > 0
+    assert len(first["gc_collections"]) == 3
+    assert monitor._gc._callback not in gc.callbacks
+
+
+def test_analyze_drift_flags_degradation():
+    steady = analyze_drift(_windows([100, 101, 99, 100, 100, 99, 101, 100], [20] * 8))
+    assert steady["flags"] == [] and not steady["degraded"]
+    assert abs(steady["throughput_change"]) < 0.02
+
+    # Throughput falls with the clock after the package heats up: thermal throttling
+    throttled = analyze_drift(
+        _windows(
+            [100, 100, 100, 95, 85, 80, 80, 80],
+            [20, 20, 20, 22, 24, 26, 26, 26],
+            cpu_mhz=[3000] * 3 + [2800, 2500, 2400, 2400, 2400],
+        )
+    )
+    assert throttled["degraded"]
+    assert {"throughput_drop", "p99_rise", "cpu_frequency_drop"} <= set(throttled["flags"])
+    assert throttled["throughput_change"] == pytest.approx(-0.2)
+    assert throttled["throughput_slope_per_hour"] < 0
+
+    leaking = analyze_drift(_windows([100] * 8, [20] * 8, rss_mb=np.linspace(500, 700, 8)))
+    assert leaking["flags"] == ["rss_growth"] and not leaking["degraded"]
+
+    assert analyze_drift(_windows([100], [20])) is None
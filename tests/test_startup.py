@@ -0,0 +1,89 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.benchmark_startup import (
+    import_breakdown,
+    parse_importtime,
+    run_probe,
+    settle_point,
+    startup_metrics,
+)
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |   _io
+import time:      1200 |       1500 | encodings
+import time:     40000 |      40000 |     torch._C
+import time:    900000 |     940000 |   torch
+import time:      5000 |     945000 | ultralytics
+"""
+
+
+def test_parse_importtime_and_breakdown():
+    entries = parse_importtime(IMPORTTIME + "unrelated stderr line\n")
+    assert entries[0] == ("_io", 300, 300, 1)
+    assert entries[2] == ("torch._C", 40000, 40000, 2)
+    assert len(entries) == 5
+    breakdown = import_breakdown(entries, top=2)
+    assert breakdown == {"torch": 940.0, "ultralytics": 5.0, "other": 1.5}
+    assert list(breakdown)[0] == "torch"
+
+
+def test_settle_point():
+    assert settle_point([10.0] * 10, steady=10.0) == 0
+    assert settle_point([80.0, 40.0, 20.0, 11.0, 10.0, 10.0, 10.0, 10.0], steady=10.0) == 3
+    # A lone fast call amid slow ones does not end warmup
+    assert settle_point([80.0, 10.0, 60.0, 50.0, 40.0, 10.0, 10.0, 10.0], steady=10.0) == 5
+    assert settle_point([50.0] * 5, steady=10.0) == 5
+
+
+def test_startup_metrics_phases():
+    """Phases are consecutive slices of the probe timeline, measured from spawn."""
+    result = {
+        "t_start": 100.05,
+        "t_imports": 101.05,
+        "t_loaded": 101.25,
+        "t_first": 101.75,
+        "t_warm": 103.0,
+        "warmup": [300.0, 100.0, 10.0, 10.0, 10.0, 10.0, 10.0],
+        "steady": [10.0] * 5,
+    }
+    m = startup_metrics(100.0, result, parse_importtime(IMPORTTIME))
+    assert m["interpreter_ms"] == pytest.approx(50)
+    assert m["import_ms"] == pytest.approx(1000)
+    assert m["load_ms"] == pytest.approx(200)
+    assert m["first_inference_ms"] == pytest.approx(500)
+    assert m["first_call_overhead_ms"] == pytest.approx(490)
+    assert m["settle_iters"] == 2 and m["settle_ms"] == pytest.approx(400)
+    assert m["time_to_first_result_ms"] == pytest.approx(1750)
+    assert m["time_to_steady_ms"] == pytest.approx(2150)
+
+
+def test_benchmark_modules_import_without_frameworks():
+    """Importing the benchmark scripts must not load torch, ultralytics or onnxruntime."""
+    code = (
+        "import sys; sys.path.insert(0, '.'); "
+        "import benchmarks.benchmark_yolo, benchmarks.benchmark_accuracy, "
+        "benchmarks.benchmark_sweep, benchmarks.benchmark_serving, benchmarks.benchmark_video, "
+        "benchmarks.benchmark_webcam, benchmarks.benchmark_startup, "
+        "benchmarks.benchmark_postprocess, benchmarks.benchmark_tiling, "
+        "benchmarks.benchmark_embeddings; "
+        "print(sorted(m for m in ('torch', 'ultralytics', 'onnxruntime') if m in sys.modules))"
+    )
+    root = Path(__file__).parent.parent
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=root)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "[]"
+
+
+@pytest.mark.skipif(not Path("yolo11n.pt").exists(), reason="Requires yolo11n.pt model")
+def test_run_probe_pytorch():
+    fmt, metrics = run_probe("yolo11n.pt", "pytorch", runs=3)
+    assert fmt == "PyTorch FP32"
+    assert metrics["import_ms"] > 0 and metrics["load_ms"] > 0
+    assert "torch" in metrics["imports"]
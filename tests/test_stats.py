@@ -0,0 +1,134 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.soak import Reservoir
+from utils.stats import (
+    bootstrap_ci,
+    find_outliers,
+    find_steady_state,
+    format_histogram,
+    format_summary,
+    is_stable,
+    jitter,
+    stage_breakdown,
+    summarize,
+    warmup_iterations,
+    warmup_until_stable,
+)
+
+
+def test_summarize_percentiles():
+    """Percentiles match numpy on a known distribution."""
+    samples = np.arange(1, 1001, dtype=float)
+    stats = summarize(samples)
+
+    assert stats["count"] == 1000
+    assert stats["mean"] == pytest.approx(500.5)
+    assert stats["p50"] == pytest.approx(np.percentile(samples, 50))
+    assert stats["p99"] == pytest.approx(np.percentile(samples, 99))
+    assert stats["p999"] == pytest.approx(np.percentile(samples, 99.9))
+    assert stats["ci_low"] < stats["mean"] < stats["ci_high"]
+
+
+def test_summarize_overflowed_reservoir():
+    """A reservoir sample counts every call and drops the order-dependent jitter."""
+    reservoir = Reservoir(size=100)
+    for i in range(1000):
+        reservoir.append(float(i % 7))
+    stats = summarize(reservoir)
+
+    assert stats["count"] == 1000
+    assert stats["sampled"] == 100
+    assert stats["jitter"] is None
+    assert "jitter n/a" in format_summary(stats)
+    assert "sampled 100 of 1000 calls" in format_summary(stats)
+
+    unfilled = Reservoir(size=100)
+    for i in range(10):
+        unfilled.append(float(i))
+    assert "sampled" not in summarize(unfilled)
+    assert summarize(unfilled)["jitter"] == pytest.approx(1.0)
+
+
+def test_summarize_empty_raises():
+    """Empty input is an error rather than NaN output."""
+    with pytest.raises(ValueError):
+        summarize([])
+
+
+def test_bootstrap_ci_narrows_with_more_samples():
+    """The CI of the mean shrinks as the sample size grows."""
+    rng = np.random.default_rng(1)
+    small = bootstrap_ci(rng.normal(10, 1, 20))
+    large = bootstrap_ci(rng.normal(10, 1, 2000))
+    assert (large[1] - large[0]) < (small[1] - small[0])
+    assert large[0] < 10 < large[1]
+
+
+def test_find_outliers_flags_spikes():
+    """A GC-pause style spike is flagged, normal samples are not."""
+    samples = [10.0, 10.2, 9.9, 10.1, 10.0, 55.0, 10.3]
+    mask = find_outliers(samples)
+    assert mask.tolist() == [False, False, False, False, False, True, False]
+
+
+def test_jitter():
+    """Jitter is the mean absolute consecutive difference."""
+    assert jitter([10, 12, 10, 12]) == pytest.approx(2.0)
+    assert jitter([5]) == 0.0
+
+
+def test_is_stable_and_steady_state():
+    """A decaying warmup followed by a flat phase is detected as stable."""
+    samples = [100, 80, 60, 40, 30, 20] + [10.0] * 20
+    assert not is_stable(samples[:8], window=4)
+    assert is_stable(samples, window=4)
+    assert find_steady_state(samples, window=4) == 13
+
+
+def test_warmup_until_stable_respects_bounds():
+    """Warmup stops early on constant work and never exceeds max_iters."""
+    calls = []
+    latencies = warmup_until_stable(lambda: calls.append(1), window=3, max_iters=50)
+    assert 6 <= len(latencies) <= 50
+    assert len(calls) == len(latencies)
+
+
+def test_warmup_iterations_fixed():
+    """An explicit iteration count runs exactly that many steps."""
+    calls = []
+    warmup_iterations(lambda: calls.append(1), 4)
+    assert len(calls) == 4
+
+
+def test_warmup_stops_when_step_returns_false():
+    """A step reporting an exhausted source ends warmup in both modes."""
+    frames = iter(range(5))
+
+    def step():
+        return next(frames, None) is not None
+
+    assert len(warmup_until_stable(step, window=10, max_iters=100)) == 5
+    assert warmup_iterations(lambda: False, 10) == []
+
+
+def test_format_histogram():
+    """Histogram has a header and ends at the 100th percentile."""
+    text = format_histogram(np.linspace(1, 100, 100))
+    lines = text.splitlines()
+    assert "Percentile" in lines[0]
+    assert lines[-1].split()[1] == "1.000000"
+    assert format_histogram([]) == ""
+
+
+def test_stage_breakdown_shares():
+    """Stage shares are fractions of the summed stage means."""
+    out = stage_breakdown({"preprocess": [1.0, 1.0], "inference": [6.0, 8.0], "overhead": [2.0]})
+    assert out["inference"]["mean"] == pytest.approx(7.0)
+    assert out["inference"]["share"] == pytest.approx(0.7)
+    assert sum(s["share"] for s in out.values()) == pytest.approx(1.0)
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.tiling import TiledDetector, merge_detections, slice_tiles, tile_windows
+
+
+class ObjectRuntime:
+    """Backend stand-in that detects one fixed object wherever a tile fully contains it."""
+
+    def __init__(self, frame, box):
+        self.frame = frame
+        self.box = np.asarray(box, dtype=np.float32)
+        self.batches = []
+
+    def infer(self, batch):
+        self.batches.append(len(batch))
+        out = []
+        for tile in batch:
+            # Recover the tile's origin from the view's offset into the frame
+            offset = tile.__array_interface__["data"][0] - self.frame.__array_interface__["data"][0]
+            y, x = divmod(offset // 3, self.frame.shape[1])
+            box = self.box - [x, y, x, y]
+            inside = (
+                box[0] >= 0 and box[1] >= 0 and box[2] <= tile.shape[1] and box[3] <= tile.shape[0]
+            )
+            out.append(
+                np.array([[*box, 0.9, 2]], np.float32) if inside else np.zeros((0, 6), np.float32)
+            )
+        return out
+
+
+def test_tile_windows_cover_frame_with_overlap():
+    windows = tile_windows((1080, 1920, 3), 640, overlap=0.25)
+    x1, y1, x2, y2 = windows.T
+    assert (x2 - x1 == 640).all() and (y2 - y1 == 640).all()
+    assert x1.min() == 0 and y1.min() == 0 and x2.max() == 1920 and y2.max() == 1080
+    xs = np.unique(x1)
+    assert (np.diff(xs) <= 640 * 0.75).all()  # neighbours share at least a quarter tile
+    assert len(windows) == len(xs) * len(np.unique(y1))
+
+    small = tile_windows((480, 600, 3), 640)
+    assert small.tolist() == [[0, 0, 600, 480]]
+    with pytest.raises(ValueError):
+        tile_windows((480, 600, 3), 640, overlap=1.0)
+
+
+def test_slice_tiles_are_views():
+    frame = np.zeros((1080, 1920, 3), np.uint8)
+    tiles = slice_tiles(frame, tile_windows(frame.shape, (640, 960), 0.1))
+    assert all(np.shares_memory(t, frame) for t in tiles)
+    assert {t.shape for t in tiles} == {(640, 960, 3)}
+
+
+def test_merge_detections_across_tiles():
+    box = np.array([[10, 10, 50, 50, 0.8, 0]], np.float32)
+    shifted = np.array([[5, 10, 45, 50, 0.9, 0]], np.float32)  # same object seen 5 px later
+    other_class = np.array([[5, 10, 45, 50, 0.7, 1]], np.float32)
+    merged = merge_detections([box, shifted, other_class], [(100, 0), (105, 0), (105, 0)])
+    np.testing.assert_allclose(merged, [[110, 10, 150, 50, 0.9, 0], [110, 10, 150, 50, 0.7, 1]])
+    assert merge_detections([], []).shape == (0, 6)
+
+
+def test_tiled_detector_runs_one_batch_and_dedups():
+    frame = np.zeros((1080, 1920, 3), np.uint8)
+    runtime = ObjectRuntime(frame, [600, 500, 630, 530])  # inside several overlapping tiles
+    detector = TiledDetector(runtime, tile=640, overlap=0.25, full_frame=True)
+    (dets,) = detector.infer([frame])
+    assert runtime.batches == [detector.tiles]
+    assert detector.tiles == len(tile_windows(frame.shape, 640, 0.25)) + 1
+    np.testing.assert_allclose(dets, [[600, 500, 630, 530, 0.9, 2]])
+    assert set(detector.stage_ms) == {"slice", "inference", "merge"}
@@ -0,0 +1,369 @@
+"""Similarity search over embedding matrices: exact and approximate indexes.
+
+Deduplication and retrieval look up the ``k`` nearest neighbours of a query
+embedding by cosine similarity; with L2-normalized vectors that is the inner
+product. Indexes (all take ``(N, D)`` float16/float32 matrices, which may be
+``np.memmap`` views of a feature file):
+
+- ``brute``: exact search, one matmul per database chunk and query batch, with
+  a running top-k merge. Chunks are converted to float32 on the fly, so a
+  float16 or memory-mapped matrix is searched without a full float32 copy
+- ``ivf``: inverted file. A spherical k-means coarse quantizer splits the
+  vectors into ``nlist`` lists; a query scans only the ``nprobe`` lists whose
+  centroids are closest. Queries are grouped by list, so each probed list costs
+  one matmul for all the queries probing it
+- ``hnsw``: hierarchical navigable small world graph from ``hnswlib`` (optional,
+  ``pip install hnswlib``); ``ef`` trades recall for speed at query time
+
+:func:`synthetic_vectors` writes clustered unit vectors (a Gaussian mixture, as
+real embeddings cluster by content) to a cached ``.npy`` file, so 1M x 768
+matrices are generated once and memory-mapped afterwards.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_ROOT = Path(
+    os.environ.get(
+        "VISION_BENCH_VECTOR_CACHE", Path.home() / ".cache" / "vision-benchmarks" / "vectors"
+    )
+)
+
+# Rows per block for generation, brute-force scans and list assignment
+CHUNK_ROWS = 65536
+
+# Score-matrix elements per brute-force block (64 MB of float32)
+MAX_BLOCK = 1 << 24
+
+# Synthetic mixture: broad components, each split over several IVF lists at 10k+
+# vectors, so neighbours straddle lists as with real embeddings
+MIXTURE_CLUSTERS = 64
+MIXTURE_SPREAD = 1.0
+
+# k-means training vectors per list, and iterations
+TRAIN_PER_LIST = 64
+KMEANS_ITERS = 10
+
+INDEXES = {}
+
+
+def register_index(cls):
+    """Class decorator adding ``cls`` to :data:`INDEXES` under ``cls.name``."""
+    INDEXES[cls.name] = cls
+    return cls
+
+
+def get_index(name):
+    """Look up an index class by name."""
+    try:
+        return INDEXES[name]
+    except KeyError:
+        raise ValueError(f"Unknown index {name!r}, expected one of {sorted(INDEXES)}") from None
+
+
+def parse_counts(value):
+    """Parse "10k,100k,1M" into vector counts."""
+    scale = {"k": 1_000, "m": 1_000_000}
+    counts = []
+    for token in (v.strip().lower() for v in str(value).split(",")):
+        if not token:
+            continue
+        factor = scale.get(token[-1], 1)
+        number = token[:-1] if token[-1] in scale else token
+        try:
+            counts.append(int(float(number) * factor))
+        except ValueError:
+            raise ValueError(f"invalid vector count {token!r}") from None
+    if any(c <= 0 for c in counts):
+        raise ValueError(f"vector counts must be positive: {value!r}")
+    return sorted(set(counts))
+
+
+def count_label(n):
+    """``10000`` -> ``"10k"``, ``1000000`` -> ``"1M"``."""
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}M"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def normalize(vectors):
+    """L2-normalize rows in float32 (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _mixture(rng, centers, n, spread):
+    labels = rng.integers(len(centers), size=n)
+    noise = rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+    return normalize(centers[labels] + spread * noise)
+
+
+def synthetic_vectors(
+    n,
+    dim,
+    dtype="float32",
+    clusters=MIXTURE_CLUSTERS,
+    spread=MIXTURE_SPREAD,
+    seed=0,
+    queries=0,
+    root=DEFAULT_ROOT,
+):
+    """Clustered unit vectors, cached as ``.npy`` and returned memory-mapped.
+
+    ``clusters`` Gaussian components around random unit centres; ``spread`` is
+    the norm of the noise around a centre relative to the centre's. With
+    ``queries`` also returns that many held-out query vectors from the same
+    mixture as ``(database, queries)``.
+    """
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.standard_normal((clusters, dim), dtype=np.float32))
+    scale = spread / np.sqrt(dim)
+    root = Path(root)
+    path = root / f"mixture_{n}x{dim}_{dtype}_c{clusters}_s{spread:g}_{seed}.npy"
+    if not path.exists():
+        root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp.npy")
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=(n, dim))
+        chunk_rng = np.random.default_rng([seed, 1])
+        for start in range(0, n, CHUNK_ROWS):
+            rows = min(CHUNK_ROWS, n - start)
+            out[start : start + rows] = _mixture(chunk_rng, centers, rows, scale)
+        out.flush()
+        del out
+        os.replace(tmp, path)
+    database = np.load(path, mmap_mode="r")
+    if not queries:
+        return database
+    query_rng = np.random.default_rng([seed, 2])
+    return database, _mixture(query_rng, centers, queries, scale).astype(dtype)
+
+
+def merge_topk(scores, ids, new_scores, new_ids, k):
+    """Keep the ``k`` best of two ``(Q, *)`` candidate sets per row."""
+    scores = np.concatenate([scores, new_scores], axis=1)
+    ids = np.concatenate([ids, new_ids], axis=1)
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, top, axis=1)
+        ids = np.take_along_axis(ids, top, axis=1)
+    return scores, ids
+
+
+def sort_topk(scores, ids):
+    """Order each row by descending score."""
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+def recall_at_k(found, truth):
+    """Mean share of the true ``k`` nearest neighbours each query found."""
+    found, truth = np.asarray(found), np.asarray(truth)
+    hits = [len(np.intersect1d(f, t)) for f, t in zip(found, truth)]
+    return float(np.mean(hits)) / truth.shape[1]
+
+
+class Index:
+    """Base class: subclasses implement ``build`` and ``search``.
+
+    ``search(queries, k)`` returns ``(scores, ids)``, both ``(Q, k)`` and sorted
+    by descending inner product; missing neighbours have id ``-1``. ``nbytes`` is
+    the memory the index holds once built. ``search_param`` names the parameter
+    that can change between searches without rebuilding (the recall/speed knob).
+    """
+
+    name = None
+    label = None
+    search_param = None
+
+    def __init__(self, **params):
+        self.params = params
+        self.ntotal = 0
+        self.nbytes = 0
+        self.build_s = 0.0
+
+    def describe(self):
+        """Search parameters for results tables, e.g. "nlist=1000, nprobe=16"."""
+        return ", ".join(f"{k}={v}" for k, v in self.params.items() if v is not None) or "-"
+
+    def build(self, vectors):
+        raise NotImplementedError
+
+    def search(self, queries, k=10):
+        raise NotImplementedError
+
+    def timed_build(self, vectors):
+        t0 = time.perf_counter()
+        self.build(vectors)
+        self.build_s = time.perf_counter() - t0
+        return self
+
+    @property
+    def bytes_per_vector(self):
+        return self.nbytes / self.ntotal if self.ntotal else 0.0
+
+
+@register_index
+class BruteForceIndex(Index):
+    """Exact inner-product search over the matrix as given (no copy)."""
+
+    name = "brute"
+    label = "Brute force"
+
+    def build(self, vectors):
+        self.vectors = vectors
+        self.ntotal = len(vectors)
+        self.nbytes = vectors.nbytes
+
+    def search(self, queries, k=10):
+        queries = np.asarray(queries, dtype=np.float32)
+        num = len(queries)
+        scores = np.full((num, 0), -np.inf, dtype=np.float32)
+        ids = np.zeros((num, 0), dtype=np.int64)
+        rows = max(k, min(CHUNK_ROWS, MAX_BLOCK // max(num, 1)))
+        for start in range(0, self.ntotal, rows):
+            block = np.asarray(self.vectors[start : start + rows], dtype=np.float32)
+            block_scores = queries @ block.T
+            block_ids = np.broadcast_to(np.arange(start, start + len(block)), block_scores.shape)
+            scores, ids = merge_topk(scores, ids, block_scores, block_ids, k)
+        return sort_topk(scores, ids)
+
+
+def spherical_kmeans(vectors, nlist, iters=KMEANS_ITERS, seed=0):
+    """Unit-norm centroids maximizing the inner product with their members."""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        # Reseed empty lists with random training vectors
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+@register_index
+class IVFIndex(Index):
+    """Inverted-file index with a spherical k-means coarse quantizer.
+
+    Params:
+        nlist: Number of lists (default ``sqrt(N)``).
+        nprobe: Lists scanned per query.
+        train_size: Vectors used to train the quantizer (default 64 per list).
+    """
+
+    name = "ivf"
+    label = "IVF"
+    search_param = "nprobe"
+
+    def __init__(self, nlist=None, nprobe=8, train_size=None, seed=0):
+        super().__init__(nlist=nlist, nprobe=nprobe)
+        self.train_size = train_size
+        self.seed = seed
+
+    def build(self, vectors):
+        n = len(vectors)
+        nlist = self.params["nlist"] or max(1, int(np.sqrt(n)))
+        nlist = self.params["nlist"] = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+        train = min(n, self.train_size or nlist * TRAIN_PER_LIST)
+        sample = np.sort(rng.choice(n, train, replace=False))
+        self.centroids = spherical_kmeans(vectors[sample], nlist, seed=self.seed)
+
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, CHUNK_ROWS):
+            block = np.asarray(vectors[start : start + CHUNK_ROWS], dtype=np.float32)
+            assign[start : start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        # Vectors stored list by list, so each list is one contiguous slice
+        self.ids = order.astype(np.int32 if n < 2**31 else np.int64)
+        self.vectors = np.asarray(vectors[order])
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+        self.ntotal = n
+        self.nbytes = (
+            self.vectors.nbytes + self.ids.nbytes + self.centroids.nbytes + self.offsets.nbytes
+        )
+
+    def search(self, queries, k=10):
+        queries = np.asarray(queries, dtype=np.float32)
+        num, nlist = len(queries), len(self.centroids)
+        nprobe = min(self.params["nprobe"], nlist)
+        coarse = queries @ self.centroids.T
+        if nprobe < nlist:
+            probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(nlist), (num, nlist))
+        # Group (query, list) pairs by list: one matmul per probed list
+        lists = probes.ravel()
+        owners = np.repeat(np.arange(num), nprobe)
+        order = np.argsort(lists, kind="stable")
+        lists, owners = lists[order], owners[order]
+        bounds = np.flatnonzero(np.diff(lists)) + 1
+        scores = np.full((num, k), -np.inf, dtype=np.float32)
+        ids = np.full((num, k), -1, dtype=np.int64)
+        for group in np.split(np.arange(len(lists)), bounds):
+            lst = lists[group[0]]
+            lo, hi = self.offsets[lst], self.offsets[lst + 1]
+            if lo == hi:
+                continue
+            rows = owners[group]
+            list_scores = queries[rows] @ np.asarray(self.vectors[lo:hi], dtype=np.float32).T
+            list_ids = np.broadcast_to(self.ids[lo:hi], list_scores.shape)
+            scores[rows], ids[rows] = merge_topk(scores[rows], ids[rows], list_scores, list_ids, k)
+        return sort_topk(scores, ids)
+
+
+@register_index
+class HNSWIndex(Index):
+    """HNSW graph from ``hnswlib`` (inner-product space).
+
+    Params:
+        m: Graph degree; memory grows with it.
+        ef_construction: Candidate list size while building.
+        ef: Candidate list size while searching (at least ``k``).
+        threads: Build threads (-1 for all cores); searches are single-threaded.
+    """
+
+    name = "hnsw"
+    label = "HNSW (hnswlib)"
+    search_param = "ef"
+
+    def __init__(self, m=16, ef_construction=200, ef=64, threads=-1):
+        super().__init__(m=m, ef_construction=ef_construction, ef=ef)
+        self.threads = threads
+
+    def build(self, vectors):
+        import hnswlib
+
+        from utils.memory import rss_bytes
+
+        n, dim = vectors.shape
+        before = rss_bytes()
+        self.index = hnswlib.Index(space="ip", dim=dim)
+        self.index.init_index(
+            max_elements=n, ef_construction=self.params["ef_construction"], M=self.params["m"]
+        )
+        for start in range(0, n, CHUNK_ROWS):
+            block = np.asarray(vectors[start : start + CHUNK_ROWS], dtype=np.float32)
+            ids = np.arange(start, start + len(block))
+            self.index.add_items(block, ids, num_threads=self.threads)
+        self.ntotal = n
+        # hnswlib does not report its footprint: take the RSS the build added
+        self.nbytes = max(rss_bytes() - before, 0)
+
+    def search(self, queries, k=10):
+        self.index.set_ef(max(self.params["ef"], k))
+        ids, distances = self.index.knn_query(
+            np.asarray(queries, dtype=np.float32), k=k, num_threads=1
+        )
+        # Inner-product distance is 1 - <q, v>
+        return 1 - distances.astype(np.float32), ids.astype(np.int64)
@@ -0,0 +1,402 @@
+"""Pluggable inference backends behind ``benchmark_model``.
+
+Every backend follows the same lifecycle -- ``load()``, ``warmup()``, ``infer()``,
+``close()`` -- and takes the same input: a list of HWC BGR uint8 frames. ``infer``
+returns one ``(N, 6)`` array of ``[x1, y1, x2, y2, conf, cls]`` per frame in
+original image coordinates, so outputs can be compared across runtimes. After each
+call, ``stage_ms`` holds that call's preprocess/inference/postprocess time in ms.
+
+Frameworks are imported inside ``load()`` so only the backend being benchmarked
+pays its import cost.
+
+Available backends:
+
+- ``pytorch``: ultralytics eager PyTorch (``.pt`` weights)
+- ``torchscript``: TorchScript export run through the ultralytics predictor
+- ``onnxruntime``: ONNX export on a raw ``InferenceSession`` with configurable
+  execution provider, graph optimization level and thread counts; NMS runs in
+  NumPy (``utils.postprocess``)
+- ``onnxruntime_int8``: the ONNX export statically quantized to INT8 (see
+  ``utils.quantization``), on the same session setup as ``onnxruntime``
+- ``tensorrt``: TensorRT FP16 engine (GPU only)
+
+Exported artifacts come from the content-addressed cache in ``utils.export_cache``.
+"""
+
+import time
+
+import numpy as np
+
+from utils.export_cache import default_cache
+from utils.pipeline import letterbox_into, scale_boxes_back
+from utils.postprocess import non_max_suppression
+from utils.stats import warmup_iterations
+
+BACKENDS = {}
+
+ORT_OPT_LEVELS = ("disable", "basic", "extended", "all")
+
+# Model stride: input sides must be multiples of it
+STRIDE = 32
+
+# Size a dynamic-shape export is traced at; the artifact itself accepts any shape
+DYNAMIC_EXPORT_IMGSZ = 640
+
+
+def imgsz_hw(imgsz):
+    """``(height, width)`` of an int (square) or ``(height, width)`` imgsz."""
+    if isinstance(imgsz, int):
+        return imgsz, imgsz
+    h, w = imgsz
+    return int(h), int(w)
+
+
+def imgsz_label(imgsz):
+    """Results label: ``640`` for square sizes, ``"1280x736"`` (width x height) otherwise."""
+    h, w = imgsz_hw(imgsz)
+    return h if h == w else f"{w}x{h}"
+
+
+def register_backend(cls):
+    """Class decorator adding ``cls`` to :data:`BACKENDS` under ``cls.name``."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def get_backend(name):
+    """Look up a backend class by name."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {sorted(BACKENDS)}") from None
+
+
+def parse_backends(value):
+    """Parse a comma-separated backend list such as "pytorch,onnxruntime"."""
+    names = [v.strip() for v in value.split(",") if v.strip()]
+    for name in names:
+        get_backend(name)
+    return names
+
+
+def export_model(model_path, fmt, imgsz=640, batch=1, dynamic=False, half=False, device="cpu"):
+    """Export ``model_path`` through the shared export cache and return the artifact path."""
+    return default_cache().get_or_export(
+        model_path, fmt, imgsz=imgsz, batch=batch, dynamic=dynamic, half=half, device=device
+    )
+
+
+class Backend:
+    """Base class: subclasses implement ``load`` and ``infer``."""
+
+    name = None
+    label = None
+    export_format = None  # set by backends that run an exported artifact
+    # Frameworks ``load()``/``infer()`` import; the startup benchmark times them apart
+    frameworks = ()
+
+    def __init__(
+        self,
+        model_path,
+        device="cpu",
+        imgsz=640,
+        batch_size=1,
+        half=False,
+        conf=0.25,
+        iou=0.7,
+        **options,
+    ):
+        self.model_path = model_path
+        self.device = device
+        self.imgsz = imgsz
+        self.batch_size = batch_size
+        self.half = half
+        self.conf = conf
+        self.iou = iou
+        self.options = options
+        self.stage_ms = None  # {"preprocess": ms, "inference": ms, "postprocess": ms}
+
+    @property
+    def precision(self):
+        return "FP16" if self.half else "FP32"
+
+    @property
+    def format_name(self):
+        """Label used in results tables, e.g. "PyTorch FP32"."""
+        return f"{self.label} {self.precision}"
+
+    def export_request(self):
+        """Keyword arguments for ``export_model``/``export_many``, or ``None``."""
+        if self.export_format is None:
+            return None
+        return {
+            "model_path": self.model_path,
+            "fmt": self.export_format,
+            "imgsz": self.imgsz,
+            "batch": self.batch_size,
+            "dynamic": self.options.get("dynamic", False),
+            "half": self.half,
+            "device": self.device,
+        }
+
+    def artifact_path(self):
+        """Path of what this backend runs: the exported artifact, or the weights themselves."""
+        request = self.export_request()
+        return export_model(**request) if request else self.model_path
+
+    def load(self):
+        raise NotImplementedError
+
+    def infer(self, batch):
+        raise NotImplementedError
+
+    def warmup(self, batch, iterations=None):
+        """Warm up on ``batch``; ``iterations=None`` runs until latency stabilizes."""
+        return warmup_iterations(lambda: self.infer(batch), iterations)
+
+    def close(self):
+        """Release the runtime. Subclasses drop references to sessions/models."""
+
+    def __enter__(self):
+        self.load()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@register_backend
+class PyTorchBackend(Backend):
+    """Eager PyTorch through the ultralytics predictor (the historical default)."""
+
+    name = "pytorch"
+    label = "PyTorch"
+    frameworks = ("torch", "ultralytics")
+
+    def load(self):
+        from ultralytics import YOLO
+
+        self.model = YOLO(self.model_path)
+
+    def infer(self, batch):
+        results = self.model(
+            batch,
+            verbose=False,
+            half=self.half,
+            device=self.device,
+            imgsz=list(imgsz_hw(self.imgsz)),
+            conf=self.conf,
+            iou=self.iou,
+        )
+        # Results.speed is the per-image average of the batch; report per-call totals
+        self.stage_ms = {k: v * len(results) for k, v in results[0].speed.items() if v is not None}
+        return [r.boxes.data.cpu().numpy() for r in results]
+
+    def close(self):
+        self.model = None
+
+
+@register_backend
+class TorchScriptBackend(PyTorchBackend):
+    """TorchScript export, traced at a fixed batch size and image size."""
+
+    name = "torchscript"
+    label = "TorchScript"
+    export_format = "torchscript"
+
+    def load(self):
+        from ultralytics import YOLO
+
+        self.model = YOLO(export_model(**self.export_request()), task="detect")
+
+
+@register_backend
+class TensorRTBackend(PyTorchBackend):
+    """TensorRT engine through the ultralytics predictor. Requires a CUDA GPU."""
+
+    name = "tensorrt"
+    label = "TensorRT"
+    export_format = "engine"
+    frameworks = ("torch", "ultralytics", "tensorrt")
+
+    def __init__(self, model_path, half=True, **kwargs):
+        super().__init__(model_path, half=half, **kwargs)
+
+    def export_request(self):
+        if str(self.model_path).endswith(".engine"):
+            return None
+        return {**super().export_request(), "device": 0}
+
+    def load(self):
+        from ultralytics import YOLO
+
+        request = self.export_request()
+        path = export_model(**request) if request else self.model_path
+        self.model = YOLO(path, task="detect")
+
+
+@register_backend
+class ONNXRuntimeBackend(Backend):
+    """ONNX Runtime session with explicit CPU tuning knobs.
+
+    Options:
+        providers: Execution providers (default ``["CPUExecutionProvider"]``).
+        opt_level: Graph optimization level, one of :data:`ORT_OPT_LEVELS`.
+        intra_op_threads / inter_op_threads: Thread pool sizes (0 = ORT default).
+        dynamic: Run one dynamic batch/shape export for every imgsz and batch size
+            instead of a static export per shape.
+        nms: Postprocessing implementation, one of :data:`utils.postprocess.NMS_METHODS`
+            (default ``"numpy"``, which keeps torch out of the process).
+        profile: File prefix for ONNX Runtime's per-operator trace
+            (``SessionOptions.enable_profiling``); :meth:`end_profiling` writes it.
+    """
+
+    name = "onnxruntime"
+    label = "ONNX Runtime"
+    export_format = "onnx"
+
+    @property
+    def frameworks(self):
+        nms = self.options.get("nms", "numpy")
+        return {
+            "numpy": ("onnxruntime",),
+            "torchvision": ("onnxruntime", "torch", "torchvision"),
+            "ultralytics": ("onnxruntime", "torch", "ultralytics"),
+        }[nms]
+
+    @property
+    def format_name(self):
+        dynamic = ", dynamic" if self.options.get("dynamic") else ""
+        nms = self.options.get("nms", "numpy")
+        nms = f", nms={nms}" if nms != "numpy" else ""
+        return (
+            f"{self.label} {self.precision} "
+            f"(opt={self.options.get('opt_level', 'all')}{dynamic}{nms})"
+        )
+
+    def export_request(self):
+        request = super().export_request()
+        if request["dynamic"]:
+            # The same artifact serves every shape, so key it on a fixed trace shape
+            request.update(imgsz=DYNAMIC_EXPORT_IMGSZ, batch=1)
+        return request
+
+    def load(self):
+        import onnxruntime as ort
+
+        opt_level = self.options.get("opt_level", "all")
+        if opt_level not in ORT_OPT_LEVELS:
+            raise ValueError(f"opt_level must be one of {ORT_OPT_LEVELS}, got {opt_level!r}")
+
+        path = self.artifact_path()
+        so = ort.SessionOptions()
+        so.graph_optimization_level = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }[opt_level]
+        so.intra_op_num_threads = self.options.get("intra_op_threads", 0)
+        so.inter_op_num_threads = self.options.get("inter_op_threads", 0)
+        if self.options.get("profile"):
+            so.enable_profiling = True
+            so.profile_file_prefix = str(self.options["profile"])
+        providers = self.options.get("providers", ["CPUExecutionProvider"])
+
+        self.session = ort.InferenceSession(path, sess_options=so, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        dtype = np.float16 if self.half else np.float32
+        h, w = imgsz_hw(self.imgsz)
+        self._canvas = np.empty((h, w, 3), dtype=np.uint8)
+        self._input = np.empty((self.batch_size, 3, h, w), dtype=dtype)
+
+    def preprocess(self, batch):
+        """Letterbox every frame into the preallocated NCHW input tensor."""
+        if len(batch) > self._input.shape[0]:
+            self._input = np.empty((len(batch), *self._input.shape[1:]), dtype=self._input.dtype)
+        meta = []
+        for i, frame in enumerate(batch):
+            ratio, pad = letterbox_into(frame, self._canvas)
+            np.multiply(self._canvas[..., ::-1].transpose(2, 0, 1), 1.0 / 255.0, out=self._input[i])
+            meta.append((ratio, pad, frame.shape[:2]))
+        return self._input[: len(batch)], meta
+
+    def postprocess(self, output, meta):
+        """NMS on the raw head output, then map boxes back to original frames."""
+        dets = non_max_suppression(
+            output,
+            conf_thres=self.conf,
+            iou_thres=self.iou,
+            method=self.options.get("nms", "numpy"),
+        )
+        out = []
+        for det, (ratio, pad, shape) in zip(dets, meta, strict=True):
+            if len(det):
+                det[:, :4] = scale_boxes_back(det[:, :4], ratio, pad, shape)
+            out.append(det)
+        return out
+
+    def infer(self, batch):
+        t0 = time.perf_counter()
+        tensor, meta = self.preprocess(batch)
+        t1 = time.perf_counter()
+        output = self.session.run(None, {self.input_name: tensor})[0]
+        t2 = time.perf_counter()
+        out = self.postprocess(output, meta)
+        t3 = time.perf_counter()
+        self.stage_ms = {
+            "preprocess": (t1 - t0) * 1000,
+            "inference": (t2 - t1) * 1000,
+            "postprocess": (t3 - t2) * 1000,
+        }
+        return out
+
+    def end_profiling(self):
+        """Write the operator trace of a ``profile`` session and return its path."""
+        return self.session.end_profiling()
+
+    def close(self):
+        self.session = None
+
+
+@register_backend
+class ONNXRuntimeINT8Backend(ONNXRuntimeBackend):
+    """ONNX Runtime on a static INT8 (QDQ) quantization of the FP32 ONNX export.
+
+    Takes the :class:`ONNXRuntimeBackend` options plus:
+        calibration: Dataset yaml, image directory or list whose images calibrate
+            activation ranges (default ``coco128.yaml``, training split).
+        calibration_images: Number of calibration images (default 100).
+        calibrate_method: ``minmax``, ``entropy`` or ``percentile``.
+        per_channel: Per-channel weight scales (default ``True``).
+
+    Inputs and outputs stay FP32; quantized models are cached by
+    ``utils.quantization``.
+    """
+
+    name = "onnxruntime_int8"
+    label = "ONNX Runtime"
+
+    @property
+    def precision(self):
+        return "INT8"
+
+    def __init__(self, model_path, half=False, **kwargs):
+        # Quantization starts from the FP32 graph and keeps FP32 inputs
+        super().__init__(model_path, half=False, **kwargs)
+
+    def artifact_path(self):
+        from utils.quantization import (
+            DEFAULT_CALIBRATION,
+            DEFAULT_CALIBRATION_IMAGES,
+            quantize_model,
+        )
+
+        return quantize_model(
+            super().artifact_path(),
+            calibration=self.options.get("calibration", DEFAULT_CALIBRATION),
+            num_images=self.options.get("calibration_images", DEFAULT_CALIBRATION_IMAGES),
+            imgsz=imgsz_hw(self.imgsz),
+            method=self.options.get("calibrate_method", "minmax"),
+            per_channel=self.options.get("per_channel", True),
+        )
@@ -0,0 +1,240 @@
+"""Declarative benchmark configs: YAML files describing a sweep matrix.
+
+A config names the settings of a run and, per kind of cell (``speed``,
+``accuracy``), a matrix of values to sweep plus ``include``/``exclude`` rules::
+
+    name: nightly
+    device: cpu
+    runs: 200
+    scheduler: {jobs: 2, timeout: 1800}
+    models: [yolo11n, yolo11s]
+    speed:
+      matrix:
+        backend: [pytorch, onnxruntime]
+        precision: [fp32, int8]
+        batch: [1, 8]
+        imgsz: [640, 1280x736]
+        threads: [0, 4]
+      exclude:
+        - {backend: pytorch, batch: 8}
+      include:
+        - {model: yolo11n, backend: onnxruntime, imgsz: 320}
+    accuracy:
+      matrix:
+        backend: [onnxruntime]
+        precision: [fp32, int8]
+        data: [coco128.yaml]
+
+The matrix is the cartesian product of its lists. ``exclude`` then drops every
+combination matching all keys of a rule. ``include`` works like GitHub Actions
+matrices: an entry extends every combination it does not contradict on a matrix
+key, and becomes a new combination if it extends none. Keys a combination
+leaves out take the defaults in :data:`SPEED_DEFAULTS`/:data:`ACCURACY_DEFAULTS`;
+a matrix without ``model`` sweeps the top-level ``models`` list (default: every
+model in ``configs/models.yaml``, see :func:`load_models`).
+
+Combinations that cannot run are dropped: FP16 and TensorRT on CPU, INT8 outside
+ONNX Runtime, and FP32 TensorRT (its engines are built in FP16, so those cells
+would repeat the FP16 ones under the wrong label). ``precision: int8`` selects the ``onnxruntime_int8`` backend, whose
+calibration options (``calibration``, ``calibration_images``, ``calibrate_method``,
+``per_channel``) come from a top-level ``int8`` mapping.
+
+Every cell gets a readable id and a key hashing its parameters and the run
+settings (device, runs, warmup). Records carry the key, so a rerun on the same
+host skips cells the results store already holds.
+"""
+
+import hashlib
+import itertools
+import json
+import platform
+from importlib import resources
+from pathlib import Path
+
+import yaml
+
+PRECISIONS = ("fp32", "fp16", "int8")
+SPEED_DEFAULTS = {"backend": "pytorch", "precision": "fp32", "batch": 1, "imgsz": 640, "threads": 0}
+ACCURACY_DEFAULTS = {
+    "backend": "pytorch",
+    "precision": "fp32",
+    "imgsz": 640,
+    "data": "coco128.yaml",
+    "engine": "cached",
+}
+SETTINGS_DEFAULTS = {"device": None, "runs": 100, "warmup": None, "store": "results/runs.jsonl"}
+INT8_OPTIONS = ("calibration", "calibration_images", "calibrate_method", "per_channel")
+
+
+class ConfigError(ValueError):
+    """Invalid benchmark config."""
+
+
+def shipped_config(name):
+    """A file from ``configs/``: installed package data, else ``./configs/<name>``."""
+    try:
+        path = resources.files("configs") / name
+    except ModuleNotFoundError:
+        return Path("configs") / name
+    return path if path.is_file() else Path("configs") / name
+
+
+def load_models(path=None):
+    """``{name: weights}`` of the default model list (``configs/models.yaml``)."""
+    path = Path(path) if path else shipped_config("models.yaml")
+    models = yaml.safe_load(path.read_text())
+    if not isinstance(models, dict) or not models:
+        raise ConfigError(f"{path} must map model names to weights files")
+    return {str(name): str(weights) for name, weights in models.items()}
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, list | tuple) else [value]
+
+
+def _matches(combo, rule):
+    return all(combo.get(k) in _as_list(v) for k, v in rule.items())
+
+
+def expand_matrix(matrix, include=(), exclude=()):
+    """Combinations of ``matrix`` after ``exclude`` and ``include`` (GitHub Actions rules)."""
+    keys = list(matrix)
+    combos = [
+        dict(zip(keys, values, strict=True))
+        for values in itertools.product(*(_as_list(matrix[k]) for k in keys))
+    ]
+    combos = [c for c in combos if not any(_matches(c, rule) for rule in exclude)]
+    for entry in include:
+        matched = [c for c in combos if all(c[k] == v for k, v in entry.items() if k in keys)]
+        for combo in matched:
+            combo.update((k, v) for k, v in entry.items() if k not in keys)
+        if not matched:
+            combos.append(dict(entry))
+    return combos
+
+
+def _imgsz(value):
+    """640, "640" or "1280x736" (width x height) as an int or ``(h, w)``."""
+    if isinstance(value, int):
+        return value
+    text = str(value).lower()
+    if "x" in text:
+        w, h = text.split("x")
+        return int(h), int(w)
+    return int(text)
+
+
+def _imgsz_id(imgsz):
+    return str(imgsz) if isinstance(imgsz, int) else f"{imgsz[1]}x{imgsz[0]}"
+
+
+def runnable(params, device, int8=None):
+    """Whether a cell can run on ``device``; points INT8 cells at their backend and options."""
+    precision, backend = params["precision"], params["backend"]
+    if precision not in PRECISIONS:
+        raise ConfigError(f"unknown precision {precision!r}, expected {PRECISIONS}")
+    if device == "cpu" and (precision == "fp16" or backend == "tensorrt"):
+        return False
+    if backend == "tensorrt" and precision == "fp32":
+        return False  # TensorRTBackend builds FP16 engines
+    if precision == "int8":
+        if backend not in ("onnxruntime", "onnxruntime_int8"):
+            return False
+        params["backend"] = "onnxruntime_int8"
+        if int8:
+            params["options"] = dict(int8)
+    return True
+
+
+def cell_key(params, settings):
+    """Hash of a cell's parameters and the run settings that change its results."""
+    fields = {
+        "params": params,
+        "device": settings["device"],
+        "runs": settings["runs"] if params["kind"] == "speed" else None,
+        "warmup": settings["warmup"] if params["kind"] == "speed" else None,
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def cell_id(params):
+    """Readable, unique id such as ``speed/yolo11n/onnxruntime/fp32/b1/640/t0``."""
+    p = params
+    if p["kind"] == "speed":
+        parts = [p["model"], p["backend"], p["precision"], f"b{p['batch']}"]
+        parts += [_imgsz_id(p["imgsz"]), f"t{p['threads']}"]
+    else:
+        parts = [p["model"], p["backend"], p["precision"], p["data"], _imgsz_id(p["imgsz"])]
+        parts.append(p["engine"])
+    return "/".join([p["kind"], *map(str, parts)])
+
+
+def load_config(path):
+    """Read and validate a config; returns a dict with ``settings`` and raw sections."""
+    path = Path(path)
+    raw = yaml.safe_load(path.read_text()) or {}
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{path}: top level must be a mapping")
+    sections = {"name", "models", "scheduler", "int8", "speed", "accuracy"}
+    unknown = set(raw) - sections - set(SETTINGS_DEFAULTS)
+    if unknown:
+        raise ConfigError(f"{path}: unknown keys {sorted(unknown)}")
+    unknown = set(raw.get("int8") or {}) - set(INT8_OPTIONS)
+    if unknown:
+        raise ConfigError(
+            f"{path}: unknown int8 options {sorted(unknown)}, expected {INT8_OPTIONS}"
+        )
+    if not raw.get("speed") and not raw.get("accuracy"):
+        raise ConfigError(f"{path}: needs a 'speed' and/or 'accuracy' section")
+    settings = {**SETTINGS_DEFAULTS, **{k: raw[k] for k in SETTINGS_DEFAULTS if k in raw}}
+    return {
+        "name": raw.get("name", path.stem),
+        "models": raw.get("models"),
+        "settings": settings,
+        "scheduler": raw.get("scheduler") or {},
+        "int8": raw.get("int8") or {},
+        "speed": raw.get("speed"),
+        "accuracy": raw.get("accuracy"),
+    }
+
+
+def expand_config(config, device):
+    """Runnable cells of ``config`` as ``{cell id: params}``, accuracy cells first."""
+    settings = {**config["settings"], "device": device}
+    cells = {}
+    for kind, defaults in (("accuracy", ACCURACY_DEFAULTS), ("speed", SPEED_DEFAULTS)):
+        section = config.get(kind)
+        if not section:
+            continue
+        unknown = set(section) - {"matrix", "include", "exclude"}
+        if unknown:
+            raise ConfigError(f"{kind}: unknown keys {sorted(unknown)}")
+        matrix = dict(section.get("matrix") or {})
+        if "model" not in matrix:
+            matrix = {"model": list(config.get("models") or load_models()), **matrix}
+        allowed = {"model", *defaults}
+        for combo in expand_matrix(matrix, section.get("include", []), section.get("exclude", [])):
+            unknown = set(combo) - allowed
+            if unknown:
+                raise ConfigError(f"{kind}: unknown matrix keys {sorted(unknown)}")
+            if "model" not in combo:
+                raise ConfigError(
+                    f"{kind}: include {combo} matches no combination and has no model"
+                )
+            params = {"kind": kind, **defaults, **combo}
+            params["imgsz"] = _imgsz(params["imgsz"])
+            if not runnable(params, device, config.get("int8")):
+                continue
+            params["key"] = cell_key(params, settings)
+            cells.setdefault(cell_id(params), params)
+    return cells
+
+
+def completed_keys(records, hostname=None):
+    """Keys of config cells already recorded on this host (``hostname`` defaults to it)."""
+    hostname = hostname or platform.node()
+    return {
+        r["config"]["cell_key"]
+        for r in records
+        if r["config"].get("cell_key") and r["environment"].get("hostname") == hostname
+    }
@@ -0,0 +1,317 @@
+"""Benchmark input corpus: varied frames decoded once into a memory-mapped file.
+
+An all-zeros frame yields no detections, so NMS and postprocessing never show up
+in timings. A corpus instead provides:
+
+- ``synthetic``: dense scenes of overlapping shapes on a textured background, at
+  mixed resolutions and aspect ratios with object counts from empty to crowded
+- ``dir``: every image in a local folder
+- ``video``: frames of a local video file
+
+Frames are decoded once and written back to back into a flat uint8 file with a
+JSON index (offset and shape per frame). Benchmarks read them through a read-only
+``np.memmap``, so decoding never shows up in timings and concurrent worker
+processes share the same page cache instead of each holding a copy.
+
+Layout::
+
+    <root>/<key>.frames   # raw HWC BGR uint8 frames, concatenated
+    <root>/<key>.json     # spec, per-frame offset/height/width/source
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+DEFAULT_ROOT = Path(
+    os.environ.get(
+        "VISION_BENCH_CORPUS_CACHE", Path.home() / ".cache" / "vision-benchmarks" / "corpus"
+    )
+)
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+    "square": (1080, 1080),
+    "portrait": (1080, 1920),
+}
+DEFAULT_RESOLUTIONS = ("720p", "1080p", "4k")
+
+# Objects drawn per synthetic frame, cycled so every density bucket is populated
+SCENE_DENSITIES = (0, 5, 20, 50, 100)
+
+# Lower bucket edges for detections per inference call (300 = ultralytics max_det)
+DETECTION_BUCKETS = (0, 1, 10, 50, 100, 300)
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+
+
+def parse_resolutions(value):
+    """Parse "720p,4k" or "1280x720,640x640" into a list of ``(width, height)``."""
+    sizes = []
+    for token in (v.strip().lower() for v in value.split(",")):
+        if not token:
+            continue
+        if token in RESOLUTIONS:
+            sizes.append(RESOLUTIONS[token])
+            continue
+        try:
+            w, h = (int(x) for x in token.split("x"))
+        except ValueError:
+            raise ValueError(
+                f"Unknown resolution {token!r}, expected WxH or one of {sorted(RESOLUTIONS)}"
+            ) from None
+        sizes.append((w, h))
+    if not sizes:
+        raise ValueError(f"No resolutions in {value!r}")
+    return sizes
+
+
+def synthetic_scene(width, height, num_objects, rng):
+    """Textured background with ``num_objects`` overlapping, outlined shapes (BGR)."""
+    # Smooth low-frequency background plus noise, so frames are not trivially compressible
+    coarse = rng.integers(40, 220, (max(2, height // 64), max(2, width // 64), 3), dtype=np.uint8)
+    img = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_LINEAR)
+    noise = rng.integers(-12, 13, img.shape, dtype=np.int16)
+    img = np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    short = min(width, height)
+    for _ in range(num_objects):
+        size = int(short * np.exp(rng.uniform(np.log(0.03), np.log(0.3))))
+        w = max(4, int(size * rng.uniform(0.5, 1.5)))
+        h = max(4, int(size * rng.uniform(0.5, 1.5)))
+        x1 = int(rng.integers(0, max(1, width - w)))
+        y1 = int(rng.integers(0, max(1, height - h)))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        thickness = max(2, short // 300)
+        if rng.random() < 0.5:
+            cv2.rectangle(img, (x1, y1), (x1 + w, y1 + h), color, -1)
+            cv2.rectangle(img, (x1, y1), (x1 + w, y1 + h), (0, 0, 0), thickness)
+        else:
+            center, axes = (x1 + w // 2, y1 + h // 2), (w // 2, h // 2)
+            cv2.ellipse(img, center, axes, 0, 0, 360, color, -1)
+            cv2.ellipse(img, center, axes, 0, 0, 360, (0, 0, 0), thickness)
+    return img
+
+
+def synthetic_frames(count, resolutions=None, densities=SCENE_DENSITIES, seed=0):
+    """Yield ``(frame, source)`` for ``count`` synthetic scenes.
+
+    Resolutions and object densities are cycled independently, so every density is
+    seen at every resolution once ``count`` is large enough.
+    """
+    sizes = resolutions or [RESOLUTIONS[r] for r in DEFAULT_RESOLUTIONS]
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        width, height = sizes[i % len(sizes)]
+        objects = densities[(i // len(sizes)) % len(densities)]
+        yield synthetic_scene(width, height, objects, rng), f"synthetic:{width}x{height}:{objects}"
+
+
+def folder_frames(path, max_frames=None):
+    """Yield ``(frame, source)`` for every readable image in ``path`` (sorted by name)."""
+    files = sorted(p for p in Path(path).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    yielded = 0
+    for file in files:
+        if max_frames is not None and yielded >= max_frames:
+            return
+        frame = cv2.imread(str(file))
+        if frame is None:
+            continue
+        yielded += 1
+        yield frame, file.name
+
+
+def video_frames(path, max_frames=None, stride=1):
+    """Yield ``(frame, source)`` for every ``stride``-th frame of a video file."""
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise OSError(f"Cannot open video {path}")
+    index = yielded = 0
+    try:
+        while max_frames is None or yielded < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            if index % stride == 0:
+                yielded += 1
+                yield frame, f"{Path(path).name}#{index}"
+            index += 1
+    finally:
+        cap.release()
+
+
+def _source_fingerprint(path):
+    """Size/mtime summary of a file or folder so edits invalidate the cached corpus."""
+    path = Path(path)
+    files = [path] if path.is_file() else sorted(p for p in path.iterdir() if p.is_file())
+    return [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in files]
+
+
+def parse_spec(spec):
+    """Split a corpus spec ("synthetic:24", "dir:images/", "video:clip.mp4") into parts."""
+    kind, _, arg = spec.partition(":")
+    if kind == "synthetic":
+        return kind, int(arg) if arg else 24
+    if kind in ("dir", "video"):
+        if not arg:
+            raise ValueError(f"Corpus spec {spec!r} needs a path, e.g. {kind}:path")
+        return kind, arg
+    raise ValueError(f"Unknown corpus {spec!r}, expected synthetic[:N], dir:PATH or video:PATH")
+
+
+class Corpus:
+    """Read-only, memory-mapped collection of frames with mixed shapes.
+
+    Pickles by path, so passing a corpus to a worker process reopens the same file
+    instead of copying the frames.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index = json.loads(self.path.with_suffix(".json").read_text())
+        self.frames = self.index["frames"]
+        self.name = self.index["name"]
+        self._data = np.memmap(self.path.with_suffix(".frames"), dtype=np.uint8, mode="r")
+
+    @classmethod
+    def build(cls, path, frames, name):
+        """Write ``(frame, source)`` pairs to ``path`` and return the opened corpus.
+
+        Frames are streamed to disk one at a time, so building a corpus of 4K frames
+        never holds more than one of them in memory.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entries, offset = [], 0
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for frame, source in frames:
+                    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+                    if frame.ndim != 3 or frame.shape[2] != 3:
+                        raise ValueError(f"Expected HxWx3 frame from {source}, got {frame.shape}")
+                    f.write(frame.tobytes())
+                    h, w = frame.shape[:2]
+                    entries.append({"offset": offset, "height": h, "width": w, "source": source})
+                    offset += frame.nbytes
+            if not entries:
+                raise ValueError(f"Corpus {name!r} has no frames")
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path.with_suffix(".frames"))
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+        # The index goes last: its presence marks the corpus as complete
+        index = path.with_suffix(".json.tmp")
+        index.write_text(json.dumps({"name": name, "frames": entries}))
+        os.replace(index, path.with_suffix(".json"))
+        return cls(path)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i):
+        """Frame ``i`` as a read-only HWC BGR view into the memory map."""
+        meta = self.frames[i % len(self.frames)]
+        size = meta["height"] * meta["width"] * 3
+        flat = self._data[meta["offset"] : meta["offset"] + size]
+        return flat.reshape(meta["height"], meta["width"], 3)
+
+    def batch(self, step, batch_size=1):
+        """Frames for iteration ``step``, cycling through the corpus."""
+        start = step * batch_size
+        return [self[start + k] for k in range(batch_size)]
+
+    def preload(self):
+        """Touch every page so the first pass does not pay page-fault cost in timings."""
+        if len(self._data):
+            int(self._data[::4096].sum())
+        return self
+
+    def resolutions(self):
+        """Distinct ``WxH`` labels with their frame counts."""
+        counts = {}
+        for meta in self.frames:
+            label = f"{meta['width']}x{meta['height']}"
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def __getstate__(self):
+        return {"path": str(self.path)}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+
+def load_corpus(spec, resolutions=None, max_frames=None, seed=0, root=DEFAULT_ROOT):
+    """Return the :class:`Corpus` for ``spec``, building and caching it on first use.
+
+    The cache key covers the spec, resolutions, frame limit, seed and (for folders
+    and videos) the size and mtime of every source file.
+    """
+    kind, arg = parse_spec(spec)
+    sizes = parse_resolutions(resolutions) if isinstance(resolutions, str) else resolutions
+    fields = {"kind": kind, "arg": arg, "max_frames": max_frames, "seed": seed}
+    if kind == "synthetic":
+        fields["resolutions"] = sizes or [RESOLUTIONS[r] for r in DEFAULT_RESOLUTIONS]
+    else:
+        fields["source"] = _source_fingerprint(arg)
+    key = hashlib.sha256(json.dumps(fields, sort_keys=True, default=list).encode()).hexdigest()
+    path = Path(root).expanduser() / key[:24]
+    if path.with_suffix(".json").exists():
+        return Corpus(path)
+
+    print(f"Building input corpus {spec} (decoded once into {path.with_suffix('.frames')})...")
+    if kind == "synthetic":
+        frames = synthetic_frames(
+            arg if max_frames is None else min(arg, max_frames), sizes, seed=seed
+        )
+    elif kind == "dir":
+        frames = folder_frames(arg, max_frames)
+    else:
+        frames = video_frames(arg, max_frames)
+    return Corpus.build(path, frames, name=spec)
+
+
+def bucket_label(edges, i):
+    lo = edges[i]
+    if i + 1 >= len(edges):
+        return f"{lo}+"
+    hi = edges[i + 1] - 1
+    return str(lo) if hi == lo else f"{lo}-{hi}"
+
+
+def bucket_by_detections(latencies, detections, edges=DETECTION_BUCKETS):
+    """Group per-call latencies by the number of detections that call produced.
+
+    Returns one dict per non-empty bucket with the bucket label, number of calls,
+    mean detections and mean/p50/p99 latency.
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    detections = np.asarray(detections)
+    if len(latencies) != len(detections):
+        raise ValueError("latencies and detections must have the same length")
+    which = np.searchsorted(edges, detections, side="right") - 1
+    rows = []
+    for i in range(len(edges)):
+        mask = which == i
+        if not mask.any():
+            continue
+        lat = latencies[mask]
+        rows.append(
+            {
+                "bucket": bucket_label(edges, i),
+                "calls": int(mask.sum()),
+                "mean_detections": float(detections[mask].mean()),
+                "mean": float(lat.mean()),
+                "p50": float(np.percentile(lat, 50)),
+                "p99": float(np.percentile(lat, 99)),
+            }
+        )
+    return rows
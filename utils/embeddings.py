@@ -0,0 +1,331 @@
+"""Image embedding extraction: models, pipelined folder loading, memory-mapped storage.
+
+Deduplication and retrieval embed every image of a collection once and search
+the vectors afterwards (``utils/ann.py``). Extraction is throughput-bound, so
+loading is pipelined with inference: :class:`ImageFolderLoader` decodes and
+preprocesses whole batches on a thread pool (OpenCV releases the GIL) while the
+model runs on the previous batch, ``prefetch`` batches ahead.
+
+Embedders (one interface: load, embed, close; frameworks are imported on
+``load()``):
+
+- ``dinov2_vits14`` / ``dinov2_vitb14`` / ``dinov2_vitl14``: DINOv2 class token
+  via ``torch.hub`` (``facebookresearch/dinov2``)
+- ``clip_vit_b32`` / ``clip_vit_b16``: CLIP image tower via ``open_clip``
+  (optional, ``pip install open_clip_torch``)
+- ``resnet50`` / ``vit_b_16``: torchvision backbones with the classifier removed
+
+Embeddings are L2-normalized, so inner product is cosine similarity.
+:class:`FeatureStore` writes them batch by batch into an ``(N, D)`` float16 or
+float32 ``.npy`` file that later runs open memory-mapped, with the image paths
+in a ``.txt`` file alongside.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.ann import normalize
+
+DEFAULT_ROOT = Path(
+    os.environ.get(
+        "VISION_BENCH_EMBEDDING_CACHE", Path.home() / ".cache" / "vision-benchmarks" / "embeddings"
+    )
+)
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+CLIP_MEAN = (0.48145466, 0.4578275, 0.40821073)
+CLIP_STD = (0.26862954, 0.26130258, 0.27577711)
+
+EMBEDDERS = {}
+
+
+def register_embedder(cls):
+    """Class decorator adding every model of ``cls`` to :data:`EMBEDDERS`."""
+    for name in cls.models:
+        EMBEDDERS[name] = cls
+    return cls
+
+
+def get_embedder(name):
+    """Embedder class for a model name such as ``"dinov2_vits14"``."""
+    try:
+        return EMBEDDERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedder {name!r}, expected one of {sorted(EMBEDDERS)}"
+        ) from None
+
+
+def resize_center_crop(image, size=224, resize=None):
+    """Scale the shorter side of a BGR image to ``resize`` (default ``size * 8 / 7``) and
+    crop the centre ``size`` x ``size``, the usual ImageNet evaluation transform."""
+    resize = resize or round(size * 8 / 7)
+    h, w = image.shape[:2]
+    scale = resize / min(h, w)
+    new_w, new_h = max(size, round(w * scale)), max(size, round(h * scale))
+    image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    top, left = (new_h - size) // 2, (new_w - size) // 2
+    return image[top : top + size, left : left + size]
+
+
+class Embedder:
+    """Base class: subclasses implement ``load`` and ``forward``.
+
+    ``embed(tensor)`` takes an ``(N, 3, S, S)`` float32 batch from
+    :meth:`preprocess` and returns ``(N, dim)`` L2-normalized float32 embeddings;
+    ``stage_ms`` holds the inference time of the last call.
+    """
+
+    label = None
+    models = {}  # model name -> embedding dim
+    frameworks = ("torch",)
+    input_size = 224
+    mean = IMAGENET_MEAN
+    std = IMAGENET_STD
+
+    def __init__(self, name, device="cpu", half=False, pretrained=True):
+        if name not in self.models:
+            raise ValueError(f"{type(self).__name__} has no model {name!r}")
+        self.name = name
+        self.device = device
+        self.half = half
+        self.pretrained = pretrained
+        self.model = None
+        self.stage_ms = None
+
+    @property
+    def dim(self):
+        return self.models[self.name]
+
+    @property
+    def format_name(self):
+        precision = "FP16" if self.half else "FP32"
+        return f"{self.label} {precision}"
+
+    def preprocess(self, image, out):
+        """Write one BGR image into ``out`` (3, S, S) as normalized RGB float32."""
+        crop = resize_center_crop(image, self.input_size)
+        scale = 1 / (255 * np.asarray(self.std, np.float32))
+        offset = np.asarray(self.mean, np.float32) / np.asarray(self.std, np.float32)
+        chw = crop[..., ::-1].transpose(2, 0, 1)
+        np.multiply(chw, scale[:, None, None], out=out)
+        out -= offset[:, None, None]
+
+    def load(self):
+        raise NotImplementedError
+
+    def forward(self, batch):
+        raise NotImplementedError
+
+    def _to_device(self, model):
+        model = model.eval().to(self.device)
+        return model.half() if self.half else model
+
+    def _run(self, fn, batch):
+        import torch
+
+        tensor = torch.from_numpy(batch).to(self.device)
+        tensor = tensor.half() if self.half else tensor
+        with torch.inference_mode():
+            return fn(tensor).float().cpu().numpy()
+
+    def embed(self, batch):
+        t0 = time.perf_counter()
+        features = normalize(self.forward(batch))
+        self.stage_ms = {"inference": (time.perf_counter() - t0) * 1000}
+        return features
+
+    def close(self):
+        self.model = None
+
+    def __enter__(self):
+        self.load()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@register_embedder
+class DINOv2Embedder(Embedder):
+    """DINOv2 ViT class token from ``torch.hub`` (downloads code and weights once)."""
+
+    label = "DINOv2"
+    models = {"dinov2_vits14": 384, "dinov2_vitb14": 768, "dinov2_vitl14": 1024}
+
+    def load(self):
+        import torch
+
+        model = torch.hub.load("facebookresearch/dinov2", self.name, pretrained=self.pretrained)
+        self.model = self._to_device(model)
+
+    def forward(self, batch):
+        return self._run(self.model, batch)
+
+
+@register_embedder
+class CLIPEmbedder(Embedder):
+    """CLIP image encoder from ``open_clip``."""
+
+    label = "CLIP"
+    models = {"clip_vit_b32": 512, "clip_vit_b16": 512}
+    frameworks = ("torch", "open_clip")
+    mean = CLIP_MEAN
+    std = CLIP_STD
+    architectures = {"clip_vit_b32": "ViT-B-32", "clip_vit_b16": "ViT-B-16"}
+
+    def load(self):
+        import open_clip
+
+        model = open_clip.create_model(
+            self.architectures[self.name], pretrained="openai" if self.pretrained else None
+        )
+        self.model = self._to_device(model)
+
+    def forward(self, batch):
+        return self._run(self.model.encode_image, batch)
+
+
+@register_embedder
+class TorchvisionEmbedder(Embedder):
+    """torchvision classifier backbone with its classification head removed."""
+
+    label = "torchvision"
+    models = {"resnet50": 2048, "vit_b_16": 768}
+    frameworks = ("torch", "torchvision")
+
+    def load(self):
+        import torch
+        import torchvision
+
+        model = torchvision.models.get_model(
+            self.name, weights="DEFAULT" if self.pretrained else None
+        )
+        if hasattr(model, "fc"):
+            model.fc = torch.nn.Identity()
+        else:
+            model.heads = torch.nn.Identity()
+        self.model = self._to_device(model)
+
+    def forward(self, batch):
+        return self._run(self.model, batch)
+
+
+class ImageFolderLoader:
+    """Batches of preprocessed images, decoded on ``workers`` threads ``prefetch`` batches ahead.
+
+    Iterating yields ``(paths, batch)`` with ``batch`` an ``(n, *shape)`` float32
+    array; ``transform(image, out)`` fills one row from a BGR image. Unreadable
+    files are left out of their batch and listed in ``failed``. ``wait_ms``
+    records how long each batch kept the consumer waiting: near zero when
+    loading keeps up with inference.
+    """
+
+    def __init__(self, paths, batch_size, transform, shape, workers=4, prefetch=2):
+        self.paths = list(paths)
+        self.batch_size = batch_size
+        self.transform = transform
+        self.shape = tuple(shape)
+        self.workers = workers
+        self.prefetch = prefetch
+        self.failed = []
+        self.wait_ms = []
+
+    def __len__(self):
+        return -(-len(self.paths) // self.batch_size)
+
+    def _load(self, paths):
+        batch = np.empty((len(paths), *self.shape), dtype=np.float32)
+        kept = []
+        for path in paths:
+            image = cv2.imread(str(path))
+            if image is None:
+                self.failed.append(path)
+                continue
+            self.transform(image, batch[len(kept)])
+            kept.append(path)
+        return kept, batch[: len(kept)]
+
+    def __iter__(self):
+        chunks = (
+            self.paths[i : i + self.batch_size] for i in range(0, len(self.paths), self.batch_size)
+        )
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="load") as pool:
+            pending = deque(
+                pool.submit(self._load, c)
+                for _, c in zip(range(self.workers + self.prefetch), chunks)
+            )
+            while pending:
+                t0 = time.perf_counter()
+                paths, batch = pending.popleft().result()
+                self.wait_ms.append((time.perf_counter() - t0) * 1000)
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append(pool.submit(self._load, chunk))
+                if paths:
+                    yield paths, batch
+
+
+class FeatureStore:
+    """Write ``(count, dim)`` features batch by batch into a memory-mapped ``.npy`` file.
+
+    ``dtype`` is the storage precision (float16 halves disk and page-cache use at
+    no measurable cost to cosine ranking). Image paths go to ``<name>.txt``. If
+    fewer than ``count`` rows were written (unreadable images), :meth:`close`
+    shrinks the file to the rows written.
+    """
+
+    def __init__(self, path, count, dim, dtype="float16"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._tmp = self.path.with_suffix(f".{os.getpid()}.tmp.npy")
+        self.array = np.lib.format.open_memmap(
+            self._tmp, mode="w+", dtype=dtype, shape=(count, dim)
+        )
+        self.paths = []
+        self.rows = 0
+
+    def append(self, features, paths):
+        n = len(features)
+        self.array[self.rows : self.rows + n] = features
+        self.paths += [str(p) for p in paths]
+        self.rows += n
+
+    def close(self):
+        """Flush, trim to the rows written and move the file into place."""
+        self.array.flush()
+        if self.rows < len(self.array):
+            trimmed = np.lib.format.open_memmap(
+                self.path, mode="w+", dtype=self.dtype, shape=(self.rows, self.dim)
+            )
+            trimmed[:] = self.array[: self.rows]
+            trimmed.flush()
+            del trimmed
+            self.array = None
+            os.remove(self._tmp)
+        else:
+            self.array = None
+            os.replace(self._tmp, self.path)
+        self.path.with_suffix(".txt").write_text("\n".join(self.paths) + "\n")
+        return self.path
+
+    @property
+    def nbytes(self):
+        return self.rows * self.dim * self.dtype.itemsize
+
+
+def load_features(path):
+    """``(features, paths)``: a feature file memory-mapped read-only, and its image paths."""
+    path = Path(path)
+    sidecar = path.with_suffix(".txt")
+    paths = sidecar.read_text().splitlines() if sidecar.exists() else None
+    return np.load(path, mmap_mode="r"), paths
@@ -0,0 +1,489 @@
+"""Fast detection accuracy from cached predictions and a vectorized mAP matcher.
+
+``model.val()`` re-runs inference on every call, so trying another confidence
+threshold costs a full pass over the dataset. Here inference runs once per
+(model, backend, dataset, imgsz) at a permissive confidence, and the raw
+detections are cached as compact columnar arrays:
+
+    <root>/<key>/offsets.npy   # int64, image i owns rows offsets[i]:offsets[i + 1]
+    <root>/<key>/boxes.npy     # float32 (N, 4) xyxy in original image pixels
+    <root>/<key>/scores.npy    # float32 (N,)
+    <root>/<key>/classes.npy   # int16 (N,)
+    <root>/<key>/meta.json     # key fields, written last (marks the entry complete)
+
+Arrays are opened with ``mmap_mode="r"``, so loading a COCO-sized cache is
+instant. :func:`evaluate` matches every prediction of every image with NumPy
+operations over the whole dataset (no per-image Python loop), and because a
+match never depends on lower-scoring predictions, :func:`sweep_thresholds`
+matches once and re-scores each confidence threshold as a mask:
+
+- predictions and labels are paired only within the same (image, class) group
+- matching is the COCO greedy rule at each IoU threshold 0.50:0.95 (highest
+  score first, each claiming its best unclaimed label), the rule ultralytics uses
+- AP is the COCO 101-point interpolated precision, averaged over the classes
+  present in the ground truth; precision and recall are macro averages at IoU 0.5
+  over the predictions kept at the evaluated threshold
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from utils.corpus import IMAGE_SUFFIXES
+from utils.export_cache import exporter_versions, weights_sha256
+
+DEFAULT_ROOT = Path(
+    os.environ.get(
+        "VISION_BENCH_PREDICTION_CACHE",
+        Path.home() / ".cache" / "vision-benchmarks" / "predictions",
+    )
+)
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+RECALL_POINTS = np.linspace(0.0, 1.0, 101)
+
+# Inference settings for the cached predictions (those of ultralytics val)
+CACHE_CONF = 0.001
+CACHE_IOU = 0.7
+MAX_DET = 300
+
+DEFAULT_SWEEP = (0.001, 0.05, 0.1, 0.25, 0.4, 0.5, 0.6)
+
+
+@dataclass
+class Detections:
+    """Boxes, scores and classes of a whole dataset, grouped by image.
+
+    Ground truth uses the same layout with every score set to 1.
+    """
+
+    offsets: np.ndarray
+    boxes: np.ndarray
+    scores: np.ndarray
+    classes: np.ndarray
+
+    FIELDS = ("offsets", "boxes", "scores", "classes")
+
+    @classmethod
+    def from_arrays(cls, per_image):
+        """Build from one ``(N, 6)`` ``[x1, y1, x2, y2, conf, cls]`` array per image."""
+        per_image = [np.asarray(a, dtype=np.float32).reshape(-1, 6) for a in per_image]
+        counts = [len(a) for a in per_image]
+        rows = np.concatenate(per_image) if per_image else np.zeros((0, 6), np.float32)
+        return cls(
+            offsets=np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int64),
+            boxes=np.ascontiguousarray(rows[:, :4]),
+            scores=np.ascontiguousarray(rows[:, 4]),
+            classes=rows[:, 5].astype(np.int16),
+        )
+
+    @property
+    def num_images(self):
+        return len(self.offsets) - 1
+
+    @property
+    def image_ids(self):
+        """Image index of every row."""
+        return np.repeat(np.arange(self.num_images), np.diff(self.offsets))
+
+    def __len__(self):
+        return len(self.scores)
+
+    def image(self, i):
+        """``(boxes, scores, classes)`` of image ``i``."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.boxes[lo:hi], self.scores[lo:hi], self.classes[lo:hi]
+
+    def _subset(self, mask):
+        counts = np.bincount(self.image_ids[mask], minlength=self.num_images)
+        return Detections(
+            offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            boxes=self.boxes[mask],
+            scores=self.scores[mask],
+            classes=self.classes[mask],
+        )
+
+    def filter(self, conf=None, max_det=None):
+        """Keep rows scoring at least ``conf``, then the top ``max_det`` per image."""
+        out = self
+        if conf is not None:
+            out = out._subset(out.scores >= conf)
+        if max_det is not None:
+            ids = out.image_ids
+            # Rank of every row within its image by descending score
+            order = np.lexsort((-out.scores, ids))
+            rank = np.empty(len(out), dtype=np.int64)
+            rank[order] = np.arange(len(out)) - out.offsets[ids[order]]
+            out = out._subset(rank < max_det)
+        return out
+
+    def save(self, directory, meta=None):
+        """Write the arrays (and ``meta.json`` last) to ``directory`` atomically."""
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=directory.parent, suffix=".tmp"))
+        try:
+            for name in self.FIELDS:
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+            (tmp / "meta.json").write_text(json.dumps(meta or {}, default=str))
+            tmp.chmod(0o755)
+            try:
+                os.replace(tmp, directory)
+            except OSError:
+                if not (directory / "meta.json").exists():
+                    raise  # otherwise another process cached the same entry first
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        return cls(*(np.load(directory / f"{name}.npy", mmap_mode=mode) for name in cls.FIELDS))
+
+
+def box_iou_pairs(a, b, eps=1e-9):
+    """IoU of ``a[i]`` with ``b[i]`` for two ``(N, 4)`` xyxy arrays."""
+    lt = np.maximum(a[:, :2], b[:, :2])
+    rb = np.minimum(a[:, 2:], b[:, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=1)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a + area_b - inter + eps)
+
+
+def candidate_pairs(pred, gt):
+    """Indices ``(p, g)`` of every prediction/label pair in the same image and class."""
+    num_classes = int(max(pred.classes.max(initial=-1), gt.classes.max(initial=-1))) + 1
+    pred_key = pred.image_ids * num_classes + pred.classes
+    gt_key = gt.image_ids * num_classes + gt.classes
+    gt_order = np.argsort(gt_key, kind="stable")
+    gt_key = gt_key[gt_order]
+    start = np.searchsorted(gt_key, pred_key, side="left")
+    count = np.searchsorted(gt_key, pred_key, side="right") - start
+    p = np.repeat(np.arange(len(pred)), count)
+    within = np.arange(len(p)) - np.repeat(np.cumsum(count) - count, count)
+    g = gt_order[np.repeat(start, count) + within]
+    return p, g
+
+
+def _group_rank(pred):
+    """Rank of every prediction among those of its (image, class), by descending score."""
+    num_classes = int(pred.classes.max(initial=-1)) + 1
+    key = pred.image_ids * num_classes + pred.classes
+    order = np.lexsort((-pred.scores, key))
+    key = key[order]
+    rank = np.empty(len(pred), dtype=np.int64)
+    rank[order] = np.arange(len(pred)) - np.searchsorted(key, key, side="left")
+    return rank
+
+
+def match_detections(pred, gt, iou_thresholds=IOU_THRESHOLDS):
+    """Boolean ``(len(pred), len(iou_thresholds))`` true-positive matrix.
+
+    COCO rule: in descending score order, each prediction claims the unclaimed
+    label of its image and class with the highest IoU, if that IoU reaches the
+    threshold. Predictions of different (image, class) groups never compete, so
+    the k-th ranked predictions of all groups are matched together and the only
+    Python loop is over ranks. A prediction's match depends only on higher-scoring
+    ones, so dropping low scores (a confidence threshold or ``max_det``) never
+    changes the remaining rows.
+    """
+    thresholds = np.asarray(iou_thresholds)
+    tp = np.zeros((len(pred), len(thresholds)), dtype=bool)
+    p, g = candidate_pairs(pred, gt)
+    if not len(p):
+        return tp
+    iou = box_iou_pairs(pred.boxes[p], gt.boxes[g])
+    rank = _group_rank(pred)[p]
+    order = np.lexsort((-iou, p, rank))  # by rank, then prediction, then IoU descending
+    p, g, iou, rank = p[order], g[order], iou[order], rank[order]
+    hit = iou[:, None] >= thresholds
+    claimed = np.zeros((len(gt), len(thresholds)), dtype=bool)
+    rows = np.arange(len(p))[:, None]
+    bounds = np.searchsorted(rank, np.arange(rank[-1] + 2))
+    for lo, hi in zip(bounds[:-1], bounds[1:], strict=True):
+        if lo == hi:
+            continue
+        pk = p[lo:hi]
+        valid = hit[lo:hi] & ~claimed[g[lo:hi]]
+        starts = np.flatnonzero(np.r_[True, pk[1:] != pk[:-1]])
+        # Best (first) still-valid pair of every prediction, per threshold
+        first = np.minimum.reduceat(np.where(valid, rows[lo:hi], len(p)), starts, axis=0)
+        found, t = np.nonzero(first < len(p))
+        best = first[found, t]
+        tp[p[best], t] = True
+        claimed[g[best], t] = True
+    return tp
+
+
+def average_precision(tp, scores, pred_classes, gt_classes):
+    """COCO 101-point AP per ground-truth class and IoU threshold.
+
+    Returns ``(classes, ap)`` with ``ap`` of shape ``(len(classes), tp.shape[1])``.
+    All classes are processed together: rows are sorted by (class, -score) and
+    the per-class cumulative sums, precision envelopes and recall lookups are done
+    on the flat arrays with per-class offsets.
+    """
+    classes, num_gt = np.unique(np.asarray(gt_classes), return_counts=True)
+    num_classes, num_thresholds = len(classes), tp.shape[1]
+    ap = np.zeros((num_classes, num_thresholds))
+    keep = np.isin(pred_classes, classes)
+    if not num_classes or not keep.any():
+        return classes, ap
+
+    c = np.searchsorted(classes, np.asarray(pred_classes)[keep])
+    order = np.lexsort((-np.asarray(scores)[keep], c))
+    hits, c = tp[keep][order].astype(np.float64), c[order]
+
+    start = np.searchsorted(c, c, side="left")  # first row of each row's class
+    end = np.searchsorted(c, np.arange(num_classes), side="right")
+    cum = np.cumsum(hits, axis=0)
+    cum -= np.where((start > 0)[:, None], cum[np.maximum(start - 1, 0)], 0)
+    rank = (np.arange(len(c)) - start + 1)[:, None]
+    recall = cum / num_gt[c][:, None]
+    precision = cum / rank
+
+    # Precision envelope (max precision at this or any lower score of the same
+    # class): a reversed running max, with a per-class offset larger than any
+    # precision so one class never leaks into the next
+    offset = 2.0 * (num_classes - c)[:, None]
+    envelope = np.maximum.accumulate((precision + offset)[::-1], axis=0)[::-1] - offset
+
+    # Interpolated precision at each recall point: envelope at the first row of
+    # the class whose recall reaches it (0 if the class never gets there)
+    queries = (2.0 * np.arange(num_classes)[:, None] + RECALL_POINTS).ravel()
+    limit = np.repeat(end, len(RECALL_POINTS))
+    for t in range(num_thresholds):
+        idx = np.searchsorted(2.0 * c + recall[:, t], queries, side="left")
+        found = idx < limit
+        interp = np.where(found, envelope[np.minimum(idx, len(c) - 1), t], 0.0)
+        ap[:, t] = interp.reshape(num_classes, -1).mean(axis=1)
+    return classes, ap
+
+
+def _score(tp, pred, gt_classes, conf):
+    classes, ap = average_precision(tp, pred.scores, pred.classes, gt_classes)
+    if not len(classes):
+        raise ValueError("Ground truth has no labels")
+
+    # Macro precision/recall at IoU 0.5 over the ground-truth classes
+    num_gt = np.bincount(np.searchsorted(classes, gt_classes), minlength=len(classes))
+    known = np.isin(pred.classes, classes)
+    c = np.searchsorted(classes, pred.classes[known])
+    num_pred = np.bincount(c, minlength=len(classes))
+    num_tp = np.bincount(c, weights=tp[known, 0], minlength=len(classes))
+    precision = float(
+        np.divide(num_tp, num_pred, out=np.zeros(len(classes)), where=num_pred > 0).mean()
+    )
+    recall = float((num_tp / num_gt).mean())
+    return {
+        "conf": conf,
+        "map50": float(ap[:, 0].mean()),
+        "map5095": float(ap.mean()),
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "detections_per_image": len(pred) / max(pred.num_images, 1),
+        "ap_per_class": {int(k): float(v) for k, v in zip(classes, ap.mean(axis=1), strict=True)},
+    }
+
+
+def _check_images(predictions, ground_truth):
+    if predictions.num_images != ground_truth.num_images:
+        raise ValueError(
+            f"{predictions.num_images} images of predictions for "
+            f"{ground_truth.num_images} images of labels"
+        )
+
+
+def evaluate(predictions, ground_truth, conf=CACHE_CONF, max_det=MAX_DET):
+    """mAP@50, mAP@50-95, precision, recall and F1 of ``predictions`` at ``conf``."""
+    _check_images(predictions, ground_truth)
+    pred = predictions.filter(conf=conf, max_det=max_det)
+    return _score(match_detections(pred, ground_truth), pred, ground_truth.classes, conf)
+
+
+def sweep_thresholds(predictions, ground_truth, confs=DEFAULT_SWEEP, max_det=MAX_DET):
+    """:func:`evaluate` at every confidence in ``confs``; one row per threshold.
+
+    Matching runs once at the lowest threshold; every other threshold reuses the
+    true-positive rows of the predictions it keeps.
+    """
+    _check_images(predictions, ground_truth)
+    confs = sorted(confs)
+    pred = predictions.filter(conf=confs[0], max_det=max_det)
+    tp = match_detections(pred, ground_truth)
+    rows = []
+    for conf in confs:
+        keep = pred.scores >= conf
+        row = _score(tp[keep], pred._subset(keep), ground_truth.classes, conf)
+        row.pop("ap_per_class")
+        rows.append(row)
+    return rows
+
+
+def detection_f1(predictions, reference, iou=0.5):
+    """Precision, recall and F1 of per-frame detections against a reference run.
+
+    Both are lists of ``(N, 6)`` ``[x1, y1, x2, y2, conf, cls]`` arrays, one per
+    frame. A prediction matches a reference box of the same frame and class with
+    IoU of at least ``iou``; 1.0 everywhere means no drift.
+    """
+    if len(predictions) != len(reference):
+        raise ValueError(f"{len(predictions)} frames of predictions for {len(reference)}")
+    pred = Detections.from_arrays(predictions)
+    ref = Detections.from_arrays(reference)
+    hits = int(match_detections(pred, ref, [iou])[:, 0].sum())
+    precision = hits / len(pred) if len(pred) else float(not len(ref))
+    recall = hits / len(ref) if len(ref) else float(not len(pred))
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def operating_point(rows):
+    """Sweep row with the best F1 (the usual deployment threshold)."""
+    return max(rows, key=lambda r: r["f1"]) if rows else None
+
+
+# --- Datasets -----------------------------------------------------------------
+
+
+def list_images(source):
+    """Image paths from a directory, a ``.txt`` list, or a list of either."""
+    if isinstance(source, list | tuple):
+        return [p for s in source for p in list_images(s)]
+    source = Path(source)
+    if source.is_dir():
+        return sorted(p for p in source.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    if source.suffix == ".txt":
+        lines = (line.strip() for line in source.read_text().splitlines())
+        return [(source.parent / line).resolve() for line in lines if line]
+    raise FileNotFoundError(f"No images at {source}")
+
+
+def read_labels(label_path, width, height):
+    """YOLO txt labels (normalized xywh or polygons) as ``(N, 6)`` pixel xyxy rows."""
+    rows = []
+    path = Path(label_path)
+    lines = path.read_text().splitlines() if path.exists() else []
+    for line in lines:
+        values = [float(v) for v in line.split()]
+        if len(values) < 5:
+            continue
+        cls, coords = values[0], np.array(values[1:])
+        if len(coords) == 4:
+            x, y, w, h = coords
+            box = [x - w / 2, y - h / 2, x + w / 2, y + h / 2]
+        else:  # segment polygon: its bounding box
+            xs, ys = coords[0::2], coords[1::2]
+            box = [xs.min(), ys.min(), xs.max(), ys.max()]
+        rows.append([box[0] * width, box[1] * height, box[2] * width, box[3] * height, 1, cls])
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+def load_dataset(data, split="val"):
+    """Resolve an ultralytics dataset yaml into ``(image_paths, labels, class_names)``."""
+    from PIL import Image
+    from ultralytics.data.utils import check_det_dataset, img2label_paths
+
+    info = check_det_dataset(data)
+    if split not in info:
+        raise ValueError(f"Dataset {data} has no {split!r} split")
+    images = list_images(info[split])
+    if not images:
+        raise ValueError(f"Dataset {data} has no images in its {split!r} split")
+    labels = []
+    for image, label in zip(images, img2label_paths([str(p) for p in images]), strict=True):
+        with Image.open(image) as im:  # header only, no decode
+            width, height = im.size
+        labels.append(read_labels(label, width, height))
+    return images, Detections.from_arrays(labels), info["names"]
+
+
+# --- Prediction cache -----------------------------------------------------------
+
+
+def images_fingerprint(images):
+    """SHA256 over the path, size and mtime of every image."""
+    digest = hashlib.sha256()
+    for path in images:
+        st = Path(path).stat()
+        digest.update(f"{Path(path).resolve()}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def prediction_key(model_path, images, backend="pytorch", imgsz=640, half=False, options=None):
+    """Return ``(key, fields)`` identifying the cached predictions of one setup."""
+    fields = {
+        "weights": weights_sha256(model_path),
+        "model": Path(str(model_path)).name,
+        "backend": backend,
+        "imgsz": imgsz,
+        "half": half,
+        "options": options or {},
+        "conf": CACHE_CONF,
+        "iou": CACHE_IOU,
+        "images": images_fingerprint(images),
+        "num_images": len(images),
+        "versions": exporter_versions(),
+    }
+    key = hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+    return key[:24], fields
+
+
+def predict_dataset(
+    model_path,
+    images,
+    backend="pytorch",
+    imgsz=640,
+    device="cpu",
+    half=False,
+    root=DEFAULT_ROOT,
+    refresh=False,
+    **options,
+):
+    """Predictions of ``model_path`` for every image, from the cache when available.
+
+    Returns ``(detections, key, cached)``. On a miss, inference runs once through
+    the ``backend`` runtime (see ``utils.backends``) at ``CACHE_CONF``/``CACHE_IOU``,
+    so every later threshold is a filter over the cached rows.
+    """
+    import cv2
+
+    from utils.backends import get_backend
+
+    key, fields = prediction_key(model_path, images, backend, imgsz, half, options)
+    directory = Path(root).expanduser() / key
+    if (directory / "meta.json").exists() and not refresh:
+        return Detections.load(directory), key, True
+    if refresh:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    runtime = get_backend(backend)(
+        model_path,
+        device=device,
+        imgsz=imgsz,
+        half=half,
+        conf=CACHE_CONF,
+        iou=CACHE_IOU,
+        **options,
+    )
+    per_image = []
+    with runtime:
+        for i, path in enumerate(images):
+            frame = cv2.imread(str(path))
+            if frame is None:
+                raise OSError(f"Cannot read image {path}")
+            per_image.append(runtime.infer([frame])[0])
+            if (i + 1) % 500 == 0:
+                print(f"  Predicted {i + 1}/{len(images)} images")
+    detections = Detections.from_arrays(per_image)
+    detections.save(directory, meta=fields)
+    return Detections.load(directory), key, False
@@ -0,0 +1,337 @@
+"""Content-addressed cache for exported model artifacts (ONNX, TorchScript, TensorRT).
+
+Artifacts are keyed on everything that changes the exported file: the SHA256 of
+the weights, the format, precision, imgsz, batch/dynamic settings and the
+versions of the exporting libraries; TensorRT engines also key on the GPU they
+were built for. A stale engine built for another imgsz, TensorRT version or GPU
+architecture therefore never gets reused.
+
+Layout::
+
+    <root>/<key>/model.<ext>    # the artifact
+    <root>/<key>/meta.json      # key fields, size, last_used
+    <root>/<key>.lock           # flock held while using / exporting / evicting
+
+Exports run in a private temp directory and are moved into place with
+``os.replace``, and an exclusive ``flock`` per key stops parallel workers from
+exporting the same artifact twice. Entries are evicted least-recently-used
+first once the cache exceeds its size budget, never the entry just exported.
+"""
+
+import fcntl
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from importlib import metadata
+from pathlib import Path
+
+DEFAULT_ROOT = Path(
+    os.environ.get(
+        "VISION_BENCH_EXPORT_CACHE", Path.home() / ".cache" / "vision-benchmarks" / "exports"
+    )
+)
+DEFAULT_MAX_BYTES = 20 * 1024**3
+
+SUFFIXES = {"onnx": ".onnx", "torchscript": ".torchscript", "engine": ".engine"}
+EXPORTER_PACKAGES = ("ultralytics", "torch", "onnx", "onnxslim", "onnxruntime", "tensorrt")
+
+
+@functools.cache
+def _file_sha256(path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def weights_sha256(model_path):
+    """SHA256 of the weights file, memoized on (path, mtime, size).
+
+    Names that are not local files (e.g. ``yolo11n.yaml`` resolved by ultralytics)
+    are hashed by name.
+    """
+    path = Path(model_path)
+    if not path.is_file():
+        return hashlib.sha256(str(model_path).encode()).hexdigest()
+    st = path.stat()
+    return _file_sha256(str(path.resolve()), st.st_mtime_ns, st.st_size)
+
+
+def exporter_versions():
+    """Versions of every library that influences the exported artifact."""
+    versions = {}
+    for name in EXPORTER_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            continue
+    return versions
+
+
+@functools.cache
+def gpu_identity(device=0):
+    """Name and compute capability of CUDA ``device`` (an index, ``"cuda:N"`` or ``"N"``).
+
+    TensorRT engines only run on the GPU architecture they were built for. ``None``
+    without a CUDA device.
+    """
+    index = str(device).rpartition(":")[2]
+    index = int(index) if index.isdigit() else 0
+    try:
+        import torch
+    except ImportError:
+        return None
+    if not torch.cuda.is_available():
+        return None
+    major, minor = torch.cuda.get_device_capability(index)
+    return f"{torch.cuda.get_device_name(index)} (sm_{major}{minor})"
+
+
+def cache_key(model_path, fmt, imgsz=640, batch=1, dynamic=False, half=False, device=0):
+    """Return ``(key, fields)`` for an export request.
+
+    ``device`` only enters the key of TensorRT engines, through :func:`gpu_identity`.
+    """
+    if fmt not in SUFFIXES:
+        raise ValueError(f"Unsupported export format {fmt!r}, expected one of {sorted(SUFFIXES)}")
+    fields = {
+        "weights_sha256": weights_sha256(model_path),
+        "format": fmt,
+        "precision": "fp16" if half else "fp32",
+        "imgsz": imgsz,
+        "batch": None if dynamic else batch,
+        "dynamic": dynamic,
+        "versions": exporter_versions(),
+    }
+    if fmt == "engine":
+        fields["gpu"] = gpu_identity(device)
+    key = hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()[:24]
+    return key, fields
+
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _locked(path, blocking=True):
+    """Hold an exclusive ``flock`` on ``path``. Yields False if non-blocking and busy.
+
+    Eviction unlinks lock files while holding them, so a waiter that opened the
+    old file retries once it gets the lock: otherwise it would share the key with
+    a process locking the newly created file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        with open(path, "a") as fd:
+            flags = fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB)
+            try:
+                fcntl.flock(fd, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                if os.fstat(fd.fileno()).st_ino != _inode(path):
+                    continue
+                yield True
+                return
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _write_json_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class ExportCache:
+    """LRU, size-bounded, multi-process safe cache of exported artifacts."""
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root).expanduser().resolve()
+        self.max_bytes = max_bytes
+
+    def _entry(self, key, fmt):
+        return self.root / key / f"model{SUFFIXES[fmt]}"
+
+    def _lock(self, key):
+        return self.root / f"{key}.lock"
+
+    def lookup(self, model_path, fmt, imgsz=640, batch=1, dynamic=False, half=False, device=0):
+        """Return the cached artifact path or ``None``, marking the entry as used."""
+        key, _ = cache_key(model_path, fmt, imgsz, batch, dynamic, half, device)
+        artifact = self._entry(key, fmt)
+        if not artifact.exists():
+            return None
+        # Under the key lock, so a concurrent evict() cannot delete it between check and touch
+        with _locked(self._lock(key)):
+            if not artifact.exists():
+                return None
+            self._touch(key)
+        return str(artifact)
+
+    def get_or_export(
+        self, model_path, fmt, imgsz=640, batch=1, dynamic=False, half=False, device="cpu"
+    ):
+        """Return a cached artifact, exporting it first if needed."""
+        key, fields = cache_key(model_path, fmt, imgsz, batch, dynamic, half, device)
+        artifact = self._entry(key, fmt)
+        with _locked(self._lock(key)):
+            # Checked under the lock: another worker may be exporting or evicting this key
+            if artifact.exists():
+                self._touch(key)
+                return str(artifact)
+            print(f"  Exporting {model_path} to {fmt} (imgsz={imgsz}, batch={batch}, key={key})...")
+            t0 = time.perf_counter()
+            self.root.mkdir(parents=True, exist_ok=True)
+            workdir = Path(tempfile.mkdtemp(dir=self.root, prefix=".export-"))
+            try:
+                exported = self._export(
+                    workdir, model_path, fmt, imgsz, batch, dynamic, half, device
+                )
+                artifact.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(exported, artifact)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            meta = {
+                **fields,
+                "source": str(model_path),
+                "size": artifact.stat().st_size,
+                "export_seconds": round(time.perf_counter() - t0, 3),
+                "created": time.time(),
+                "last_used": time.time(),
+            }
+            _write_json_atomic(artifact.parent / "meta.json", meta)
+
+        self.evict(keep=(key,))
+        return str(artifact)
+
+    @staticmethod
+    def _export(workdir, model_path, fmt, imgsz, batch, dynamic, half, device):
+        """Export inside ``workdir`` so concurrent exports never share output paths."""
+        from ultralytics import YOLO
+
+        source = Path(model_path)
+        if source.is_file():
+            # ultralytics writes the export next to the weights, so export from a private copy
+            local = workdir / source.name
+            try:
+                os.link(source, local)
+            except OSError:
+                shutil.copy2(source, local)
+            source = local
+        cwd = os.getcwd()
+        try:
+            os.chdir(workdir)  # non-file sources (e.g. yaml configs) export into cwd
+            path = YOLO(str(source)).export(
+                format=fmt, imgsz=imgsz, batch=batch, dynamic=dynamic, half=half, device=device
+            )
+        finally:
+            os.chdir(cwd)
+        return str(Path(workdir, path))
+
+    def _touch(self, key):
+        meta_path = self.root / key / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return
+        meta["last_used"] = time.time()
+        _write_json_atomic(meta_path, meta)
+
+    def entries(self):
+        """List of entry metadata dicts (with ``key``), least recently used first."""
+        out = []
+        if not self.root.exists():
+            return out
+        for meta_path in self.root.glob("*/meta.json"):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            meta["key"] = meta_path.parent.name
+            out.append(meta)
+        return sorted(out, key=lambda m: m.get("last_used", 0))
+
+    def size(self):
+        return sum(m.get("size", 0) for m in self.entries())
+
+    def evict(self, max_bytes=None, keep=()):
+        """Delete least-recently-used entries until the cache fits ``max_bytes``.
+
+        Entries in ``keep`` (e.g. the one just exported) and entries currently
+        locked by another process (being exported or used) are skipped.
+        Returns the list of evicted keys.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(m.get("size", 0) for m in entries)
+        evicted = []
+        for meta in entries:
+            if total <= budget:
+                break
+            key = meta["key"]
+            if key in keep:
+                continue
+            with _locked(self._lock(key), blocking=False) as acquired:
+                if not acquired:
+                    continue
+                shutil.rmtree(self.root / key, ignore_errors=True)
+                self._lock(key).unlink(missing_ok=True)
+            total -= meta.get("size", 0)
+            evicted.append(key)
+        return evicted
+
+
+@functools.cache
+def default_cache():
+    """Process-wide cache at :data:`DEFAULT_ROOT`."""
+    return ExportCache()
+
+
+def _export_worker(root, max_bytes, request):
+    return ExportCache(root, max_bytes).get_or_export(**request)
+
+
+def export_many(requests, cache=None, max_workers=None):
+    """Export many artifacts concurrently in a process pool.
+
+    ``requests`` is a list of ``get_or_export`` keyword dicts. Returns a list of
+    ``(request, path_or_exception)`` in completion order. Already-cached entries
+    are resolved in-process without spawning work.
+    """
+    cache = cache or default_cache()
+    results, pending = [], []
+    for request in requests:
+        path = cache.lookup(**request)
+        if path:
+            results.append((request, path))
+        else:
+            pending.append(request)
+    if not pending:
+        return results
+
+    workers = max_workers or min(len(pending), os.cpu_count() or 1)
+    # spawn: forking a parent that already initialized torch thread pools can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(_export_worker, cache.root, cache.max_bytes, r): r for r in pending}
+        for future in as_completed(futures):
+            try:
+                results.append((futures[future], future.result()))
+            except Exception as e:
+                results.append((futures[future], e))
+    return results
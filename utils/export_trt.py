@@ -1,21 +1,24 @@
 import argparse
+import sys
+from pathlib import Path
 
-from ultralytics import YOLO
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.export_cache import default_cache
 
 
 def export_to_tensorrt(model_path, fp16=True):
     """
     Export a YOLO model to TensorRT engine format.
+
+    Engines are stored in the shared export cache, keyed on the weights hash,
+    precision and TensorRT version, so a stale engine is never reused.
     """
     print(f"Loading model: {model_path}")
     try:
-        model = YOLO(model_path)
-
         print(f"Starting TensorRT export (FP16={fp16})...")
-        # Export the model
         # dynamic=True often helps with varying batch sizes, but for fixed benchmarks static is fine.
-        # simple=True is default for benchmarks.
-        path = model.export(format="engine", half=fp16, device=0, verbose=True)
+        path = default_cache().get_or_export(model_path, "engine", half=fp16, device=0)
 
         print(f"Export successful: {path}")
         return path
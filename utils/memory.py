@@ -0,0 +1,193 @@
+"""Process memory accounting for benchmark cells (CPU only, no GPU APIs).
+
+Node packing is bounded by resident memory, so every speed cell records:
+
+- RSS before and after ``load()``: the model's load delta
+- steady-state RSS: the median of one reading after every timed call
+- peak RSS over the cell: the kernel's high-water mark (``VmHWM``), reset at the
+  start of the cell where Linux allows it (``/proc/self/clear_refs``); elsewhere
+  it is the process-lifetime peak
+- RSS growth across the timed loop, to flag per-iteration leaks on long runs
+- the on-disk size of the weights or exported artifact
+
+:func:`trace_allocations` adds a tracemalloc pass: the Python allocation peak of
+each call and the source lines holding memory that outlives the calls. It runs
+after the timed loop because tracing slows every allocation.
+
+RSS readings come from ``/proc/self`` on Linux, falling back to psutil (an
+ultralytics dependency) elsewhere. In a process that benchmarks several cells, the
+first cell's load delta also includes framework imports; the sweep runner isolates
+every cell in its own process.
+"""
+
+import mmap
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+MB = 1024 * 1024
+
+# RSS growth across a timed loop above this is reported as a suspected leak
+LEAK_THRESHOLD = 4 * MB
+
+
+def rss_bytes():
+    """Current resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except OSError:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+
+
+def peak_rss_bytes():
+    """High-water RSS in bytes since the last :func:`reset_peak_rss` (or process start)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS mark. Returns ``False`` where that is not supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def artifact_bytes(path):
+    """Size on disk of a weights file or exported artifact (file or directory), or ``None``."""
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return None
+
+
+def rss_growth(samples):
+    """Leak indicators from per-iteration RSS readings.
+
+    Returns the growth between the medians of the first and last quarter of the
+    samples (robust to allocator noise) and the least-squares slope in bytes per
+    iteration.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.size < 4:
+        return 0.0, 0.0
+    quarter = samples.size // 4
+    growth = float(np.median(samples[-quarter:]) - np.median(samples[:quarter]))
+    slope = float(np.polyfit(np.arange(samples.size), samples, 1)[0])
+    return growth, slope
+
+
+class MemoryTracker:
+    """RSS bookkeeping for one cell: create before ``load()``, then call
+    :meth:`loaded` after it and :meth:`sample` after every timed call."""
+
+    def __init__(self):
+        self.peak_reset = reset_peak_rss()
+        self.before_load = rss_bytes()
+        self.after_load = self.before_load
+        self.samples = []
+
+    def loaded(self):
+        self.after_load = rss_bytes()
+
+    def sample(self):
+        self.samples.append(rss_bytes())
+
+    def summary(self, artifact=None):
+        """Memory metrics of the cell, in bytes."""
+        growth, slope = rss_growth(self.samples)
+        steady = float(np.median(self.samples)) if self.samples else float(self.after_load)
+        return {
+            "load_delta": self.after_load - self.before_load,
+            "steady_rss": steady,
+            "peak_rss": peak_rss_bytes(),
+            "peak_scope": "cell" if self.peak_reset else "process",
+            "rss_growth": growth,
+            "rss_growth_per_iter": slope,
+            "leak_suspect": growth > LEAK_THRESHOLD,
+            "artifact_bytes": artifact_bytes(artifact) if artifact else None,
+        }
+
+
+def format_memory(stats):
+    """One-line rendering of :meth:`MemoryTracker.summary` output."""
+    line = (
+        f"peak {stats['peak_rss'] / MB:.0f} MB | steady {stats['steady_rss'] / MB:.0f} MB | "
+        f"load +{stats['load_delta'] / MB:.0f} MB | growth {stats['rss_growth'] / MB:+.1f} MB"
+    )
+    if stats["artifact_bytes"] is not None:
+        line += f" | artifact {stats['artifact_bytes'] / MB:.1f} MB"
+    if stats["leak_suspect"]:
+        line += " | possible leak"
+    return line
+
+
+def _site(stat):
+    frame = stat.traceback[0]
+    path = Path(frame.filename)
+    return f"{path.parent.name}/{path.name}:{frame.lineno}"
+
+
+def trace_allocations(step, iterations=20, top=10):
+    """Run ``step()`` ``iterations`` times under tracemalloc.
+
+    Returns the mean and max Python allocation peak per call, the traced memory
+    still held at the end of the pass (per call) and the ``top`` source lines
+    holding it, the first place to look for a leak. One untraced call first keeps
+    one-time caches out of the figures.
+    """
+    step()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            step()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        retained = tracemalloc.get_traced_memory()[0] - start
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+    )
+    return {
+        "iterations": iterations,
+        "python_peak_per_call": float(np.mean(peaks)),
+        "python_peak_max": int(max(peaks)),
+        "python_retained_per_call": retained / iterations,
+        "sites": [
+            {"site": _site(s), "bytes": s.size, "count": s.count}
+            for s in snapshot.statistics("lineno")[:top]
+        ],
+    }
@@ -0,0 +1,132 @@
+"""Motion-gated inference: reuse detections while the scene does not change.
+
+Static cameras deliver long runs of nearly identical frames, and running the
+detector on each of them buys nothing. :class:`MotionGate` compares every frame
+with the last frame that went through inference, on a small grayscale thumbnail
+(an area-averaged downsample, so sensor noise mostly cancels out). The change
+is the share of thumbnail pixels whose brightness moved by more than
+``pixel_delta``. Below ``threshold`` the frame is skipped and the previous
+detections are reused; every ``refresh``-th consecutive skip runs inference
+anyway, so slow drifts (lighting, an object creeping in) are never missed for
+long.
+
+Comparing against the last *inferred* frame rather than the previous one means
+small per-frame changes still add up until they cross the threshold.
+
+:func:`gate_stages` puts a gate in front of pipeline stages (see
+``utils/pipeline.py``); ``utils.evaluation.detection_f1`` measures how far the
+reused detections drift from running full inference on every frame.
+"""
+
+import cv2
+import numpy as np
+
+# Thumbnail the frames are compared on (width, height): 16:9 at 1/20 of 1080p
+THUMBNAIL_SIZE = (96, 54)
+
+
+class MotionGate:
+    """Decides per frame whether inference has to run.
+
+    Args:
+        threshold: Share of thumbnail pixels that must change to run inference.
+        refresh: Run inference after this many consecutive skipped frames.
+        pixel_delta: Brightness change (0-255) for a thumbnail pixel to count as changed.
+        size: Thumbnail ``(width, height)``.
+    """
+
+    def __init__(self, threshold=0.003, refresh=30, pixel_delta=12, size=THUMBNAIL_SIZE):
+        if not 0 <= threshold <= 1:
+            raise ValueError(f"threshold must be in [0, 1], got {threshold}")
+        if refresh < 1:
+            raise ValueError(f"refresh must be at least 1, got {refresh}")
+        self.threshold = threshold
+        self.refresh = refresh
+        self.pixel_delta = pixel_delta
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        """Forget the reference frame and the counters."""
+        self.frames = 0
+        self.inferred = 0
+        self.forced = 0
+        self.changes = []
+        self._reference = None
+        self._skipped = 0
+
+    def thumbnail(self, frame):
+        """Grayscale ``int16`` thumbnail of a BGR or grayscale frame."""
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def change(self, thumb):
+        """Share of pixels of ``thumb`` that differ from the reference frame."""
+        if self._reference is None:
+            return 1.0
+        moved = np.abs(thumb - self._reference) > self.pixel_delta
+        return float(np.count_nonzero(moved)) / moved.size
+
+    def __call__(self, frame):
+        """Whether ``frame`` needs inference; updates the reference when it does."""
+        thumb = self.thumbnail(frame)
+        change = self.change(thumb)
+        self.frames += 1
+        self.changes.append(change)
+        run = change >= self.threshold or self._skipped >= self.refresh
+        if run:
+            if change < self.threshold:
+                self.forced += 1
+            self.inferred += 1
+            self._reference = thumb
+            self._skipped = 0
+        else:
+            self._skipped += 1
+        return run
+
+    @property
+    def skip_rate(self):
+        """Share of frames that reused earlier detections."""
+        return 1 - self.inferred / self.frames if self.frames else 0.0
+
+    def summary(self):
+        """Counters for a results record."""
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped": self.frames - self.inferred,
+            "forced_refreshes": self.forced,
+            "skip_rate": self.skip_rate,
+            "mean_change": float(np.mean(self.changes)) if self.changes else 0.0,
+        }
+
+
+def gate_stages(stages, gate):
+    """Put ``gate`` in front of pipeline ``stages``; skipped frames reuse the last result.
+
+    Only frames the gate passes go through the stages. A skipped frame's final
+    payload is that of the last frame that ran; stages process frames in stream
+    order, so that is the most recent inferred frame.
+    """
+    last = {}
+
+    def check(frame):
+        return frame, gate(frame)
+
+    def wrap(fn, final):
+        def stage(item):
+            payload, run = item
+            if run:
+                payload = fn(payload)
+            if not final:
+                return payload, run
+            if run:
+                last["payload"] = payload
+            return last["payload"]
+
+        return stage
+
+    gated = [(name, wrap(fn, i == len(stages) - 1)) for i, (name, fn) in enumerate(stages)]
+    return [("gate", check), *gated]
@@ -0,0 +1,319 @@
+"""Pipelined producer/consumer inference engine.
+
+Frame acquisition, preprocessing, inference and postprocessing run as separate
+stages on their own threads, connected by bounded queues. OpenCV decode and
+PyTorch inference both release the GIL, so the stages overlap in practice.
+
+The queue between the frame source and the first stage applies a frame policy:
+
+- ``block``: back-pressure the source, never drop (offline files, throughput runs)
+- ``drop_oldest``: when full, discard the oldest queued frame
+- ``latest``: keep only the newest frame (live cameras, lowest latency)
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+
+from utils.soak import Reservoir
+
+POLICIES = ("block", "drop_oldest", "latest")
+
+_STOP = object()
+
+
+class FrameQueue:
+    """Bounded FIFO queue with a configurable overflow policy."""
+
+    def __init__(self, maxsize=2, policy="block"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        self.maxsize = 1 if policy == "latest" else max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item, force=False):
+        """Enqueue ``item``. ``force`` always blocks instead of dropping (used for sentinels)."""
+        with self._cond:
+            if self.policy == "block" or force:
+                while len(self._items) >= self.maxsize:
+                    self._cond.wait()
+            else:
+                while len(self._items) >= self.maxsize and self._items[0] is not _STOP:
+                    self._items.popleft()
+                    self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self):
+        """Dequeue the oldest item, blocking until one is available."""
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+@dataclass
+class FramePacket:
+    """A frame travelling through the pipeline, with per-stage timings in ms."""
+
+    index: int
+    payload: object
+    t_capture: float
+    stage_ms: dict = field(default_factory=dict)
+    t_done: float = 0.0
+
+
+@dataclass
+class PipelineResult:
+    """Aggregate timings for one pipeline run."""
+
+    frames: int
+    dropped: int
+    wall_time: float
+    end_to_end_ms: list
+    stage_ms: dict
+    outputs: list
+
+    @property
+    def fps(self):
+        """Sustained throughput in processed frames per second."""
+        return self.frames / self.wall_time if self.wall_time > 0 else 0.0
+
+
+def open_source(source):
+    """Open any cv2-readable source. Digit strings are treated as camera indices."""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise OSError(f"Could not open video source {source!r}")
+    return cap
+
+
+def letterbox_into(frame, out, color=114):
+    """Resize ``frame`` keeping aspect ratio and pad it into the preallocated ``out`` buffer.
+
+    Returns ``(ratio, (pad_x, pad_y))`` needed to map boxes back to the original frame.
+    """
+    h, w = frame.shape[:2]
+    out_h, out_w = out.shape[:2]
+    ratio = min(out_h / h, out_w / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (out_w - new_w) // 2, (out_h - new_h) // 2
+
+    out[...] = color
+    region = out[pad_y : pad_y + new_h, pad_x : pad_x + new_w]
+    if (new_w, new_h) == (w, h):
+        region[...] = frame
+    else:
+        region[...] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return ratio, (pad_x, pad_y)
+
+
+class Preprocessor:
+    """Letterbox + BGR->RGB + normalize into a ring of preallocated buffers.
+
+    ``num_buffers`` must exceed the number of frames that can be in flight
+    downstream, otherwise a buffer would be overwritten while still in use.
+    """
+
+    def __init__(self, imgsz=640, num_buffers=8):
+        self.imgsz = imgsz
+        self._canvas = [np.empty((imgsz, imgsz, 3), dtype=np.uint8) for _ in range(num_buffers)]
+        self._tensors = [
+            np.empty((1, 3, imgsz, imgsz), dtype=np.float32) for _ in range(num_buffers)
+        ]
+        self._next = 0
+
+    def __call__(self, frame):
+        i = self._next
+        self._next = (i + 1) % len(self._canvas)
+        canvas, tensor = self._canvas[i], self._tensors[i]
+        ratio, pad = letterbox_into(frame, canvas)
+        # HWC BGR uint8 -> CHW RGB float32 in [0, 1], no intermediate allocations
+        np.multiply(canvas[..., ::-1].transpose(2, 0, 1), 1.0 / 255.0, out=tensor[0])
+        return {"tensor": tensor, "ratio": ratio, "pad": pad, "shape": frame.shape[:2]}
+
+
+def scale_boxes_back(xyxy, ratio, pad, shape):
+    """Map letterboxed ``xyxy`` boxes back to original frame coordinates."""
+    boxes = xyxy.astype(np.float32, copy=True)
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+    return boxes
+
+
+def make_yolo_stages(model, imgsz=640, device="cpu", num_buffers=8):
+    """Build (preprocess, inference, postprocess) stages around an ultralytics ``YOLO`` model.
+
+    Postprocess returns an ``(N, 6)`` array of ``[x1, y1, x2, y2, conf, cls]`` in
+    original frame coordinates.
+    """
+    import torch
+
+    preprocess = Preprocessor(imgsz=imgsz, num_buffers=num_buffers)
+
+    def infer(item):
+        tensor = torch.from_numpy(item["tensor"])
+        item["results"] = model(tensor, verbose=False, device=device)
+        return item
+
+    def postprocess(item):
+        boxes = item["results"][0].boxes
+        xyxy = scale_boxes_back(boxes.xyxy.cpu().numpy(), item["ratio"], item["pad"], item["shape"])
+        conf = boxes.conf.cpu().numpy()[:, None]
+        cls = boxes.cls.cpu().numpy()[:, None]
+        return np.concatenate([xyxy, conf, cls], axis=1)
+
+    return [("preprocess", preprocess), ("inference", infer), ("postprocess", postprocess)]
+
+
+class Pipeline:
+    """Run ``stages`` over frames read from ``cap``, one thread per stage.
+
+    Args:
+        cap: Object with a cv2-style ``read()`` returning ``(ok, frame)``. If it has a
+            ``last_timestamp`` (``time.perf_counter()`` arrival time of the frame just
+            read), end-to-end latency is measured from there.
+        stages: List of ``(name, fn)``; each ``fn`` maps the previous payload to the next.
+        queue_size: Capacity of every inter-stage queue.
+        policy: Frame policy for the source queue (see module docstring).
+        max_frames: Stop after reading this many frames (``None`` reads until EOF).
+        duration: Stop reading after this many seconds (soak runs on live sources).
+        keep_outputs: Keep the final payload of every frame in the result.
+        on_frame: Called with every finished :class:`FramePacket`, in the run thread.
+        sample_size: Keep a uniform sample of at most this many timings per stage
+            and end to end instead of one per frame (long runs).
+    """
+
+    def __init__(
+        self,
+        cap,
+        stages,
+        queue_size=2,
+        policy="block",
+        max_frames=None,
+        keep_outputs=False,
+        on_frame=None,
+        sample_size=None,
+        duration=None,
+    ):
+        self.cap = cap
+        self.stages = stages
+        self.max_frames = max_frames
+        self.duration = duration
+        self.keep_outputs = keep_outputs
+        self.on_frame = on_frame
+        self.queues = [FrameQueue(queue_size, policy)]
+        self.queues += [FrameQueue(queue_size, "block") for _ in stages]
+        self._samples = (lambda: Reservoir(sample_size)) if sample_size else list
+        self.stage_ms = {"capture": self._samples()}
+        self.stage_ms.update({name: self._samples() for name, _ in stages})
+        self._errors = []
+
+    @staticmethod
+    def max_in_flight(queue_size, num_stages):
+        """Upper bound on frames held by queues and stage threads at once."""
+        return (queue_size + 1) * (num_stages + 1) + 1
+
+    def _capture(self):
+        q = self.queues[0]
+        index = 0
+        deadline = time.perf_counter() + self.duration if self.duration else None
+        try:
+            while self.max_frames is None or index < self.max_frames:
+                t0 = time.perf_counter()
+                if deadline is not None and t0 >= deadline:
+                    break
+                ret, frame = self.cap.read()
+                t1 = time.perf_counter()
+                if not ret:
+                    break
+                # Sources that decode ahead report when the frame actually arrived
+                t_capture = getattr(self.cap, "last_timestamp", None) or t0
+                packet = FramePacket(index=index, payload=frame, t_capture=t_capture)
+                packet.stage_ms["capture"] = (t1 - t0) * 1000
+                q.put(packet)
+                index += 1
+        except Exception as e:  # surface in run() instead of hanging consumers
+            self._errors.append(e)
+        finally:
+            q.put(_STOP, force=True)
+
+    def _worker(self, name, fn, in_q, out_q):
+        while True:
+            packet = in_q.get()
+            if packet is _STOP:
+                out_q.put(_STOP, force=True)
+                return
+            try:
+                t0 = time.perf_counter()
+                packet.payload = fn(packet.payload)
+                packet.stage_ms[name] = (time.perf_counter() - t0) * 1000
+            except Exception as e:
+                self._errors.append(e)
+                continue
+            out_q.put(packet)
+
+    def run(self):
+        """Run until the source is exhausted and return a :class:`PipelineResult`."""
+        threads = [threading.Thread(target=self._capture, name="capture", daemon=True)]
+        for i, (name, fn) in enumerate(self.stages):
+            threads.append(
+                threading.Thread(
+                    target=self._worker,
+                    args=(name, fn, self.queues[i], self.queues[i + 1]),
+                    name=name,
+                    daemon=True,
+                )
+            )
+
+        end_to_end, outputs = self._samples(), []
+        t_start = time.perf_counter()
+        for t in threads:
+            t.start()
+
+        sink = self.queues[-1]
+        while True:
+            packet = sink.get()
+            if packet is _STOP:
+                break
+            packet.t_done = time.perf_counter()
+            end_to_end.append((packet.t_done - packet.t_capture) * 1000)
+            for name, ms in packet.stage_ms.items():
+                self.stage_ms[name].append(ms)
+            if self.keep_outputs:
+                outputs.append(packet.payload)
+            if self.on_frame is not None:
+                self.on_frame(packet)
+
+        wall = time.perf_counter() - t_start
+        for t in threads:
+            t.join()
+        if self._errors:
+            raise self._errors[0]
+
+        return PipelineResult(
+            frames=getattr(end_to_end, "seen", len(end_to_end)),
+            dropped=sum(q.dropped for q in self.queues),
+            wall_time=wall,
+            end_to_end_ms=end_to_end,
+            stage_ms=self.stage_ms,
+            outputs=outputs,
+        )
@@ -0,0 +1,225 @@
+"""Vectorized NumPy postprocessing of raw YOLO head outputs: decode and NMS.
+
+A drop-in for ultralytics' ``non_max_suppression`` that works on NumPy arrays and
+handles the whole batch at once instead of looping over images in torch:
+
+1. decode: the best class of every anchor across the batch (one ``max`` over the
+   class axis), the confidence filter, and ``xywh`` -> ``xyxy`` for the survivors
+   only, so the cost follows the candidate count rather than ``anchors x classes``
+2. top-k pre-filter: at most ``max_nms`` candidates per image, by confidence
+3. batched NMS: the greedy algorithm ultralytics and torchvision use, within
+   (image, class) groups, or per image when ``agnostic``. Overlapping pairs of
+   every group are found in one vectorized pass and the greedy rule is resolved
+   over those pairs (see :func:`batched_nms`), so there is no Python loop per
+   image, class or kept box
+4. per-image split, ordered by confidence and capped at ``max_det``
+
+Inputs are the export's head layouts: ``(B, 4 + nc, anchors)`` with ``xywh``
+boxes and class scores (YOLOv8/11/12, YOLO-World), or end-to-end
+``(B, max_det, 6)`` ``[x1, y1, x2, y2, conf, cls]`` rows (YOLO26), which only need
+the confidence filter. PyTorch head tensors are passed as ``tensor.numpy()``.
+
+``method="torchvision"`` runs step 3 through ``torchvision.ops.batched_nms``
+instead; ``method="ultralytics"`` calls ultralytics' own implementation. Both
+import torch, which the NumPy path avoids.
+"""
+
+import numpy as np
+
+NMS_METHODS = ("numpy", "torchvision", "ultralytics")
+
+# Candidate cap per image before NMS, as in ultralytics
+MAX_NMS = 30000
+
+# Candidate pairs NMS compares at once (about 8 bytes of temporaries per pair each)
+MAX_PAIRS = 1 << 21
+
+
+def xywh_to_xyxy(xywh):
+    """``(N, 4)`` center/size boxes as corner boxes."""
+    xyxy = np.empty_like(xywh)
+    half = xywh[:, 2:] / 2
+    xyxy[:, :2] = xywh[:, :2] - half
+    xyxy[:, 2:] = xywh[:, :2] + half
+    return xyxy
+
+
+def decode(output, conf_thres=0.25, classes=None, max_nms=MAX_NMS):
+    """Candidates of a ``(B, 4 + nc, anchors)`` head output above ``conf_thres``.
+
+    Returns ``(images, boxes, scores, labels)``: image index, ``xyxy`` box, best
+    class confidence and class of each candidate, in (image, anchor) order.
+    """
+    scores = output[:, 4:]
+    best = scores.max(axis=1)
+    images, anchors = np.nonzero(best > conf_thres)
+    labels = scores[images, :, anchors].argmax(axis=1)
+    conf = best[images, anchors].astype(np.float32, copy=False)
+    boxes = xywh_to_xyxy(output[images, :4, anchors].astype(np.float32, copy=False))
+    if classes is not None:
+        keep = np.isin(labels, classes)
+        images, boxes, conf, labels = images[keep], boxes[keep], conf[keep], labels[keep]
+
+    counts = np.bincount(images, minlength=len(output))
+    if counts.max(initial=0) > max_nms:
+        # Keep each image's max_nms most confident candidates
+        order = np.lexsort((-conf, images))
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        keep = np.sort(order[np.arange(len(order)) - starts < max_nms])
+        images, boxes, conf, labels = images[keep], boxes[keep], conf[keep], labels[keep]
+    return images, boxes, conf, labels
+
+
+def greedy_nms(boxes, scores, iou_thres):
+    """Indices of the boxes greedy NMS keeps, most confident first.
+
+    Each round keeps the most confident remaining box and drops every box whose
+    IoU with it exceeds ``iou_thres``, the same rule as ``torchvision.ops.nms``.
+    One round per kept box: used for groups too large for :func:`batched_nms`.
+    """
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])
+        h = np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])
+        inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+        order = rest[inter <= iou_thres * (areas[i] + areas[rest] - inter)]
+    return np.array(keep, dtype=np.intp)
+
+
+def group_pairs(starts, sizes):
+    """Every ``(i, j)`` with ``i < j`` inside the same group, for adjacent groups ``[start, start + size)``."""
+    position = np.arange(starts[0], starts[0] + sizes.sum()) if len(starts) else starts
+    later = np.repeat(starts + sizes, sizes) - position - 1  # later members of each one's group
+    i = np.repeat(position, later)
+    offset = np.arange(len(i)) - np.repeat(np.cumsum(later) - later, later)
+    return i, i + 1 + offset
+
+
+def batched_nms(boxes, scores, groups, iou_thres, max_pairs=MAX_PAIRS):
+    """Greedy NMS within each group; kept indices ordered by group, then confidence.
+
+    With candidates sorted by group and confidence, greedy NMS keeps a box iff no
+    kept, more confident box of its group overlaps it by more than ``iou_thres``.
+    The overlapping pairs of all groups are found in one vectorized pass, then
+    that rule is iterated from "keep everything" to its fixed point, which is the
+    greedy result; suppression chains are short, so it takes a few passes instead
+    of one round per kept box. Groups are processed in chunks of up to
+    ``max_pairs`` pairs; a group with more pairs than that uses :func:`greedy_nms`.
+    """
+    order = np.lexsort((-scores, groups))
+    boxes, groups = boxes[order], groups[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(order) else order
+    sizes = np.diff(np.r_[starts, len(order)])
+    pairs = sizes * (sizes - 1) // 2
+    keep = np.ones(len(order), dtype=bool)
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    chunk_end = 0
+    while chunk_end < len(starts):
+        chunk_start = chunk_end
+        if pairs[chunk_start] > max_pairs:
+            start, size = starts[chunk_start], sizes[chunk_start]
+            members = np.arange(start, start + size)
+            keep[members] = False
+            keep[members[greedy_nms(boxes[members], scores[order[members]], iou_thres)]] = True
+            chunk_end += 1
+            continue
+        total = np.cumsum(pairs[chunk_start:])
+        chunk_end = chunk_start + max(1, np.searchsorted(total, max_pairs, side="right"))
+        i, j = group_pairs(starts[chunk_start:chunk_end], sizes[chunk_start:chunk_end])
+        w = np.minimum(x2[i], x2[j]) - np.maximum(x1[i], x1[j])
+        h = np.minimum(y2[i], y2[j]) - np.maximum(y1[i], y1[j])
+        inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+        over = inter > iou_thres * (areas[i] + areas[j] - inter)
+        i, j = i[over], j[over]
+        while True:
+            suppressed = np.zeros(len(keep), dtype=bool)
+            suppressed[j[keep[i]]] = True
+            updated = keep.copy()
+            updated[j] = ~suppressed[j]
+            if np.array_equal(updated, keep):
+                break
+            keep = updated
+    return order[keep]
+
+
+def _torchvision_nms(boxes, scores, groups, iou_thres):
+    import torch
+    import torchvision
+
+    keep = torchvision.ops.batched_nms(
+        torch.from_numpy(boxes), torch.from_numpy(scores), torch.from_numpy(groups), iou_thres
+    )
+    return keep.numpy()
+
+
+def _ultralytics_nms(output, conf_thres, iou_thres, classes, agnostic, max_det, max_nms):
+    import torch
+
+    try:
+        from ultralytics.utils.nms import non_max_suppression as nms
+    except ImportError:  # ultralytics < 8.3.x
+        from ultralytics.utils.ops import non_max_suppression as nms
+
+    dets = nms(
+        torch.from_numpy(np.ascontiguousarray(output)).float(),
+        conf_thres=conf_thres,
+        iou_thres=iou_thres,
+        classes=classes,
+        agnostic=agnostic,
+        max_det=max_det,
+        max_nms=max_nms,
+    )
+    return [det.numpy() for det in dets]
+
+
+def non_max_suppression(
+    output,
+    conf_thres=0.25,
+    iou_thres=0.7,
+    classes=None,
+    agnostic=False,
+    max_det=300,
+    max_nms=MAX_NMS,
+    method="numpy",
+):
+    """Per-image ``(N, 6)`` float32 ``[x1, y1, x2, y2, conf, cls]`` detections of a head output.
+
+    Matches ``ultralytics.utils.nms.non_max_suppression`` (single label per box)
+    up to the order of equal-confidence boxes.
+    """
+    if method not in NMS_METHODS:
+        raise ValueError(f"method must be one of {NMS_METHODS}, got {method!r}")
+    if method == "ultralytics":
+        return _ultralytics_nms(output, conf_thres, iou_thres, classes, agnostic, max_det, max_nms)
+    if output.shape[-1] == 6:  # end-to-end head: rows are final detections
+        out = []
+        for pred in output:
+            keep = pred[:, 4] > conf_thres
+            if classes is not None:
+                keep &= np.isin(pred[:, 5], classes)
+            out.append(pred[keep][:max_det].astype(np.float32))
+        return out
+
+    batch, num_classes = len(output), output.shape[1] - 4
+    images, boxes, scores, labels = decode(output, conf_thres, classes, max_nms)
+    groups = images if agnostic else images * num_classes + labels
+    if method == "torchvision":
+        keep = _torchvision_nms(boxes, scores, groups, iou_thres)
+    else:
+        keep = batched_nms(boxes, scores, groups, iou_thres)
+
+    keep = keep[np.lexsort((-scores[keep], images[keep]))]  # by image, then confidence
+    dets = np.empty((len(keep), 6), dtype=np.float32)
+    dets[:, :4] = boxes[keep]
+    dets[:, 4] = scores[keep]
+    dets[:, 5] = labels[keep]
+    per_image = np.split(dets, np.cumsum(np.bincount(images[keep], minlength=batch))[:-1])
+    return [d[:max_det] for d in per_image]
@@ -0,0 +1,138 @@
+"""Profiling hooks for ``--profile`` runs.
+
+Each profiler gets its own pass over the same callable so they never distort one
+another's numbers:
+
+- ``cprofile.prof`` / ``cprofile.txt``: cProfile stats (open with snakeviz or pstats)
+- ``stacks.collapsed``: one ``frame;frame;frame <microseconds>`` line per distinct
+  call stack, ready for ``flamegraph.pl`` or speedscope
+- ``torch_trace.json`` / ``torch_ops.txt``: torch.profiler Chrome trace and the
+  per-operator table, for torch-based backends
+- ``ort_trace_<timestamp>.json``: ONNX Runtime's own per-operator Chrome trace,
+  from a separate session created with profiling enabled
+
+Profiling runs after the timed loop, so it never affects reported latencies.
+"""
+
+import cProfile
+import pstats
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+
+class StackCollector:
+    """Deterministic collapsed-stack profiler built on ``sys.setprofile``.
+
+    Every Python and C call on the current thread is tracked, and the time between
+    consecutive events is charged to the full stack active at that moment. Slower
+    than sampling, but exact and dependency-free.
+    """
+
+    def __init__(self):
+        self.stacks = Counter()  # tuple of frame labels -> ns
+        self._stack = []
+        self._last = 0
+
+    @staticmethod
+    def _label(frame, event, arg):
+        if event.startswith("c_"):
+            module = getattr(arg, "__module__", None) or "builtins"
+            name = getattr(arg, "__qualname__", None) or repr(arg)
+            return f"{module}.{name}"
+        code = frame.f_code
+        return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if self._stack:
+            self.stacks[tuple(self._stack)] += now - self._last
+        if event in ("call", "c_call"):
+            self._stack.append(self._label(frame, event, arg).replace(";", ":"))
+        elif self._stack:  # return, c_return, c_exception
+            self._stack.pop()
+        self._last = time.perf_counter_ns()  # exclude our own bookkeeping
+
+    def __enter__(self):
+        self._stack = []
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._callback)
+        return self
+
+    def __exit__(self, *exc):
+        sys.setprofile(None)
+
+    def collapsed(self):
+        """Lines in Brendan Gregg's collapsed-stack format, heaviest first."""
+        return [
+            f"{';'.join(stack)} {ns // 1000}"
+            for stack, ns in self.stacks.most_common()
+            if ns >= 1000
+        ]
+
+    def write(self, path):
+        Path(path).write_text("\n".join(self.collapsed()) + "\n")
+
+
+def _profile_torch(step, iterations, out_dir):
+    try:
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+    except ImportError:
+        return []
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    with profile(activities=activities, record_shapes=True) as prof:
+        for _ in range(iterations):
+            step()
+    trace = out_dir / "torch_trace.json"
+    prof.export_chrome_trace(str(trace))
+    table = out_dir / "torch_ops.txt"
+    table.write_text(prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=40))
+    return [trace, table]
+
+
+def profile_onnxruntime(make_runtime, batch, out_dir, iterations=20):
+    """Per-operator trace of an ONNX Runtime backend, written into ``out_dir``.
+
+    Session profiling can only be switched on when the session is created, so
+    ``make_runtime(**options)`` builds a second backend with ``profile`` set rather
+    than slowing down the timed one. Returns the list of files written.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with make_runtime(profile=out_dir / "ort_trace") as runtime:
+        for _ in range(iterations):
+            runtime.infer(batch)
+        return [Path(runtime.end_profiling())]
+
+
+def profile_step(step, out_dir, iterations=20, torch_trace=True):
+    """Profile ``iterations`` calls of ``step()`` and write traces into ``out_dir``.
+
+    Returns the list of files written.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(iterations):
+        step()
+    profiler.disable()
+    profiler.dump_stats(out_dir / "cprofile.prof")
+    with open(out_dir / "cprofile.txt", "w") as f:
+        pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+    written = [out_dir / "cprofile.prof", out_dir / "cprofile.txt"]
+
+    with StackCollector() as collector:
+        for _ in range(iterations):
+            step()
+    collector.write(out_dir / "stacks.collapsed")
+    written.append(out_dir / "stacks.collapsed")
+
+    if torch_trace:
+        written.extend(_profile_torch(step, iterations, out_dir))
+    return written
@@ -0,0 +1,261 @@
+"""Post-training static INT8 quantization of ONNX exports for CPU inference.
+
+The FP32 ONNX export from the export cache is quantized with ONNX Runtime's
+``quantize_static`` in QDQ format: INT8 weights (per channel) and UINT8
+activations, whose ranges are calibrated on images drawn from a local dataset.
+The box-decoding tail of the YOLO head (reshapes, DFL, anchor arithmetic, the
+final sigmoid) stays in FP32: 8-bit box coordinates cost localization accuracy
+and those ops are a small share of the runtime.
+
+Both stages are cached:
+
+- activation ranges per (FP32 model, calibration images, input size, method), so
+  re-quantizing with other settings skips calibration inference (needs an
+  onnxruntime whose ``quantize_static`` takes ``calibration_cache_path``; older
+  versions calibrate every time)
+- the quantized model per (ranges, quantization settings, onnxruntime version)
+
+Layout::
+
+    <root>/calibration/<key>.json   # calibrated tensor ranges
+    <root>/<key>/model.onnx         # INT8 QDQ model
+    <root>/<key>/meta.json          # key fields; written last, marks the entry complete
+
+The cache lives in ``~/.cache/vision-benchmarks/quantized``, or
+``$VISION_BENCH_QUANT_CACHE`` if set.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+import numpy as np
+
+from utils.evaluation import images_fingerprint, list_images
+from utils.export_cache import weights_sha256
+from utils.pipeline import letterbox_into
+
+DEFAULT_ROOT = Path(
+    os.environ.get(
+        "VISION_BENCH_QUANT_CACHE", Path.home() / ".cache" / "vision-benchmarks" / "quantized"
+    )
+)
+CALIBRATION_METHODS = ("minmax", "entropy", "percentile")
+DEFAULT_CALIBRATION = "coco128.yaml"
+DEFAULT_CALIBRATION_IMAGES = 100
+
+
+def calibration_images(source, count=DEFAULT_CALIBRATION_IMAGES, split="train"):
+    """Up to ``count`` images spread evenly over a dataset yaml's split, a directory or a list.
+
+    Calibrating on the training split keeps the images mAP is measured on out of
+    the activation ranges.
+    """
+    if str(source).endswith((".yaml", ".yml")):
+        from ultralytics.data.utils import check_det_dataset
+
+        info = check_det_dataset(source)
+        source = info.get(split) or info["val"]
+    images = list_images(source)
+    if not images:
+        raise ValueError(f"No calibration images in {source}")
+    if len(images) > count:
+        images = [images[i] for i in np.linspace(0, len(images) - 1, count).round().astype(int)]
+    return images
+
+
+def preprocess_image(path, imgsz):
+    """Letterbox an image into the ``(1, 3, h, w)`` float32 tensor the ONNX backend feeds."""
+    import cv2
+
+    frame = cv2.imread(str(path))
+    if frame is None:
+        raise OSError(f"Cannot read image {path}")
+    canvas = np.empty((*imgsz, 3), dtype=np.uint8)
+    letterbox_into(frame, canvas)
+    return (canvas[..., ::-1].transpose(2, 0, 1)[None] / 255.0).astype(np.float32)
+
+
+class ImageCalibrationReader:
+    """``CalibrationDataReader`` feeding letterboxed images ``batch`` at a time.
+
+    Static exports fix the batch dimension, so every tensor has exactly ``batch``
+    images; the last one is filled up with images from the start of the list.
+    """
+
+    def __init__(self, images, input_name, imgsz, batch=1):
+        self.images = list(images)
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.batch = batch
+        self._next = 0
+
+    def get_next(self):
+        if self._next >= len(self.images):
+            return None
+        indices = [(self._next + i) % len(self.images) for i in range(self.batch)]
+        tensor = np.concatenate([preprocess_image(self.images[i], self.imgsz) for i in indices])
+        self._next += self.batch
+        return {self.input_name: tensor}
+
+    def rewind(self):
+        self._next = 0
+
+    def __len__(self):
+        return -(-len(self.images) // self.batch)
+
+
+def static_batch(model):
+    """Batch dimension of a model's first input, or 1 when it is dynamic."""
+    dim = model.graph.input[0].type.tensor_type.shape.dim[0]
+    return dim.dim_value if dim.HasField("dim_value") and dim.dim_value > 0 else 1
+
+
+def head_postprocess_nodes(model):
+    """Names of the box-decoding nodes of the final (Detect) module, kept in FP32.
+
+    ultralytics exports name nodes after their module path (``/model.23/cv2.0/...``).
+    Nodes directly in the last module (reshapes, concats, anchor math) or in its
+    DFL are excluded; the prediction convolutions (``cv2``/``cv3``) are quantized.
+    """
+    modules = {n.name.split("/")[1] for n in model.graph.node if n.name.startswith("/model.")}
+    if not modules:
+        return []
+    prefix = f"/model.{max(int(m.split('.')[1]) for m in modules)}/"
+    excluded = []
+    for node in model.graph.node:
+        rest = node.name[len(prefix) :] if node.name.startswith(prefix) else None
+        if rest is not None and ("/" not in rest or rest.startswith("dfl/")):
+            excluded.append(node.name)
+    return excluded
+
+
+def _key(fields):
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def quantization_key(
+    onnx_path, images, imgsz, method="minmax", per_channel=True, exclude_head=True
+):
+    """Return ``(key, calibration_key, fields)`` for a quantization request."""
+    calibration = {
+        "fp32_sha256": weights_sha256(onnx_path),
+        "images": images_fingerprint(images),
+        "num_images": len(images),
+        "imgsz": list(imgsz),
+        "method": method,
+        "onnxruntime": metadata.version("onnxruntime"),
+    }
+    fields = {
+        **calibration,
+        "format": "qdq",
+        "weights": "qint8",
+        "activations": "quint8",
+        "per_channel": per_channel,
+        "exclude_head": exclude_head,
+    }
+    return _key(fields), _key(calibration), fields
+
+
+def quantize_model(
+    onnx_path,
+    calibration=DEFAULT_CALIBRATION,
+    num_images=DEFAULT_CALIBRATION_IMAGES,
+    imgsz=(640, 640),
+    method="minmax",
+    per_channel=True,
+    exclude_head=True,
+    root=DEFAULT_ROOT,
+    refresh=False,
+):
+    """Path of the INT8 version of ``onnx_path``, quantizing on first use.
+
+    ``calibration`` is a dataset yaml, image directory or ``.txt`` list; up to
+    ``num_images`` of its images calibrate the activation ranges.
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"method must be one of {CALIBRATION_METHODS}, got {method!r}")
+    imgsz = tuple(imgsz)
+    images = calibration_images(calibration, num_images)
+    key, calibration_key, fields = quantization_key(
+        onnx_path, images, imgsz, method, per_channel, exclude_head
+    )
+    root = Path(root).expanduser()
+    directory = root / key
+    artifact = directory / "model.onnx"
+    if (directory / "meta.json").exists() and not refresh:
+        return str(artifact)
+
+    ranges = root / "calibration" / f"{calibration_key}.json"
+    ranges.parent.mkdir(parents=True, exist_ok=True)
+    if refresh:
+        ranges.unlink(missing_ok=True)
+    options = {}
+    if "calibration_cache_path" in inspect.signature(quantize_static).parameters:
+        options["calibration_cache_path"] = ranges
+    cached = ranges.exists() and "calibration_cache_path" in options
+    print(
+        f"  Quantizing {onnx_path} to INT8 ({method}, "
+        + ("cached ranges" if cached else f"calibrating on {len(images)} images")
+        + f", key={key})..."
+    )
+
+    t0 = time.perf_counter()
+    workdir = Path(tempfile.mkdtemp(dir=root, prefix=".quantize-"))
+    try:
+        # Shape inference and constant folding first, as ONNX Runtime recommends
+        source = workdir / "preprocessed.onnx"
+        try:
+            quant_pre_process(str(onnx_path), str(source))
+        except Exception as e:
+            print(f"  Pre-processing failed ({e}), quantizing the export as is")
+            source = Path(onnx_path)
+        model = onnx.load(str(source))
+        input_name = model.graph.input[0].name
+        quantize_static(
+            str(source),
+            str(workdir / "model.onnx"),
+            ImageCalibrationReader(images, input_name, imgsz, batch=static_batch(model)),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method={
+                "minmax": CalibrationMethod.MinMax,
+                "entropy": CalibrationMethod.Entropy,
+                "percentile": CalibrationMethod.Percentile,
+            }[method],
+            nodes_to_exclude=head_postprocess_nodes(model) if exclude_head else None,
+            **options,
+        )
+        meta = {
+            **fields,
+            "source": str(onnx_path),
+            "calibration": str(calibration),
+            "calibration_key": calibration_key,
+            "fp32_bytes": Path(onnx_path).stat().st_size,
+            "int8_bytes": (workdir / "model.onnx").stat().st_size,
+            "quantize_seconds": round(time.perf_counter() - t0, 3),
+        }
+        (workdir / "preprocessed.onnx").unlink(missing_ok=True)
+        (workdir / "meta.json").write_text(json.dumps(meta, indent=2, sort_keys=True))
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(workdir, directory)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return str(artifact)
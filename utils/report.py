@@ -0,0 +1,342 @@
+"""Speed/accuracy Pareto report built from the results store.
+
+Speed records (``yolo_speed``, ``yolo_batch``) and accuracy records
+(``yolo_accuracy``) are written by different scripts with different model keys
+("yolo11n" vs "yolo11n.pt"). This module normalizes model identity, joins every
+speed configuration -- (model, backend, precision, imgsz, batch) -- with the most
+specific accuracy result available for it, and keeps the configurations that are
+Pareto-optimal for p99 latency vs mAP@50-95 and for throughput vs mAP@50-95::
+
+    python utils/report.py                      # results/pareto_results.md + pareto.png
+    python utils/report.py --max-p99 10         # best mAP under 10 ms p99 on this CPU
+    python utils/report.py --min-fps 60 --all-hosts
+
+Accuracy is matched from most to least specific: same backend, precision and
+imgsz; same backend and imgsz; same imgsz; then any result for the model. The
+"mAP Source" column says which level matched.
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.results_store import (
+    DEFAULT_STORE,
+    ResultsStore,
+    cpu_model,
+    render_environment,
+    render_table,
+)
+
+SPEED_BENCHMARKS = ("yolo_speed", "yolo_batch", "yolo_imgsz")
+MODEL_SUFFIXES = (".pt", ".onnx", ".engine", ".torchscript", ".yaml", ".xml", ".tflite")
+DEFAULT_IMGSZ = 640
+
+REPORT_COLUMNS = [
+    ("Model", lambda r: r["model"], ""),
+    ("Format", lambda r: r["format"], ""),
+    ("imgsz", lambda r: r["imgsz"], ""),
+    ("Batch", lambda r: r["batch"], "d"),
+    ("Images/s", lambda r: r["fps"], ".2f"),
+    ("p99 (ms)", lambda r: r["p99"], ".2f"),
+    ("mAP@50-95", lambda r: r["map5095"], ".3f"),
+    ("mAP Source", lambda r: r["map_source"], ""),
+]
+
+
+def model_id(name):
+    """Canonical model identity: "weights/yolo11n.pt" and "yolo11n" both give "yolo11n"."""
+    name = Path(str(name)).name.lower()
+    for suffix in MODEL_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def record_precision(record):
+    """Precision of a speed record ("fp32", "fp16", "int8") from its cell or format label."""
+    cell = record["cell"]
+    if cell.get("precision"):
+        return str(cell["precision"]).lower()
+    match = re.search(r"\b(FP32|FP16|INT8)\b", cell.get("format", ""), re.IGNORECASE)
+    return match.group(1).lower() if match else "fp32"
+
+
+def record_imgsz(record):
+    return record["cell"].get("imgsz") or record["config"].get("imgsz") or DEFAULT_IMGSZ
+
+
+def latest(records, key):
+    """Most recent record per ``key(record)``."""
+    out = {}
+    for record in records:
+        k = key(record)
+        if k not in out or record["timestamp"] >= out[k]["timestamp"]:
+            out[k] = record
+    return list(out.values())
+
+
+def speed_configs(records):
+    """One row per speed configuration (latest measurement wins)."""
+
+    def key(r):
+        cell = r["cell"]
+        return (
+            model_id(cell["model"]),
+            cell.get("backend", "pytorch"),
+            record_precision(r),
+            record_imgsz(r),
+            cell.get("batch", 1),
+            cell.get("device"),
+            cell.get("input", "zeros"),
+            cell.get("format", ""),  # e.g. static vs dynamic-shape ONNX exports
+        )
+
+    rows = []
+    for r in latest(records, key):
+        model, backend, precision, imgsz, batch, device, input_, fmt = key(r)
+        rows.append(
+            {
+                "model": model,
+                "format": fmt,
+                "backend": backend,
+                "precision": precision,
+                "imgsz": imgsz,
+                "batch": batch,
+                "device": device,
+                "input": input_,
+                "fps": r["metrics"]["fps"],
+                "p99": r["metrics"]["p99"],
+                "run_id": r["run_id"],
+            }
+        )
+    return rows
+
+
+def accuracy_precision(cell):
+    """Precision of an accuracy record's cell, or ``None`` when the record does not say.
+
+    Cached-engine records mark FP16 runs with ``half``; the rest ran FP32, or INT8
+    on the quantized backend. ``model.val()`` records carry no precision.
+    """
+    if cell.get("precision"):
+        return str(cell["precision"]).lower()
+    if cell.get("engine") != "cached":
+        return None
+    if cell.get("backend") == "onnxruntime_int8":
+        return "int8"
+    return "fp16" if cell.get("half") else "fp32"
+
+
+def accuracy_index(records, data=None):
+    """Map ``(model, backend, precision, imgsz)`` lookup keys to mAP@50-95.
+
+    Every record is indexed under keys of decreasing specificity (unknown fields
+    become ``None``); the latest record wins for each key.
+    """
+    if data is not None:
+        records = [r for r in records if r["cell"].get("data") == data]
+    index = {}
+    for r in sorted(records, key=lambda r: r["timestamp"]):
+        cell = r["cell"]
+        model = model_id(cell["model"])
+        backend = cell.get("backend", "pytorch")  # model.val() records run PyTorch
+        precision = accuracy_precision(cell)
+        imgsz = cell.get("imgsz") or DEFAULT_IMGSZ
+        value = r["metrics"]["map5095"]
+        if precision:
+            index[(model, backend, precision, imgsz)] = value
+        index[(model, backend, None, imgsz)] = value
+        index[(model, None, None, imgsz)] = value
+        index[(model, None, None, None)] = value
+    return index
+
+
+MATCH_LEVELS = (
+    ("exact", lambda r: (r["model"], r["backend"], r["precision"], r["imgsz"])),
+    ("backend", lambda r: (r["model"], r["backend"], None, r["imgsz"])),
+    ("imgsz", lambda r: (r["model"], None, None, r["imgsz"])),
+    ("model", lambda r: (r["model"], None, None, None)),
+)
+
+
+def join(speed_rows, index):
+    """Attach ``map5095`` and ``map_source`` to each speed row that has any accuracy result."""
+    joined = []
+    for row in speed_rows:
+        for level, key in MATCH_LEVELS:
+            if key(row) in index:
+                joined.append({**row, "map5095": index[key(row)], "map_source": level})
+                break
+    return joined
+
+
+def pareto_front(rows, cost, value="map5095"):
+    """Rows not dominated on (lower ``cost(row)``, higher ``row[value]``), cheapest first."""
+    front, best = [], float("-inf")
+    for row in sorted(rows, key=lambda r: (cost(r), -r[value])):
+        if row[value] > best:
+            front.append(row)
+            best = row[value]
+    return front
+
+
+def best_under(rows, max_p99=None, min_fps=None):
+    """Highest-mAP row meeting the latency/throughput budget (ties: lower p99), or ``None``."""
+    ok = [
+        r
+        for r in rows
+        if (max_p99 is None or r["p99"] <= max_p99) and (min_fps is None or r["fps"] >= min_fps)
+    ]
+    return max(ok, key=lambda r: (r["map5095"], -r["p99"])) if ok else None
+
+
+def plot_frontier(rows, latency_front, throughput_front, path):
+    """Scatter every configuration with both frontiers; ``False`` without matplotlib."""
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+
+    fig, (ax_lat, ax_fps) = plt.subplots(1, 2, figsize=(13, 5))
+    panels = (
+        (ax_lat, "p99", latency_front, "p99 latency (ms, log)"),
+        (ax_fps, "fps", throughput_front, "Throughput (images/s, log)"),
+    )
+    for ax, key, front, label in panels:
+        for backend in sorted({r["backend"] for r in rows}):
+            subset = [r for r in rows if r["backend"] == backend]
+            ax.scatter(
+                [r[key] for r in subset], [r["map5095"] for r in subset], label=backend, alpha=0.6
+            )
+        front = sorted(front, key=lambda r: r[key])
+        ax.plot([r[key] for r in front], [r["map5095"] for r in front], "k--", marker="o")
+        for r in front:
+            ax.annotate(
+                f"{r['model']} {r['backend']} b{r['batch']} {r['precision']}",
+                (r[key], r["map5095"]),
+                fontsize=7,
+                xytext=(4, 4),
+                textcoords="offset points",
+            )
+        ax.set_xscale("log")
+        ax.set_xlabel(label)
+        ax.set_ylabel("mAP@50-95")
+        ax.grid(True, which="both", alpha=0.3)
+    ax_lat.set_title("Latency frontier")
+    ax_fps.set_title("Throughput frontier")
+    ax_lat.legend(title="Backend")
+    fig.tight_layout()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return True
+
+
+def build_report(store, data=None, all_hosts=False, device=None):
+    """Joined rows plus the speed records they came from (for the environment header)."""
+    speed = [r for b in SPEED_BENCHMARKS for r in store.records(b)]
+    if not all_hosts:
+        here = cpu_model()
+        speed = [r for r in speed if r["environment"].get("cpu_model") == here]
+    if device:
+        speed = [r for r in speed if r["cell"].get("device") == device]
+    accuracy = list(store.records("yolo_accuracy"))
+    if data is None and accuracy:
+        data = max(accuracy, key=lambda r: r["timestamp"])["cell"].get("data")
+    rows = join(speed_configs(speed), accuracy_index(accuracy, data))
+    return rows, speed, data
+
+
+def write_report(rows, speed, data, path, plot_path=None, max_p99=None, min_fps=None):
+    latency_front = pareto_front(rows, cost=lambda r: r["p99"])
+    throughput_front = pareto_front(rows, cost=lambda r: -r["fps"])
+    Path(path).parent.mkdir(exist_ok=True)
+    with open(path, "w") as f:
+        f.write("# Speed vs Accuracy (Pareto Frontier)\n\n")
+        if speed:
+            f.write(render_environment(max(speed, key=lambda r: r["timestamp"])) + "\n")
+        f.write(f"**Accuracy dataset:** {data}\n\n")
+        if max_p99 is not None or min_fps is not None:
+            budget = []
+            if max_p99 is not None:
+                budget.append(f"p99 <= {max_p99:g} ms")
+            if min_fps is not None:
+                budget.append(f">= {min_fps:g} images/s")
+            best = best_under(rows, max_p99, min_fps)
+            f.write(f"## Best mAP with {' and '.join(budget)}\n\n")
+            if best:
+                f.write(render_table([best], REPORT_COLUMNS) + "\n\n")
+            else:
+                f.write("No configuration meets this budget.\n\n")
+        f.write("## Latency Frontier (p99 vs mAP@50-95)\n\n")
+        f.write(render_table(latency_front, REPORT_COLUMNS) + "\n\n")
+        f.write("## Throughput Frontier (Images/s vs mAP@50-95)\n\n")
+        f.write(render_table(throughput_front, REPORT_COLUMNS) + "\n\n")
+        f.write("## All Configurations\n\n")
+        ranked = sorted(rows, key=lambda r: (-r["map5095"], r["p99"]))
+        f.write(render_table(ranked, REPORT_COLUMNS) + "\n")
+        f.write(
+            "\nEach frontier lists the configurations no other configuration beats on both "
+            "axes, fastest first. p99 is the latency of one inference call, so for batch > 1 "
+            "it is the wait for the whole batch.\n"
+        )
+        if plot_path and plot_frontier(rows, latency_front, throughput_front, plot_path):
+            f.write(f"\n![Pareto frontier]({Path(plot_path).name})\n")
+    print(f"Report saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed/accuracy Pareto report")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE, help="JSONL results file")
+    parser.add_argument(
+        "--data", type=str, default=None, help="Accuracy dataset (default: most recent)"
+    )
+    parser.add_argument("--device", type=str, default=None, help="Only speed cells on this device")
+    parser.add_argument(
+        "--all-hosts", action="store_true", help="Include speed results from other CPUs"
+    )
+    parser.add_argument("--max-p99", type=float, default=None, help="Latency budget in ms")
+    parser.add_argument("--min-fps", type=float, default=None, help="Throughput floor")
+    parser.add_argument("--out", type=Path, default=Path("results/pareto_results.md"))
+    parser.add_argument("--plot", type=Path, default=Path("results/pareto.png"))
+    parser.add_argument("--no-plot", action="store_true")
+    args = parser.parse_args()
+
+    rows, speed, data = build_report(
+        ResultsStore(args.store), args.data, args.all_hosts, args.device
+    )
+    if not rows:
+        print("No speed results with matching accuracy results; run both benchmarks first.")
+        return 1
+
+    write_report(
+        rows,
+        speed,
+        data,
+        args.out,
+        plot_path=None if args.no_plot else args.plot,
+        max_p99=args.max_p99,
+        min_fps=args.min_fps,
+    )
+    if args.max_p99 is not None or args.min_fps is not None:
+        best = best_under(rows, args.max_p99, args.min_fps)
+        if best is None:
+            print("No configuration meets the budget.")
+            return 1
+        print(
+            f"Best: {best['model']} {best['backend']} {best['precision']} imgsz={best['imgsz']} "
+            f"batch={best['batch']} -> mAP@50-95 {best['map5095']:.3f}, "
+            f"p99 {best['p99']:.2f} ms, {best['fps']:.1f} images/s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
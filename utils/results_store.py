@@ -0,0 +1,379 @@
+"""Structured, append-only results store with run history and regression detection.
+
+Every benchmark cell is saved as one JSON line in ``results/runs.jsonl``::
+
+    {
+        "run_id": "...",            # shared by all cells from one script invocation
+        "timestamp": "...",
+        "benchmark": "yolo_speed",
+        "cell": {...},              # identity used to match cells across runs
+        "config": {...},            # run parameters (runs, warmup, ...)
+        "metrics": {...},           # summary numbers (fps, p50, map50, ...)
+        "latencies_ms": [...],      # raw per-iteration latencies, if any
+        "environment": {...},       # CPU, cores, library versions, thread settings
+        "git": {"sha": "...", "dirty": false},
+    }
+
+The markdown tables in ``results/`` are rendered from this store. The
+``compare`` command flags statistically significant latency/throughput
+regressions between two runs::
+
+    python utils/results_store.py list
+    python utils/results_store.py compare --baseline <run> --candidate <run>
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import uuid
+from datetime import UTC, datetime
+from importlib import metadata
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_STORE = Path("results/runs.jsonl")
+
+TRACKED_PACKAGES = ("torch", "ultralytics", "onnxruntime", "onnxruntime-gpu", "numpy")
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def new_run_id():
+    """Short unique id shared by all records of one benchmark invocation."""
+    return datetime.now(UTC).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def cpu_model():
+    """CPU model string from /proc/cpuinfo, falling back to ``platform``."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def package_versions(packages=TRACKED_PACKAGES):
+    """Installed versions of ``packages`` without importing them."""
+    versions = {}
+    for name in packages:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            continue
+    return versions
+
+
+def thread_settings():
+    """Thread-related settings that change CPU inference speed."""
+    settings = {var: os.environ.get(var) for var in THREAD_ENV_VARS if os.environ.get(var)}
+    torch = sys.modules.get("torch")  # only report if already loaded by the benchmark
+    if torch is not None:
+        settings["torch_num_threads"] = torch.get_num_threads()
+        settings["torch_num_interop_threads"] = torch.get_num_interop_threads()
+    return settings
+
+
+def environment_fingerprint():
+    """Describe the machine and software stack a result was measured on."""
+    env = {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_model": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "packages": package_versions(),
+        "threads": thread_settings(),
+    }
+    if hasattr(os, "sched_getaffinity"):
+        env["cpu_affinity_count"] = len(os.sched_getaffinity(0))
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        env["gpu"] = torch.cuda.get_device_name(0)
+    return env
+
+
+@functools.cache
+def git_info(cwd=None):
+    """Current git SHA and whether the working tree has uncommitted changes."""
+    cwd = cwd or Path(__file__).resolve().parent.parent
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"sha": None, "dirty": None}
+    return {"sha": sha, "dirty": bool(status.strip())}
+
+
+def make_record(benchmark, cell, metrics, config=None, latencies=None, run_id=None):
+    """Build one results record. ``cell`` identifies what was measured."""
+    return {
+        "run_id": run_id or new_run_id(),
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "benchmark": benchmark,
+        "cell": cell,
+        "config": config or {},
+        "metrics": metrics,
+        "latencies_ms": [round(float(v), 4) for v in latencies] if latencies is not None else [],
+        "environment": environment_fingerprint(),
+        "git": git_info(),
+    }
+
+
+def cell_key(record):
+    """Hashable identity of a record's cell, used to match cells across runs."""
+    return record["benchmark"], json.dumps(record["cell"], sort_keys=True)
+
+
+class ResultsStore:
+    """Append-only JSONL file of benchmark records."""
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = Path(path)
+
+    def append(self, record):
+        """Append ``record`` as a single line write so concurrent writers don't interleave."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, sort_keys=True) + "\n"
+        with open(self.path, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def records(self, benchmark=None, run_id=None):
+        """Iterate over stored records, optionally filtered by benchmark and run."""
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if benchmark and record["benchmark"] != benchmark:
+                    continue
+                if run_id and record["run_id"] != run_id:
+                    continue
+                yield record
+
+    def runs(self, benchmark=None):
+        """Ordered list of ``(run_id, first_timestamp, git_sha, n_records)``."""
+        runs = {}
+        for r in self.records(benchmark):
+            if r["run_id"] not in runs:
+                runs[r["run_id"]] = [r["run_id"], r["timestamp"], r["git"].get("sha"), 0]
+            runs[r["run_id"]][3] += 1
+        return [tuple(v) for v in sorted(runs.values(), key=lambda v: v[1])]
+
+    def resolve_run(self, ref, benchmark=None):
+        """Resolve a run id prefix, git SHA prefix or ``latest``/``previous`` to a run id."""
+        runs = self.runs(benchmark)
+        if not runs:
+            raise LookupError(f"No runs found in {self.path}")
+        if ref in ("latest", None):
+            return runs[-1][0]
+        if ref == "previous":
+            if len(runs) < 2:
+                raise LookupError("Need at least two runs to compare against 'previous'")
+            return runs[-2][0]
+        matches = [r[0] for r in runs if r[0].startswith(ref) or (r[2] or "").startswith(ref)]
+        if not matches:
+            raise LookupError(f"No run matches {ref!r}")
+        return matches[-1]
+
+
+def mann_whitney_u(a, b):
+    """Two-sided Mann-Whitney U test (normal approximation with tie correction).
+
+    Returns ``(u_statistic, p_value)``. Latency samples are far from normal, so a
+    rank test is more trustworthy than a t-test here.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n1, n2 = a.size, b.size
+    if n1 == 0 or n2 == 0:
+        return float("nan"), 1.0
+
+    combined = np.concatenate([a, b])
+    values, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+    # Average rank of each distinct value, handling ties
+    upper = np.cumsum(counts)
+    avg_rank = upper - (counts - 1) / 2.0
+    ranks = avg_rank[inverse]
+
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2.0
+    n = n1 + n2
+    tie_term = np.sum(counts**3 - counts) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return float(u1), 1.0
+    z = (u1 - n1 * n2 / 2.0) / sigma
+    return float(u1), float(math.erfc(abs(z) / math.sqrt(2)))
+
+
+def compare_records(baseline, candidate, alpha=0.01, threshold=0.05):
+    """Compare two runs cell by cell.
+
+    A cell is flagged as a regression when its median latency got worse by more
+    than ``threshold`` (relative) and the Mann-Whitney test rejects equality at
+    ``alpha``. Cells without raw latencies compare their scalar metrics instead.
+    """
+    base_by_key = {cell_key(r): r for r in baseline}
+    rows = []
+    for cand in candidate:
+        base = base_by_key.get(cell_key(cand))
+        if base is None:
+            continue
+        row = {"benchmark": cand["benchmark"], "cell": cand["cell"]}
+        if base["latencies_ms"] and cand["latencies_ms"]:
+            b_med = float(np.median(base["latencies_ms"]))
+            c_med = float(np.median(cand["latencies_ms"]))
+            change = (c_med - b_med) / b_med
+            _, p = mann_whitney_u(base["latencies_ms"], cand["latencies_ms"])
+            significant = p < alpha and abs(change) > threshold
+            row.update(
+                metric="p50_latency_ms",
+                baseline=b_med,
+                candidate=c_med,
+                change=change,
+                p_value=p,
+                status=("regression" if change > 0 else "improvement") if significant else "ok",
+            )
+        else:
+            metric = next(
+                (m for m in ("map5095", "fps") if m in base["metrics"] and m in cand["metrics"]),
+                None,
+            )
+            if metric is None:
+                continue
+            b_val, c_val = base["metrics"][metric], cand["metrics"][metric]
+            change = (c_val - b_val) / b_val if b_val else 0.0
+            # Higher is better for every scalar metric we compare
+            status = "ok"
+            if abs(change) > threshold:
+                status = "regression" if change < 0 else "improvement"
+            row.update(
+                metric=metric,
+                baseline=b_val,
+                candidate=c_val,
+                change=change,
+                p_value=None,
+                status=status,
+            )
+        rows.append(row)
+    return rows
+
+
+def format_cell(cell):
+    return " ".join(f"{k}={v}" for k, v in cell.items())
+
+
+def render_comparison(rows):
+    """Markdown table for :func:`compare_records` output."""
+    lines = [
+        "| Benchmark | Cell | Metric | Baseline | Candidate | Change | p-value | Status |",
+        "|-----------|------|--------|---------:|----------:|-------:|--------:|--------|",
+    ]
+    for r in rows:
+        p = f"{r['p_value']:.2g}" if r["p_value"] is not None else "-"
+        lines.append(
+            f"| {r['benchmark']} | {format_cell(r['cell'])} | {r['metric']} "
+            f"| {r['baseline']:.3f} | {r['candidate']:.3f} | {r['change'] * 100:+.1f}% "
+            f"| {p} | {r['status']} |"
+        )
+    return "\n".join(lines)
+
+
+def render_table(records, columns):
+    """Render records as a markdown table.
+
+    ``columns`` is a list of ``(header, getter, fmt)`` where ``getter`` maps a
+    record to a value and ``fmt`` is a format spec (``""`` for strings).
+    """
+    header = "| " + " | ".join(c[0] for c in columns) + " |"
+    align = "|" + "|".join("-" * (len(c[0]) + 1) + (":" if c[2] else "-") for c in columns) + "|"
+    lines = [header, align]
+    for record in records:
+        cells = []
+        for _, getter, fmt in columns:
+            value = getter(record)
+            cells.append("N/A" if value is None else format(value, fmt))
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def render_environment(record):
+    """Markdown header lines describing the environment of ``record``."""
+    env = record["environment"]
+    packages = " | ".join(f"**{k}:** {v}" for k, v in env.get("packages", {}).items())
+    sha = (record["git"].get("sha") or "unknown")[:10]
+    dirty = " (dirty)" if record["git"].get("dirty") else ""
+    lines = [
+        f"**Device:** {env.get('gpu') or env.get('cpu_model')} ({env.get('cpu_count')} cores)",
+        packages,
+        f"**Run:** {record['run_id']} | **Git:** {sha}{dirty} | **Date:** {record['timestamp']}",
+    ]
+    return "\n".join(line for line in lines if line) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark results store")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE, help="JSONL results file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="List recorded runs")
+    p_list.add_argument("--benchmark", type=str, default=None)
+
+    p_cmp = sub.add_parser("compare", help="Flag regressions between two runs")
+    p_cmp.add_argument("--baseline", type=str, default="previous", help="Run id / git SHA")
+    p_cmp.add_argument("--candidate", type=str, default="latest", help="Run id / git SHA")
+    p_cmp.add_argument("--benchmark", type=str, default=None)
+    p_cmp.add_argument("--alpha", type=float, default=0.01, help="Significance level")
+    p_cmp.add_argument("--threshold", type=float, default=0.05, help="Min relative change")
+
+    args = parser.parse_args()
+    store = ResultsStore(args.store)
+
+    if args.command == "list":
+        for run_id, timestamp, sha, n in store.runs(args.benchmark):
+            print(f"{run_id}  {timestamp}  {(sha or 'unknown')[:10]}  {n} cells")
+        return 0
+
+    baseline_id = store.resolve_run(args.baseline, args.benchmark)
+    candidate_id = store.resolve_run(args.candidate, args.benchmark)
+    print(f"Baseline: {baseline_id} | Candidate: {candidate_id}\n")
+    rows = compare_records(
+        list(store.records(args.benchmark, baseline_id)),
+        list(store.records(args.benchmark, candidate_id)),
+        alpha=args.alpha,
+        threshold=args.threshold,
+    )
+    if not rows:
+        print("No matching cells between the two runs.")
+        return 0
+    print(render_comparison(rows))
+    regressions = [r for r in rows if r["status"] == "regression"]
+    print(f"\n{len(regressions)} regression(s) out of {len(rows)} cells")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Sweep scheduler: every benchmark cell in a fresh subprocess.
+
+Running each (model, backend, precision, batch) cell in its own process means a
+model that leaks allocator or thread-pool state cannot skew the next one, and a
+crash or hang only loses that cell.
+
+- **Concurrency**: ``shared`` cells (e.g. accuracy evals) run up to ``jobs`` at a
+  time; ``exclusive`` cells (speed runs) never share the machine. With
+  ``reserved_cores`` exclusive cells instead run one at a time pinned to those
+  cores while shared cells keep the remaining cores busy.
+- **Timeouts**: a cell exceeding ``timeout`` seconds has its process group killed.
+- **Checkpointing**: every finished cell is appended to a JSONL checkpoint, so a
+  resumed sweep skips cells that already succeeded.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+
+@dataclass
+class Cell:
+    """One unit of work. ``params`` is handed to the subprocess as JSON."""
+
+    id: str
+    params: dict = field(default_factory=dict)
+    exclusive: bool = False
+
+
+def parse_cores(value):
+    """Parse a core list such as "0-3,8,10-11" into a sorted list of ints."""
+    cores = set()
+    for part in (p.strip() for p in value.split(",")):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cores.update(range(int(lo), int(hi or lo) + 1))
+    if not cores:
+        raise ValueError(f"No cores in {value!r}")
+    return sorted(cores)
+
+
+class Checkpoint:
+    """Append-only JSONL log of a sweep: a header line, then one line per finished cell."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def start(self, run_id, meta=None):
+        """Begin a new sweep, discarding any previous checkpoint."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = {"sweep": run_id, "started": datetime.now(UTC).isoformat(), **(meta or {})}
+        self.path.write_text(json.dumps(header) + "\n")
+
+    def _lines(self):
+        if not self.path.exists():
+            return []
+        lines = []
+        for line in self.path.read_text().splitlines():
+            try:
+                lines.append(json.loads(line))
+            except ValueError:
+                continue  # torn last line after a crash
+        return lines
+
+    def run_id(self):
+        """Run id of the checkpointed sweep, or ``None`` if there is none."""
+        lines = self._lines()
+        return lines[0].get("sweep") if lines else None
+
+    def results(self):
+        """Latest outcome per cell id."""
+        return {line["cell"]: line for line in self._lines()[1:] if "cell" in line}
+
+    def done(self):
+        """Ids of cells that finished successfully."""
+        return {cid for cid, line in self.results().items() if line["status"] == "ok"}
+
+    def record(self, cell, status, seconds, returncode=None):
+        line = {
+            "cell": cell.id,
+            "status": status,
+            "seconds": round(seconds, 2),
+            "returncode": returncode,
+            "finished": datetime.now(UTC).isoformat(),
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(line) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _pin(cores):
+    if cores is None or not hasattr(os, "sched_setaffinity"):
+        return None
+    return lambda: os.sched_setaffinity(0, cores)
+
+
+class Scheduler:
+    """Run :class:`Cell` s as subprocesses under concurrency, pinning and timeout rules.
+
+    Args:
+        command: Callable mapping a cell to the argv of its subprocess.
+        jobs: Maximum concurrently running shared cells.
+        reserved_cores: Cores for exclusive cells; shared cells get the rest.
+            ``None``, or a reservation that leaves no core to pin shared cells to,
+            makes exclusive cells wait for (and block) everything else.
+        timeout: Per-cell wall-clock limit in seconds (``None`` = unlimited).
+        checkpoint: Optional :class:`Checkpoint` receiving every outcome.
+        log_dir: Directory for per-cell stdout/stderr logs (``None`` = inherit).
+    """
+
+    def __init__(
+        self,
+        command,
+        jobs=1,
+        reserved_cores=None,
+        timeout=None,
+        checkpoint=None,
+        log_dir=None,
+        poll_interval=0.2,
+    ):
+        self.command = command
+        self.jobs = max(1, jobs)
+        self.reserved_cores = reserved_cores
+        self.timeout = timeout
+        self.checkpoint = checkpoint
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.poll_interval = poll_interval
+        self.shared_cores = None
+        if reserved_cores and hasattr(os, "sched_getaffinity"):
+            rest = sorted(os.sched_getaffinity(0) - set(reserved_cores))
+            self.shared_cores = rest or None
+            if not rest:
+                print("Reserved cores cover every CPU: exclusive cells will run alone")
+
+    def _can_start(self, cell, running):
+        exclusive = sum(1 for r in running.values() if r["cell"].exclusive)
+        shared = len(running) - exclusive
+        if self.shared_cores:  # shared cells are pinned away from the reserved cores
+            return exclusive == 0 if cell.exclusive else shared < self.jobs
+        if cell.exclusive:
+            return not running
+        return exclusive == 0 and shared < self.jobs
+
+    def _launch(self, cell):
+        cores = self.reserved_cores if cell.exclusive else self.shared_cores
+        stdout = None
+        if self.log_dir:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            stdout = open(self.log_dir / f"{cell.id.replace('/', '_')}.log", "w")
+        proc = subprocess.Popen(
+            self.command(cell),
+            stdout=stdout,
+            stderr=subprocess.STDOUT if stdout else None,
+            preexec_fn=_pin(cores),
+            start_new_session=True,  # own process group so a timeout kills its children too
+        )
+        print(f"[start] {cell.id}" + (f" (cores {cores[0]}-{cores[-1]})" if cores else ""))
+        return {"cell": cell, "proc": proc, "started": time.monotonic(), "log": stdout}
+
+    def _finish(self, entry, status):
+        seconds = time.monotonic() - entry["started"]
+        if entry["log"]:
+            entry["log"].close()
+        returncode = entry["proc"].returncode
+        print(f"[{status}] {entry['cell'].id} after {seconds:.1f}s")
+        if self.checkpoint:
+            self.checkpoint.record(entry["cell"], status, seconds, returncode)
+        return {"cell": entry["cell"].id, "status": status, "seconds": seconds}
+
+    def run(self, cells, skip=()):
+        """Run every cell whose id is not in ``skip``; returns one outcome dict per cell.
+
+        Without reserved cores, exclusive cells keep their position in the queue: when
+        one cannot start yet no later cell overtakes it, so speed runs are not starved
+        by shared work.
+        """
+        pending = [c for c in cells if c.id not in set(skip)]
+        running, outcomes = {}, []
+        try:
+            while pending or running:
+                for pid, entry in list(running.items()):
+                    proc = entry["proc"]
+                    if proc.poll() is not None:
+                        status = "ok" if proc.returncode == 0 else "failed"
+                        outcomes.append(self._finish(running.pop(pid), status))
+                    elif self.timeout and time.monotonic() - entry["started"] > self.timeout:
+                        os.killpg(proc.pid, signal.SIGKILL)
+                        proc.wait()
+                        outcomes.append(self._finish(running.pop(pid), "timeout"))
+
+                for cell in list(pending):
+                    if self._can_start(cell, running):
+                        pending.remove(cell)
+                        entry = self._launch(cell)
+                        running[entry["proc"].pid] = entry
+                    elif cell.exclusive and not self.reserved_cores:
+                        break  # later cells must not overtake a waiting exclusive cell
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            for entry in running.values():
+                os.killpg(entry["proc"].pid, signal.SIGKILL)
+            raise
+        return outcomes
+
+
+def python_command(script, *args):
+    """argv running ``script`` with the current interpreter."""
+    return [sys.executable, str(script), *map(str, args)]
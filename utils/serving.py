@@ -0,0 +1,240 @@
+"""Multi-stream inference server simulator with dynamic micro-batching.
+
+Many camera streams share one inference process. Simulated streams submit frames
+at a fixed rate to an in-process :class:`InferenceServer`, whose worker thread
+groups waiting requests into micro-batches: a batch is dispatched as soon as it
+holds ``max_batch_size`` frames, or once its oldest frame has waited
+``max_queue_delay_ms``. Bigger batches raise throughput but add queueing delay;
+the delay bound caps what a lightly loaded server adds to latency.
+
+Admission is bounded. A frame that arrives while ``max_queue`` frames are already
+waiting is dropped, as a live camera feed cannot be back-pressured.
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class Request:
+    """One frame submitted by a stream, with its arrival, dispatch and completion times."""
+
+    stream: int
+    frame: object
+    t_arrival: float
+    t_dispatch: float = 0.0
+    t_done: float = 0.0
+
+    @property
+    def latency_ms(self):
+        return (self.t_done - self.t_arrival) * 1000
+
+    @property
+    def queue_ms(self):
+        return (self.t_dispatch - self.t_arrival) * 1000
+
+
+class InferenceServer:
+    """Micro-batching server around ``infer``, a function mapping a list of frames to outputs.
+
+    Args:
+        infer: Called on the worker thread with each batch (a list of frames).
+        max_batch_size: Largest batch handed to ``infer``.
+        max_queue_delay_ms: Dispatch a partial batch once its oldest frame has waited
+            this long.
+        max_queue: Waiting frames beyond which new arrivals are dropped
+            (default: two full batches).
+    """
+
+    def __init__(self, infer, max_batch_size=8, max_queue_delay_ms=5.0, max_queue=None):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        self.infer = infer
+        self.max_batch_size = max_batch_size
+        self.max_queue_delay = max_queue_delay_ms / 1000
+        self.max_queue = max_queue or 2 * max_batch_size
+        self.completed = []
+        self.dropped = Counter()  # per stream
+        self.batch_sizes = []
+        self.batch_ms = []
+        self.queue_depths = []  # frames waiting when each batch was formed
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+        self._errors = []
+
+    def submit(self, stream, frame, t_arrival=None):
+        """Queue ``frame`` from ``stream``. Returns ``False`` if it was dropped."""
+        request = Request(stream, frame, t_arrival or time.perf_counter())
+        with self._cond:
+            if self._closed or len(self._pending) >= self.max_queue:
+                self.dropped[stream] += 1
+                return False
+            self._pending.append(request)
+            self._cond.notify()
+        return True
+
+    def _next_batch(self):
+        """Block until a batch is due; ``None`` once closed and drained."""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            deadline = self._pending[0].t_arrival + self.max_queue_delay
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self.queue_depths.append(len(self._pending))
+            n = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _serve(self):
+        while (batch := self._next_batch()) is not None:
+            t0 = time.perf_counter()
+            try:
+                self.infer([r.frame for r in batch])
+            except Exception as e:  # surface in close() instead of hanging submitters
+                self._errors.append(e)
+                with self._cond:
+                    self._closed = True
+                    self._pending.clear()
+                return
+            t1 = time.perf_counter()
+            for r in batch:
+                r.t_dispatch, r.t_done, r.frame = t0, t1, None
+            self.batch_sizes.append(len(batch))
+            self.batch_ms.append((t1 - t0) * 1000)
+            self.completed.extend(batch)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, name="inference-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop admitting frames, serve the ones already queued and join the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_load(server, frames, streams, fps, duration, seed=0):
+    """Submit frames from ``streams`` simulated cameras at ``fps`` each for ``duration`` s.
+
+    Stream start times are staggered at random within one frame interval, so
+    arrivals interleave like independent cameras instead of in lockstep. A frame's
+    arrival time is its scheduled slot, so if the generator itself falls behind the
+    lateness still counts toward latency. Returns the number of frames offered.
+    """
+    period = 1.0 / fps
+    rng = np.random.default_rng(seed)
+    t_start = time.perf_counter()
+    end = t_start + duration
+    due = [(t_start + rng.uniform(0, period), stream, 0) for stream in range(streams)]
+    heapq.heapify(due)
+    offered = 0
+    while due:
+        t, stream, n = heapq.heappop(due)
+        if t >= end:
+            continue
+        delay = t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        server.submit(stream, frames[(stream + n) % len(frames)], t_arrival=t)
+        offered += 1
+        heapq.heappush(due, (t + period, stream, n + 1))
+    return offered
+
+
+@dataclass
+class ServingResult:
+    """Outcome of one load level: ``streams`` cameras at ``fps`` each."""
+
+    streams: int
+    fps: float
+    offered: int
+    wall_time: float
+    latency_ms: dict  # stream -> list of end-to-end latencies
+    queue_ms: list
+    dropped: dict  # stream -> dropped frames
+    batch_sizes: list
+    batch_ms: list
+    queue_depths: list = field(default_factory=list)
+
+    @property
+    def completed(self):
+        return sum(len(v) for v in self.latency_ms.values())
+
+    @property
+    def throughput(self):
+        """Served frames per second."""
+        return self.completed / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def drop_rate(self):
+        return sum(self.dropped.values()) / self.offered if self.offered else 0.0
+
+    def stream_p99(self):
+        """p99 latency of every stream; a stream that completed nothing counts as ``inf``."""
+        return {
+            s: float(np.percentile(self.latency_ms[s], 99)) if self.latency_ms.get(s) else np.inf
+            for s in range(self.streams)
+        }
+
+
+def simulate(
+    infer,
+    frames,
+    streams,
+    fps=15.0,
+    duration=10.0,
+    max_batch_size=8,
+    max_queue_delay_ms=5.0,
+    max_queue=None,
+    seed=0,
+):
+    """Drive an :class:`InferenceServer` with ``streams`` simulated cameras.
+
+    Wall time runs from the first arrival slot until every admitted frame is
+    served, so a server that falls behind shows up as lower throughput.
+    """
+    server = InferenceServer(infer, max_batch_size, max_queue_delay_ms, max_queue)
+    t0 = time.perf_counter()
+    with server:
+        offered = generate_load(server, frames, streams, fps, duration, seed=seed)
+    wall = time.perf_counter() - t0
+
+    latency_ms = {}
+    for r in server.completed:
+        latency_ms.setdefault(r.stream, []).append(r.latency_ms)
+    return ServingResult(
+        streams=streams,
+        fps=fps,
+        offered=offered,
+        wall_time=wall,
+        latency_ms=latency_ms,
+        queue_ms=[r.queue_ms for r in server.completed],
+        dropped=dict(server.dropped),
+        batch_sizes=server.batch_sizes,
+        batch_ms=server.batch_ms,
+        queue_depths=server.queue_depths,
+    )
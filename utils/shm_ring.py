@@ -0,0 +1,139 @@
+"""Zero-copy frame transport between processes over ``multiprocessing.shared_memory``.
+
+A :class:`FrameRing` is a single-producer, single-consumer ring of fixed-size frame
+slots in one shared memory block. The producer decodes straight into a free slot
+and publishes it with a sequence number and timestamp; the consumer gets a NumPy
+view of the slot, runs on it in place, and releases it back to the producer. No
+frame is pickled or copied on the way.
+
+Handoff costs two semaphore operations per frame (``free`` and ``filled`` slot
+counts), which also order the slot writes before the consumer's reads. Slot
+indices live in each side's own process, so nothing else is locked. To feed N
+workers, give each its own ring and let the producer pick one with a free slot.
+
+Timestamps are ``time.perf_counter()`` values, which share one clock across
+processes on Linux (``CLOCK_MONOTONIC``).
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Sequence number of the end-of-stream marker slot
+END = -1
+
+
+class FrameRing:
+    """Ring of ``num_slots`` frames of ``shape``/``dtype`` in shared memory.
+
+    Create it in the producer and pass it to the consumer process as a
+    ``Process`` argument; the consumer attaches to the same block. The creator
+    must call :meth:`unlink` once both sides are done.
+    """
+
+    def __init__(self, shape, num_slots=4, dtype=np.uint8, context=None):
+        if num_slots < 1:
+            raise ValueError(f"num_slots must be >= 1, got {num_slots}")
+        context = context or multiprocessing.get_context()
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.num_slots = num_slots
+        self._free = context.Semaphore(num_slots)
+        self._filled = context.Semaphore(0)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=16 * num_slots + frame_bytes * num_slots
+        )
+        self._owner = True
+        self._map()
+
+    def _map(self):
+        buf = self._shm.buf
+        n = self.num_slots
+        # Header: per-slot sequence number and publish time, then the frame slots
+        self.seqs = np.ndarray((n,), dtype=np.int64, buffer=buf)
+        self.stamps = np.ndarray((n,), dtype=np.float64, buffer=buf, offset=8 * n)
+        self.frames = np.ndarray((n, *self.shape), dtype=self.dtype, buffer=buf, offset=16 * n)
+        self._write = 0  # next slot the producer fills
+        self._read = 0  # next slot the consumer reads
+
+    def __getstate__(self):
+        return {
+            "name": self._shm.name,
+            "shape": self.shape,
+            "dtype": self.dtype.str,
+            "num_slots": self.num_slots,
+            "free": self._free,
+            "filled": self._filled,
+        }
+
+    def __setstate__(self, state):
+        self.shape = state["shape"]
+        self.dtype = np.dtype(state["dtype"])
+        self.num_slots = state["num_slots"]
+        self._free, self._filled = state["free"], state["filled"]
+        # Child processes share the creator's resource tracker, so attaching here
+        # does not hand ownership of the block to this process
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._map()
+
+    @property
+    def nbytes(self):
+        return self._shm.size
+
+    # Producer side
+
+    def acquire(self, block=True, timeout=None):
+        """Writable view of the next free slot, or ``None`` if none frees up in time."""
+        if not self._free.acquire(block, timeout):
+            return None
+        return self.frames[self._write % self.num_slots]
+
+    def publish(self, seq, timestamp=0.0):
+        """Hand the slot from :meth:`acquire` to the consumer."""
+        i = self._write % self.num_slots
+        self.seqs[i] = seq
+        self.stamps[i] = timestamp
+        self._write += 1
+        self._filled.release()
+
+    def close(self):
+        """Publish the end-of-stream marker (blocks until a slot is free)."""
+        self.acquire()
+        self.publish(END)
+
+    # Consumer side
+
+    def get(self, timeout=None):
+        """Next published frame as ``(seq, view, timestamp)``; ``None`` at end of stream.
+
+        The view aliases shared memory: call :meth:`release` once done with it.
+        Raises ``TimeoutError`` if nothing is published within ``timeout``.
+        """
+        if not self._filled.acquire(True, timeout):
+            raise TimeoutError("no frame published in time")
+        i = self._read % self.num_slots
+        seq = int(self.seqs[i])
+        if seq == END:
+            return None
+        return seq, self.frames[i], float(self.stamps[i])
+
+    def release(self):
+        """Return the slot from the last :meth:`get` to the producer."""
+        self._read += 1
+        self._free.release()
+
+    # Lifetime
+
+    def detach(self):
+        """Unmap the block in this process. Views into it must no longer be used."""
+        self.seqs = self.stamps = self.frames = None
+        self._shm.close()
+
+    def unlink(self):
+        """Detach and free the block (creator only)."""
+        self.detach()
+        if self._owner:
+            self._shm.unlink()
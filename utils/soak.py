@@ -0,0 +1,334 @@
+"""Long-duration soak runs: windowed metrics streamed to JSONL, then drift analysis.
+
+A 100-call run takes seconds and cannot show what happens over hours: CPU
+frequency dropping as the package heats up, the allocator fragmenting, GC
+pauses growing with the heap. In soak mode a benchmark runs for a wall-clock
+duration and :class:`SoakMonitor` closes a window every ``window_s`` seconds
+(default one minute), appending one JSON line per window to a log:
+
+- calls, items and throughput (items/s) in the window
+- latency mean/p50/p99/max over the window's calls
+- RSS at the end of the window
+- CPU frequency (mean over cores, from ``/sys/devices/system/cpu/*/cpufreq``
+  or ``/proc/cpuinfo``), the hottest thermal zone and the kernel's thermal
+  throttle event count, where the platform exposes them
+- garbage collections per generation and GC pause time, from ``gc.callbacks``
+
+Only the current window's latencies are held in memory and each line is flushed
+as it is written, so memory stays flat however long the run and a killed run
+keeps every finished window. Per-call samples the benchmark keeps for its
+summary go into a :class:`Reservoir`, a fixed-size uniform sample of the calls.
+
+:func:`analyze_drift` compares the first and last quarter of the windows
+(medians, so a single slow minute does not count) and flags a throughput drop,
+a p99 rise, RSS growth, a lower CPU frequency and throttle events. A throughput
+drop together with a frequency drop points at thermal or power throttling
+rather than the code.
+"""
+
+import gc
+import glob
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.memory import MB, rss_bytes
+
+DEFAULT_WINDOW_S = 60.0
+
+SOAK_ROOT = Path("results/soak")
+
+# Per-call samples a soak run keeps for its overall summary
+RESERVOIR_SIZE = 10_000
+
+# Relative change between the start and end of a run that counts as drift
+DRIFT_TOLERANCE = 0.05
+P99_TOLERANCE = 0.10
+RSS_GROWTH_TOLERANCE = 0.05
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value):
+    """Seconds in "90", "45s", "30m", "2h" or "1h30m"."""
+    text = str(value).strip().lower()
+    if re.fullmatch(r"\d+(\.\d+)?", text):
+        seconds = float(text)
+    else:
+        parts = re.findall(r"(\d+(?:\.\d+)?)([smhd])", text)
+        if not parts or "".join(n + u for n, u in parts) != text:
+            raise ValueError(f"invalid duration {value!r}, expected e.g. 90s, 30m, 2h or 1h30m")
+        seconds = sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    if seconds <= 0:
+        raise ValueError(f"duration must be positive, got {value!r}")
+    return seconds
+
+
+def cpu_frequency_mhz():
+    """Mean current frequency over all cores in MHz, or ``None`` if unavailable."""
+    values = []
+    for path in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq"):
+        try:
+            values.append(int(Path(path).read_text()) / 1000)
+        except (OSError, ValueError):
+            continue
+    if not values:
+        try:
+            with open("/proc/cpuinfo") as f:
+                values = [float(line.split(":")[1]) for line in f if line.startswith("cpu MHz")]
+        except OSError:
+            pass
+    return float(np.mean(values)) if values else None
+
+
+def cpu_temperature_c():
+    """Temperature of the hottest thermal zone in degrees C, or ``None``."""
+    values = []
+    for path in glob.glob("/sys/class/thermal/thermal_zone*/temp"):
+        try:
+            values.append(int(Path(path).read_text()) / 1000)
+        except (OSError, ValueError):
+            continue
+    return max(values) if values else None
+
+
+def throttle_events():
+    """Kernel thermal throttle events summed over cores and packages, or ``None``."""
+    paths = glob.glob("/sys/devices/system/cpu/cpu[0-9]*/thermal_throttle/*_throttle_count")
+    total = None
+    for path in paths:
+        try:
+            total = (total or 0) + int(Path(path).read_text())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+class Reservoir(list):
+    """A list that keeps a uniform random sample of at most ``size`` appended items."""
+
+    def __init__(self, size=RESERVOIR_SIZE, seed=0):
+        super().__init__()
+        self.size = size
+        self.seen = 0
+        self._rng = random.Random(seed)
+
+    def append(self, item):
+        self.seen += 1
+        if len(self) < self.size:
+            super().append(item)
+            return
+        i = self._rng.randrange(self.seen)
+        if i < self.size:
+            self[i] = item
+
+
+class GCMonitor:
+    """Counts collections per generation and their pause time via ``gc.callbacks``."""
+
+    def __init__(self):
+        self._started = None
+        self.take()
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            pause = (time.perf_counter() - self._started) * 1000
+            self._collections[info["generation"]] += 1
+            self._pause_ms += pause
+            self._max_pause_ms = max(self._max_pause_ms, pause)
+            self._started = None
+
+    def start(self):
+        gc.callbacks.append(self._callback)
+        return self
+
+    def stop(self):
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+
+    def take(self):
+        """Counters since the last call, then reset them."""
+        counters = {}
+        if hasattr(self, "_collections"):
+            counters = {
+                "gc_collections": list(self._collections),
+                "gc_pause_ms": self._pause_ms,
+                "gc_max_pause_ms": self._max_pause_ms,
+            }
+        self._collections = [0, 0, 0]
+        self._pause_ms = 0.0
+        self._max_pause_ms = 0.0
+        return counters
+
+
+class SoakMonitor:
+    """Aggregates per-call latencies into fixed windows appended to a JSONL log.
+
+    Call :meth:`add` after every call; it returns ``True`` when that call closed a
+    window. :meth:`close` writes the final, partial window and stops GC tracking.
+    ``windows`` keeps each window's metrics (one small dict per window) for
+    :func:`analyze_drift`.
+    """
+
+    def __init__(self, path, window_s=DEFAULT_WINDOW_S, **labels):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.window_s = window_s
+        self.labels = labels
+        self.windows = []
+        self._file = open(self.path, "a", buffering=1)
+        self._gc = GCMonitor().start()
+        self._throttle = throttle_events()
+        self._t0 = self._window_start = time.monotonic()
+        self._latencies = []
+        self._items = 0
+
+    def add(self, latency_ms, items=1):
+        self._latencies.append(latency_ms)
+        self._items += items
+        if time.monotonic() - self._window_start >= self.window_s:
+            self._flush()
+            return True
+        return False
+
+    def _flush(self, partial=False):
+        now = time.monotonic()
+        duration = now - self._window_start
+        lat = np.asarray(self._latencies, dtype=np.float64)
+        throttle = throttle_events()
+        window = {
+            "window": len(self.windows),
+            "t_start_s": self._window_start - self._t0,
+            "duration_s": duration,
+            "partial": partial,
+            "calls": len(lat),
+            "items": self._items,
+            "throughput": self._items / duration if duration > 0 else 0.0,
+            "mean": float(lat.mean()) if len(lat) else None,
+            "p50": float(np.percentile(lat, 50)) if len(lat) else None,
+            "p99": float(np.percentile(lat, 99)) if len(lat) else None,
+            "max": float(lat.max()) if len(lat) else None,
+            "rss_mb": rss_bytes() / MB,
+            "cpu_mhz": cpu_frequency_mhz(),
+            "temp_c": cpu_temperature_c(),
+            "throttle_events": (
+                throttle - self._throttle if None not in (throttle, self._throttle) else None
+            ),
+            **self._gc.take(),
+        }
+        self._throttle = throttle
+        self._file.write(json.dumps({**self.labels, **window}) + "\n")
+        self.windows.append(window)
+        self._window_start = now
+        self._latencies = []
+        self._items = 0
+
+    def close(self):
+        """Write the last window if it has calls; returns the drift analysis."""
+        if self._latencies:
+            self._flush(partial=True)
+        self._gc.stop()
+        self._file.close()
+        return analyze_drift(self.windows)
+
+
+def _median(windows, key):
+    values = [w[key] for w in windows if w.get(key) is not None]
+    return float(np.median(values)) if values else None
+
+
+def _change(start, end):
+    return end / start - 1 if start and end is not None else None
+
+
+def analyze_drift(windows, tolerance=DRIFT_TOLERANCE):
+    """Start vs end of a soak run and the drift flags raised.
+
+    Partial windows are ignored; the first and last quarter of the remaining
+    windows (at least one each) are compared by their medians. Returns ``None``
+    with fewer than two full windows.
+    """
+    full = [w for w in windows if not w.get("partial")]
+    if len(full) < 2:
+        return None
+    quarter = max(1, len(full) // 4)
+    head, tail = full[:quarter], full[-quarter:]
+    keys = ("throughput", "p99", "rss_mb", "cpu_mhz", "gc_pause_ms")
+    start = {k: _median(head, k) for k in keys}
+    end = {k: _median(tail, k) for k in keys}
+
+    hours = np.array([w["t_start_s"] + w["duration_s"] / 2 for w in full]) / 3600
+    throughput = np.array([w["throughput"] for w in full])
+    slope = float(np.polyfit(hours, throughput, 1)[0]) if np.ptp(hours) > 0 else 0.0
+    throttled = sum(w.get("throttle_events") or 0 for w in full)
+
+    drift = {
+        "windows": len(full),
+        "start": start,
+        "end": end,
+        "throughput_change": _change(start["throughput"], end["throughput"]),
+        "p99_change": _change(start["p99"], end["p99"]),
+        "rss_growth_mb": end["rss_mb"] - start["rss_mb"],
+        "cpu_mhz_change": _change(start["cpu_mhz"], end["cpu_mhz"]),
+        "throughput_slope_per_hour": slope / start["throughput"] if start["throughput"] else None,
+        "throttle_events": throttled,
+    }
+    flags = []
+    if (drift["throughput_change"] or 0) < -tolerance:
+        flags.append("throughput_drop")
+    if (drift["p99_change"] or 0) > P99_TOLERANCE:
+        flags.append("p99_rise")
+    if drift["rss_growth_mb"] > RSS_GROWTH_TOLERANCE * start["rss_mb"]:
+        flags.append("rss_growth")
+    if (drift["cpu_mhz_change"] or 0) < -tolerance:
+        flags.append("cpu_frequency_drop")
+    if throttled:
+        flags.append("thermal_throttling")
+    drift["flags"] = flags
+    drift["degraded"] = bool({"throughput_drop", "p99_rise"} & set(flags))
+    return drift
+
+
+def format_drift(drift):
+    """Printable summary of :func:`analyze_drift` output."""
+    if drift is None:
+        return "Drift: fewer than two full windows, nothing to compare"
+
+    def pct(value):
+        return "n/a" if value is None else f"{value:+.1%}"
+
+    line = (
+        f"Drift over {drift['windows']} windows: throughput {pct(drift['throughput_change'])} | "
+        f"p99 {pct(drift['p99_change'])} | RSS {drift['rss_growth_mb']:+.1f} MB | "
+        f"CPU MHz {pct(drift['cpu_mhz_change'])} | throttle events {drift['throttle_events']}"
+    )
+    verdict = "DEGRADED" if drift["degraded"] else "steady"
+    flags = ", ".join(drift["flags"]) or "none"
+    return f"{line}\n{verdict} (flags: {flags})"
+
+
+def _drift(key):
+    def get(record):
+        drift = record["metrics"]["soak"]["drift"]
+        return drift[key] if drift else None
+
+    return get
+
+
+# render_table columns for records with a ``metrics["soak"]`` entry
+DRIFT_COLUMNS = [
+    ("Duration (min)", lambda r: r["metrics"]["soak"]["duration_s"] / 60, ".1f"),
+    ("Windows", lambda r: r["metrics"]["soak"]["windows"], "d"),
+    ("Throughput Change", _drift("throughput_change"), "+.1%"),
+    ("p99 Change", _drift("p99_change"), "+.1%"),
+    ("RSS Growth (MB)", _drift("rss_growth_mb"), "+.1f"),
+    ("CPU MHz Change", _drift("cpu_mhz_change"), "+.1%"),
+    ("Throttle Events", _drift("throttle_events"), "d"),
+    ("Flags", lambda r: ", ".join(_drift("flags")(r) or []) or "-", ""),
+]
@@ -0,0 +1,222 @@
+"""Latency distribution statistics shared by all benchmark scripts.
+
+All inputs are per-iteration latencies in milliseconds. Means hide the tail, so
+every benchmark reports percentiles (p50/p90/p99/p99.9), jitter and a bootstrap
+confidence interval, and warms up until latency stabilizes rather than for a
+fixed number of iterations.
+"""
+
+import time
+
+import numpy as np
+
+PERCENTILES = {"p50": 50.0, "p90": 90.0, "p99": 99.0, "p999": 99.9}
+
+
+def bootstrap_ci(samples, statistic=np.mean, confidence=0.95, n_resamples=1000, seed=0):
+    """Percentile bootstrap confidence interval for ``statistic`` of ``samples``.
+
+    ``statistic`` must accept an ``axis`` keyword (``np.mean``, ``np.median``, ...).
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.size < 2:
+        value = float(statistic(samples)) if samples.size else float("nan")
+        return value, value
+
+    rng = np.random.default_rng(seed)
+    estimates = np.empty(n_resamples)
+    # Resample in chunks so long soak runs don't allocate n_resamples x n at once
+    chunk = max(1, min(n_resamples, 2_000_000 // samples.size))
+    for start in range(0, n_resamples, chunk):
+        stop = min(start + chunk, n_resamples)
+        idx = rng.integers(0, samples.size, size=(stop - start, samples.size))
+        estimates[start:stop] = statistic(samples[idx], axis=1)
+
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(estimates, [alpha, 1.0 - alpha])
+    return float(low), float(high)
+
+
+def find_outliers(samples, threshold=3.5):
+    """Boolean mask of outliers using the modified z-score (median absolute deviation).
+
+    Robust to the heavy right tail typical of latency data, unlike mean/std rules.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.size == 0:
+        return np.zeros(0, dtype=bool)
+    median = np.median(samples)
+    mad = np.median(np.abs(samples - median))
+    if mad == 0:
+        return samples != median
+    return np.abs(0.6745 * (samples - median) / mad) > threshold
+
+
+def jitter(samples):
+    """Mean absolute difference between consecutive latencies (RFC 3550 style)."""
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.size < 2:
+        return 0.0
+    return float(np.mean(np.abs(np.diff(samples))))
+
+
+def summarize(samples):
+    """Summary statistics for a list of latencies in ms.
+
+    Returns a dict with count, mean, std, min, max, p50/p90/p99/p999, jitter,
+    a 95% bootstrap CI of the mean (``ci_low``/``ci_high``) and the outlier count.
+
+    A ``utils.soak.Reservoir`` that has overflowed holds a random sample of the
+    calls in no particular order: ``count`` is then the number of calls seen,
+    ``sampled`` the sample size the statistics come from, and ``jitter`` is None.
+    """
+    seen = getattr(samples, "seen", None)
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.size == 0:
+        raise ValueError("Cannot summarize an empty latency list")
+    sampled = seen is not None and seen > samples.size
+
+    stats = {
+        "count": int(seen) if sampled else int(samples.size),
+        "mean": float(np.mean(samples)),
+        "std": float(np.std(samples, ddof=1)) if samples.size > 1 else 0.0,
+        "min": float(np.min(samples)),
+        "max": float(np.max(samples)),
+    }
+    values = np.percentile(samples, list(PERCENTILES.values()))
+    stats.update({name: float(v) for name, v in zip(PERCENTILES, values, strict=True)})
+    stats["jitter"] = None if sampled else jitter(samples)
+    if sampled:
+        stats["sampled"] = int(samples.size)
+    stats["ci_low"], stats["ci_high"] = bootstrap_ci(samples)
+    stats["outliers"] = int(find_outliers(samples).sum())
+    return stats
+
+
+def stage_breakdown(stages):
+    """Per-stage mean/p50/p99 and share of the summed stage time.
+
+    ``stages`` maps a stage name to its per-iteration latencies in ms, e.g. the
+    ``preprocess``/``inference``/``postprocess``/``overhead`` split of every call.
+    """
+    means = {name: float(np.mean(v)) for name, v in stages.items() if len(v)}
+    total = sum(means.values())
+    out = {}
+    for name, mean in means.items():
+        p50, p99 = np.percentile(np.asarray(stages[name], dtype=np.float64), [50.0, 99.0])
+        out[name] = {
+            "mean": mean,
+            "p50": float(p50),
+            "p99": float(p99),
+            "share": mean / total if total > 0 else 0.0,
+        }
+    return out
+
+
+def is_stable(samples, window=10, tolerance=0.05):
+    """True when the medians of the last two ``window``-sized blocks differ by < ``tolerance``."""
+    if len(samples) < 2 * window:
+        return False
+    recent = np.median(samples[-window:])
+    previous = np.median(samples[-2 * window : -window])
+    return abs(recent - previous) <= tolerance * previous
+
+
+def find_steady_state(samples, window=10, tolerance=0.05):
+    """Index of the first sample after which latency is stable, or ``None``.
+
+    Useful for trimming the warmup phase out of an already-recorded run.
+    """
+    for end in range(2 * window, len(samples) + 1):
+        if is_stable(samples[:end], window, tolerance):
+            return end
+    return None
+
+
+def warmup_until_stable(step, window=10, tolerance=0.05, min_iters=None, max_iters=200):
+    """Call ``step()`` until its latency stabilizes (see :func:`is_stable`).
+
+    Returns the list of warmup latencies in ms. Always runs at least ``min_iters``
+    (default ``2 * window``) and at most ``max_iters`` iterations. A ``step`` that
+    returns ``False`` (e.g. a video source ran out of frames) ends warmup early.
+    """
+    min_iters = 2 * window if min_iters is None else min_iters
+    latencies = []
+    while len(latencies) < max_iters:
+        t0 = time.perf_counter()
+        if step() is False:
+            break
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if len(latencies) >= min_iters and is_stable(latencies, window, tolerance):
+            break
+    return latencies
+
+
+def warmup_iterations(step, iterations=None, **kwargs):
+    """Run a fixed number of warmup ``iterations``, or warm up until stable when ``None``.
+
+    As in :func:`warmup_until_stable`, a ``step`` returning ``False`` stops early.
+    """
+    if iterations is None:
+        return warmup_until_stable(step, **kwargs)
+    latencies = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        if step() is False:
+            break
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def format_histogram(samples, ticks_per_half=1, width=40):
+    """HdrHistogram-style percentile distribution as printable text.
+
+    Rows are emitted at percentiles 0, 50, 75, 87.5, ... (halving the remaining
+    distance to 100 each step), which keeps resolution where the tail lives.
+    """
+    samples = np.sort(np.asarray(samples, dtype=np.float64))
+    if samples.size == 0:
+        return ""
+
+    percentiles = [0.0]
+    remaining = 50.0
+    while True:
+        step = remaining / ticks_per_half
+        for _ in range(ticks_per_half):
+            percentiles.append(percentiles[-1] + step)
+        remaining /= 2
+        # Stop once the next tick would land on the last sample
+        if (100.0 - percentiles[-1]) * samples.size / 100.0 < 1:
+            break
+    percentiles.append(100.0)
+
+    max_value = samples[-1]
+    lines = [f"{'Value (ms)':>12} {'Percentile':>11} {'TotalCount':>10} {'1/(1-P)':>9}"]
+    for p in percentiles:
+        value = float(np.percentile(samples, p))
+        count = int(np.searchsorted(samples, value, side="right"))
+        inverse = "inf" if p >= 100.0 else f"{100.0 / (100.0 - p):.2f}"
+        bar = "#" * int(round(width * value / max_value)) if max_value > 0 else ""
+        lines.append(f"{value:12.3f} {p / 100.0:11.6f} {count:10d} {inverse:>9} {bar}")
+    return "\n".join(lines)
+
+
+def format_summary(stats):
+    """One-line human-readable rendering of :func:`summarize` output."""
+    jitter_text = "n/a" if stats["jitter"] is None else f"{stats['jitter']:.2f}"
+    line = (
+        f"mean {stats['mean']:.2f}ms (95% CI {stats['ci_low']:.2f}-{stats['ci_high']:.2f}) "
+        f"| p50 {stats['p50']:.2f} | p90 {stats['p90']:.2f} | p99 {stats['p99']:.2f} "
+        f"| p99.9 {stats['p999']:.2f} | std {stats['std']:.2f} | jitter {jitter_text} "
+        f"| outliers {stats['outliers']}/{stats.get('sampled', stats['count'])}"
+    )
+    if "sampled" in stats:
+        line += f" | sampled {stats['sampled']} of {stats['count']} calls"
+    return line
+
+
+def format_stages(breakdown):
+    """One-line rendering of :func:`stage_breakdown` output."""
+    return " | ".join(
+        f"{name} {s['mean']:.2f}ms ({s['share']:.0%})" for name, s in breakdown.items()
+    )
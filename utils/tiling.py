@@ -0,0 +1,129 @@
+"""Tiled inference for high-resolution frames: slice, batch, merge.
+
+A detector that sees a 4K frame letterboxed to 640 px shrinks it six-fold, and
+objects a few dozen pixels wide disappear. Tiling runs the model on overlapping
+crops at (close to) native resolution instead:
+
+1. :func:`tile_windows` covers the frame with ``tile``-sized windows whose
+   neighbours overlap by at least ``overlap`` of a tile. Windows are spread
+   evenly, so the last one ends on the frame edge instead of hanging over it
+2. :func:`slice_tiles` returns the windows as NumPy views of the frame; the only
+   copy of the pixels is the one into the model's input tensor
+3. every tile of every frame (plus, with ``full_frame``, each whole frame
+   letterboxed as usual, for objects larger than a tile) goes through the
+   backend as one batch
+4. :func:`merge_detections` shifts tile detections back into frame coordinates
+   and removes duplicates from overlapping tiles with class-wise NMS across tiles
+   (``utils.postprocess.batched_nms``)
+
+An object cut by a tile border can leave a partial box next to the full one
+from the neighbouring tile. The merge IoU (default 0.5) is lower than the
+model's NMS IoU so that most of these are merged, and ``overlap`` should exceed
+the size of the objects tiling is meant to find.
+"""
+
+import time
+
+import numpy as np
+
+from utils.backends import imgsz_hw
+from utils.postprocess import batched_nms
+
+# IoU above which detections from different tiles are merged
+MERGE_IOU = 0.5
+
+
+def tile_starts(length, tile, overlap):
+    """Start offsets of windows of size ``tile`` covering ``[0, length)``."""
+    if length <= tile:
+        return np.zeros(1, dtype=np.intp)
+    stride = max(1, int(tile * (1 - overlap)))
+    count = -(-(length - tile) // stride) + 1
+    return np.round(np.linspace(0, length - tile, count)).astype(np.intp)
+
+
+def tile_windows(shape, tile, overlap=0.2):
+    """``(K, 4)`` ``[x1, y1, x2, y2]`` windows covering a frame of ``shape`` (h, w, ...).
+
+    ``tile`` is an int (square) or ``(height, width)``; ``overlap`` is the minimum
+    share of a tile neighbouring windows have in common. Frames smaller than a
+    tile along a side get one window spanning that side.
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+    height, width = shape[:2]
+    tile_h, tile_w = imgsz_hw(tile)
+    ys = tile_starts(height, tile_h, overlap)
+    xs = tile_starts(width, tile_w, overlap)
+    y1, x1 = (a.ravel() for a in np.meshgrid(ys, xs, indexing="ij"))
+    return np.stack([x1, y1, np.minimum(x1 + tile_w, width), np.minimum(y1 + tile_h, height)], 1)
+
+
+def slice_tiles(frame, windows):
+    """Views of ``frame`` for each window (no pixels are copied)."""
+    return [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+
+
+def merge_detections(per_tile, offsets, iou=MERGE_IOU):
+    """One frame's detections from its tiles: shift to frame coordinates, then cross-tile NMS.
+
+    ``per_tile`` holds ``(N, 6)`` ``[x1, y1, x2, y2, conf, cls]`` arrays in tile
+    coordinates and ``offsets`` the ``(x, y)`` origin of each tile (``(0, 0)`` for
+    a full-frame pass). Returns the kept rows by descending confidence.
+    """
+    dets = [d + np.array([x, y, x, y, 0, 0], np.float32) for d, (x, y) in zip(per_tile, offsets)]
+    dets = np.concatenate(dets) if dets else np.zeros((0, 6), np.float32)
+    if not len(dets):
+        return dets
+    keep = batched_nms(dets[:, :4], dets[:, 4], dets[:, 5].astype(np.intp), iou)
+    return dets[keep[np.argsort(-dets[keep, 4], kind="stable")]]
+
+
+class TiledDetector:
+    """Runs a backend on the tiles of every frame in one batch and merges the results.
+
+    ``runtime`` is a loaded :mod:`utils.backends` backend whose input size is the
+    tile size (tiles are then fed at native resolution). ``infer`` takes and
+    returns the same as the backend's, so the two are interchangeable in a
+    benchmark; ``stage_ms`` splits each call into slicing, inference and merging,
+    and ``tiles`` is the batch size of the last call.
+    """
+
+    def __init__(self, runtime, tile=640, overlap=0.2, full_frame=False, iou=MERGE_IOU):
+        self.runtime = runtime
+        self.tile = tile
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self.iou = iou
+        self.stage_ms = None
+        self.tiles = 0
+
+    def infer(self, frames):
+        t0 = time.perf_counter()
+        batch, owners, offsets = [], [], []
+        for i, frame in enumerate(frames):
+            windows = tile_windows(frame.shape, self.tile, self.overlap)
+            batch += slice_tiles(frame, windows)
+            owners += [i] * len(windows)
+            offsets += windows[:, :2].tolist()
+            if self.full_frame and len(windows) > 1:
+                batch.append(frame)
+                owners.append(i)
+                offsets.append((0, 0))
+        t1 = time.perf_counter()
+        dets = self.runtime.infer(batch)
+        t2 = time.perf_counter()
+        out = []
+        for i in range(len(frames)):
+            mine = [k for k, owner in enumerate(owners) if owner == i]
+            out.append(
+                merge_detections([dets[k] for k in mine], [offsets[k] for k in mine], self.iou)
+            )
+        t3 = time.perf_counter()
+        self.tiles = len(batch)
+        self.stage_ms = {
+            "slice": (t1 - t0) * 1000,
+            "inference": (t2 - t1) * 1000,
+            "merge": (t3 - t2) * 1000,
+        }
+        return out
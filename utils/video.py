@@ -0,0 +1,329 @@
+"""Hardware-free video stream sources with background decode into a ring buffer.
+
+Sources (all expose a cv2-style ``read()``):
+
+- video files, stream URLs and camera indices (``cv2.VideoCapture``)
+- a directory of clips, played back to back (:class:`ClipSequence`)
+- ``synthetic[:WxH]``: generated dense scenes, no files or camera needed
+  (:class:`SyntheticCapture`)
+
+Files and clip directories can loop (:class:`LoopingCapture`), so a soak run
+(see ``utils/soak.py``) can stream for hours from a short clip.
+
+:class:`RingDecoder` decodes on a background thread into a ring of preallocated
+frames, so decode overlaps inference and no frame is allocated per read. With a
+``target_fps`` it replays the source as a live stream: frame ``n`` arrives at
+``n / target_fps`` seconds and is dropped if the ring has no free slot at that
+moment, which is how a real-time consumer that falls behind loses frames.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.corpus import RESOLUTIONS, SCENE_DENSITIES, synthetic_scene
+from utils.pipeline import open_source
+from utils.soak import Reservoir
+
+VIDEO_SUFFIXES = {".mp4", ".avi", ".mkv", ".mov", ".webm", ".m4v", ".ts"}
+
+
+class SyntheticCapture:
+    """Endless stream of synthetic scenes at a fixed resolution.
+
+    ``unique`` frames are generated up front and cycled, so ``read()`` costs one
+    copy, roughly what a hardware decoder handing over a frame costs.
+    """
+
+    def __init__(self, width=1920, height=1080, fps=30.0, unique=8, seed=0):
+        rng = np.random.default_rng(seed)
+        self.fps = fps
+        self._frames = [
+            synthetic_scene(width, height, SCENE_DENSITIES[i % len(SCENE_DENSITIES)], rng)
+            for i in range(unique)
+        ]
+        self._index = 0
+
+    def read(self, image=None):
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            return True, image
+        return True, frame.copy()
+
+    def grab(self):
+        self._index += 1
+        return True
+
+    def get(self, prop):
+        height, width = self._frames[0].shape[:2]
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: width,
+            cv2.CAP_PROP_FRAME_HEIGHT: height,
+            cv2.CAP_PROP_FPS: self.fps,
+        }.get(prop, 0.0)
+
+    def isOpened(self):  # noqa: N802 - cv2.VideoCapture API
+        return True
+
+    def release(self):
+        self._frames = []
+
+
+class ClipSequence:
+    """Play every video file in a directory back to back, in name order."""
+
+    def __init__(self, directory):
+        self.paths = sorted(
+            p for p in Path(directory).iterdir() if p.suffix.lower() in VIDEO_SUFFIXES
+        )
+        if not self.paths:
+            raise OSError(f"No video files in {directory}")
+        self._next = 0
+        self._cap = None
+        self._open_next()
+
+    def _open_next(self):
+        if self._cap is not None:
+            self._cap.release()
+        self._cap = None
+        while self._next < len(self.paths):
+            cap = cv2.VideoCapture(str(self.paths[self._next]))
+            self._next += 1
+            if cap.isOpened():
+                self._cap = cap
+                return True
+        return False
+
+    def read(self, image=None):
+        while self._cap is not None:
+            ok, frame = self._cap.read(image) if image is not None else self._cap.read()
+            if ok:
+                return ok, frame
+            self._open_next()
+        return False, None
+
+    def grab(self):
+        while self._cap is not None:
+            if self._cap.grab():
+                return True
+            self._open_next()
+        return False
+
+    def get(self, prop):
+        return self._cap.get(prop) if self._cap is not None else 0.0
+
+    def isOpened(self):  # noqa: N802 - cv2.VideoCapture API
+        return self._cap is not None
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+class LoopingCapture:
+    """Restart a finite source from the beginning whenever it runs out.
+
+    ``open_fn`` opens the source; it is called again at every end of stream.
+    ``loops`` counts completed passes.
+    """
+
+    def __init__(self, open_fn):
+        self._open = open_fn
+        self._cap = open_fn()
+        self.loops = 0
+
+    def _restart(self):
+        self._cap.release()
+        self._cap = self._open()
+        self.loops += 1
+
+    def read(self, image=None):
+        for _ in range(2):
+            ok, frame = self._cap.read(image) if image is not None else self._cap.read()
+            if ok:
+                return ok, frame
+            self._restart()
+        return False, None  # empty source: stop instead of reopening forever
+
+    def grab(self):
+        if self._cap.grab():
+            return True
+        self._restart()
+        return self._cap.grab()
+
+    def get(self, prop):
+        return self._cap.get(prop)
+
+    def isOpened(self):  # noqa: N802 - cv2.VideoCapture API
+        return self._cap.isOpened()
+
+    def release(self):
+        self._cap.release()
+
+
+def open_stream(source, fps=30.0, loop=False):
+    """Open a file, clip directory, ``synthetic[:WxH]`` stream, URL or camera index.
+
+    ``loop`` replays files and clip directories endlessly; synthetic streams are
+    endless already, and cameras and URLs are live.
+    """
+    source = str(source)
+    if source.startswith("synthetic"):
+        _, _, size = source.partition(":")
+        width, height = RESOLUTIONS["1080p"]
+        if size:
+            size = size.lower()
+            width, height = RESOLUTIONS[size] if size in RESOLUTIONS else map(int, size.split("x"))
+        return SyntheticCapture(width, height, fps=fps)
+    if Path(source).is_dir():
+        if loop:
+            return LoopingCapture(lambda: ClipSequence(source))
+        return ClipSequence(source)
+    if loop and Path(source).is_file():
+        return LoopingCapture(lambda: open_source(source))
+    return open_source(source)
+
+
+class RingDecoder:
+    """Decode ``cap`` on a background thread into a ring of preallocated frames.
+
+    ``read()`` hands out views into the ring; a slot is only overwritten once
+    ``reserve`` further frames have been read, so consumers that hold on to at most
+    ``reserve`` frames (e.g. a :class:`~utils.pipeline.Pipeline` up to its
+    preprocess stage) never see a frame change under them.
+
+    Args:
+        cap: Object with a cv2-style ``read()``.
+        num_slots: Ring size; must exceed ``reserve``.
+        reserve: Frames the consumer may still be using after reading them.
+        target_fps: Replay as a live stream at this rate and drop frames that find
+            the ring full. ``None`` decodes as fast as the consumer allows (offline).
+        max_frames: Stop after this many source frames (delivered or dropped).
+        duration: Stop decoding this many seconds after :meth:`start`.
+        sample_size: Keep a uniform sample of at most this many ``decode_ms``
+            entries instead of one per frame (long runs).
+    """
+
+    def __init__(
+        self,
+        cap,
+        num_slots=16,
+        reserve=8,
+        target_fps=None,
+        max_frames=None,
+        duration=None,
+        sample_size=None,
+    ):
+        if num_slots <= reserve:
+            raise ValueError(f"num_slots ({num_slots}) must exceed reserve ({reserve})")
+        self.cap = cap
+        self.num_slots = num_slots
+        self.reserve = reserve
+        self.target_fps = target_fps
+        self.max_frames = max_frames
+        self.duration = duration
+        self.dropped = 0
+        self.decode_ms = Reservoir(sample_size) if sample_size else []
+        self.last_timestamp = None  # arrival time of the frame returned by read()
+        self._slots = [None] * num_slots
+        self._stamps = [0.0] * num_slots
+        self._written = 0  # frames decoded into the ring
+        self._read = 0  # frames handed to the consumer
+        self._eof = False
+        self._error = None
+        self._stop = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._decode, name="decode", daemon=True)
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _has_free_slot(self):
+        # Slot for frame n is free once frame n - num_slots + reserve has been read
+        return self._written < self._read - self.reserve + self.num_slots
+
+    def _decode(self):
+        source_index = 0
+        try:
+            while not self._stop and (self.max_frames is None or source_index < self.max_frames):
+                if self.duration is not None and time.perf_counter() - self._t0 >= self.duration:
+                    break
+                if self.target_fps:
+                    arrival = self._t0 + source_index / self.target_fps
+                    delay = arrival - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    with self._cond:
+                        free = self._has_free_slot()
+                    if not free:
+                        # Live source: the frame is gone if nobody has room for it
+                        if not self.cap.grab():
+                            break
+                        self.dropped += 1
+                        source_index += 1
+                        continue
+                else:
+                    with self._cond:
+                        while not self._has_free_slot() and not self._stop:
+                            self._cond.wait()
+                    arrival = None
+
+                slot = self._written % self.num_slots
+                t0 = time.perf_counter()
+                buffer = self._slots[slot]
+                ok, frame = self.cap.read(buffer) if buffer is not None else self.cap.read()
+                t1 = time.perf_counter()
+                if not ok:
+                    break
+                if frame is not buffer:
+                    # First frame or a resolution change: (re)allocate this slot
+                    self._slots[slot] = np.ascontiguousarray(frame)
+                self.decode_ms.append((t1 - t0) * 1000)
+                source_index += 1
+                with self._cond:
+                    self._stamps[slot] = arrival if arrival is not None else t1
+                    self._written += 1
+                    self._cond.notify_all()
+        except Exception as e:  # surface in read() instead of hanging the consumer
+            self._error = e
+        finally:
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+
+    def read(self):
+        """Next decoded frame as ``(ok, frame_view)``; ``(False, None)`` at end of stream."""
+        with self._cond:
+            while self._read >= self._written and not self._eof:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+            if self._read >= self._written:
+                return False, None
+            slot = self._read % self.num_slots
+            self.last_timestamp = self._stamps[slot]
+            self._read += 1
+            self._cond.notify_all()
+            return True, self._slots[slot]
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def release(self):
+        self.stop()
+        self.cap.release()